@@ -0,0 +1,128 @@
+"""
+Benchmark approximate-mode aggregate queries: latency and bytes vs accuracy.
+
+Runs one GROUP BY aggregate against a large public table exactly, then through
+approximate_query (the DS agent's APPROXIMATE_EXPLORATION rewrite) at several
+TABLESAMPLE rates, and reports per sample rate:
+- wall-clock latency and bytes processed
+- median / max relative error of the scaled COUNT and SUM, and of AVG, across
+  groups compared with the exact result
+- how often the exact COUNT falls inside the reported 95% error bound
+
+Uses Application Default Credentials and disables the query cache. Run from
+repo root:
+
+    uv run python benchmarks/bench_approximate_queries.py [--rates 10 1 0.1]
+
+Query costs are billed to GOOGLE_CLOUD_PROJECT (the exact run scans a few GB).
+"""
+
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env", override=True)
+# App modules are imported without running the package __init__ files, which
+# build the whole agent tree (Code Interpreter, toolsets) and need the app's
+# full configuration.
+_APP = Path(__file__).parent.parent / "bq_multi_agent_app"
+for _init in _APP.rglob("__init__.py"):
+    _name = ".".join(_init.parent.relative_to(_APP.parent).parts)
+    sys.modules[_name] = ModuleType(_name)
+    sys.modules[_name].__path__ = [str(_init.parent)]
+
+import google.auth
+from google.cloud import bigquery
+
+from bq_multi_agent_app.sql_rewrite import (
+    SAMPLED_ROWS_COLUMN,
+    approximate_query,
+)
+
+_TABLE = "bigquery-public-data.samples.natality"
+
+_QUERY = f"""
+SELECT state, COUNT(*) AS births, SUM(plurality) AS babies,
+  AVG(weight_pounds) AS avg_weight
+FROM `{_TABLE}`
+WHERE state IS NOT NULL
+GROUP BY state
+"""
+
+
+def _run(client: bigquery.Client, sql: str) -> tuple[dict, float, int]:
+    config = bigquery.QueryJobConfig(use_query_cache=False)
+    started = time.perf_counter()
+    job = client.query(sql, job_config=config)
+    rows = {row["state"]: dict(row) for row in job.result()}
+    return rows, time.perf_counter() - started, job.total_bytes_processed or 0
+
+
+def _errors(exact: dict, approx: dict, column: str) -> list[float]:
+    return [
+        abs(approx[key][column] - row[column]) / abs(row[column])
+        for key, row in exact.items()
+        if key in approx and row[column]
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rates", type=float, nargs="+", default=[10.0, 1.0, 0.1])
+    args = parser.parse_args()
+
+    credentials, default_project = google.auth.default()
+    project_id = os.getenv("GOOGLE_CLOUD_PROJECT", default_project)
+    client = bigquery.Client(project=project_id, credentials=credentials)
+    table = client.get_table(_TABLE)
+    schemas = {
+        _TABLE: {
+            "columns": {f.name: f.field_type for f in table.schema},
+            "num_bytes": table.num_bytes,
+            "table_type": table.table_type,
+        }
+    }
+
+    print(f"Project: {project_id}")
+    print(
+        f"Table: {_TABLE} ({table.num_rows:,} rows, {table.num_bytes / 1e9:.1f} GB)\n"
+    )
+    exact, exact_seconds, exact_bytes = _run(client, _QUERY)
+
+    print("=== Latency / bytes vs accuracy ===")
+    print(
+        f"  {'sample':>8} {'seconds':>8} {'GB':>7}  "
+        f"{'COUNT err (med/max)':>20} {'SUM err':>9} {'AVG err':>9} {'in 95%':>7}"
+    )
+    print(f"  {'exact':>8} {exact_seconds:>8.2f} {exact_bytes / 1e9:>7.2f}")
+    for rate in args.rates:
+        report = approximate_query(_QUERY, schemas, sample_percent=rate)
+        approx, seconds, num_bytes = _run(client, report["query"])
+        count_errors = _errors(exact, approx, "births")
+        covered = [
+            abs(approx[key]["births"] - row["births"]) / row["births"]
+            <= 1.96 / math.sqrt(approx[key][SAMPLED_ROWS_COLUMN])
+            for key, row in exact.items()
+            if key in approx
+        ]
+        print(
+            f"  {rate:>7g}% {seconds:>8.2f} {num_bytes / 1e9:>7.2f}  "
+            f"{statistics.median(count_errors):>9.2%} / {max(count_errors):>8.2%} "
+            f"{statistics.median(_errors(exact, approx, 'babies')):>9.2%} "
+            f"{statistics.median(_errors(exact, approx, 'avg_weight')):>9.2%} "
+            f"{sum(covered) / len(covered):>7.0%}"
+        )
+        missing = set(exact) - set(approx)
+        if missing:
+            print(f"           groups missing from the sample: {len(missing)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark batched multi-series forecasting: series/sec, one job vs per series.
+
+Forecasts daily sales per store from a public table two ways and reports
+series per second for each:
+- per series: one AI.FORECAST job per store (what a forecast tool call per
+  series costs), for the first --sample stores
+- batched: every store in one AI.FORECAST job with id_cols, using the same
+  summary query as forecast_series
+
+Uses Application Default Credentials and disables the query cache. Run from
+repo root:
+
+    uv run python benchmarks/bench_batch_forecast.py [--stores 300] [--sample 5]
+
+Query costs are billed to GOOGLE_CLOUD_PROJECT.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env", override=True)
+# App modules are imported without running the package __init__ files, which
+# build the whole agent tree (Code Interpreter, toolsets) and need the app's
+# full configuration.
+_APP = Path(__file__).parent.parent / "bq_multi_agent_app"
+for _init in _APP.rglob("__init__.py"):
+    _name = ".".join(_init.parent.relative_to(_APP.parent).parts)
+    sys.modules[_name] = ModuleType(_name)
+    sys.modules[_name].__path__ = [str(_init.parent)]
+
+import google.auth
+from google.cloud import bigquery
+
+from bq_multi_agent_app.batch_forecast import (
+    build_forecast_sql,
+    build_summary_sql,
+)
+
+_HISTORY = """
+SELECT date, CAST(store_number AS STRING) AS store, SUM(sale_dollars) AS sales
+FROM `bigquery-public-data.iowa_liquor_sales.sales`
+WHERE date >= '2023-01-01'
+  AND store_number IN (
+    SELECT store_number FROM `bigquery-public-data.iowa_liquor_sales.sales`
+    WHERE date >= '2023-01-01'
+    GROUP BY store_number ORDER BY COUNT(*) DESC LIMIT {stores})
+GROUP BY date, store
+"""
+
+_HORIZON = 30
+
+
+def _run(client: bigquery.Client, sql: str) -> tuple[int, float]:
+    config = bigquery.QueryJobConfig(use_query_cache=False)
+    started = time.perf_counter()
+    rows = list(client.query(sql, job_config=config).result())
+    return len(rows), time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stores", type=int, default=300)
+    parser.add_argument("--sample", type=int, default=5)
+    args = parser.parse_args()
+
+    credentials, default_project = google.auth.default()
+    project_id = os.getenv("GOOGLE_CLOUD_PROJECT", default_project)
+    client = bigquery.Client(project=project_id, credentials=credentials)
+    history = _HISTORY.format(stores=args.stores)
+    print(f"Project: {project_id}")
+    print(f"Series: {args.stores} stores, horizon {_HORIZON} days\n")
+
+    stores = [
+        row["store"]
+        for row in client.query(
+            f"SELECT DISTINCT store FROM ({history}) LIMIT {args.sample}"
+        ).result()
+    ]
+    per_series = 0.0
+    for store in stores:
+        single = f"SELECT date, sales FROM ({history}) WHERE store = '{store}'"
+        sql = (
+            f"SELECT * FROM AI.FORECAST(({single}), data_col => 'sales', "
+            f"timestamp_col => 'date', horizon => {_HORIZON})"
+        )
+        _, seconds = _run(client, sql)
+        per_series += seconds
+
+    forecast_sql = build_forecast_sql(
+        f"({history})", "date", "sales", ["store"], _HORIZON, 0.95
+    )
+    series, batched = _run(client, build_summary_sql(forecast_sql, ["store"]))
+
+    print("=== Throughput ===")
+    print(f"  {'mode':<12} {'series':>7} {'seconds':>9} {'series/sec':>11}")
+    print(
+        f"  {'per series':<12} {len(stores):>7} {per_series:>9.2f} "
+        f"{len(stores) / per_series:>11.2f}"
+    )
+    print(f"  {'batched':<12} {series:>7} {batched:>9.2f} {series / batched:>11.2f}")
+    estimate = per_series / len(stores) * series
+    print(
+        f"\n  {series} per-series jobs would take about {estimate:.0f}s "
+        f"({estimate / batched:.0f}x the batched job)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark event compaction: prompt tokens and latency per turn over a session.
+
+Plays the same scripted analyst session (--turns, default 50) through a small
+agent twice and reports prompt tokens and latency per turn:
+- without compaction: every tool result stays in the prompt
+- with compaction: the app's AnalystEventsSummarizer with --threshold tokens
+
+The agent's tools return canned payloads shaped like get_table_info and
+execute_sql results (a 40-column table, 100 rows per query), so no BigQuery
+access is needed. Uses the Vertex AI Gemini API with Application Default
+Credentials. Run from repo root:
+
+    uv run python benchmarks/bench_compaction.py [--turns 50] [--threshold 20000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env", override=True)
+# App modules are imported without running the package __init__ files, which
+# build the whole agent tree (Code Interpreter, toolsets) and need the app's
+# full configuration.
+_APP = Path(__file__).parent.parent / "bq_multi_agent_app"
+for _init in _APP.rglob("__init__.py"):
+    _name = ".".join(_init.parent.relative_to(_APP.parent).parts)
+    sys.modules[_name] = ModuleType(_name)
+    sys.modules[_name].__path__ = [str(_init.parent)]
+
+from google.adk.agents import Agent
+from google.adk.apps.app import App, EventsCompactionConfig
+from google.adk.models.google_llm import Gemini
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from bq_multi_agent_app.compaction import AnalystEventsSummarizer
+from bq_multi_agent_app.constants import MODEL_NAME
+
+_COLUMNS = [f"metric_{i}" for i in range(38)] + ["region", "order_date"]
+
+_QUESTIONS = [
+    "Describe the bench-project.sales.orders table.",
+    "What was total revenue by region last quarter?",
+    "Which region grew fastest month over month?",
+    "Show the top 10 customers by revenue in the fastest-growing region.",
+    "How does average order value compare across regions?",
+]
+
+
+def get_table_info(project_id: str, dataset_id: str, table_id: str) -> dict:
+    """Get metadata information about a BigQuery table."""
+    return {
+        "tableReference": {
+            "projectId": project_id,
+            "datasetId": dataset_id,
+            "tableId": table_id,
+        },
+        "schema": {
+            "fields": [
+                {"name": c, "type": "FLOAT", "mode": "NULLABLE"} for c in _COLUMNS
+            ]
+        },
+        "numRows": "125000000",
+        "timePartitioning": {"type": "DAY", "field": "order_date"},
+    }
+
+
+def execute_sql(project_id: str, query: str) -> dict:
+    """Run a BigQuery SQL query and return the result rows."""
+    rows = [
+        {"region": f"region_{i % 7}", **{c: round(i * 1.37, 2) for c in _COLUMNS[:12]}}
+        for i in range(100)
+    ]
+    return {"status": "SUCCESS", "rows": rows}
+
+
+def _app(compaction: EventsCompactionConfig | None) -> App:
+    agent = Agent(
+        model=MODEL_NAME,
+        name="bench_analyst",
+        instruction=(
+            "You answer questions about bench-project.sales.orders. Look up the "
+            "schema with get_table_info when needed and answer with execute_sql. "
+            "Keep answers to two sentences."
+        ),
+        tools=[get_table_info, execute_sql],
+    )
+    return App(
+        name="bench_compaction", root_agent=agent, events_compaction_config=compaction
+    )
+
+
+async def _session(app: App, turns: int) -> list[tuple[int, float]]:
+    """Run the scripted session; returns (prompt tokens, seconds) per turn."""
+    sessions = InMemorySessionService()
+    runner = Runner(app=app, session_service=sessions)
+    session = await sessions.create_session(app_name=app.name, user_id="bench")
+    results = []
+    for turn in range(turns):
+        message = types.Content(
+            role="user", parts=[types.Part(text=_QUESTIONS[turn % len(_QUESTIONS)])]
+        )
+        prompt_tokens = 0
+        started = time.perf_counter()
+        async for event in runner.run_async(
+            user_id="bench", session_id=session.id, new_message=message
+        ):
+            usage = event.usage_metadata
+            if usage and usage.prompt_token_count:
+                prompt_tokens = max(prompt_tokens, usage.prompt_token_count)
+        results.append((prompt_tokens, time.perf_counter() - started))
+        print(
+            f"  turn {turn + 1:>3}: {prompt_tokens:>7} prompt tokens, "
+            f"{results[-1][1]:.1f}s"
+        )
+    return results
+
+
+def _report(label: str, results: list[tuple[int, float]]) -> None:
+    tokens = [t for t, _ in results]
+    seconds = [s for _, s in results]
+    tail = results[-10:]
+    print(
+        f"  {label:<20} max {max(tokens):>7} tokens | last 10 turns: "
+        f"{statistics.mean(t for t, _ in tail):>8.0f} tokens/turn, "
+        f"{statistics.median(s for _, s in tail):>5.1f}s median | "
+        f"all turns {statistics.median(seconds):.1f}s median"
+    )
+
+
+async def _benchmark(turns: int, threshold: int, retained: int) -> None:
+    print("Without compaction:")
+    plain = await _session(_app(None), turns)
+    print(f"\nWith compaction (threshold {threshold} tokens, {retained} events kept):")
+    compacted = await _session(
+        _app(
+            EventsCompactionConfig(
+                summarizer=AnalystEventsSummarizer(Gemini(model=MODEL_NAME)),
+                token_threshold=threshold,
+                event_retention_size=retained,
+                compaction_interval=turns + 1,  # token threshold only
+                overlap_size=1,
+            )
+        ),
+        turns,
+    )
+
+    print("\n=== Prompt tokens and latency ===")
+    _report("no compaction", plain)
+    _report("compaction", compacted)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--threshold", type=int, default=20000)
+    parser.add_argument("--retained", type=int, default=12)
+    args = parser.parse_args()
+
+    print(f"Model: {MODEL_NAME}, {args.turns} turns\n")
+    asyncio.run(_benchmark(args.turns, args.threshold, args.retained))
+
+
+if __name__ == "__main__":
+    main()
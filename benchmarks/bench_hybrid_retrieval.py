@@ -0,0 +1,195 @@
+"""
+Benchmark hybrid retrieval for rag_response: recall@k and lookups per task.
+
+Runs the labeled questions in bqml_questions.json against the BQML RAG
+corpus. A question is recalled at k when one of the top k chunks contains its
+expected identifier (e.g. ML.GENERATE_EMBEDDING, AUTO_ARIMA_MAX_ORDER).
+
+1. recall@1/3/5 for three rankings over the same vector results:
+   - vector: distance order only
+   - reranked: vector + lexical re-ranking of the candidates
+   - hybrid: vector fused with the local BM25 index (reciprocal rank fusion)
+2. rag_response calls per task: each question runs as a task through a
+   small agent with rag_response, once without and once with the index.
+
+Needs BQML_RAG_CORPUS_NAME and the lexical index written by
+setup/rag_corpus/create_bqml_corpus.py. Uses Vertex AI with Application
+Default Credentials. Run from repo root:
+
+    uv run python benchmarks/bench_hybrid_retrieval.py [--tasks 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+from pathlib import Path
+from types import ModuleType
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env", override=True)
+# App modules are imported without running the package __init__ files, which
+# build the whole agent tree (Code Interpreter, toolsets) and need the app's
+# full configuration.
+_APP = Path(__file__).parent.parent / "bq_multi_agent_app"
+for _init in _APP.rglob("__init__.py"):
+    _name = ".".join(_init.parent.relative_to(_APP.parent).parts)
+    sys.modules[_name] = ModuleType(_name)
+    sys.modules[_name].__path__ = [str(_init.parent)]
+
+import vertexai
+from google.adk.agents import Agent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from vertexai import rag
+
+from bq_multi_agent_app.constants import MODEL_NAME
+from bq_multi_agent_app.sub_agents.bqml_agents import retrieval
+from bq_multi_agent_app.sub_agents.bqml_agents.tools import rag_response
+
+_QUESTIONS = Path(__file__).parent / "bqml_questions.json"
+_KS = (1, 3, 5)
+
+
+def _vector_contexts(corpus_name: str, question: str) -> list[dict]:
+    """Vector retrieval as rag_response runs it, before post-processing."""
+    response = rag.retrieval_query(
+        rag_resources=[rag.RagResource(rag_corpus=corpus_name)],
+        text=question,
+        rag_retrieval_config=rag.RagRetrievalConfig(
+            top_k=retrieval.RAG_CANDIDATES,
+            filter=rag.Filter(vector_distance_threshold=0.5),
+        ),
+    )
+    return [
+        {"text": c.text, "source_uri": c.source_uri, "distance": c.distance}
+        for c in response.contexts.contexts
+    ]
+
+
+def _ranking(question: str, contexts: list[dict], rerank: bool) -> list[str]:
+    chunks = retrieval.condense_contexts(
+        question, contexts, top_k=max(_KS), max_tokens=10**6, rerank=rerank
+    )["chunks"]
+    return [chunk["text"] for chunk in chunks]
+
+
+def _recalled(expected: str, texts: list[str], k: int) -> bool:
+    return any(expected.lower() in text.lower() for text in texts[:k])
+
+
+def _recall(
+    corpus_name: str, questions: list[dict], index: retrieval.LexicalIndex
+) -> None:
+    rankings: dict[str, list[tuple[str, list[str]]]] = {
+        "vector": [],
+        "reranked": [],
+        "hybrid": [],
+    }
+    for item in questions:
+        question = item["question"]
+        contexts = _vector_contexts(corpus_name, question)
+        fused = retrieval.reciprocal_rank_fusion(
+            [contexts, index.search(question, retrieval.RAG_CANDIDATES)]
+        )
+        rankings["vector"].append(
+            (item["expected"], _ranking(question, contexts, False))
+        )
+        rankings["reranked"].append(
+            (item["expected"], _ranking(question, contexts, True))
+        )
+        rankings["hybrid"].append((item["expected"], _ranking(question, fused, False)))
+
+    print(f"=== recall@k over {len(questions)} questions ===")
+    for label, results in rankings.items():
+        recalls = [
+            statistics.mean(
+                _recalled(expected, texts, k) for expected, texts in results
+            )
+            for k in _KS
+        ]
+        print(
+            f"  {label:<10}"
+            + "".join(f" recall@{k} {r:.2f} |" for k, r in zip(_KS, recalls))
+        )
+    print()
+
+
+async def _lookups_per_task(questions: list[dict]) -> tuple[list[int], int]:
+    """rag_response calls per task, and tasks whose answer names the identifier."""
+    agent = Agent(
+        model=MODEL_NAME,
+        name="bench_bqml",
+        instruction=(
+            "You write BigQuery ML SQL. Look up the syntax with rag_response before "
+            "answering; query again only if the chunks do not answer the task. "
+            "Answer with the statement and one sentence."
+        ),
+        tools=[rag_response],
+    )
+    sessions = InMemorySessionService()
+    runner = Runner(agent=agent, app_name="bench_bqml", session_service=sessions)
+    calls, answered = [], 0
+    for item in questions:
+        session = await sessions.create_session(app_name="bench_bqml", user_id="bench")
+        message = types.Content(role="user", parts=[types.Part(text=item["question"])])
+        count, answer = 0, ""
+        async for event in runner.run_async(
+            user_id="bench", session_id=session.id, new_message=message
+        ):
+            count += sum(
+                1 for call in event.get_function_calls() if call.name == "rag_response"
+            )
+            if event.is_final_response() and event.content and event.content.parts:
+                answer = "".join(p.text or "" for p in event.content.parts)
+        calls.append(count)
+        answered += item["expected"].lower() in answer.lower()
+    return calls, answered
+
+
+async def _lookups(questions: list[dict], index: retrieval.LexicalIndex) -> None:
+    print(f"=== rag_response calls per task over {len(questions)} tasks ===")
+    for label, mode_index in (("vector", None), ("hybrid", index)):
+        # rag_response reads the index through lexical_index().
+        retrieval._index, retrieval._index_loaded = mode_index, True
+        calls, answered = await _lookups_per_task(questions)
+        print(
+            f"  {label:<10} {statistics.mean(calls):.2f} calls/task "
+            f"(max {max(calls)}), {answered}/{len(questions)} answers name "
+            "the expected identifier"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus_name = os.getenv("BQML_RAG_CORPUS_NAME")
+    if not corpus_name:
+        raise SystemExit(
+            "Set BQML_RAG_CORPUS_NAME (setup/rag_corpus/create_bqml_corpus.py)"
+        )
+    if not Path(retrieval.RAG_LEXICAL_INDEX).exists():
+        raise SystemExit(
+            f"No lexical index at {retrieval.RAG_LEXICAL_INDEX}; "
+            "run setup/rag_corpus/create_bqml_corpus.py"
+        )
+    vertexai.init(
+        project=os.getenv("GOOGLE_CLOUD_PROJECT"),
+        location=os.getenv("RAG_LOCATION", "us-west4"),
+    )
+    questions = json.loads(_QUESTIONS.read_text())
+    index = retrieval.LexicalIndex.load(retrieval.RAG_LEXICAL_INDEX)
+
+    print(f"Model: {MODEL_NAME}, index: {len(index.chunks)} chunks\n")
+    _recall(corpus_name, questions, index)
+    asyncio.run(_lookups(questions[: args.tasks], index))
+
+
+if __name__ == "__main__":
+    main()
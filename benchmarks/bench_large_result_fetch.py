@@ -0,0 +1,103 @@
+"""
+Benchmark large-result fetch throughput: REST row iteration vs Storage Read API.
+
+Runs one query against a public dataset, then reads its result table two ways:
+- REST: tabledata.list pages converted to Python dicts (how execute_sql reads rows)
+- Storage Read API: parallel Arrow streams (how fetch_large_result reads rows)
+
+Uses Application Default Credentials. Run from repo root:
+
+    uv run python benchmarks/bench_large_result_fetch.py [--rows 500000]
+
+Query and read costs are billed to GOOGLE_CLOUD_PROJECT.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env", override=True)
+# App modules are imported without running the package __init__ files, which
+# build the whole agent tree (Code Interpreter, toolsets) and need the app's
+# full configuration.
+_APP = Path(__file__).parent.parent / "bq_multi_agent_app"
+for _init in _APP.rglob("__init__.py"):
+    _name = ".".join(_init.parent.relative_to(_APP.parent).parts)
+    sys.modules[_name] = ModuleType(_name)
+    sys.modules[_name].__path__ = [str(_init.parent)]
+
+import google.auth
+from google.cloud import bigquery, bigquery_storage
+
+from bq_multi_agent_app.large_results import read_table_arrow
+
+_QUERY = """
+SELECT name, gender, state, year, number
+FROM `bigquery-public-data.usa_names.usa_1910_current`
+LIMIT {rows}
+"""
+
+
+def _rest_fetch(client: bigquery.Client, table: bigquery.TableReference) -> int:
+    count = 0
+    for row in client.list_rows(table, page_size=50_000):
+        dict(row)
+        count += 1
+    return count
+
+
+def _storage_fetch(
+    read_client: bigquery_storage.BigQueryReadClient,
+    table: bigquery.TableReference,
+    billing_project: str,
+) -> int:
+    path = (
+        f"projects/{table.project}/datasets/{table.dataset_id}/tables/{table.table_id}"
+    )
+    return read_table_arrow(read_client, path, billing_project).num_rows
+
+
+def _report(label: str, rows: int, seconds: float) -> None:
+    print(
+        f"  {label:<18} {rows:>10,} rows  {seconds:>7.2f}s  {rows / seconds:>12,.0f} rows/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    credentials, default_project = google.auth.default()
+    project_id = os.getenv("GOOGLE_CLOUD_PROJECT", default_project)
+    client = bigquery.Client(project=project_id, credentials=credentials)
+    read_client = bigquery_storage.BigQueryReadClient(credentials=credentials)
+
+    print(f"Project: {project_id}")
+    print(f"Running query for {args.rows:,} rows...")
+    job = client.query(_QUERY.format(rows=args.rows))
+    job.result(max_results=0)
+    table = job.destination
+    print(f"Result table: {table.project}.{table.dataset_id}.{table.table_id}\n")
+
+    started = time.perf_counter()
+    rest_rows = _rest_fetch(client, table)
+    rest_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    storage_rows = _storage_fetch(read_client, table, project_id)
+    storage_seconds = time.perf_counter() - started
+
+    print("=== Fetch throughput ===")
+    _report("REST (dicts)", rest_rows, rest_seconds)
+    _report("Storage Read", storage_rows, storage_seconds)
+    print(f"  Speed-up: {rest_seconds / storage_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
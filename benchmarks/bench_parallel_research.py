@@ -0,0 +1,91 @@
+"""
+Benchmark multi-platform research: one grounded call vs parallel fan-out.
+
+Answers the same comparison question two ways and reports latency:
+- sequential: one Google Search grounded call covering every platform, as
+  research_aida_agent does today (its searches run within one model turn)
+- parallel: research_platforms, one grounded call per platform run
+  concurrently; also reports the per-branch times and their sum
+
+Uses the Vertex AI Gemini API with Application Default Credentials. Run from
+repo root:
+
+    uv run python benchmarks/bench_parallel_research.py [--runs 3]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env", override=True)
+# App modules are imported without running the package __init__ files, which
+# build the whole agent tree (Code Interpreter, toolsets) and need the app's
+# full configuration.
+_APP = Path(__file__).parent.parent / "bq_multi_agent_app"
+for _init in _APP.rglob("__init__.py"):
+    _name = ".".join(_init.parent.relative_to(_APP.parent).parts)
+    sys.modules[_name] = ModuleType(_name)
+    sys.modules[_name].__path__ = [str(_init.parent)]
+
+from google.genai import types
+
+from bq_multi_agent_app.constants import MODEL_NAME
+from bq_multi_agent_app.sub_agents.research_agents import parallel
+from bq_multi_agent_app.sub_agents.research_agents.prompts import (
+    return_instructions_research,
+)
+
+_QUESTION = "storage and compute pricing for a 10 TB analytics workload"
+_PLATFORMS = ["BigQuery", "Snowflake", "Databricks", "Redshift"]
+
+
+async def _sequential() -> float:
+    started = time.perf_counter()
+    await parallel._genai_client().aio.models.generate_content(
+        model=MODEL_NAME,
+        contents=f"Compare {', '.join(_PLATFORMS)}: {_QUESTION}",
+        config=types.GenerateContentConfig(
+            system_instruction=return_instructions_research(),
+            tools=[types.Tool(google_search=types.GoogleSearch())],
+        ),
+    )
+    return time.perf_counter() - started
+
+
+async def _benchmark(runs: int) -> None:
+    sequential, wall, branch_sum = [], [], []
+    for run in range(1, runs + 1):
+        sequential.append(await _sequential())
+        timing = (await parallel.research_platforms(_QUESTION, _PLATFORMS))["timing"]
+        wall.append(timing["wall_seconds"])
+        branch_sum.append(timing["sequential_seconds"])
+        print(
+            f"  run {run}: one call {sequential[-1]:.1f}s | parallel "
+            f"{wall[-1]:.1f}s (branches sum {branch_sum[-1]:.1f}s)"
+        )
+
+    print("\n=== Median latency ===")
+    print(f"  one grounded call:        {statistics.median(sequential):>6.1f}s")
+    print(f"  parallel fan-out (wall):  {statistics.median(wall):>6.1f}s")
+    print(f"  fan-out branches, summed: {statistics.median(branch_sum):>6.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Model: {MODEL_NAME}")
+    print(f"Question: {', '.join(_PLATFORMS)} — {_QUESTION}\n")
+    # One event loop for all runs: the async Gemini client is reused.
+    asyncio.run(_benchmark(args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Benchmark BQML corpus chunking and top_k offline: recall, MRR, size, latency.
+
+Builds local indices over a local copy of the BQML documentation for every
+chunking configuration (--chunk-sizes x --overlaps) and runs the labeled
+questions in bqml_questions.json against each with three retrievers:
+- bm25: the LexicalIndex rag_response uses for hybrid retrieval
+- vector: cosine similarity over local sentence-transformers embeddings
+- hybrid: bm25 and vector fused by reciprocal rank fusion
+
+The corpus import counts chunk_size in tokens, the lexical index in words, so
+their chunk boundaries differ. The vector chunks here are therefore cut at
+about 0.75 words per token, so hybrid fuses differently bounded chunks the
+way rag_response does.
+
+A question is answered at rank r when its expected identifier appears in
+the first r chunks, read up to the same text budget for every configuration
+(--budget-tokens, default RAG_MAX_TOKENS, the budget rag_response trims
+to). Without it, bigger chunks contain more identifiers and would win on
+size alone. Reports, per configuration and retriever: chunk count, index size (BM25
+postings JSON plus float32 embeddings), recall@k for each --top-k, MRR, and
+p50/p95 query latency (questions are embedded beforehand, so vector latency
+is the search alone). Use the results to set RAG_CHUNK_SIZE,
+RAG_CHUNK_OVERLAP, and RAG_TOP_K, then re-run create_bqml_corpus.py.
+
+Runs without network access or credentials once the inputs are local:
+- documents: copy them once with
+  gsutil -m cp -r gs://cloud-samples-data/adk-samples/data-science/bqml ./bqml_docs
+- embeddings: computed with --embedding-model (requires
+  `pip install sentence-transformers`, model downloaded once) and cached in
+  --embeddings-cache, so later runs reuse the precomputed question and chunk
+  vectors; without the package or a cache, only bm25 is evaluated
+
+Local chunks are counted in words, so compare configurations with each other
+rather than with the corpus exactly. Run from repo root:
+
+    uv run python benchmarks/bench_retrieval_chunking.py --docs ./bqml_docs \\
+        [--chunk-sizes 256 512 1024] [--overlaps 0 100] [--top-k 1 3 5 10] \\
+        [--budget-tokens 1500]
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import re
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+_ROOT = Path(__file__).parent.parent
+_QUESTIONS = Path(__file__).parent / "bqml_questions.json"
+_TEXT_SUFFIXES = (".md", ".txt", ".html", ".htm")
+
+# Vector chunks stand in for the corpus's token chunks; also converts the
+# token budget to words.
+_WORDS_PER_TOKEN = 0.75
+
+# retrieval.py is loaded on its own: importing the bq_multi_agent_app package
+# builds the agents, which needs credentials and network access.
+_spec = importlib.util.spec_from_file_location(
+    "bqml_retrieval", _ROOT / "bq_multi_agent_app/sub_agents/bqml_agents/retrieval.py"
+)
+retrieval = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(retrieval)
+
+
+def _documents(docs: Path) -> list[tuple[str, str]]:
+    """(source path, text) for every text document under docs."""
+    documents = []
+    for path in sorted(docs.rglob("*")):
+        if not path.is_file() or not path.name.lower().endswith(_TEXT_SUFFIXES):
+            continue
+        text = path.read_text(errors="replace")
+        if path.suffix.lower() in (".html", ".htm"):
+            text = re.sub(r"<[^>]+>", " ", text)
+        documents.append((str(path.relative_to(docs)), text))
+    return documents
+
+
+def _chunks(
+    documents: list[tuple[str, str]], chunk_size: int, overlap: int
+) -> list[dict]:
+    return [
+        {"text": chunk, "source_uri": source}
+        for source, text in documents
+        for chunk in retrieval.chunk_text(text, chunk_size, overlap)
+    ]
+
+
+class _Embedder:
+    """sentence-transformers model with an on-disk cache of computed vectors."""
+
+    def __init__(self, model_name: str, cache: Path):
+        self.model_name = model_name
+        self.cache = cache
+        self.model = None
+
+    def vectors(self, texts: list[str]):
+        """Normalized float32 vectors for texts; cached by model and texts.
+
+        Raises:
+            RuntimeError: Not cached and sentence-transformers is not installed.
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise RuntimeError("numpy is not installed") from e
+
+        digest = hashlib.sha256(
+            "\0".join([self.model_name, *texts]).encode()
+        ).hexdigest()[:16]
+        path = self.cache / f"{digest}.npy"
+        if path.exists():
+            return np.load(path)
+        if self.model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise RuntimeError("sentence-transformers is not installed") from e
+            self.model = SentenceTransformer(self.model_name)
+        vectors = np.asarray(
+            self.model.encode(texts, normalize_embeddings=True), dtype=np.float32
+        )
+        self.cache.mkdir(parents=True, exist_ok=True)
+        np.save(path, vectors)
+        return vectors
+
+
+def _relevant_rank(expected: str, ranked: list[dict], budget_words: int) -> int | None:
+    """Rank of the first chunk naming expected within the first budget_words words."""
+    for rank, chunk in enumerate(ranked, start=1):
+        if budget_words <= 0:
+            break
+        words = chunk["text"].split()[:budget_words]
+        budget_words -= len(words)
+        if expected.lower() in " ".join(words).lower():
+            return rank
+    return None
+
+
+def _evaluate(
+    search, questions: list[dict], top_ks: list[int], budget_words: int
+) -> dict[str, float | list[float]]:
+    """Recall@k, MRR (over max top_k), and per-query latency of a search function."""
+    depth = max(top_ks)
+    ranks, latencies = [], []
+    for item in questions:
+        started = time.perf_counter()
+        ranked = search(item["question"], depth)
+        latencies.append((time.perf_counter() - started) * 1000)
+        ranks.append(_relevant_rank(item["expected"], ranked, budget_words))
+    latencies.sort()
+    return {
+        "recall": [
+            statistics.mean(rank is not None and rank <= k for rank in ranks)
+            for k in top_ks
+        ],
+        "mrr": statistics.mean(1 / rank if rank else 0.0 for rank in ranks),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def _benchmark(args: argparse.Namespace) -> None:
+    documents = _documents(args.docs)
+    if not documents:
+        raise SystemExit(f"No {', '.join(_TEXT_SUFFIXES)} documents under {args.docs}")
+    questions = json.loads(_QUESTIONS.read_text())
+    embedder = _Embedder(args.embedding_model, args.embeddings_cache)
+    try:
+        question_vectors = dict(
+            zip(
+                (item["question"] for item in questions),
+                embedder.vectors([item["question"] for item in questions]),
+            )
+        )
+    except RuntimeError as e:
+        print(f"Vector retrieval skipped ({e}; no cached embeddings)\n")
+        question_vectors = None
+    budget_words = round(args.budget_tokens * _WORDS_PER_TOKEN)
+    print(
+        f"{len(documents)} documents, {len(questions)} questions, top_k {args.top_k}, "
+        f"budget {args.budget_tokens} tokens (~{budget_words} words)\n"
+    )
+
+    header = (
+        f"{'chunk':>5} {'overlap':>7} {'retriever':<9} {'chunks':>6} {'index MB':>8} "
+        + " ".join(f"{f'R@{k}':>5}" for k in args.top_k)
+        + f" {'MRR':>5} {'p50 ms':>7} {'p95 ms':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    rows = []
+    for chunk_size in args.chunk_sizes:
+        for overlap in args.overlaps:
+            if overlap >= chunk_size:
+                continue
+            chunks = _chunks(documents, chunk_size, overlap)
+            index = retrieval.LexicalIndex(chunks)
+            bm25_bytes = len(
+                json.dumps(
+                    {
+                        "chunks": chunks,
+                        "lengths": index.lengths,
+                        "postings": index.postings,
+                    },
+                    separators=(",", ":"),
+                )
+            )
+            retrievers = {"bm25": (index.search, bm25_bytes, len(chunks))}
+            vector_chunks = _chunks(
+                documents,
+                round(chunk_size * _WORDS_PER_TOKEN),
+                round(overlap * _WORDS_PER_TOKEN),
+            )
+            vectors = None
+            if question_vectors is not None:
+                try:
+                    vectors = embedder.vectors([c["text"] for c in vector_chunks])
+                except RuntimeError as e:
+                    print(f"{chunk_size:>5} {overlap:>7} vector skipped: {e}")
+            if vectors is not None:
+
+                def vector_search(query, k, vectors=vectors, chunks=vector_chunks):
+                    scores = vectors @ question_vectors[query]
+                    return [chunks[i] for i in scores.argsort()[::-1][:k]]
+
+                def hybrid_search(query, k, vector_search=vector_search, index=index):
+                    return retrieval.reciprocal_rank_fusion(
+                        [vector_search(query, k), index.search(query, k)]
+                    )[:k]
+
+                retrievers["vector"] = (
+                    vector_search,
+                    vectors.nbytes,
+                    len(vector_chunks),
+                )
+                retrievers["hybrid"] = (
+                    hybrid_search,
+                    vectors.nbytes + bm25_bytes,
+                    len(chunks) + len(vector_chunks),
+                )
+
+            for name, (search, size, count) in retrievers.items():
+                result = _evaluate(search, questions, args.top_k, budget_words)
+                rows.append((chunk_size, overlap, name, result))
+                print(
+                    f"{chunk_size:>5} {overlap:>7} {name:<9} {count:>6} "
+                    f"{size / 1e6:>8.2f} "
+                    + " ".join(f"{r:>5.2f}" for r in result["recall"])
+                    + f" {result['mrr']:>5.2f} {result['p50_ms']:>7.2f} "
+                    f"{result['p95_ms']:>7.2f}"
+                )
+
+    print("\n=== Best configuration per retriever (by MRR, then recall) ===")
+    for name in dict.fromkeys(row[2] for row in rows):
+        chunk_size, overlap, _, result = max(
+            (row for row in rows if row[2] == name),
+            key=lambda row: (row[3]["mrr"], row[3]["recall"]),
+        )
+        print(
+            f"  {name:<9} chunk {chunk_size}, overlap {overlap}: "
+            f"MRR {result['mrr']:.2f}, "
+            + ", ".join(f"R@{k} {r:.2f}" for k, r in zip(args.top_k, result["recall"]))
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=Path, required=True)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[256, 512, 1024])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, 50, 100])
+    parser.add_argument("--top-k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--budget-tokens", type=int, default=retrieval.RAG_MAX_TOKENS)
+    parser.add_argument("--embedding-model", default="all-MiniLM-L6-v2")
+    parser.add_argument(
+        "--embeddings-cache",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "bqml_chunk_embeddings",
+    )
+    _benchmark(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,10 @@ BigQuery ML, and conversational analytics via BQ Data Agents.
 All BigQuery and Data Agent operations use per-user OAuth so each user's
 IAM permissions are enforced transparently.
 
+Long sessions are compacted (compaction.py): once a turn's prompt passes a
+token threshold, older events are replaced by a summary and a schema block.
+ADK tools load `app` in preference to `root_agent`.
+
 Memory Bank (Vertex AI) provides cross-session conversation persistence when
 deployed to Agent Engine. Run locally with:
     uv run adk web --memory_service_uri=agentengine://$AGENT_ENGINE_ID
@@ -17,12 +21,36 @@ from datetime import date
 from google.adk.agents import Agent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.readonly_context import ReadonlyContext
-from google.adk.tools.preload_memory_tool import PreloadMemoryTool
+from google.adk.apps.app import App
 from google.adk.tools.load_memory_tool import LoadMemoryTool
 
+from .callbacks import (
+    abandon_query_flight,
+    cache_table_schema,
+    serve_cached_result,
+    store_query_result,
+)
+from .charts import persist_data_result, render_chart
+from .compaction import compaction_config
 from .constants import MODEL_NAME
+from .local_results import query_cached_result, store_local_result
+from .prefetch import (
+    SpeculativePreloadMemoryTool,
+    finish_speculative_prefetch,
+    serve_prefetched_metadata,
+    start_speculative_prefetch,
+)
 from .prompts import return_instructions_root
-from .sub_agents import bqml_agent, ds_agent, research_aida_agent
+from .sub_agents import (
+    bqml_agent,
+    compound_agent,
+    ds_agent,
+    plan_compound_request,
+    research_aida_agent,
+    research_compare_agent,
+)
+from .sub_agents.bqml_agents.jobs import BQML_JOB_UPDATES_KEY, refresh_bqml_jobs
+from .tool_outputs import offload_large_output, read_tool_output
 from .tools import ca_toolset, data_agent_toolset
 
 # Number of recent events to process for memory generation per turn.
@@ -40,7 +68,28 @@ async def _generate_memories_callback(callback_context: CallbackContext) -> None
     )
 
 
-def _global_instruction(_ctx: ReadonlyContext) -> str:
+def _bqml_job_updates(ctx: ReadonlyContext | None) -> str:
+    """Describe BQML jobs that finished since the previous turn, if any."""
+    updates = ctx.state.get(BQML_JOB_UPDATES_KEY) if ctx else None
+    if not updates:
+        return ""
+    lines = [
+        f"- {u['model'] or 'BQML script'} (job {u['job_id']}): "
+        + (
+            f"FAILED — {u['error']}"
+            if u.get("error")
+            else ("training finished" if u["model"] else "finished")
+        )
+        for u in updates
+    ]
+    return (
+        "\n    BQML jobs finished since the last turn — tell the user first:\n    "
+        + "\n    ".join(lines)
+        + "\n"
+    )
+
+
+def _global_instruction(ctx: ReadonlyContext) -> str:
     """Build global instruction with current date (evaluated per-request)."""
     return f"""
     You are a Data Science and BigQuery Analytics Multi Agent System.
@@ -52,9 +101,8 @@ def _global_instruction(_ctx: ReadonlyContext) -> str:
     - For quick data questions (counts, trends, comparisons): answers are returned
       as text and tables directly.
     - For charts or visualizations: include "chart", "plot", "visualize", or similar
-      in your request so the system routes to the advanced analysis path from the
-      start. Requesting a chart after a text-only analysis requires re-querying the
-      data, so it is more efficient to ask for the chart upfront.
+      in your request, or ask to chart a result you just received (e.g. "now plot
+      that") — the system draws it from the saved result without re-querying.
     - For BigQuery ML: ask to create, train, evaluate, or run predictions with a
       BigQuery ML model and the system handles the full lifecycle.
     - For research: ask about BigQuery features, platform comparisons
@@ -62,7 +110,7 @@ def _global_instruction(_ctx: ReadonlyContext) -> str:
       and the system uses Google Search to provide cited, up-to-date answers.
     - For pre-configured BQ Data Agents: reference them by name (e.g. "ask
       order_user_agent about top customers") and the system routes to them directly.
-    """
+    {_bqml_job_updates(ctx)}"""
 
 
 root_agent = Agent(
@@ -75,12 +123,44 @@ root_agent = Agent(
     ),
     global_instruction=_global_instruction,
     instruction=return_instructions_root(),
-    sub_agents=[ds_agent, bqml_agent, research_aida_agent],
+    sub_agents=[
+        ds_agent,
+        bqml_agent,
+        research_aida_agent,
+        research_compare_agent,
+        compound_agent,
+    ],
     tools=[
         ca_toolset,  # CA API + discovery tools (ask_data_insights, list/get dataset/table)
         data_agent_toolset,  # Pre-configured BQ Data Agents via Conversational Analytics API
-        PreloadMemoryTool(),  # Auto-retrieves relevant memories at the start of each turn
+        SpeculativePreloadMemoryTool(),  # Memories for each turn, searched once, early
         LoadMemoryTool(),  # Model calls this explicitly to search memories mid-conversation
+        render_chart,  # Charts the last CA API result without re-querying
+        query_cached_result,  # Drill-downs on earlier results in local DuckDB
+        plan_compound_request,  # Split compound requests into parallel branches
+        read_tool_output,  # Slices of results too large for the conversation
+    ],
+    before_agent_callback=[
+        start_speculative_prefetch,  # Likely metadata + memory, alongside routing
+        refresh_bqml_jobs,  # Surface finished BQML trainings
+    ],
+    after_agent_callback=[finish_speculative_prefetch, _generate_memories_callback],
+    before_tool_callback=[
+        serve_prefetched_metadata,  # Discovery calls answered by the prefetch
+        serve_cached_result,  # Per-user query result cache
     ],
-    after_agent_callback=_generate_memories_callback,
+    after_tool_callback=[
+        cache_table_schema,
+        persist_data_result,
+        store_query_result,
+        store_local_result,
+        offload_large_output,  # Last: replaces oversized results with a handle
+    ],
+    on_tool_error_callback=abandon_query_flight,
+)
+
+app = App(
+    name="bq_multi_agent_app",
+    root_agent=root_agent,
+    events_compaction_config=compaction_config(),  # Bound per-turn context size
 )
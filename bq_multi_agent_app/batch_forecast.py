@@ -0,0 +1,230 @@
+"""
+Batched multi-series forecasting for the DS agent.
+
+forecast_series forecasts every series of a table (e.g. one per store) with a
+single AI.FORECAST job using id_cols, instead of one forecast call per
+series, and returns a per-series summary instead of every forecast point.
+
+Results are cached per user in process memory (a QueryResultCache from
+query_cache.py) keyed on the source, columns, horizon, confidence level, and
+the last-modified time of the source tables, so repeated dashboard questions
+do not refit until the data changes.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+
+from google.adk.tools.tool_context import ToolContext
+
+from .bq_clients import client_for
+from .query_cache import (
+    QueryResultCache,
+    cache_key,
+    cacheable_tables,
+    normalize_sql,
+    table_versions,
+)
+from .sql_lint import as_subquery, qualified_path, split_statements
+
+_COLUMN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+_MAX_ID_COLUMNS = 4
+
+# AI.FORECAST accepts horizons up to 10,000 points.
+_MAX_HORIZON = 10_000
+
+# Series summaries returned; series_count covers all of them.
+_MAX_SERIES_ROWS = 100
+
+# Forecasts only change with the data, which the key covers; the TTL bounds
+# how long a revoked permission could still be served from memory.
+_FORECAST_TTL_SECONDS = 24 * 60 * 60
+
+forecast_cache = QueryResultCache(
+    max_bytes=16 * 1024**2, ttl_seconds=_FORECAST_TTL_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def build_forecast_sql(
+    source: str,
+    timestamp_col: str,
+    data_col: str,
+    id_cols: list[str],
+    horizon: int,
+    confidence_level: float,
+) -> str:
+    """Returns the AI.FORECAST query producing every forecast point."""
+    ids = ", ".join(f"'{c}'" for c in id_cols)
+    return f"""
+SELECT *
+FROM AI.FORECAST(
+  {source},
+  data_col => '{data_col}',
+  timestamp_col => '{timestamp_col}',
+  id_cols => [{ids}],
+  horizon => {horizon},
+  confidence_level => {confidence_level})
+""".strip()
+
+
+def build_summary_sql(forecast_sql: str, id_cols: list[str]) -> str:
+    """Wraps the forecast query into one summary row per series."""
+    ids = ", ".join(id_cols)
+    return f"""
+WITH forecast AS (
+{forecast_sql}
+)
+SELECT
+  {ids},
+  COUNT(*) AS points,
+  MIN(forecast_timestamp) AS first_timestamp,
+  MAX(forecast_timestamp) AS last_timestamp,
+  SUM(forecast_value) AS forecast_total,
+  AVG(forecast_value) AS forecast_mean,
+  ARRAY_AGG(
+    STRUCT(
+      forecast_value AS value,
+      prediction_interval_lower_bound AS lower_bound,
+      prediction_interval_upper_bound AS upper_bound)
+    ORDER BY forecast_timestamp DESC LIMIT 1)[OFFSET(0)] AS last_point,
+  ANY_VALUE(ai_forecast_status) AS ai_forecast_status
+FROM forecast
+GROUP BY {ids}
+ORDER BY forecast_total DESC
+""".strip()
+
+
+async def forecast_series(
+    project_id: str,
+    timestamp_col: str,
+    data_col: str,
+    id_cols: list[str],
+    tool_context: ToolContext,
+    table: str = "",
+    query: str = "",
+    horizon: int = 30,
+    confidence_level: float = 0.95,
+) -> dict:
+    """Forecasts every series (e.g. each store) in one AI.FORECAST job.
+
+    Use this instead of one forecast call per series. Returns a summary per
+    series; fetch every forecast point with fetch_large_result and the
+    returned forecast_query when needed.
+
+    Args:
+        project_id: The GCP project to run the query in.
+        timestamp_col: The TIMESTAMP, DATETIME or DATE column.
+        data_col: The numeric column to forecast.
+        id_cols: Columns identifying each series, e.g. ["store_id"].
+        tool_context: Provided by ADK.
+        table: History table (dataset.table or project.dataset.table). Pass
+            this or query.
+        query: A SELECT producing the history, e.g. aggregated per day.
+        horizon: Number of points to forecast per series.
+        confidence_level: Prediction interval confidence, default 0.95.
+
+    Returns:
+        dict: series_count, series (up to 100, largest forecast_total
+        first), series_per_second, forecast_query, and forecast_cache when
+        served from the cache.
+    """
+    try:
+        if bool(table) == bool(query):
+            raise ValueError("Pass exactly one of table or query.")
+        if table:
+            table_path = qualified_path(table, project_id)
+            source, tables = f"TABLE `{table_path}`", [table_path]
+        else:
+            statements = split_statements(query)
+            if len(statements) != 1 or statements[0][0].upper not in ("SELECT", "WITH"):
+                raise ValueError("query must be a single SELECT statement.")
+            source = as_subquery(query, statements[0])
+            tables = cacheable_tables(query, default_project=project_id)
+        id_cols = list(id_cols or [])
+        if not 1 <= len(id_cols) <= _MAX_ID_COLUMNS:
+            raise ValueError(
+                f"id_cols takes 1 to {_MAX_ID_COLUMNS} columns; use forecast "
+                "for a single series."
+            )
+        columns = [timestamp_col, data_col, *id_cols]
+        if not all(_COLUMN_RE.fullmatch(c or "") for c in columns):
+            raise ValueError(f"Invalid column names: {columns}.")
+        if not 1 <= horizon <= _MAX_HORIZON:
+            raise ValueError(f"horizon must be between 1 and {_MAX_HORIZON}.")
+        if not 0 < confidence_level < 1:
+            raise ValueError("confidence_level must be between 0 and 1.")
+    except ValueError as e:
+        return {"status": "ERROR", "error_details": str(e)}
+
+    forecast_sql = build_forecast_sql(
+        source, timestamp_col, data_col, id_cols, horizon, confidence_level
+    )
+    sql = build_summary_sql(forecast_sql, id_cols)
+
+    def client():
+        return client_for(tool_context, project_id, user_agent="forecast_series")
+
+    key = None
+    if tables:
+        try:
+            versions = await asyncio.to_thread(lambda: table_versions(client(), tables))
+        except ValueError:
+            versions = None
+        if versions is not None:
+            key = cache_key(
+                tool_context.user_id,
+                "forecast_series",
+                project_id,
+                normalize_sql(forecast_sql),
+                versions,
+            )
+
+    def run():
+        job = client().query(sql, project=project_id, job_id_prefix="forecast_")
+        rows = [
+            json.loads(json.dumps(dict(row.items()), default=str))
+            for row in job.result()
+        ]
+        return job, rows
+
+    async def forecast():
+        started = time.perf_counter()
+        try:
+            job, rows = await asyncio.to_thread(run)
+        except Exception as e:
+            logger.exception("forecast_series: AI.FORECAST job failed")
+            return {"status": "ERROR", "error_details": str(e)}
+        elapsed = time.perf_counter() - started
+        if job.started and job.ended:
+            job_seconds = (job.ended - job.started).total_seconds()
+        else:
+            job_seconds = elapsed
+        return {
+            "status": "SUCCESS",
+            "series_count": len(rows),
+            "series": rows[:_MAX_SERIES_ROWS],
+            "horizon": horizon,
+            "elapsed_seconds": round(elapsed, 2),
+            "series_per_second": round(len(rows) / max(job_seconds, 1e-3), 1),
+            "bytes_billed": job.total_bytes_billed,
+            "forecast_query": forecast_sql,
+        }
+
+    if key is None:
+        return await forecast()
+    cached = forecast_cache.get(key)
+    if cached is not None:
+        result, age = cached
+        result["forecast_cache"] = {"status": "HIT", "age_seconds": round(age, 1)}
+        return result
+    # Identical concurrent calls share one job; the flight is released even
+    # if this call is cancelled.
+    result, coalesced = await forecast_cache.run_once(key, forecast)
+    if coalesced:
+        result["forecast_cache"] = {"status": "COALESCED", "age_seconds": 0.0}
+    return result
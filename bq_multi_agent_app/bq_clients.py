@@ -0,0 +1,267 @@
+"""
+Pooled per-user BigQuery clients keyed on the user's OAuth access token.
+
+ADK's BigQuery tools call google.adk.tools.bigquery.client.get_bigquery_client
+on every invocation, which builds a new bigquery.Client — and with it a new
+HTTP session, so every tool call pays a fresh TLS handshake. install_client_pool
+replaces that factory with BigQueryClientPool.get, which reuses one client per
+(token hash, project, location, user agent) until the token changes, expires,
+or is evicted by the size bound.
+
+The Conversational Analytics tools (ask_data_insights and data_agent_toolset)
+do not use bigquery.Client; they open a new requests.Session per call and pass
+the token as a Bearer header. install_client_pool points them at one shared
+keep-alive session instead. The token stays per-request in the header and the
+session's cookie jar rejects all cookies, so no state is shared between users.
+
+The pools are process-wide, so ca_toolset, ds_toolset, bqml_toolset,
+data_agent_toolset and the custom tools in this package (via client_for) all
+share them. read_client_for pools Storage Read API (gRPC) clients the same way.
+Tokens are never stored — only a SHA-256 prefix is used as the key.
+"""
+
+import hashlib
+import http.cookiejar
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import google.oauth2.credentials
+import requests
+from google.adk.tools.bigquery import client as adk_bigquery_client
+from google.adk.tools.bigquery import data_insights_tool as adk_data_insights
+from google.adk.tools.data_agent import data_agent_tool as adk_data_agent
+from google.adk.tools.tool_context import ToolContext
+from google.cloud import bigquery
+
+# Session state key where Gemini Enterprise deposits the user's OAuth access token.
+_AUTH_ID = os.getenv("AUTH_ID", "bq-oauth")
+
+# Upper bound on pooled clients (roughly concurrent users x tools per user).
+_MAX_CLIENTS = int(os.getenv("BQ_CLIENT_POOL_SIZE", "64"))
+
+# Gemini Enterprise access tokens live for one hour; drop clients a little earlier.
+_CLIENT_TTL_SECONDS = 55 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def token_digest(token: str) -> str:
+    """Return a short, non-reversible identifier for an access token."""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class BigQueryClientPool:
+    """Bounded LRU pool of bigquery.Client objects keyed on access-token hash."""
+
+    def __init__(
+        self,
+        max_size: int = _MAX_CLIENTS,
+        ttl_seconds: float = _CLIENT_TTL_SECONDS,
+        factory: Any = None,
+    ):
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._factory = factory or adk_bigquery_client.get_bigquery_client
+        self._clients: OrderedDict[tuple, tuple[float, bigquery.Client]] = OrderedDict()
+        self._user_tokens: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "clients_created": 0,
+            "clients_reused": 0,
+            "evicted_expired": 0,
+            "evicted_capacity": 0,
+            "evicted_token_change": 0,
+        }
+
+    def get(
+        self,
+        *,
+        project: str | None,
+        credentials: Any,
+        location: str | None = None,
+        user_agent: str | list[str] | None = None,
+    ) -> bigquery.Client:
+        """Return a pooled client; signature matches ADK's get_bigquery_client."""
+        token = getattr(credentials, "token", None)
+        if not token:
+            # Service-account / ADC credentials refresh themselves — no pooling key.
+            return self._factory(
+                project=project,
+                credentials=credentials,
+                location=location,
+                user_agent=user_agent,
+            )
+
+        agents = tuple(user_agent) if isinstance(user_agent, list) else (user_agent,)
+        key = (token_digest(token), project, location, agents)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry and now - entry[0] < self._ttl_seconds:
+                self._clients.move_to_end(key)
+                self._stats["clients_reused"] += 1
+                return entry[1]
+            if entry:
+                del self._clients[key]
+                self._stats["evicted_expired"] += 1
+
+        client = self._factory(
+            project=project,
+            credentials=credentials,
+            location=location,
+            user_agent=user_agent,
+        )
+        with self._lock:
+            self._clients[key] = (now, client)
+            self._stats["clients_created"] += 1
+            while len(self._clients) > self._max_size:
+                self._clients.popitem(last=False)
+                self._stats["evicted_capacity"] += 1
+        return client
+
+    def observe_token(self, user_id: str, token: str) -> None:
+        """Evict a user's clients when their access token changes."""
+        digest = token_digest(token)
+        with self._lock:
+            previous = self._user_tokens.get(user_id)
+            self._user_tokens[user_id] = digest
+            if previous is None or previous == digest:
+                return
+            stale = [key for key in self._clients if key[0] == previous]
+            for key in stale:
+                del self._clients[key]
+            self._stats["evicted_token_change"] += len(stale)
+        logger.info("Token changed for user; evicted %d pooled client(s)", len(stale))
+
+    def stats(self) -> dict[str, int]:
+        """Pool counters. Each reuse avoids one client build and TLS handshake."""
+        with self._lock:
+            return {
+                **self._stats,
+                "pooled_clients": len(self._clients),
+                "tls_handshakes_avoided": self._stats["clients_reused"],
+            }
+
+
+class _SharedSessionRequests:
+    """Stand-in for the `requests` module that hands out one pooled Session.
+
+    Only Session() and get() are redirected; every other attribute (exceptions,
+    status codes) resolves to the real requests module.
+    """
+
+    def __init__(self):
+        self._session = requests.Session()
+        # Auth travels in per-request headers; never let cookies leak across users.
+        self._session.cookies.set_policy(
+            http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+        )
+        self._lock = threading.Lock()
+        self.reused = 0
+
+    def Session(self) -> requests.Session:
+        with self._lock:
+            self.reused += 1
+        return self._session
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        with self._lock:
+            self.reused += 1
+        return self._session.get(url, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(requests, name)
+
+
+def _make_read_client(
+    *,
+    project: str | None,
+    credentials: Any,
+    location: str | None = None,
+    user_agent: Any = None,
+) -> Any:
+    """Build a BigQuery Storage Read API client (gRPC channel) for one token."""
+    from google.api_core.client_info import ClientInfo
+    from google.cloud import bigquery_storage
+
+    agents = user_agent if isinstance(user_agent, list) else [user_agent]
+    return bigquery_storage.BigQueryReadClient(
+        credentials=credentials,
+        client_info=ClientInfo(user_agent=" ".join(a for a in agents if a)),
+    )
+
+
+client_pool = BigQueryClientPool()
+read_client_pool = BigQueryClientPool(factory=_make_read_client)
+http_pool = _SharedSessionRequests()
+
+
+def pool_stats() -> dict[str, int]:
+    """Combined counters for the BigQuery client pool and shared HTTP session."""
+    stats = client_pool.stats()
+    # The first request through the shared session opens its connection.
+    http_reused = max(http_pool.reused - 1, 0)
+    read_reused = read_client_pool.stats()["clients_reused"]
+    stats["http_session_reuses"] = http_reused
+    stats["read_clients_reused"] = read_reused
+    stats["tls_handshakes_avoided"] += http_reused + read_reused
+    return stats
+
+
+def install_client_pool() -> None:
+    """Route ADK's BigQuery and CA API tools through the shared pools (idempotent)."""
+    if adk_bigquery_client.get_bigquery_client != client_pool.get:
+        adk_bigquery_client.get_bigquery_client = client_pool.get
+    adk_data_insights.requests = http_pool
+    adk_data_agent.requests = http_pool
+
+
+def client_for(
+    tool_context: ToolContext,
+    project: str | None,
+    location: str | None = None,
+    user_agent: str | None = None,
+) -> bigquery.Client:
+    """Return a pooled client authorised with the calling user's OAuth token.
+
+    Used by the custom tools in this package, mirroring how the ADK toolsets
+    read the token via external_access_token_key.
+
+    Raises:
+        ValueError: No access token is present in session state.
+    """
+    token = tool_context.state.get(_AUTH_ID)
+    if not token:
+        raise ValueError(
+            f"No access token found in tool_context.state with key {_AUTH_ID}."
+        )
+    client_pool.observe_token(tool_context.user_id, token)
+    return client_pool.get(
+        project=project,
+        credentials=google.oauth2.credentials.Credentials(token=token),
+        location=location,
+        user_agent=["bq-multi-agent-app", user_agent],
+    )
+
+
+def read_client_for(tool_context: ToolContext, user_agent: str | None = None) -> Any:
+    """Return a pooled Storage Read API client for the calling user's token.
+
+    Raises:
+        ValueError: No access token is present in session state.
+    """
+    token = tool_context.state.get(_AUTH_ID)
+    if not token:
+        raise ValueError(
+            f"No access token found in tool_context.state with key {_AUTH_ID}."
+        )
+    read_client_pool.observe_token(tool_context.user_id, token)
+    return read_client_pool.get(
+        project=None,
+        credentials=google.oauth2.credentials.Credentials(token=token),
+        user_agent=["bq-multi-agent-app", user_agent],
+    )
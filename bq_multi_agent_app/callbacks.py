@@ -0,0 +1,437 @@
+"""
+Tool callbacks shared by the root agent and sub-agents.
+
+Registered via before_tool_callback / after_tool_callback on each Agent:
+1. cache_table_schema — keeps a compact copy of every get_table_info result
+   in session state so later checks never need another metadata call
+2. lint_execute_sql   — runs the local SQL linter (sql_lint.py) on every
+   execute_sql call and returns rewrite hints instead of running a costly query
+3. rewrite_exploratory_query / report_query_rewrite — optional mode
+   (EXPLORATORY_QUERY_REWRITE=true) that prunes columns, injects LIMIT, and
+   samples large tables for SELECT * previews (sql_rewrite.py), then reports
+   the estimated bytes saved alongside the query result
+4. serve_cached_result / store_query_result / abandon_query_flight — per-user
+   result cache with single-flight for execute_sql and ask_data_insights
+   (query_cache.py)
+5. approximate_exploratory_query / report_approximation — optional DS agent
+   mode (APPROXIMATE_EXPLORATION=true) that rewrites aggregate queries to
+   approximate functions and TABLESAMPLE (sql_rewrite.py), then annotates the
+   result with the sample fraction and per-row error bounds
+
+ADK runs a list of before/after callbacks in order until one returns a value,
+so callbacks that only observe or annotate mutate in place and return None.
+
+Centralised here (like constants.py) so sub-agents can import the callbacks
+without a circular import through agent.py.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
+import math
+import os
+from typing import Any
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from .bq_clients import client_for
+from .query_cache import (
+    cache_key,
+    cacheable_tables,
+    normalize_sql,
+    result_cache,
+    table_versions,
+)
+from .sql_lint import lint_sql
+from .sql_rewrite import SAMPLED_ROWS_COLUMN, approximate_query
+from .sql_rewrite import rewrite_exploratory_query as _rewrite_query
+
+logger = logging.getLogger(__name__)
+
+# Session state key holding compact table metadata keyed by project.dataset.table.
+SCHEMA_CACHE_KEY = "schema_cache"
+
+# Session state key holding digests of linted queries the agent chose to run anyway.
+_LINT_ACKNOWLEDGED_KEY = "sql_lint_acknowledged"
+
+# Invocation-scoped state key prefix carrying a rewrite report to the after callback.
+_REWRITE_REPORT_PREFIX = "temp:query_rewrite:"
+
+# Invocation-scoped state key prefix carrying an approximation report to the after callback.
+_APPROXIMATION_REPORT_PREFIX = "temp:approximation:"
+
+# Invocation-scoped state key prefix carrying a result cache key to the after callback.
+_RESULT_CACHE_PREFIX = "temp:result_cache:"
+
+# Tools whose results are cached (identical calls in flight wait up to the
+# cache's flight_seconds for the running one).
+_CACHED_TOOLS = {"execute_sql", "ask_data_insights"}
+
+# Result cache flights this process is running, by function call id. Futures
+# are kept out of session state, which is copied into event deltas.
+_runner_flights: dict[str, concurrent.futures.Future] = {}
+
+
+def _sample_percent_setting() -> float | None:
+    """APPROXIMATE_SAMPLE_PERCENT, or None (use the computed rate) if unset or invalid."""
+    value = os.getenv("APPROXIMATE_SAMPLE_PERCENT")
+    if not value:
+        return None
+    try:
+        percent = float(value)
+    except ValueError:
+        percent = None
+    if percent is None or not 0 < percent <= 100:
+        logger.warning(
+            "APPROXIMATE_SAMPLE_PERCENT=%r is not a percentage in (0, 100]; "
+            "using the computed sample rate",
+            value,
+        )
+        return None
+    return percent
+
+
+# Fixed TABLESAMPLE rate for approximate mode; None sizes it to read ~1 GB.
+_APPROXIMATE_SAMPLE_PERCENT = _sample_percent_setting()
+
+
+def compact_table_info(table_info: dict[str, Any]) -> dict[str, Any]:
+    """Reduce a get_table_info API representation to what the SQL checks need.
+
+    Args:
+        table_info: The table resource returned by get_table_info
+            (google.cloud.bigquery.Table.to_api_repr()).
+
+    Returns:
+        A dict with columns (name -> type), partitioning, row/byte counts, and
+        the last-modified timestamp in milliseconds.
+    """
+    time_partitioning = table_info.get("timePartitioning") or {}
+    range_partitioning = table_info.get("rangePartitioning") or {}
+    partition_type = time_partitioning.get("type") or (
+        "RANGE" if range_partitioning else None
+    )
+    return {
+        "columns": {
+            field["name"]: field.get("type", "")
+            for field in (table_info.get("schema") or {}).get("fields", [])
+        },
+        "partition_type": partition_type,
+        "partition_field": time_partitioning.get("field")
+        or range_partitioning.get("field"),
+        "require_partition_filter": bool(
+            table_info.get("requirePartitionFilter")
+            or time_partitioning.get("requirePartitionFilter")
+        ),
+        "num_rows": int(table_info.get("numRows") or 0),
+        "num_bytes": int(table_info.get("numBytes") or 0),
+        "last_modified": int(table_info.get("lastModifiedTime") or 0),
+        "table_type": table_info.get("type", "TABLE"),
+    }
+
+
+def cache_table_schema(
+    tool: BaseTool,
+    args: dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any,
+) -> dict | None:
+    """after_tool_callback: remember get_table_info results in session state."""
+    if tool.name != "get_table_info" or not isinstance(tool_response, dict):
+        return None
+    table_ref = tool_response.get("tableReference") or {}
+    if not table_ref or "schema" not in tool_response:
+        return None
+
+    table = ".".join(
+        (
+            table_ref.get("projectId", ""),
+            table_ref.get("datasetId", ""),
+            table_ref.get("tableId", ""),
+        )
+    )
+    # Reassign the dict so ADK records the state delta.
+    cache = dict(tool_context.state.get(SCHEMA_CACHE_KEY) or {})
+    cache[table] = compact_table_info(tool_response)
+    tool_context.state[SCHEMA_CACHE_KEY] = cache
+    return None
+
+
+def lint_execute_sql(
+    tool: BaseTool, args: dict[str, Any], tool_context: ToolContext
+) -> dict | None:
+    """before_tool_callback: return lint findings instead of running a costly query.
+
+    Each flagged query is rejected once. If the agent re-submits the identical
+    query (e.g. the user confirmed the full scan is intended), it runs as-is.
+    """
+    if tool.name != "execute_sql" or args.get("dry_run"):
+        return None
+    query = args.get("query") or ""
+    findings = lint_sql(
+        query,
+        tool_context.state.get(SCHEMA_CACHE_KEY) or {},
+        default_project=args.get("project_id"),
+    )
+    if not findings:
+        return None
+
+    digest = hashlib.sha256(" ".join(query.split()).encode()).hexdigest()[:16]
+    acknowledged = list(tool_context.state.get(_LINT_ACKNOWLEDGED_KEY) or [])
+    if digest in acknowledged:
+        return None
+    tool_context.state[_LINT_ACKNOWLEDGED_KEY] = acknowledged + [digest]
+
+    logger.info("lint_execute_sql: %d finding(s) for query %s", len(findings), digest)
+    return {
+        "status": "NEEDS_REVISION",
+        "lint_findings": findings,
+        "next_step": (
+            "The query was NOT executed. Revise it using the hints above. If the "
+            "flagged pattern is intentional, call execute_sql again with the "
+            "identical query to run it as-is."
+        ),
+    }
+
+
+def rewrite_exploratory_query(
+    tool: BaseTool, args: dict[str, Any], tool_context: ToolContext
+) -> dict | None:
+    """before_tool_callback: make SELECT * previews cheaper when the mode is on.
+
+    Rewrites args["query"] in place and stashes the report for
+    report_query_rewrite. Always returns None so later callbacks (lint) and the
+    tool itself still run, against the rewritten query.
+    """
+    if tool.name != "execute_sql" or args.get("dry_run"):
+        return None
+    if os.getenv("EXPLORATORY_QUERY_REWRITE", "false").lower() != "true":
+        return None
+    report = _rewrite_query(
+        args.get("query") or "",
+        tool_context.state.get(SCHEMA_CACHE_KEY) or {},
+        default_project=args.get("project_id"),
+    )
+    if report is None:
+        return None
+
+    args["query"] = report["query"]
+    key = _REWRITE_REPORT_PREFIX + str(tool_context.function_call_id)
+    tool_context.state[key] = report
+    logger.info(
+        "rewrite_exploratory_query: %s, ~%d bytes saved",
+        report["table"],
+        report["estimated_bytes_saved"],
+    )
+    return None
+
+
+def report_query_rewrite(
+    tool: BaseTool,
+    args: dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any,
+) -> dict | None:
+    """after_tool_callback: attach the rewrite report to the execute_sql result."""
+    if tool.name != "execute_sql" or not isinstance(tool_response, dict):
+        return None
+    key = _REWRITE_REPORT_PREFIX + str(tool_context.function_call_id)
+    report = tool_context.state.get(key)
+    if not report:
+        return None
+    tool_context.state[key] = None
+    tool_response["query_rewrite"] = report
+    return None
+
+
+def approximate_exploratory_query(
+    tool: BaseTool, args: dict[str, Any], tool_context: ToolContext
+) -> dict | None:
+    """before_tool_callback: run aggregate queries approximately when the mode is on.
+
+    Rewrites args["query"] in place (APPROX_COUNT_DISTINCT, TABLESAMPLE with
+    scaled COUNT/SUM) and stashes the report for report_approximation.
+    APPROXIMATE_SAMPLE_PERCENT overrides the sample rate sized to read ~1 GB.
+    """
+    if tool.name != "execute_sql" or args.get("dry_run"):
+        return None
+    if os.getenv("APPROXIMATE_EXPLORATION", "false").lower() != "true":
+        return None
+    report = approximate_query(
+        args.get("query") or "",
+        tool_context.state.get(SCHEMA_CACHE_KEY) or {},
+        default_project=args.get("project_id"),
+        sample_percent=_APPROXIMATE_SAMPLE_PERCENT,
+    )
+    if report is None:
+        return None
+
+    args["query"] = report["query"]
+    key = _APPROXIMATION_REPORT_PREFIX + str(tool_context.function_call_id)
+    tool_context.state[key] = report
+    logger.info(
+        "approximate_exploratory_query: %s, %s",
+        report["table"],
+        ", ".join(report["approximations"]),
+    )
+    return None
+
+
+def report_approximation(
+    tool: BaseTool,
+    args: dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any,
+) -> dict | None:
+    """after_tool_callback: annotate an approximate result with its error bounds.
+
+    Replaces the sampled-rows helper column on each row with
+    _relative_error_95, the 95% relative error bound of that row's counts.
+    """
+    if tool.name != "execute_sql" or not isinstance(tool_response, dict):
+        return None
+    key = _APPROXIMATION_REPORT_PREFIX + str(tool_context.function_call_id)
+    report = tool_context.state.get(key)
+    if not report:
+        return None
+    tool_context.state[key] = None
+    for row in tool_response.get("rows") or []:
+        if isinstance(row, dict) and SAMPLED_ROWS_COLUMN in row:
+            sampled = row.pop(SAMPLED_ROWS_COLUMN)
+            row["_relative_error_95"] = (
+                round(1.96 / math.sqrt(sampled), 4) if sampled else None
+            )
+    tool_response["approximation"] = {
+        k: report[k]
+        for k in (
+            "approximations",
+            "sample_percent",
+            "scale_factor",
+            "error_notes",
+            "original_query",
+        )
+    }
+    return None
+
+
+async def _result_cache_key(
+    tool_name: str, args: dict[str, Any], tool_context: ToolContext
+) -> str | None:
+    """Build the cache key for a tool call, or None if the call is not cacheable."""
+    project = args.get("project_id")
+    if tool_name == "execute_sql":
+        if args.get("dry_run"):
+            return None
+        query = args.get("query") or ""
+        tables = cacheable_tables(query, default_project=project)
+        request = normalize_sql(query)
+    else:
+        tables = sorted(
+            ".".join(
+                (r.get("projectId", ""), r.get("datasetId", ""), r.get("tableId", ""))
+            )
+            for r in args.get("table_references") or []
+        )
+        request = " ".join((args.get("user_query_with_context") or "").split())
+    if not tables:
+        return None
+
+    try:
+        client = client_for(tool_context, project, user_agent="query_result_cache")
+    except ValueError:
+        return None
+    versions = await asyncio.to_thread(table_versions, client, tables)
+    if versions is None:
+        return None
+    return cache_key(tool_context.user_id, tool_name, project, request, versions)
+
+
+async def serve_cached_result(
+    tool: BaseTool, args: dict[str, Any], tool_context: ToolContext
+) -> dict | None:
+    """before_tool_callback: answer repeated queries from the per-user result cache.
+
+    On a miss the caller becomes the single runner for the key; identical calls
+    that arrive while it runs wait for its result instead of starting a job.
+    Register last in the before list so it sees the final (rewritten) query.
+    """
+    if tool.name not in _CACHED_TOOLS:
+        return None
+    key = await _result_cache_key(tool.name, args, tool_context)
+    if key is None:
+        return None
+
+    cached = result_cache.get(key)
+    if cached is not None:
+        result, age = cached
+        result["result_cache"] = {"status": "HIT", "age_seconds": round(age, 1)}
+        logger.info("serve_cached_result: %s cache hit (%.0fs old)", tool.name, age)
+        return result
+
+    flight, is_runner = result_cache.claim_flight(key)
+    if is_runner:
+        call_id = str(tool_context.function_call_id)
+        tool_context.state[_RESULT_CACHE_PREFIX + call_id] = key
+        _runner_flights[call_id] = flight
+        # ADK runs each call (callbacks and tool) in its own task. Release the
+        # flight when that task ends, so a cancelled call (client disconnect,
+        # a ParallelAgent sibling failing) does not leave waiters blocked.
+        # After store_query_result has released it, this is a no-op.
+        task = asyncio.current_task()
+        if task is not None:
+
+            def release(done: asyncio.Task) -> None:
+                result_cache.abandon(key, flight)
+                if done.cancelled() or done.exception() is not None:
+                    _runner_flights.pop(call_id, None)
+
+            task.add_done_callback(release)
+        return None
+    shared = await result_cache.wait(key, flight)
+    if not shared:
+        return None
+    result = shared
+    result["result_cache"] = {"status": "COALESCED", "age_seconds": 0.0}
+    logger.info("serve_cached_result: %s joined an in-flight call", tool.name)
+    return result
+
+
+def store_query_result(
+    tool: BaseTool,
+    args: dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any,
+) -> dict | None:
+    """after_tool_callback: cache the runner's result and release waiting calls.
+
+    ERROR responses are not shared; waiting calls run the tool themselves.
+    """
+    call_id = str(tool_context.function_call_id)
+    key = tool_context.state.get(_RESULT_CACHE_PREFIX + call_id)
+    flight = _runner_flights.pop(call_id, None)
+    if tool.name not in _CACHED_TOOLS or not key or flight is None:
+        return None
+    tool_context.state[_RESULT_CACHE_PREFIX + call_id] = None
+    if isinstance(tool_response, dict) and tool_response.get("status") != "ERROR":
+        result_cache.complete(key, tool_response, flight)
+    else:
+        result_cache.abandon(key, flight)
+    return None
+
+
+def abandon_query_flight(
+    tool: BaseTool,
+    args: dict[str, Any],
+    tool_context: ToolContext,
+    error: Exception,
+) -> dict | None:
+    """on_tool_error_callback: release waiting calls when the runner raised."""
+    call_id = str(tool_context.function_call_id)
+    key = tool_context.state.get(_RESULT_CACHE_PREFIX + call_id)
+    flight = _runner_flights.pop(call_id, None)
+    if key and flight is not None:
+        tool_context.state[_RESULT_CACHE_PREFIX + call_id] = None
+        result_cache.abandon(key, flight)
+    return None
@@ -0,0 +1,275 @@
+"""
+Follow-up charts from Conversational Analytics results without re-querying.
+
+PATH D (ask_data_insights) and PATH A (ask_data_agent) return rows but no chart:
+ADK drops the CA API's chart messages (see README "CA API Chart / Visualization
+Limitations"). This module keeps those rows so a follow-up "now plot that"
+costs no BigQuery job and no Code Interpreter round trip:
+1. persist_data_result — after_tool_callback that saves the last "Data
+   Retrieved" block (plus the generated SQL and question) as a session artifact
+2. render_chart        — tool that builds a Vega-Lite spec from the saved rows
+   and, when vl-convert-python is installed, renders it to a PNG artifact that
+   Gemini Enterprise displays inline
+
+Without vl-convert-python the spec is still saved; the DS agent can load the
+result artifact and plot it in Code Interpreter instead.
+"""
+
+import json
+import logging
+import re
+from typing import Any
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+# Artifact names; ADK versions each save, so the latest result/chart wins.
+RESULT_ARTIFACT = "last_query_result.json"
+_SPEC_ARTIFACT = "chart.vl.json"
+_PNG_ARTIFACT = "chart.png"
+
+# Tools whose responses carry CA API "Data Retrieved" messages.
+_CA_TOOLS = {"ask_data_insights", "ask_data_agent"}
+
+# chart_type -> Vega-Lite mark.
+_MARKS = {
+    "bar": "bar",
+    "line": "line",
+    "area": "area",
+    "scatter": "point",
+    "pie": "arc",
+}
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}(-\d{2})?([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?")
+
+logger = logging.getLogger(__name__)
+
+
+def extract_data_result(tool_response: Any) -> dict[str, Any] | None:
+    """Pull the last data block, SQL, and answer out of a CA API tool response.
+
+    Args:
+        tool_response: The dict returned by ask_data_insights / ask_data_agent,
+            with a "response" list of single-key message dicts.
+
+    Returns:
+        A dict with headers, rows, summary, sql, question, and answer, or None
+        when the response retrieved no data.
+    """
+    if not isinstance(tool_response, dict):
+        return None
+    messages = tool_response.get("response")
+    if not isinstance(messages, list):
+        return None
+
+    result: dict[str, Any] = {}
+    for message in messages:
+        if not isinstance(message, dict):
+            continue
+        if "Data Retrieved" in message:
+            result.update(message["Data Retrieved"])
+        elif "SQL Generated" in message:
+            result["sql"] = message["SQL Generated"]
+        elif "Question" in message:
+            result["question"] = message["Question"]
+        elif "Answer" in message:
+            result["answer"] = message["Answer"]
+    if not result.get("headers"):
+        return None
+    return result
+
+
+async def persist_data_result(
+    tool: BaseTool,
+    args: dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any,
+) -> dict | None:
+    """after_tool_callback: save CA API rows as an artifact for render_chart."""
+    if tool.name not in _CA_TOOLS:
+        return None
+    result = extract_data_result(tool_response)
+    if result is None:
+        return None
+    result.setdefault(
+        "question",
+        args.get("user_query_with_context") or args.get("query") or "",
+    )
+    result["tool"] = tool.name
+
+    part = types.Part.from_bytes(
+        data=json.dumps(result, default=str).encode(), mime_type="application/json"
+    )
+    try:
+        await tool_context.save_artifact(RESULT_ARTIFACT, part)
+    except ValueError:
+        # No artifact service configured (e.g. bare `adk run`) — charts fall back to PATH C.
+        logger.warning("persist_data_result: artifact service unavailable")
+        return None
+    tool_response["result_artifact"] = RESULT_ARTIFACT
+    return None
+
+
+def build_vega_lite_spec(
+    result: dict[str, Any],
+    chart_type: str,
+    x: str,
+    y: str,
+    color: str | None = None,
+    title: str | None = None,
+) -> dict[str, Any]:
+    """Build a Vega-Lite v5 spec with the result rows inlined.
+
+    Field types are inferred from the values: numbers are quantitative, ISO
+    dates are temporal, everything else is nominal.
+
+    Raises:
+        ValueError: Unknown chart type or a column not in the result.
+    """
+    mark = _MARKS.get(chart_type.lower())
+    if mark is None:
+        raise ValueError(
+            f"Unsupported chart_type '{chart_type}'. Use one of: {', '.join(_MARKS)}."
+        )
+    headers = result["headers"]
+    for column in (x, y, color):
+        if column and column not in headers:
+            raise ValueError(
+                f"Column '{column}' is not in the result. Available: {', '.join(headers)}."
+            )
+
+    records = [dict(zip(headers, row)) for row in result.get("rows", [])]
+    used = [c for c in (x, y, color) if c]
+    types_by_column = {c: _field_type([r.get(c) for r in records]) for c in used}
+    for record in records:
+        for column in used:
+            if types_by_column[column] == "quantitative" and record[column] is not None:
+                record[column] = float(record[column])
+
+    if mark == "arc":
+        encoding = {
+            "theta": {"field": y, "type": "quantitative"},
+            "color": {"field": x, "type": types_by_column[x]},
+        }
+    else:
+        encoding = {
+            "x": {"field": x, "type": types_by_column[x]},
+            "y": {"field": y, "type": types_by_column[y]},
+        }
+        if color:
+            encoding["color"] = {"field": color, "type": types_by_column[color]}
+        if mark == "bar" and types_by_column[x] == "nominal":
+            encoding["x"]["sort"] = "-y"
+
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "title": title or result.get("question", "")[:80],
+        "width": 640,
+        "height": 360,
+        "data": {"values": records},
+        "mark": {"type": mark, "tooltip": True},
+        "encoding": encoding,
+    }
+
+
+def _field_type(values: list[Any]) -> str:
+    present = [v for v in values if v not in (None, "")]
+    if not present:
+        return "nominal"
+    try:
+        for value in present:
+            float(value)
+        return "quantitative"
+    except (TypeError, ValueError):
+        pass
+    if all(isinstance(v, str) and _DATE_RE.match(v) for v in present):
+        return "temporal"
+    return "nominal"
+
+
+def _render_png(spec: dict[str, Any]) -> bytes | None:
+    """Render a Vega-Lite spec to PNG with vl-convert-python, if installed."""
+    try:
+        import vl_convert as vlc
+    except ImportError:
+        return None
+    return vlc.vegalite_to_png(vl_spec=spec, scale=2)
+
+
+async def render_chart(
+    chart_type: str,
+    x: str,
+    y: str,
+    tool_context: ToolContext,
+    color: str = "",
+    title: str = "",
+) -> dict:
+    """Charts the most recent ask_data_insights / ask_data_agent result.
+
+    Uses the rows already retrieved earlier in this conversation — no new
+    query is run. Call this when the user asks to plot or visualize a result
+    you just returned from ask_data_insights or ask_data_agent.
+
+    Args:
+        chart_type: One of "bar", "line", "area", "scatter", "pie".
+        x: Result column for the x axis (category for pie charts).
+        y: Result column for the y axis (value for pie charts).
+        tool_context: Provided by ADK.
+        color: Optional result column to split series by colour.
+        title: Optional chart title; defaults to the original question.
+
+    Returns:
+        dict: status, the chart and spec artifact names, rows plotted, and the
+        SQL/question the data came from.
+    """
+    try:
+        part = await tool_context.load_artifact(RESULT_ARTIFACT)
+    except ValueError:
+        part = None
+    if part is None or part.inline_data is None:
+        return {
+            "status": "ERROR",
+            "error_details": (
+                "No saved query result in this conversation. Answer the question "
+                "with ask_data_insights first, or delegate the chart to ds_agent."
+            ),
+        }
+    result = json.loads(part.inline_data.data)
+
+    try:
+        spec = build_vega_lite_spec(result, chart_type, x, y, color or None, title)
+    except ValueError as e:
+        return {"status": "ERROR", "error_details": str(e)}
+
+    await tool_context.save_artifact(
+        _SPEC_ARTIFACT,
+        types.Part.from_bytes(
+            data=json.dumps(spec).encode(), mime_type="application/json"
+        ),
+    )
+    response = {
+        "status": "SUCCESS",
+        "spec_artifact": _SPEC_ARTIFACT,
+        "chart_artifact": None,
+        "rows_plotted": len(spec["data"]["values"]),
+        "source": {
+            "question": result.get("question"),
+            "sql": result.get("sql"),
+            "summary": result.get("summary"),
+        },
+    }
+    png = _render_png(spec)
+    if png is None:
+        response["note"] = (
+            "PNG rendering is unavailable (vl-convert-python not installed); only "
+            "the Vega-Lite spec was saved. Delegate to ds_agent to draw the chart "
+            f"from the {RESULT_ARTIFACT} artifact."
+        )
+        return response
+
+    await tool_context.save_artifact(
+        _PNG_ARTIFACT, types.Part.from_bytes(data=png, mime_type="image/png")
+    )
+    response["chart_artifact"] = _PNG_ARTIFACT
+    return response
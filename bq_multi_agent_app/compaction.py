@@ -0,0 +1,243 @@
+"""
+Event compaction for long analyst sessions.
+
+Every tool result and code output stays in session.events, so without
+compaction each turn's prompt grows with the session. The app
+(agent.py) enables ADK event compaction: once a turn's prompt reaches
+COMPACTION_TOKEN_THRESHOLD tokens, the older events (all but the last
+COMPACTION_RETAINED_EVENTS) are replaced by one summary event built by
+AnalystEventsSummarizer:
+1. a model-written summary of the older turns — questions, tables used,
+   key figures, decisions, and open tasks
+2. large tool payloads shortened before summarization to a preview plus the
+   artifacts they were stored as (result_artifact, chart_artifact, ...)
+3. schema facts from get_table_info kept verbatim in a compact JSON block
+   (compact_table_info), merged across successive summaries
+
+Each compaction rolls the previous summary into the next one, so the prompt
+stays bounded however long the session runs. Set
+COMPACTION_TOKEN_THRESHOLD=0 to disable.
+"""
+
+import json
+import logging
+import os
+from typing import Any
+
+from google.adk.apps.app import EventsCompactionConfig
+from google.adk.apps.base_events_summarizer import BaseEventsSummarizer
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions, EventCompaction
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from .callbacks import compact_table_info
+from .constants import MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+# Prompt size (tokens) that triggers compaction after a turn; 0 disables it.
+_TOKEN_THRESHOLD = int(os.getenv("COMPACTION_TOKEN_THRESHOLD", "50000"))
+
+# Most recent raw events kept verbatim after a compaction.
+_RETAINED_EVENTS = int(os.getenv("COMPACTION_RETAINED_EVENTS", "12"))
+
+# Backstop: also compact every N turns, keeping one turn of overlap.
+_COMPACTION_INTERVAL = int(os.getenv("COMPACTION_INTERVAL", "25"))
+
+# Model that writes the summaries (default: MODEL_NAME).
+_SUMMARY_MODEL = os.getenv("COMPACTION_MODEL") or MODEL_NAME
+
+# Tool payloads longer than this are shortened to a preview before summarizing.
+_PAYLOAD_CHARS = 1500
+
+# First line of the structured schema part of a summary event.
+SCHEMA_BLOCK_HEADER = "Known table schemas (JSON):"
+
+_PROMPT_TEMPLATE = """The following is the older part of a conversation between a data
+analyst and a BigQuery analytics agent. Summarize it so the agent can continue
+the session without the original messages:
+- the questions asked and the tables, filters, and date ranges used
+- key figures and findings, with their exact numbers
+- decisions, assumptions, and unresolved questions or pending tasks
+- artifact names mentioned in the history (saved results, charts), so they
+  can be loaded again instead of re-querying
+Do not restate table schemas — they are kept separately. Be concise.
+
+{conversation_history}"""
+
+
+def _artifact_references(response: Any) -> list[str]:
+    if not isinstance(response, dict):
+        return []
+    return [
+        f"{key}={value}"
+        for key, value in response.items()
+        if key.endswith("artifact") and isinstance(value, str)
+    ]
+
+
+def _format_response(part: types.FunctionResponse, payload_chars: int) -> str:
+    response = part.response or {}
+    if part.name == "get_table_info" and "tableReference" in response:
+        ref = response["tableReference"]
+        return (
+            f"[schema of {ref.get('projectId')}.{ref.get('datasetId')}."
+            f"{ref.get('tableId')} — see known table schemas]"
+        )
+    payload = json.dumps(response, default=str)
+    if len(payload) <= payload_chars:
+        return payload
+    references = _artifact_references(response)
+    return (
+        f"{payload[:payload_chars]}… [{len(payload)} chars total"
+        + (f"; stored as {', '.join(references)}" if references else "")
+        + "]"
+    )
+
+
+def render_history(events: list[Event], payload_chars: int = _PAYLOAD_CHARS) -> str:
+    """Render events as summarizer input, with large tool payloads shortened."""
+    lines = []
+    for event in events:
+        if not event.content or not event.content.parts:
+            continue
+        for part in event.content.parts:
+            if part.thought:
+                continue
+            if part.text and not part.text.startswith(SCHEMA_BLOCK_HEADER):
+                lines.append(f"{event.author}: {part.text}")
+            elif part.function_call:
+                args = json.dumps(part.function_call.args or {}, default=str)
+                lines.append(
+                    f"{event.author} called {part.function_call.name}"
+                    f"({args[:payload_chars]})"
+                )
+            elif part.function_response:
+                lines.append(
+                    f"{part.function_response.name} returned: "
+                    + _format_response(part.function_response, payload_chars)
+                )
+            elif part.inline_data:
+                lines.append(
+                    f"{event.author}: [{part.inline_data.mime_type} attachment]"
+                )
+    return "\n".join(lines)
+
+
+def schema_facts(events: list[Event]) -> dict[str, dict[str, Any]]:
+    """Collect compact table metadata from get_table_info results and earlier summaries.
+
+    Returns:
+        compact_table_info dicts keyed by project.dataset.table; later events win.
+    """
+    facts: dict[str, dict[str, Any]] = {}
+    for event in events:
+        if not event.content or not event.content.parts:
+            continue
+        for part in event.content.parts:
+            if part.text and part.text.startswith(SCHEMA_BLOCK_HEADER):
+                try:
+                    facts.update(json.loads(part.text[len(SCHEMA_BLOCK_HEADER) :]))
+                except ValueError:
+                    logger.warning("schema_facts: unreadable schema block skipped")
+            response = part.function_response
+            if (
+                response
+                and response.name == "get_table_info"
+                and "tableReference" in (response.response or {})
+            ):
+                ref = response.response["tableReference"]
+                table = ".".join(
+                    (
+                        ref.get("projectId", ""),
+                        ref.get("datasetId", ""),
+                        ref.get("tableId", ""),
+                    )
+                )
+                facts[table] = compact_table_info(response.response)
+    return facts
+
+
+class AnalystEventsSummarizer(BaseEventsSummarizer):
+    """Summarizes older events into one compaction event with a schema block."""
+
+    def __init__(self, llm: BaseLlm, payload_chars: int = _PAYLOAD_CHARS):
+        self._llm = llm
+        self._payload_chars = payload_chars
+
+    async def maybe_summarize_events(self, *, events: list[Event]) -> Event | None:
+        if not events:
+            return None
+
+        history = render_history(events, self._payload_chars)
+        llm_request = LlmRequest(
+            model=self._llm.model,
+            contents=[
+                types.Content(
+                    role="user",
+                    parts=[
+                        types.Part(
+                            text=_PROMPT_TEMPLATE.format(conversation_history=history)
+                        )
+                    ],
+                )
+            ],
+        )
+        summary = ""
+        try:
+            async for response in self._llm.generate_content_async(
+                llm_request, stream=False
+            ):
+                if response.content and response.content.parts:
+                    summary = "".join(p.text or "" for p in response.content.parts)
+                    break
+        except Exception:  # the events stay uncompacted this turn
+            logger.exception("AnalystEventsSummarizer: summary call failed")
+            return None
+        if not summary:
+            return None
+
+        parts = [types.Part(text=f"Summary of earlier conversation:\n{summary}")]
+        facts = schema_facts(events)
+        if facts:
+            parts.append(
+                types.Part(
+                    text=f"{SCHEMA_BLOCK_HEADER}\n"
+                    + json.dumps(facts, separators=(",", ":"))
+                )
+            )
+        logger.info(
+            "AnalystEventsSummarizer: %d events (%d chars) compacted to %d chars, "
+            "%d table schemas kept",
+            len(events),
+            len(history),
+            sum(len(p.text) for p in parts),
+            len(facts),
+        )
+        return Event(
+            author="user",
+            invocation_id=Event.new_id(),
+            actions=EventActions(
+                compaction=EventCompaction(
+                    start_timestamp=events[0].timestamp,
+                    end_timestamp=events[-1].timestamp,
+                    compacted_content=types.Content(role="model", parts=parts),
+                )
+            ),
+        )
+
+
+def compaction_config() -> EventsCompactionConfig | None:
+    """Event compaction settings for the app, or None when disabled."""
+    if _TOKEN_THRESHOLD <= 0:
+        return None
+    return EventsCompactionConfig(
+        summarizer=AnalystEventsSummarizer(Gemini(model=_SUMMARY_MODEL)),
+        token_threshold=_TOKEN_THRESHOLD,
+        event_retention_size=_RETAINED_EVENTS,
+        compaction_interval=_COMPACTION_INTERVAL,
+        overlap_size=1,
+    )
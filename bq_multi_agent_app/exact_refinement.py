@@ -0,0 +1,137 @@
+"""
+Background exact refinement of approximate answers for the DS agent.
+
+In approximate mode (APPROXIMATE_EXPLORATION=true) execute_sql answers
+aggregate questions from samples and sketches, and reports the original query
+under approximation.original_query. When the user wants the exact figures:
+1. start_exact_refinement submits the original query as a job and returns at
+   once, so the conversation can continue on the approximate answer
+2. get_exact_refinement returns the exact rows once the job is done
+
+Submitted jobs are tracked in session state under EXACT_REFINEMENTS_KEY.
+"""
+
+import asyncio
+import logging
+import time
+
+from google.adk.tools.tool_context import ToolContext
+
+from .bq_clients import client_for
+from .sql_lint import split_statements
+
+# Session state key: {job_id: {project, location, submitted_at}}.
+EXACT_REFINEMENTS_KEY = "exact_refinements"
+
+_MAX_TRACKED_JOBS = 10
+
+# Rows returned by get_exact_refinement — matches execute_sql.
+_MAX_RESULT_ROWS = 50
+
+logger = logging.getLogger(__name__)
+
+
+async def start_exact_refinement(
+    project_id: str, query: str, tool_context: ToolContext
+) -> dict:
+    """Starts the exact version of an approximate query in the background.
+
+    Pass approximation.original_query from an approximate execute_sql result.
+    Returns a job_id immediately; fetch the rows later with
+    get_exact_refinement.
+
+    Args:
+        project_id: The GCP project to run the query in.
+        query: The original (exact) SELECT.
+        tool_context: Provided by ADK.
+
+    Returns:
+        dict: status and the job_id of the exact query.
+    """
+    statements = split_statements(query)
+    if len(statements) != 1 or statements[0][0].upper not in ("SELECT", "WITH"):
+        return {
+            "status": "ERROR",
+            "error_details": "start_exact_refinement accepts a single SELECT.",
+        }
+
+    def submit():
+        client = client_for(
+            tool_context, project_id, user_agent="start_exact_refinement"
+        )
+        return client.query(query, project=project_id, job_id_prefix="exact_")
+
+    try:
+        job = await asyncio.to_thread(submit)
+    except Exception as e:
+        logger.exception("start_exact_refinement: job insert failed")
+        return {"status": "ERROR", "error_details": str(e)}
+
+    jobs = dict(tool_context.state.get(EXACT_REFINEMENTS_KEY) or {})
+    jobs[job.job_id] = {
+        "project": project_id,
+        "location": job.location,
+        "submitted_at": int(time.time()),
+    }
+    tool_context.state[EXACT_REFINEMENTS_KEY] = dict(
+        list(jobs.items())[-_MAX_TRACKED_JOBS:]
+    )
+    return {"status": "SUCCESS", "job_id": job.job_id}
+
+
+async def get_exact_refinement(job_id: str, tool_context: ToolContext) -> dict:
+    """Returns the exact result of a query started with start_exact_refinement.
+
+    Args:
+        job_id: The job_id returned by start_exact_refinement.
+        tool_context: Provided by ADK.
+
+    Returns:
+        dict: job_state; once DONE, the exact rows (up to 50) and total_rows.
+    """
+    jobs = tool_context.state.get(EXACT_REFINEMENTS_KEY) or {}
+    record = jobs.get(job_id)
+    if record is None:
+        return {
+            "status": "ERROR",
+            "error_details": f"Unknown job {job_id}. Tracked jobs: "
+            f"{', '.join(jobs) or 'none'}.",
+        }
+
+    def fetch():
+        client = client_for(
+            tool_context,
+            record["project"],
+            record["location"],
+            user_agent="get_exact_refinement",
+        )
+        job = client.get_job(
+            job_id, project=record["project"], location=record["location"]
+        )
+        if job.state != "DONE" or job.error_result:
+            return job, None
+        return job, job.result(max_results=_MAX_RESULT_ROWS)
+
+    try:
+        job, rows = await asyncio.to_thread(fetch)
+    except Exception as e:
+        logger.exception("get_exact_refinement: fetch of %s failed", job_id)
+        return {"status": "ERROR", "error_details": str(e)}
+
+    if job.error_result:
+        return {
+            "status": "ERROR",
+            "job_state": job.state,
+            "error_details": job.error_result.get("message"),
+        }
+    result = {
+        "status": "SUCCESS",
+        "job_id": job_id,
+        "job_state": job.state,
+        "elapsed_seconds": int(time.time()) - record["submitted_at"],
+    }
+    if rows is not None:
+        result["rows"] = [dict(row) for row in rows]
+        result["total_rows"] = rows.total_rows
+        result["bytes_billed"] = job.total_bytes_billed
+    return result
@@ -0,0 +1,316 @@
+"""
+Incremental anomaly detection with persisted watermarks for the DS agent.
+
+The built-in detect_anomalies tool trains a temporary ARIMA_PLUS model on the
+full history on every call. detect_new_anomalies instead keeps one persisted
+model per (table, series id columns) in ANOMALY_MODEL_DATASET and:
+1. trains the model once (and again every _RETRAIN_AFTER_DAYS, or on request)
+2. scores only rows newer than the watermark with ML.DETECT_ANOMALIES on the
+   existing model
+3. advances the watermark to the newest scored timestamp
+
+The watermark and training metadata are stored in the model's description,
+so the agent and the scheduled runner (deployment/anomaly_monitor.py) share
+them without extra state. score_new_data holds the logic used by both.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import UTC, date, datetime, timedelta
+
+from google.adk.tools.tool_context import ToolContext
+from google.api_core.exceptions import NotFound
+
+from .bq_clients import client_for
+from .sql_lint import qualified_path
+
+_RETRAIN_AFTER_DAYS = 30
+
+# ARIMA_PLUS can only score points within the horizon after its training
+# data, so keep it well beyond the retrain interval for daily or hourly data.
+_HORIZON = 1000
+
+_MAX_ID_COLUMNS = 4
+
+# Anomalies returned per run; the count covers all of them.
+_MAX_ANOMALY_ROWS = 50
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_DATASET = re.compile(r"^(?:[A-Za-z0-9_-]+\.)?[A-Za-z0-9_]+$")
+
+_WATERMARK_TYPES = ("TIMESTAMP", "DATETIME", "DATE")
+
+logger = logging.getLogger(__name__)
+
+
+def model_path(table: str, timestamp_col: str, data_col: str, id_cols, dataset):
+    """Returns the persisted model for a (table, series id columns) pair."""
+    key = "|".join([table, timestamp_col, data_col, *id_cols])
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return f"{dataset}.anomaly_{digest}"
+
+
+def anomaly_model_dataset(project_id: str) -> str:
+    """Returns ANOMALY_MODEL_DATASET as project.dataset, or "" when unset.
+
+    The DS toolset is read-only, so persisted models are only created in a
+    dataset the deployment opted in to. Raises ValueError for invalid names.
+    """
+    dataset = os.getenv("ANOMALY_MODEL_DATASET", "").strip().strip("`")
+    if not dataset:
+        return ""
+    if not _DATASET.fullmatch(dataset):
+        raise ValueError(f"Invalid ANOMALY_MODEL_DATASET: {dataset!r}")
+    return dataset if "." in dataset else f"{project_id}.{dataset}"
+
+
+def _literal(value: str | None, field_type: str) -> str | None:
+    """Validates a stored watermark and renders it as a typed SQL literal."""
+    if not value:
+        return None
+    if field_type == "DATE":
+        parsed = date.fromisoformat(value[:10])
+    else:
+        parsed = datetime.fromisoformat(value)
+    return f"{field_type} '{parsed.isoformat()}'"
+
+
+def _isoformat(value) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def _columns(timestamp_col, data_col, id_cols):
+    return ", ".join([timestamp_col, data_col, *id_cols])
+
+
+def _train(client, model, table, timestamp_col, data_col, id_cols, through):
+    id_option = (
+        f"\n  time_series_id_col = [{', '.join(repr(c) for c in id_cols)}],"
+        if id_cols
+        else ""
+    )
+    sql = f"""
+CREATE OR REPLACE MODEL `{model}`
+OPTIONS (
+  model_type = 'ARIMA_PLUS',
+  time_series_timestamp_col = '{timestamp_col}',
+  time_series_data_col = '{data_col}',{id_option}
+  horizon = {_HORIZON}
+) AS
+SELECT {_columns(timestamp_col, data_col, id_cols)}
+FROM `{table}`
+WHERE {timestamp_col} <= {through}
+""".strip()
+    job = client.query(sql, job_id_prefix="anomaly_train_")
+    job.result()
+    return job.total_bytes_billed or 0
+
+
+def score_new_data(
+    client,
+    table: str,
+    timestamp_col: str,
+    data_col: str,
+    id_cols: list[str] | None = None,
+    model_dataset: str = "",
+    threshold: float = 0.95,
+    retrain: bool = False,
+) -> dict:
+    """Scores rows newer than the watermark with a persisted ARIMA_PLUS model.
+
+    Trains the model first when it does not exist yet, is older than
+    _RETRAIN_AFTER_DAYS, or retrain is set; a first run scores the training
+    history itself. Raises ValueError for invalid arguments.
+
+    Args:
+        client: A bigquery.Client billed to the table's project.
+        table: The source table, project.dataset.table.
+        timestamp_col: The TIMESTAMP, DATETIME or DATE column.
+        data_col: The numeric column to score.
+        id_cols: Columns that identify separate series, if any.
+        model_dataset: Dataset for the persisted model.
+        threshold: anomaly_prob_threshold for ML.DETECT_ANOMALIES.
+        retrain: Retrain the model on all scored data before scoring.
+
+    Returns:
+        dict: anomalies (up to 50), counts, and the old and new watermark.
+    """
+    id_cols = list(id_cols or [])
+    for column in [timestamp_col, data_col, *id_cols]:
+        if not _IDENTIFIER.match(column):
+            raise ValueError(f"Invalid column name: {column!r}.")
+    if len(id_cols) > _MAX_ID_COLUMNS:
+        raise ValueError(f"At most {_MAX_ID_COLUMNS} series id columns.")
+    if not 0 < threshold < 1:
+        raise ValueError("threshold must be between 0 and 1.")
+    if not model_dataset:
+        raise ValueError(
+            "No model dataset: set ANOMALY_MODEL_DATASET to a dataset where "
+            "anomaly models may be created."
+        )
+
+    source = client.get_table(table)
+    field_type = next(
+        (f.field_type for f in source.schema if f.name == timestamp_col), None
+    )
+    if field_type not in _WATERMARK_TYPES:
+        raise ValueError(
+            f"{timestamp_col} must be one of {', '.join(_WATERMARK_TYPES)}, "
+            f"not {field_type}."
+        )
+
+    model_id = model_path(table, timestamp_col, data_col, id_cols, model_dataset)
+    try:
+        model = client.get_model(model_id)
+        meta = json.loads(model.description or "{}")
+    except NotFound:
+        model, meta = None, {}
+    watermark = _literal(meta.get("scored_through"), field_type)
+
+    new_rows_filter = f"{timestamp_col} > {watermark}" if watermark else "TRUE"
+    latest = next(
+        iter(
+            client.query_and_wait(
+                f"SELECT MAX({timestamp_col}) AS latest, "
+                f"COUNTIF({new_rows_filter}) AS new_rows FROM `{table}`"
+            )
+        )
+    )
+    result = {
+        "model": model_id,
+        "watermark": meta.get("scored_through"),
+        "new_rows": latest["new_rows"],
+        "retrained": False,
+        "anomalies": [],
+        "anomaly_count": 0,
+    }
+    if not latest["new_rows"]:
+        return result
+    through = _literal(_isoformat(latest["latest"]), field_type)
+
+    stale = model is not None and model.created < datetime.now(UTC) - timedelta(
+        days=_RETRAIN_AFTER_DAYS
+    )
+    if model is None or stale or retrain:
+        # Retrain on scored data only, so new rows are still scored as unseen.
+        bytes_billed = _train(
+            client,
+            model_id,
+            table,
+            timestamp_col,
+            data_col,
+            id_cols,
+            watermark or through,
+        )
+        result.update(retrained=True, training_bytes_billed=bytes_billed)
+        meta["trained_through"] = meta.get("scored_through") or _isoformat(
+            latest["latest"]
+        )
+
+    # Without a watermark there is nothing to score but the training history.
+    target = (
+        f",\n  (SELECT {_columns(timestamp_col, data_col, id_cols)} FROM `{table}`"
+        f"\n   WHERE {timestamp_col} > {watermark} AND {timestamp_col} <= {through})"
+        if watermark
+        else ""
+    )
+    rows = list(
+        client.query_and_wait(
+            f"""
+SELECT *, COUNT(*) OVER () AS _anomaly_count
+FROM ML.DETECT_ANOMALIES(
+  MODEL `{model_id}`,
+  STRUCT({threshold} AS anomaly_prob_threshold){target})
+WHERE is_anomaly
+ORDER BY anomaly_probability DESC
+LIMIT {_MAX_ANOMALY_ROWS}
+""".strip()
+        )
+    )
+    result["anomaly_count"] = rows[0]["_anomaly_count"] if rows else 0
+    result["anomalies"] = [
+        json.loads(
+            json.dumps(
+                {k: v for k, v in row.items() if k != "_anomaly_count"}, default=str
+            )
+        )
+        for row in rows
+    ]
+
+    meta.update(
+        source=table,
+        timestamp_col=timestamp_col,
+        data_col=data_col,
+        id_cols=id_cols,
+        scored_through=_isoformat(latest["latest"]),
+    )
+    model = client.get_model(model_id)
+    model.description = json.dumps(meta)
+    client.update_model(model, ["description"])
+    result["scored_through"] = meta["scored_through"]
+    return result
+
+
+async def detect_new_anomalies(
+    project_id: str,
+    table: str,
+    timestamp_col: str,
+    data_col: str,
+    tool_context: ToolContext,
+    id_cols: list[str] | None = None,
+    threshold: float = 0.95,
+    retrain: bool = False,
+) -> dict:
+    """Detects anomalies in rows added since the last check of this series.
+
+    Reuses a persisted ARIMA_PLUS model per table and series id columns and
+    scores only rows newer than its watermark, so recurring checks do not
+    rescan the history. The first call trains the model and scores the
+    existing history. Use detect_anomalies for one-off analysis.
+
+    Args:
+        project_id: The GCP project to run the queries in.
+        table: The source table, project.dataset.table or dataset.table.
+        timestamp_col: The TIMESTAMP, DATETIME or DATE column.
+        data_col: The numeric column to check.
+        tool_context: Provided by ADK.
+        id_cols: Columns that identify separate series, e.g. ["store_id"].
+        threshold: Anomaly probability threshold, default 0.95.
+        retrain: Retrain the model before scoring, e.g. after a level shift.
+
+    Returns:
+        dict: status, new_rows, anomaly_count, anomalies (up to 50), the old
+        watermark and the new scored_through.
+    """
+    try:
+        table_path = qualified_path(table, project_id)
+        dataset = anomaly_model_dataset(project_id)
+    except ValueError as e:
+        return {"status": "ERROR", "error_details": str(e)}
+
+    def run():
+        client = client_for(tool_context, project_id, user_agent="detect_new_anomalies")
+        return score_new_data(
+            client,
+            table_path,
+            timestamp_col,
+            data_col,
+            id_cols,
+            dataset,
+            threshold,
+            retrain,
+        )
+
+    try:
+        result = await asyncio.to_thread(run)
+    except ValueError as e:
+        return {"status": "ERROR", "error_details": str(e)}
+    except Exception as e:
+        logger.exception("detect_new_anomalies: %s failed", table_path)
+        return {"status": "ERROR", "error_details": str(e)}
+    return {"status": "SUCCESS", **result}
@@ -0,0 +1,259 @@
+"""
+Large-result fetch path for the DS agent: BigQuery Storage Read API → Code Interpreter.
+
+execute_sql returns at most 50 rows as JSON dicts through the REST API, which
+is both capped and slow for statistics that need tens of thousands of rows.
+fetch_large_result instead:
+1. Runs the query as a job — BigQuery materialises every query result into
+   an anonymous temporary table (kept 24 hours)
+2. Reads that table with the Storage Read API in Arrow format, one thread per
+   read stream (parallel streams), via read_table_arrow
+3. Writes the Arrow table to a compressed CSV or Parquet file and attaches it
+   to the Code Interpreter as an input file, so Python code can call
+   pd.read_csv / pd.read_parquet on it directly
+
+Only the file name, row count, and schema go back to the model — never the
+rows. See benchmarks/bench_large_result_fetch.py for REST vs Storage Read
+throughput.
+"""
+
+import asyncio
+import base64
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from google.adk.tools.tool_context import ToolContext
+
+from .bq_clients import client_for, read_client_for
+from .sql_lint import split_statements
+
+# Largest result fetched; aggregate in BigQuery beyond this.
+_MAX_ROWS = 2_000_000
+
+# ADK re-sends Code Interpreter input files with every code execution, so keep
+# them small enough for the extension request.
+_MAX_FILE_BYTES = 32 * 1024**2
+
+# The attached files live in session state, which is persisted with every
+# state delta and re-sent on every execution: keep the newest few, bounded in
+# total (base64) size, and evict the oldest.
+_MAX_INPUT_FILES = 3
+_MAX_INPUT_FILES_BYTES = 64 * 1024**2
+
+# Upper bound on parallel Storage Read streams (the server may return fewer).
+_MAX_STREAMS = 8
+
+# Session state key ADK's CodeExecutorContext reads Code Interpreter input files
+# from (google.adk.code_executors.code_executor_context._INPUT_FILE_KEY).
+_CODE_EXECUTOR_INPUT_FILES_KEY = "_code_executor_input_files"
+
+_FILE_FORMATS = {
+    "csv": (".csv.gz", "text/csv"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def read_table_arrow(
+    read_client: Any,
+    table_path: str,
+    billing_project: str,
+    max_streams: int = _MAX_STREAMS,
+) -> Any:
+    """Read a whole table through the Storage Read API as one Arrow table.
+
+    Args:
+        read_client: A google.cloud.bigquery_storage.BigQueryReadClient.
+        table_path: "projects/{p}/datasets/{d}/tables/{t}".
+        billing_project: Project billed for the read session.
+        max_streams: Maximum number of streams read in parallel.
+
+    Returns:
+        A pyarrow.Table with the rows of all streams concatenated.
+    """
+    import pyarrow as pa
+    from google.cloud.bigquery_storage import types
+
+    session = read_client.create_read_session(
+        parent=f"projects/{billing_project}",
+        read_session=types.ReadSession(
+            table=table_path, data_format=types.DataFormat.ARROW
+        ),
+        max_stream_count=max_streams,
+    )
+    if not session.streams:
+        schema = pa.ipc.read_schema(
+            pa.py_buffer(session.arrow_schema.serialized_schema)
+        )
+        return schema.empty_table()
+
+    def read_stream(stream):
+        return read_client.read_rows(stream.name).to_arrow(session)
+
+    with ThreadPoolExecutor(max_workers=len(session.streams)) as pool:
+        parts = list(pool.map(read_stream, session.streams))
+    return pa.concat_tables(parts)
+
+
+def encode_table(table: Any, file_format: str) -> bytes:
+    """Serialise an Arrow table as gzip CSV or zstd Parquet."""
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, sink, compression="zstd")
+    else:
+        import pyarrow.csv as pacsv
+
+        with pa.CompressedOutputStream(sink, "gzip") as stream:
+            pacsv.write_csv(table, stream)
+    return sink.getvalue().to_pybytes()
+
+
+def attach_code_interpreter_file(
+    tool_context: ToolContext, name: str, data: bytes, mime_type: str
+) -> list[str]:
+    """Make a file available to the agent's Code Interpreter, replacing any same-named file.
+
+    Older files are evicted, oldest first, to stay within _MAX_INPUT_FILES and
+    _MAX_INPUT_FILES_BYTES.
+
+    Returns:
+        Names of the evicted files.
+    """
+    files = [
+        f
+        for f in tool_context.state.get(_CODE_EXECUTOR_INPUT_FILES_KEY) or []
+        if f.get("name") != name
+    ]
+    files.append(
+        {
+            "name": name,
+            "content": base64.b64encode(data).decode(),
+            "mime_type": mime_type,
+        }
+    )
+    evicted = []
+    while len(files) > 1 and (
+        len(files) > _MAX_INPUT_FILES
+        or sum(len(f.get("content") or "") for f in files) > _MAX_INPUT_FILES_BYTES
+    ):
+        evicted.append(files.pop(0).get("name"))
+    if evicted:
+        logger.info("attach_code_interpreter_file: evicted %s", evicted)
+    # Reassign the list so ADK records the state delta.
+    tool_context.state[_CODE_EXECUTOR_INPUT_FILES_KEY] = files
+    return evicted
+
+
+async def fetch_large_result(
+    project_id: str,
+    query: str,
+    file_name: str,
+    tool_context: ToolContext,
+    file_format: str = "csv",
+) -> dict:
+    """Runs a SELECT and hands the full result to Code Interpreter as a file.
+
+    Use this instead of execute_sql when the analysis needs more rows than
+    execute_sql returns (it stops at 50) — e.g. distributions, correlations,
+    or statistical tests over thousands of rows. The rows are not returned
+    here; read the file in Code Interpreter, e.g.
+    `df = pd.read_csv("orders.csv.gz")`.
+
+    Args:
+        project_id: The GCP project to run the query in.
+        query: A single BigQuery SELECT. Select only the columns you need.
+        file_name: Base name for the file (letters, digits, underscores).
+        tool_context: Provided by ADK.
+        file_format: "csv" (gzip, default) or "parquet".
+
+    Returns:
+        dict: status, the file name to read in Code Interpreter, row count,
+        column types, file size, and fetch timings, plus evicted_files when
+        older files were detached to make room (fetch them again if needed).
+    """
+    if file_format not in _FILE_FORMATS:
+        return {
+            "status": "ERROR",
+            "error_details": f"file_format must be one of {', '.join(_FILE_FORMATS)}.",
+        }
+    statements = split_statements(query)
+    if len(statements) != 1 or statements[0][0].upper not in ("SELECT", "WITH", "("):
+        return {
+            "status": "ERROR",
+            "error_details": "fetch_large_result accepts a single SELECT statement.",
+        }
+    extension, mime_type = _FILE_FORMATS[file_format]
+    name = (re.sub(r"[^A-Za-z0-9_]", "_", file_name) or "result") + extension
+
+    def fetch():
+        client = client_for(tool_context, project_id, user_agent="fetch_large_result")
+        started = time.perf_counter()
+        job = client.query(query, project=project_id)
+        rows = job.result(max_results=0)
+        query_seconds = time.perf_counter() - started
+        if rows.total_rows > _MAX_ROWS:
+            return None, rows.total_rows, query_seconds, 0.0
+        destination = job.destination
+        table = read_table_arrow(
+            read_client_for(tool_context, user_agent="fetch_large_result"),
+            f"projects/{destination.project}/datasets/{destination.dataset_id}"
+            f"/tables/{destination.table_id}",
+            billing_project=project_id,
+        )
+        return table, rows.total_rows, query_seconds, time.perf_counter() - started
+
+    try:
+        table, total_rows, query_seconds, total_seconds = await asyncio.to_thread(fetch)
+    except Exception as e:
+        logger.exception("fetch_large_result: fetch failed")
+        return {"status": "ERROR", "error_details": str(e)}
+    if table is None:
+        return {
+            "status": "ERROR",
+            "error_details": f"Result has {total_rows} rows (limit {_MAX_ROWS}). "
+            "Aggregate, filter, or sample in SQL first.",
+        }
+
+    data = encode_table(table, file_format)
+    if len(data) > _MAX_FILE_BYTES:
+        return {
+            "status": "ERROR",
+            "error_details": f"Result file is {len(data) // 1024**2} MB "
+            f"(limit {_MAX_FILE_BYTES // 1024**2} MB). Select fewer columns or rows.",
+        }
+    evicted = attach_code_interpreter_file(tool_context, name, data, mime_type)
+
+    read_seconds = max(total_seconds - query_seconds, 1e-6)
+    logger.info(
+        "fetch_large_result: %d rows in %.2fs (%.0f rows/s read)",
+        table.num_rows,
+        total_seconds,
+        table.num_rows / read_seconds,
+    )
+    result = {
+        "status": "SUCCESS",
+        "file": name,
+        "row_count": table.num_rows,
+        "columns": {field.name: str(field.type) for field in table.schema},
+        "file_bytes": len(data),
+        "query_seconds": round(query_seconds, 2),
+        "read_seconds": round(read_seconds, 2),
+        "rows_per_second": round(table.num_rows / read_seconds),
+        "usage": (
+            f'df = pd.read_parquet("{name}")'
+            if file_format == "parquet"
+            else f'df = pd.read_csv("{name}")'
+        ),
+    }
+    if evicted:
+        # The model must fetch these again before reading them.
+        result["evicted_files"] = evicted
+    return result
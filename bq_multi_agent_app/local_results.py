@@ -0,0 +1,402 @@
+"""
+Local drill-down cache: answer follow-up questions on a result set in DuckDB.
+
+Analyst sessions drill repeatedly into the same result ("now by region", "now
+only Q3"), and each step would otherwise be a new BigQuery job. When
+LOCAL_RESULT_CACHE=true and duckdb is installed:
+1. store_local_result  — after_tool_callback that writes every complete (not
+   truncated) execute_sql / ask_data_insights / ask_data_agent result to a
+   per-session Parquet file and names it in the tool response (local_table)
+2. cache_query_result  — tool that runs a SELECT once and downloads the full
+   result (up to _MAX_LOCAL_ROWS) for drill-downs beyond the 50 rows the
+   BigQuery tools return
+3. query_cached_result — tool that runs DuckDB SQL over those tables in
+   milliseconds, returning provenance (source query, fetch time) and whether
+   the source BigQuery tables changed since the fetch
+
+DuckDB runs in memory with external file/network access disabled, over Arrow
+tables read from the session's Parquet files. Table metadata lives in session
+state; the Parquet files live on local disk, so on a multi-instance deployment
+a follow-up may land on an instance without them — the tool then says so and
+the agent queries BigQuery as usual.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import UTC, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from .bq_clients import client_for
+from .query_cache import table_versions
+from .sql_lint import referenced_tables, split_statements
+
+# Session state key: local table name -> provenance metadata.
+LOCAL_RESULTS_KEY = "local_results"
+
+# Largest result cache_query_result will download, and tables kept per session.
+_MAX_LOCAL_ROWS = 200_000
+_MAX_TABLES_PER_SESSION = 20
+
+# Session directories kept on disk; the least recently used are deleted.
+_MAX_SESSION_DIRS = 100
+
+# Rows returned to the model from a local query.
+_MAX_RESULT_ROWS = 50
+
+_CA_TOOLS = {"ask_data_insights", "ask_data_agent"}
+
+logger = logging.getLogger(__name__)
+
+
+def _enabled() -> bool:
+    if os.getenv("LOCAL_RESULT_CACHE", "false").lower() != "true":
+        return False
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        logger.warning("LOCAL_RESULT_CACHE=true but duckdb is not installed")
+        return False
+    return True
+
+
+def _store_root() -> Path:
+    return Path(
+        os.getenv("LOCAL_RESULT_CACHE_DIR")
+        or Path(tempfile.gettempdir()) / "bq_agent_results"
+    )
+
+
+def _session_dir(tool_context: ToolContext) -> Path:
+    """Per-session directory, named by a hash so ids never reach the filesystem."""
+    digest = hashlib.sha256(
+        f"{tool_context.user_id}/{tool_context.session.id}".encode()
+    ).hexdigest()[:24]
+    return _store_root() / digest
+
+
+def _prune_session_dirs(root: Path) -> None:
+    dirs = sorted(
+        (d for d in root.iterdir() if d.is_dir()), key=lambda d: d.stat().st_mtime
+    )
+    for stale in dirs[:-_MAX_SESSION_DIRS]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def _coerce_numeric(records: list[dict[str, Any]]) -> None:
+    """Turn all-numeric string columns (as the CA API returns them) into numbers."""
+    for column in records[0] if records else {}:
+        values = [r[column] for r in records if r[column] not in (None, "")]
+        if not values or not all(isinstance(v, str) for v in values):
+            continue
+        for cast in (int, float):
+            try:
+                converted = {v: cast(v) for v in values}
+            except ValueError:
+                continue
+            for record in records:
+                record[column] = converted.get(record[column], record[column])
+            break
+
+
+def save_local_table(
+    tool_context: ToolContext,
+    table: Any,
+    source: dict[str, Any],
+) -> str:
+    """Write an Arrow table to the session store and record its provenance.
+
+    Args:
+        tool_context: The calling tool's context (user, session, state).
+        table: A pyarrow.Table with the result rows.
+        source: Provenance — tool, query or question, and source_tables.
+
+    Returns:
+        The local table name to use in query_cached_result.
+    """
+    import pyarrow.parquet as pq
+
+    directory = _session_dir(tool_context)
+    new_session = not directory.exists()
+    directory.mkdir(parents=True, exist_ok=True)
+    if new_session:
+        _prune_session_dirs(directory.parent)
+
+    tables = dict(tool_context.state.get(LOCAL_RESULTS_KEY) or {})
+    name = f"result_{max((int(n.split('_')[1]) for n in tables), default=0) + 1}"
+    pq.write_table(table, directory / f"{name}.parquet")
+
+    tables[name] = {
+        **source,
+        "row_count": table.num_rows,
+        "columns": table.column_names,
+        "fetched_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "fetched_at_ms": int(time.time() * 1000),
+    }
+    while len(tables) > _MAX_TABLES_PER_SESSION:
+        oldest = next(iter(tables))
+        (directory / f"{oldest}.parquet").unlink(missing_ok=True)
+        del tables[oldest]
+    # Reassign the dict so ADK records the state delta.
+    tool_context.state[LOCAL_RESULTS_KEY] = tables
+    return name
+
+
+def _result_records(
+    tool_name: str, args: dict[str, Any], tool_response: dict[str, Any]
+) -> tuple[list[dict[str, Any]], dict[str, Any]] | None:
+    """Extract complete result rows and provenance from a tool response."""
+    if tool_name == "execute_sql":
+        if args.get("dry_run") or tool_response.get("result_is_likely_truncated"):
+            return None
+        rows = tool_response.get("rows")
+        if not rows or not isinstance(rows[0], dict):
+            return None
+        query = args.get("query") or ""
+        return [dict(r) for r in rows], {
+            "tool": tool_name,
+            "query": query,
+            "source_tables": referenced_tables(query, args.get("project_id")),
+        }
+
+    for message in tool_response.get("response") or []:
+        data = message.get("Data Retrieved") if isinstance(message, dict) else None
+        if not data or not str(data.get("summary", "")).startswith("Showing all"):
+            continue
+        records = [dict(zip(data["headers"], row)) for row in data.get("rows", [])]
+        if not records:
+            return None
+        _coerce_numeric(records)
+        return records, {
+            "tool": tool_name,
+            "question": args.get("user_query_with_context") or args.get("query"),
+            "source_tables": [
+                ".".join((r.get("projectId"), r.get("datasetId"), r.get("tableId")))
+                for r in args.get("table_references") or []
+            ],
+        }
+    return None
+
+
+def store_local_result(
+    tool: BaseTool,
+    args: dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any,
+) -> dict | None:
+    """after_tool_callback: keep complete results for local drill-downs."""
+    if tool.name not in _CA_TOOLS | {"execute_sql"}:
+        return None
+    if not isinstance(tool_response, dict) or tool_response.get("status") != "SUCCESS":
+        return None
+    if not _enabled():
+        return None
+    extracted = _result_records(tool.name, args, tool_response)
+    if extracted is None:
+        return None
+
+    import pyarrow as pa
+
+    records, source = extracted
+    try:
+        name = save_local_table(tool_context, pa.Table.from_pylist(records), source)
+    except (pa.ArrowException, OSError) as e:
+        logger.warning("store_local_result: not stored: %s", e)
+        return None
+    tool_response["local_table"] = name
+    return None
+
+
+async def cache_query_result(
+    project_id: str, query: str, tool_context: ToolContext
+) -> dict:
+    """Runs a BigQuery SELECT once and keeps the full result for local drill-downs.
+
+    Use this before a series of follow-up breakdowns of the same data (by
+    region, by month, filtered to a segment) when the result is too large to
+    return directly. Then answer each follow-up with query_cached_result
+    instead of a new BigQuery query.
+
+    Args:
+        project_id: The GCP project to run the query in.
+        query: A single BigQuery SELECT statement. Select only the columns
+            and rows the follow-ups need.
+        tool_context: Provided by ADK.
+
+    Returns:
+        dict: status, local_table name, row_count, and columns — or an error
+        if the query is not a SELECT or returns more than 200,000 rows.
+    """
+    if not _enabled():
+        return {
+            "status": "ERROR",
+            "error_details": "Local result cache is disabled "
+            "(set LOCAL_RESULT_CACHE=true and install duckdb).",
+        }
+    statements = split_statements(query)
+    if len(statements) != 1 or statements[0][0].upper not in ("SELECT", "WITH"):
+        return {
+            "status": "ERROR",
+            "error_details": "cache_query_result accepts a single SELECT statement.",
+        }
+
+    def fetch():
+        client = client_for(tool_context, project_id, user_agent="cache_query_result")
+        rows = client.query_and_wait(query, project=project_id)
+        if rows.total_rows and rows.total_rows > _MAX_LOCAL_ROWS:
+            return None, rows.total_rows
+        return rows.to_arrow(), rows.total_rows
+
+    try:
+        table, total_rows = await asyncio.to_thread(fetch)
+    except Exception as e:
+        logger.exception("cache_query_result: query failed")
+        return {"status": "ERROR", "error_details": str(e)}
+    if table is None:
+        return {
+            "status": "ERROR",
+            "error_details": f"Result has {total_rows} rows (limit {_MAX_LOCAL_ROWS}). "
+            "Aggregate or filter in BigQuery first.",
+        }
+
+    name = save_local_table(
+        tool_context,
+        table,
+        {
+            "tool": "cache_query_result",
+            "query": query,
+            "source_tables": referenced_tables(query, project_id),
+        },
+    )
+    return {
+        "status": "SUCCESS",
+        "local_table": name,
+        "row_count": table.num_rows,
+        "columns": table.column_names,
+    }
+
+
+async def query_cached_result(sql: str, tool_context: ToolContext) -> dict:
+    """Answers a follow-up question locally from a result fetched earlier.
+
+    Use this instead of execute_sql or ask_data_insights when a previous tool
+    result in this conversation included a `local_table` name and the follow-up
+    only filters, groups, or re-aggregates that result. Runs in DuckDB with no
+    BigQuery job.
+
+    Args:
+        sql: A DuckDB SELECT over the local table(s), e.g.
+            "SELECT region, SUM(sales) AS sales FROM result_2 GROUP BY region".
+        tool_context: Provided by ADK.
+
+    Returns:
+        dict: status, rows (up to 50), and provenance per local table — the
+        source query, when it was fetched, and `source_changed` (True if the
+        BigQuery tables were modified since, None if unknown).
+    """
+    if not _enabled():
+        return {
+            "status": "ERROR",
+            "error_details": "Local result cache is disabled "
+            "(set LOCAL_RESULT_CACHE=true and install duckdb).",
+        }
+    statements = split_statements(sql)
+    if len(statements) != 1 or statements[0][0].upper not in ("SELECT", "WITH"):
+        return {
+            "status": "ERROR",
+            "error_details": "query_cached_result accepts a single SELECT statement.",
+        }
+
+    import duckdb
+    import pyarrow.parquet as pq
+
+    tables = tool_context.state.get(LOCAL_RESULTS_KEY) or {}
+    words = {t.name for t in statements[0] if t.kind in ("word", "quoted")}
+    used = [n for n in tables if n.upper() in words]
+    directory = _session_dir(tool_context)
+    missing = [n for n in used if not (directory / f"{n}.parquet").exists()]
+    if not used or missing:
+        return {
+            "status": "ERROR",
+            "error_details": (
+                f"Local table(s) {', '.join(missing) or 'none'} not available "
+                f"(known: {', '.join(tables) or 'none'}). Query BigQuery instead."
+            ),
+        }
+
+    start = time.perf_counter()
+    con = duckdb.connect(":memory:", config={"enable_external_access": False})
+    try:
+        for name in used:
+            con.register(name, pq.read_table(directory / f"{name}.parquet"))
+        cursor = con.execute(sql)
+        columns = [d[0] for d in cursor.description]
+        fetched = cursor.fetchmany(_MAX_RESULT_ROWS + 1)
+    except duckdb.Error as e:
+        return {"status": "ERROR", "error_details": f"DuckDB error: {e}"}
+    finally:
+        con.close()
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    rows = [
+        {c: _jsonable(v) for c, v in zip(columns, row)}
+        for row in fetched[:_MAX_RESULT_ROWS]
+    ]
+    provenance = {}
+    for name in used:
+        meta = tables[name]
+        provenance[name] = {
+            key: meta.get(key)
+            for key in ("tool", "query", "question", "fetched_at", "row_count")
+            if meta.get(key) is not None
+        }
+        provenance[name]["source_changed"] = await _source_changed(tool_context, meta)
+
+    result = {
+        "status": "SUCCESS",
+        "rows": rows,
+        "elapsed_ms": elapsed_ms,
+        "provenance": provenance,
+    }
+    if len(fetched) > _MAX_RESULT_ROWS:
+        result["result_is_likely_truncated"] = True
+    return result
+
+
+async def _source_changed(
+    tool_context: ToolContext, meta: dict[str, Any]
+) -> bool | None:
+    """Whether any source table was modified after the local copy was fetched."""
+    tables = meta.get("source_tables") or []
+    if not tables:
+        return None
+    try:
+        client = client_for(
+            tool_context, tables[0].split(".")[0], user_agent="query_cached_result"
+        )
+    except ValueError:
+        return None
+    versions = await asyncio.to_thread(table_versions, client, tables)
+    if versions is None:
+        return None
+    return any(v > meta["fetched_at_ms"] for v in versions.values())
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return str(value)
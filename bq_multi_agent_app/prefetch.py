@@ -0,0 +1,281 @@
+"""
+Speculative schema discovery and memory preload for the root agent.
+
+A turn used to run strictly in sequence: memory preload, the routing model
+call, then list_table_ids / get_table_info calls one model step at a time.
+start_speculative_prefetch (before_agent_callback) guesses the metadata the
+turn will need from the user message and session history and starts those
+lookups — plus the memory search — as background tasks, so they run while the
+routing model call is in flight:
+1. project.dataset.table in the message       → get_table_info
+2. project.dataset in the message             → list_table_ids
+3. tables from earlier turns (SCHEMA_CACHE_KEY) whose table or dataset name
+   appears in the message                     → get_table_info
+
+serve_prefetched_metadata (before_tool_callback) answers a matching call from
+its task, waiting for it if still running. SpeculativePreloadMemoryTool reuses
+the prefetched memory search on every model call of the turn instead of
+searching once per call. finish_speculative_prefetch (after_agent_callback)
+cancels lookups nothing asked for and logs time saved vs wasted calls.
+Cancelling stops waiting on a lookup; an HTTP request already sent finishes in
+its worker thread.
+
+Set SPECULATIVE_PREFETCH=false to disable.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.preload_memory_tool import PreloadMemoryTool
+from google.adk.tools.tool_context import ToolContext
+from google.cloud import bigquery
+
+from .bq_clients import client_for
+from .callbacks import SCHEMA_CACHE_KEY
+
+logger = logging.getLogger(__name__)
+
+_ENABLED = os.getenv("SPECULATIVE_PREFETCH", "true").lower() == "true"
+
+# Upper bound on speculative metadata lookups per turn.
+_MAX_LOOKUPS = int(os.getenv("SPECULATIVE_PREFETCH_MAX_LOOKUPS", "8"))
+
+# Concurrent turns tracked; the oldest is cancelled if a turn never finishes.
+_MAX_TRACKED_TURNS = 64
+
+# project.dataset[.table], optionally backticked. Project IDs are 6-30
+# characters: lowercase letters, digits, and hyphens.
+_REFERENCE_RE = re.compile(
+    r"(?<![\w.-])`?([a-z][a-z0-9-]{4,28}[a-z0-9])\.(\w+)(?:\.([\w$-]+))?`?(?![\w-]|\.\w)"
+)
+
+_PREFETCHED_TOOLS = {"get_table_info", "list_table_ids"}
+
+
+def speculative_lookups(
+    message: str,
+    schema_cache: dict[str, Any] | None = None,
+    max_lookups: int = _MAX_LOOKUPS,
+) -> list[tuple[str, ...]]:
+    """Guess the metadata calls a turn will make.
+
+    Args:
+        message: The user's message.
+        schema_cache: Compact table metadata from earlier turns, keyed by
+            project.dataset.table (SCHEMA_CACHE_KEY).
+        max_lookups: Upper bound on returned lookups.
+
+    Returns:
+        Tool-argument tuples, most likely first:
+        ("get_table_info", project, dataset, table) or
+        ("list_table_ids", project, dataset).
+    """
+    lookups = []
+    for project, dataset, table in _REFERENCE_RE.findall(message):
+        if table:
+            lookups.append(("get_table_info", project, dataset, table))
+        else:
+            lookups.append(("list_table_ids", project, dataset))
+
+    words = set(re.findall(r"\w+", message.lower()))
+    for path in schema_cache or {}:
+        project, dataset, table = path.rsplit(".", 2)
+        if table.lower() in words or dataset.lower() in words:
+            lookups.append(("get_table_info", project, dataset, table))
+
+    return list(dict.fromkeys(lookups))[:max_lookups]
+
+
+def _lookup(context: CallbackContext, lookup: tuple[str, ...]) -> Any:
+    """Run one metadata call the way the ADK BigQuery tool returns it."""
+    tool_name, project, dataset, *table = lookup
+    client = client_for(context, project, user_agent="speculative_prefetch")
+    dataset_ref = bigquery.DatasetReference(project, dataset)
+    if tool_name == "list_table_ids":
+        return [t.table_id for t in client.list_tables(dataset_ref)]
+    return client.get_table(dataset_ref.table(table[0])).to_api_repr()
+
+
+class SpeculativePrefetch:
+    """Background lookups for one turn, and how much of their work was used."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.lookups: dict[tuple[str, ...], asyncio.Task] = {}
+        self.memory: asyncio.Task | None = None
+        self.finished_at: dict[Any, float] = {}
+        self.served: set[Any] = set()
+        self.seconds_saved = 0.0
+
+    def track(self, key: Any, task: asyncio.Task) -> asyncio.Task:
+        def finished(task: asyncio.Task) -> None:
+            self.finished_at[key] = time.monotonic()
+            if not task.cancelled():
+                task.exception()  # retrieved here so unused failures are not logged
+
+        task.add_done_callback(finished)
+        return task
+
+    async def take(self, key: Any, task: asyncio.Task) -> Any:
+        """Result of a prefetched task; credits the time it ran ahead of the request."""
+        requested_at = time.monotonic()
+        result = await asyncio.shield(task)
+        if key not in self.served:
+            self.served.add(key)
+            ready_at = min(self.finished_at.get(key, requested_at), requested_at)
+            self.seconds_saved += ready_at - self.started_at
+        return result
+
+
+_turns: OrderedDict[str, SpeculativePrefetch] = OrderedDict()
+_lock = threading.Lock()
+_stats = {
+    "turns": 0,
+    "lookups_started": 0,
+    "lookups_used": 0,
+    "lookups_wasted": 0,
+    "memory_searches_used": 0,
+    "seconds_saved": 0.0,
+}
+
+
+def prefetch_stats() -> dict[str, Any]:
+    """Process-wide totals: lookups started, used, and wasted, and seconds saved."""
+    with _lock:
+        return {**_stats, "seconds_saved": round(_stats["seconds_saved"], 2)}
+
+
+def _user_text(context: CallbackContext) -> str:
+    content = context.user_content
+    if not content or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+
+async def start_speculative_prefetch(callback_context: CallbackContext) -> None:
+    """before_agent_callback: start likely metadata lookups and the memory search."""
+    message = _user_text(callback_context)
+    if not _ENABLED or not message:
+        return
+
+    prefetch = SpeculativePrefetch()
+    for lookup in speculative_lookups(
+        message, callback_context.state.get(SCHEMA_CACHE_KEY)
+    ):
+        prefetch.lookups[lookup] = prefetch.track(
+            lookup,
+            asyncio.create_task(asyncio.to_thread(_lookup, callback_context, lookup)),
+        )
+    # Same query PreloadMemoryTool would send: the first text part.
+    query = callback_context.user_content.parts[0].text
+    if query:
+        prefetch.memory = prefetch.track(
+            "memory", asyncio.create_task(callback_context.search_memory(query))
+        )
+
+    with _lock:
+        _turns[callback_context.invocation_id] = prefetch
+        _stats["turns"] += 1
+        _stats["lookups_started"] += len(prefetch.lookups)
+        while len(_turns) > _MAX_TRACKED_TURNS:
+            _cancel(_turns.popitem(last=False)[1])
+    if prefetch.lookups:
+        logger.info(
+            "start_speculative_prefetch: %d metadata lookups started: %s",
+            len(prefetch.lookups),
+            [".".join(lookup[1:]) for lookup in prefetch.lookups],
+        )
+
+
+async def serve_prefetched_metadata(
+    tool: BaseTool, args: dict[str, Any], tool_context: ToolContext
+) -> Any:
+    """before_tool_callback: answer a metadata call from its speculative lookup.
+
+    Returns the same value the tool would (a table resource dict or a list of
+    table IDs). A lookup that failed falls through to the real tool call.
+    """
+    if tool.name not in _PREFETCHED_TOOLS:
+        return None
+    prefetch = _turns.get(tool_context.invocation_id)
+    if prefetch is None:
+        return None
+    lookup = (tool.name, args.get("project_id"), args.get("dataset_id"))
+    if tool.name == "get_table_info":
+        lookup += (args.get("table_id"),)
+    task = prefetch.lookups.get(lookup)
+    if task is None or task.cancelled():
+        return None
+    try:
+        result = await prefetch.take(lookup, task)
+    except Exception as e:  # noqa: BLE001 — the tool reports the error itself
+        logger.info("serve_prefetched_metadata: %s failed: %s", ".".join(lookup[1:]), e)
+        return None
+    logger.info("serve_prefetched_metadata: %s served", ".".join(lookup[1:]))
+    return result
+
+
+class SpeculativePreloadMemoryTool(PreloadMemoryTool):
+    """PreloadMemoryTool that reuses the turn's prefetched memory search.
+
+    PreloadMemoryTool searches memory before every model call of a turn. This
+    subclass hands it the search started by start_speculative_prefetch, so the
+    turn searches once and the search overlaps the agent's setup callbacks.
+    """
+
+    async def process_llm_request(
+        self, *, tool_context: ToolContext, llm_request: LlmRequest
+    ) -> None:
+        prefetch = _turns.get(tool_context.invocation_id)
+        if prefetch is not None and prefetch.memory is not None:
+            task = prefetch.memory
+
+            async def prefetched_search(query: str) -> Any:
+                return await prefetch.take("memory", task)
+
+            # The base class formats whatever search_memory returns.
+            tool_context.search_memory = prefetched_search
+        await super().process_llm_request(
+            tool_context=tool_context, llm_request=llm_request
+        )
+
+
+def _cancel(prefetch: SpeculativePrefetch) -> tuple[int, int]:
+    """Cancel unfinished work; returns (lookups used, lookups wasted)."""
+    for task in [*prefetch.lookups.values(), prefetch.memory]:
+        if task is not None and not task.done():
+            task.cancel()
+    used = len(prefetch.served & prefetch.lookups.keys())
+    wasted = len(prefetch.lookups) - used
+    _stats["lookups_used"] += used
+    _stats["lookups_wasted"] += wasted
+    _stats["memory_searches_used"] += "memory" in prefetch.served
+    _stats["seconds_saved"] += prefetch.seconds_saved
+    return used, wasted
+
+
+def finish_speculative_prefetch(callback_context: CallbackContext) -> None:
+    """after_agent_callback: cancel unused lookups and log time saved vs wasted."""
+    with _lock:
+        prefetch = _turns.pop(callback_context.invocation_id, None)
+        if prefetch is None:
+            return
+        used, wasted = _cancel(prefetch)
+    logger.info(
+        "finish_speculative_prefetch: %d lookups used, %d wasted, memory %s, "
+        "%.2fs saved (totals: %s)",
+        used,
+        wasted,
+        "used" if "memory" in prefetch.served else "unused",
+        prefetch.seconds_saved,
+        prefetch_stats(),
+    )
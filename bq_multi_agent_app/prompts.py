@@ -20,6 +20,13 @@ def return_instructions_root() -> str:
 
     Choose ONE path. Check in this order:
 
+    **COMPOUND PATH**: The request has two or more INDEPENDENT parts that belong to different
+    paths — own-data metrics (PATH D), analysis or a chart (PATH C), and research (PATH E) —
+    e.g. "how does our churn trend compare to industry best practice, and chart it".
+    → Call `plan_compound_request`, then transfer to `compound_agent`.
+    NOT when one part needs another's result first (e.g. "find the top product, then
+    forecast it") — handle those with the single path that covers them.
+
     **PATH A — DATA AGENT PATH**: User explicitly mentions "my data agent", "ask the data agent",
     or a named BQ Data Agent resource.
     → Use `list_accessible_data_agents` → `get_data_agent_info` → `ask_data_agent`
@@ -32,11 +39,16 @@ def return_instructions_root() -> str:
     or comparisons with other platforms (Snowflake, Databricks, Redshift, Azure Synapse).
     Also handles data analytics concepts, AI/ML best practices, or documentation lookups.
     NOT for querying the user's own data — those go to PATH C or D.
-    → Delegate to `research_aida_agent`
+    → Delegate to `research_compare_agent` when the user compares two or more named platforms
+      (e.g. "Snowflake vs Databricks vs BigQuery"); otherwise to `research_aida_agent`
+
+    **CHART FOLLOW-UP**: User asks to chart, plot, or visualize the result you just returned
+    from `ask_data_insights` or `ask_data_agent` (e.g. "now plot that", "show it as a bar chart").
+    → Call `render_chart` — it uses the saved rows and runs no new query.
 
     **PATH C — ADVANCED PATH**: Request requires statistical testing, hypothesis tests,
     custom Python/pandas transformations, anomaly/forecast/contribution analysis,
-    OR any chart or visualization request.
+    OR any other chart or visualization request.
     → Delegate to `ds_agent` with: the user's question + fully-qualified table names +
       column descriptions discovered in Step 1.
 
@@ -44,7 +56,8 @@ def return_instructions_root() -> str:
     and rankings that do NOT require a chart or visualization.
     → Use `ask_data_insights` with `table_references`.
     → `ask_data_insights` returns data and text analysis only — it does NOT produce
-      charts or visualizations. For any visualization request, use PATH C instead.
+      charts or visualizations. For a new visualization request, use PATH C; to chart
+      a result it already returned, use CHART FOLLOW-UP.
 
     ## Step 3: Execution
 
@@ -53,13 +66,35 @@ def return_instructions_root() -> str:
     2. Call `ask_data_insights(user_query, table_references=[{project_id, dataset_id, table_id}])`
     3. Present the result — summarize key numbers in plain language
 
+    **CHART FOLLOW-UP execution:**
+    1. Pick `chart_type` (bar, line, area, scatter, pie) and `x` / `y` (and optional `color`)
+       from the result's column headers — line for time series, bar for rankings
+    2. Call `render_chart`. If it returns a `note` that PNG rendering is unavailable, or an
+       error, delegate to `ds_agent`: the rows are saved in the `last_query_result.json`
+       artifact, which it can load instead of re-querying
+
+    **LOCAL DRILL-DOWN** (when enabled): If an earlier `ask_data_insights` result in this
+    conversation has a `local_table` (e.g. `result_2`) and the follow-up only filters, groups,
+    or re-aggregates that same data ("now by region", "only Q3"), call
+    `query_cached_result` with DuckDB SQL over that table instead of a new query. If it
+    returns an error or `source_changed: true`, use PATH D or C as usual.
+
     **PATH C execution:**
     1. Complete schema discovery
     2. Delegate to `ds_agent` with full context (question + table names + column descriptions)
     3. The DS agent queries BigQuery and runs Python directly — do not pre-fetch data
 
+    **COMPOUND PATH execution:**
+    1. Discover schema (Step 1) for the data and analysis parts
+    2. Call `plan_compound_request` with one self-contained question per part:
+       `data_question` (PATH D work), `analysis_question` (PATH C work, incl. charts), and/or
+       `research_question` (PATH E work). Include fully-qualified table names and columns
+    3. Transfer to `compound_agent` — it runs the parts in parallel and presents one merged
+       answer; do not repeat it
+
     **PATH E execution:**
-    1. Delegate to `research_aida_agent` with the user's question as-is
+    1. Delegate to `research_compare_agent` (multi-platform comparison) or
+       `research_aida_agent` (everything else) with the user's question as-is
 
     **PATH B execution:**
     1. Delegate immediately to `bqml_agent` with dataset/project context if known
@@ -73,6 +108,9 @@ def return_instructions_root() -> str:
     - If `ask_data_insights` returns insufficient results, offer PATH C
     - Show only the first 3-5 records for readability; state total count
     - Format results in clean markdown — never raw JSON
+    - If a tool result has `output_offloaded`, it was too large for the conversation: answer
+      from its `summary` when possible, and call `read_tool_output` with its `output_artifact`
+      handle for the rows or fields you still need — never re-run the call to see more
 
     """
 
@@ -0,0 +1,264 @@
+"""
+Per-user result cache for execute_sql and ask_data_insights.
+
+Agents often re-run the same query within a conversation (a chart after a
+text answer, a re-check after a follow-up question). QueryResultCache keeps
+recent tool results in process memory so those repeats skip BigQuery:
+1. Keys combine the user, the tool, the normalised SQL (or CA API question),
+   and the last-modified time of every referenced table, so a result is never
+   served after its source tables change
+2. Single-flight: while one call for a key is running, identical concurrent
+   calls wait for its result instead of starting their own job. A flight
+   expires after flight_seconds, so a runner that vanished (cancelled
+   without releasing it) cannot block the key
+3. Bounded by total result size (LRU eviction) and entry age
+
+Only queries whose result is a pure function of table contents are cached —
+single SELECT statements over base tables with no streaming buffer and no
+time, random, or session functions. Everything else runs as usual.
+"""
+
+import asyncio
+import concurrent.futures
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from google.cloud import bigquery
+
+from .sql_lint import referenced_tables, split_statements, tokenize
+
+# Total result bytes (JSON-encoded) kept across all users; override for larger hosts.
+_MAX_CACHE_BYTES = 64 * 1024**2
+
+# A single result larger than this is not worth caching (rows are truncated anyway).
+_MAX_ENTRY_BYTES = 4 * 1024**2
+
+# Entries are re-validated against table timestamps, but permissions can change.
+_ENTRY_TTL_SECONDS = 60 * 60
+
+# How long identical calls wait on a running call; its flight expires after this.
+_FLIGHT_SECONDS = 300
+
+# Functions whose value differs between runs over unchanged tables.
+_NONDETERMINISTIC = {
+    "CURRENT_DATE",
+    "CURRENT_DATETIME",
+    "CURRENT_TIME",
+    "CURRENT_TIMESTAMP",
+    "RAND",
+    "GENERATE_UUID",
+    "SESSION_USER",
+    "@@SCRIPT",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and drop comments, leaving literals untouched."""
+    return " ".join(token.text for token in tokenize(sql))
+
+
+def cacheable_tables(sql: str, default_project: str | None = None) -> list[str] | None:
+    """Return the tables a cacheable query reads, or None if it must not be cached."""
+    statements = split_statements(sql)
+    if len(statements) != 1:
+        return None
+    tokens = statements[0]
+    if tokens[0].upper not in ("SELECT", "WITH", "("):
+        return None
+    if any(t.upper in _NONDETERMINISTIC for t in tokens):
+        return None
+    return referenced_tables(sql, default_project) or None
+
+
+def table_versions(client: bigquery.Client, tables: list[str]) -> dict[str, int] | None:
+    """Fetch last-modified times (ms) for base tables via metadata calls.
+
+    Returns None when any table is a view, external, or wildcard table, or has
+    rows in the streaming buffer — none of which bump lastModifiedTime reliably.
+    """
+    versions = {}
+    for table_id in tables:
+        try:
+            table = client.get_table(table_id)
+        except Exception as e:  # noqa: BLE001 — uncacheable, not an error
+            logger.debug("table_versions: %s not cacheable: %s", table_id, e)
+            return None
+        if table.table_type != "TABLE" or table.streaming_buffer is not None:
+            return None
+        versions[table_id] = int(table.modified.timestamp() * 1000)
+    return versions
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable digest of the JSON-serialisable key parts."""
+    encoded = json.dumps(parts, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class QueryResultCache:
+    """Size-bounded LRU of tool results with single-flight de-duplication."""
+
+    def __init__(
+        self,
+        max_bytes: int = _MAX_CACHE_BYTES,
+        max_entry_bytes: int = _MAX_ENTRY_BYTES,
+        ttl_seconds: float = _ENTRY_TTL_SECONDS,
+        flight_seconds: float = _FLIGHT_SECONDS,
+    ):
+        self._max_bytes = max_bytes
+        self._max_entry_bytes = max_entry_bytes
+        self._ttl_seconds = ttl_seconds
+        self._flight_seconds = flight_seconds
+        self._entries: OrderedDict[str, tuple[float, int, dict]] = OrderedDict()
+        # key -> (flight, deadline); a flight past its deadline is replaced.
+        self._inflight: dict[str, tuple[concurrent.futures.Future, float]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "stale_flights": 0,
+        }
+
+    def get(self, key: str) -> tuple[dict, float] | None:
+        """Return a copy of the cached result and its age in seconds, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] >= self._ttl_seconds:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return copy.deepcopy(entry[2]), now - entry[0]
+
+    def claim_flight(self, key: str) -> tuple[concurrent.futures.Future, bool]:
+        """Join the running call for key, or become its runner.
+
+        Returns:
+            (flight, is_runner). A runner must finish with complete or abandon,
+            passing its flight; other callers wait on the flight.
+        """
+        now = time.monotonic()
+        stale = None
+        with self._lock:
+            current = self._inflight.get(key)
+            if current is not None and current[1] > now:
+                self._stats["coalesced"] += 1
+                return current[0], False
+            if current is not None:
+                stale = current[0]
+                self._stats["stale_flights"] += 1
+            flight = concurrent.futures.Future()
+            self._inflight[key] = (flight, now + self._flight_seconds)
+        if stale is not None and not stale.done():
+            stale.set_result(None)
+        return flight, True
+
+    def _release(self, key: str, flight: concurrent.futures.Future) -> None:
+        # Caller holds the lock. Only the given flight is released, so a late
+        # runner cannot release its replacement's flight.
+        current = self._inflight.get(key)
+        if current is not None and current[0] is flight:
+            del self._inflight[key]
+
+    def complete(
+        self, key: str, result: dict, flight: concurrent.futures.Future
+    ) -> None:
+        """Store a successful result and release any waiting callers.
+
+        An ERROR result is neither cached nor shared: waiters are released
+        without it and run the call themselves.
+        """
+        stored = copy.deepcopy(result)
+        size = len(json.dumps(stored, default=str))
+        failed = result.get("status") == "ERROR"
+        with self._lock:
+            self._release(key, flight)
+            if not failed and size <= self._max_entry_bytes:
+                self._drop(key)
+                self._entries[key] = (time.monotonic(), size, stored)
+                self._bytes += size
+                while self._bytes > self._max_bytes:
+                    self._drop(next(iter(self._entries)))
+                    self._stats["evictions"] += 1
+        if not flight.done():
+            flight.set_result(None if failed else stored)
+
+    def abandon(self, key: str, flight: concurrent.futures.Future) -> None:
+        """Release waiting callers without a result (the runner raised or is gone)."""
+        with self._lock:
+            self._release(key, flight)
+        if not flight.done():
+            flight.set_result(None)
+
+    async def wait(self, key: str, flight: concurrent.futures.Future) -> dict | None:
+        """Wait for a running call's result; None if it failed or timed out.
+
+        A timed-out flight is released, so the next caller runs the call.
+        """
+        try:
+            # shield: a timeout must not cancel the runner's shared future.
+            shared = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(flight)), self._flight_seconds
+            )
+        except TimeoutError:
+            self.abandon(key, flight)
+            return None
+        return copy.deepcopy(shared) if shared else None
+
+    async def run_once(
+        self, key: str, run: Callable[[], Awaitable[dict]]
+    ) -> tuple[dict, bool]:
+        """Run run() for key unless an identical call is running; share its result.
+
+        The flight is released however run() ends, including cancellation; an
+        ERROR result is not shared, so waiters run the call themselves.
+
+        Returns:
+            (result, coalesced): coalesced is True when the result came from
+            another caller's run.
+        """
+        flight, is_runner = self.claim_flight(key)
+        if not is_runner:
+            shared = await self.wait(key, flight)
+            if shared is not None:
+                return shared, True
+            flight, is_runner = self.claim_flight(key)
+            if not is_runner:
+                return await run(), False
+        result = None
+        try:
+            result = await run()
+        finally:
+            if result is None:
+                self.abandon(key, flight)
+            else:
+                self.complete(key, result, flight)
+        return result, False
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+
+result_cache = QueryResultCache()
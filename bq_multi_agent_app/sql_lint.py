@@ -0,0 +1,679 @@
+"""
+Local static analysis for BigQuery SQL submitted through execute_sql.
+
+Flags costly query patterns before the query reaches BigQuery:
+1. select_star        — SELECT * on a wide table
+2. missing_partition_filter — no predicate on the partition column of a partitioned table
+3. cross_join         — CROSS JOIN / comma join between tables (not UNNEST)
+4. order_by_without_limit — final ORDER BY with no LIMIT
+
+Table metadata comes from get_table_info results cached in session state (see
+callbacks.py), so linting is a pure in-process pass with no network calls.
+The tokenizer is intentionally small: it understands BigQuery comments, string
+literals, backtick identifiers, and parenthesis depth, which is all the rules
+above need.
+"""
+
+import re
+from typing import Any, NamedTuple
+
+# Tables with at least this many top-level columns are considered "wide".
+_WIDE_TABLE_COLUMNS = 20
+
+# Tables with at most this many rows are safe to cross join.
+_SMALL_TABLE_ROWS = 1000
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|\#[^\n]*|/\*.*?\*/)
+  | (?P<string>[rRbB]{0,2}(?:'''.*?'''|\"\"\".*?\"\"\"|'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"))
+  | (?P<quoted>`[^`]*`)
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)
+  | (?P<word>@{0,2}[A-Za-z_][A-Za-z_0-9]*)
+  | (?P<op>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Keywords that end a FROM item alias or a clause.
+_CLAUSE_KEYWORDS = {
+    "WHERE",
+    "GROUP",
+    "HAVING",
+    "QUALIFY",
+    "WINDOW",
+    "ORDER",
+    "LIMIT",
+    "UNION",
+    "INTERSECT",
+}
+_JOIN_KEYWORDS = {"JOIN", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "OUTER"}
+_NOT_ALIAS = (
+    _CLAUSE_KEYWORDS
+    | _JOIN_KEYWORDS
+    | {"ON", "USING", "FOR", "TABLESAMPLE", "WITH", "EXCEPT", "AS"}
+)
+
+
+# A plain dataset.name or project.dataset.name path (no quoting or wildcards).
+_PATH_RE = re.compile(r"[A-Za-z0-9_-]+(\.[A-Za-z0-9_-]+){1,2}")
+
+
+class Token(NamedTuple):
+    """A lexical token with its parenthesis depth and source offsets."""
+
+    kind: str
+    text: str
+    depth: int
+    start: int
+    end: int
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper()
+
+    @property
+    def name(self) -> str:
+        """Identifier text without backticks, upper-cased for comparison."""
+        return self.text.strip("`").upper()
+
+
+class FromItem(NamedTuple):
+    """A table-like item in a FROM clause."""
+
+    kind: str  # "table", "subquery", "unnest"
+    table: str  # normalised table path for kind == "table", else ""
+    alias: str
+    join: str  # "from", "comma", "cross", "join"
+    end: int  # source offset just past the item and its alias
+
+
+def tokenize(sql: str) -> list[Token]:
+    """Split SQL into tokens, dropping whitespace and comments.
+
+    Args:
+        sql: BigQuery SQL text.
+
+    Returns:
+        Tokens annotated with parenthesis depth. An opening parenthesis carries
+        the outer depth; tokens inside it carry depth + 1.
+    """
+    tokens = []
+    depth = 0
+    for match in _TOKEN_RE.finditer(sql):
+        kind = match.lastgroup
+        if kind in ("ws", "comment"):
+            continue
+        text = match.group()
+        if text == ")":
+            depth = max(depth - 1, 0)
+        tokens.append(Token(kind, text, depth, match.start(), match.end()))
+        if text == "(":
+            depth += 1
+    return tokens
+
+
+def split_statements(sql: str) -> list[list[Token]]:
+    """Tokenize a (possibly multi-statement) script into one token list per statement."""
+    statements: list[list[Token]] = [[]]
+    for token in tokenize(sql):
+        if token.text == ";" and token.depth == 0:
+            statements.append([])
+        else:
+            statements[-1].append(token)
+    return [s for s in statements if s]
+
+
+def as_subquery(sql: str, statement: list[Token]) -> str:
+    """Parenthesise one statement of sql for use as a FROM subquery.
+
+    The text runs from the statement's first token to its last, so a
+    trailing semicolon or `--` comment cannot break the closing parenthesis.
+    """
+    return f"({sql[statement[0].start : statement[-1].end]})"
+
+
+def normalize_table_path(path: str, default_project: str | None = None) -> str:
+    """Normalise a table reference to `project.dataset.table` form.
+
+    Args:
+        path: Table path as written in SQL, with or without backticks.
+        default_project: Project used when the path has only dataset.table.
+
+    Returns:
+        The dotted path without backticks.
+    """
+    parts = [p for p in path.replace("`", "").split(".") if p]
+    if len(parts) == 2 and default_project:
+        parts.insert(0, default_project)
+    return ".".join(parts)
+
+
+def referenced_tables(sql: str, default_project: str | None = None) -> list[str]:
+    """Return the distinct tables read by a query, excluding CTEs and UNNEST.
+
+    Args:
+        sql: BigQuery SQL text.
+        default_project: Project used for dataset.table references.
+
+    Returns:
+        Normalised table paths in order of first appearance.
+    """
+    tables: list[str] = []
+    for statement in split_statements(sql):
+        for _, _, items in select_scopes(statement):
+            for item in items:
+                if item.kind != "table":
+                    continue
+                table = normalize_table_path(item.table, default_project)
+                if table not in tables:
+                    tables.append(table)
+    return tables
+
+
+def qualified_path(path: str, default_project: str) -> str:
+    """Validate a table or model path from tool arguments and qualify it.
+
+    Args:
+        path: dataset.name or project.dataset.name, optionally backticked.
+        default_project: Project used when the path has only dataset.name.
+
+    Returns:
+        The project.dataset.name path, safe to embed in backticks.
+
+    Raises:
+        ValueError: The path is not a plain two- or three-part identifier.
+    """
+    path = path.strip().strip("`")
+    if not _PATH_RE.fullmatch(path):
+        raise ValueError(f"Invalid table or model path: {path!r}")
+    return path if path.count(".") == 2 else f"{default_project}.{path}"
+
+
+def created_models(sql: str, default_project: str | None = None) -> list[str]:
+    """Return the models created by CREATE [OR REPLACE] MODEL statements in a script.
+
+    Args:
+        sql: BigQuery SQL text.
+        default_project: Project used for dataset.model references.
+
+    Returns:
+        Normalised model paths in statement order.
+    """
+    models: list[str] = []
+    for statement in split_statements(sql):
+        words = [t.upper for t in statement[:6]]
+        if words[:1] != ["CREATE"]:
+            continue
+        index = 1
+        if words[1:3] == ["OR", "REPLACE"]:
+            index = 3
+        if words[index : index + 1] != ["MODEL"]:
+            continue
+        index += 1
+        if words[index : index + 3] == ["IF", "NOT", "EXISTS"]:
+            index += 3
+        if index < len(statement):
+            path, _ = _read_path(statement, index)
+            models.append(normalize_table_path(path, default_project))
+    return models
+
+
+def lookup_schema(
+    table: str, schemas: dict[str, dict[str, Any]]
+) -> dict[str, Any] | None:
+    """Find cached metadata for a table path, tolerating a missing project."""
+    if table in schemas:
+        return schemas[table]
+    if table.count(".") == 1:
+        for key, value in schemas.items():
+            if key.endswith(f".{table}"):
+                return value
+    return None
+
+
+def lint_sql(
+    sql: str,
+    schemas: dict[str, dict[str, Any]],
+    default_project: str | None = None,
+) -> list[dict[str, str]]:
+    """Detect costly query patterns without contacting BigQuery.
+
+    Args:
+        sql: BigQuery SQL text, optionally a multi-statement script.
+        schemas: Cached table metadata keyed by `project.dataset.table`, as
+            produced by callbacks.compact_table_info.
+        default_project: Project used to resolve dataset.table references.
+
+    Returns:
+        A list of findings, each with rule, table (may be empty), message, and
+        hint keys. An empty list means nothing was flagged.
+    """
+    findings: list[dict[str, str]] = []
+    for statement in split_statements(sql):
+        findings.extend(_lint_statement(statement, schemas, default_project))
+    return findings
+
+
+def _lint_statement(
+    tokens: list[Token],
+    schemas: dict[str, dict[str, Any]],
+    default_project: str | None,
+) -> list[dict[str, str]]:
+    findings: list[dict[str, str]] = []
+    # CREATE MODEL / ML.PREDICT inputs intentionally read every feature column.
+    is_model_statement = any(t.upper == "MODEL" for t in tokens)
+    scopes = select_scopes(tokens)
+    scope_filters = [_filtered_columns(tokens, start, end) for start, end, _ in scopes]
+    # A filter on a CTE or subquery's columns may reach the tables inside it.
+    derived_filters = {
+        column
+        for filters, (_, _, items) in zip(scope_filters, scopes, strict=True)
+        if any(item.kind in ("cte", "subquery") for item in items)
+        for column in filters
+    }
+    table_aliases = {
+        item.alias.upper()
+        for _, _, items in scopes
+        for item in items
+        if item.kind == "table"
+    }
+
+    for (select_index, scope_end, items), filters in zip(
+        scopes, scope_filters, strict=True
+    ):
+        tables = {
+            item.alias.upper(): normalize_table_path(item.table, default_project)
+            for item in items
+            if item.kind == "table"
+        }
+
+        if not is_model_statement:
+            for qualifier in _star_qualifiers(tokens, select_index, scope_end):
+                targets = [tables[qualifier]] if qualifier in tables else []
+                if not qualifier:
+                    targets = list(dict.fromkeys(tables.values()))
+                for table in targets:
+                    meta = lookup_schema(table, schemas)
+                    if meta and len(meta.get("columns", {})) >= _WIDE_TABLE_COLUMNS:
+                        findings.append(_select_star_finding(table, meta))
+
+        for item in items:
+            if item.kind == "table":
+                table = normalize_table_path(item.table, default_project)
+                meta = lookup_schema(table, schemas)
+                # A column qualified with another table's alias filters that
+                # table only; unqualified columns and columns of CTEs or
+                # subqueries may reach this one.
+                columns = {
+                    column
+                    for qualifier, column in filters | derived_filters
+                    if qualifier in ("", item.alias.upper())
+                    or qualifier not in table_aliases
+                }
+                finding = _partition_finding(table, meta, columns)
+                if finding:
+                    findings.append(finding)
+            # Comma/CROSS joins against UNNEST, CTEs, and subqueries are usually
+            # intentional (array expansion, single-row parameters), so only
+            # base tables are flagged.
+            if item.join in ("comma", "cross") and item.kind == "table":
+                table = normalize_table_path(item.table, default_project)
+                meta = lookup_schema(table, schemas)
+                if meta and 0 < meta.get("num_rows", 0) <= _SMALL_TABLE_ROWS:
+                    continue
+                findings.append(
+                    {
+                        "rule": "cross_join",
+                        "table": table,
+                        "message": (
+                            f"Unbounded cross join with {table}: "
+                            "output size is the product of both inputs."
+                        ),
+                        "hint": (
+                            "Use an INNER JOIN ... ON with a join key, or pre-aggregate "
+                            "one side so it has very few rows before joining."
+                        ),
+                    }
+                )
+
+    finding = _order_by_finding(tokens)
+    if finding:
+        findings.append(finding)
+    return _dedupe(findings)
+
+
+def select_scopes(tokens: list[Token]) -> list[tuple[int, int, list[FromItem]]]:
+    """Return the FROM items of every SELECT in a statement.
+
+    Args:
+        tokens: Tokens of a single statement (see split_statements).
+
+    Returns:
+        One (SELECT token index, scope end index, FROM items) tuple per SELECT.
+    """
+    cte_names = _cte_names(tokens)
+    scopes = []
+    for index, token in enumerate(tokens):
+        if token.upper != "SELECT":
+            continue
+        depth = token.depth
+        end = index + 1
+        while end < len(tokens) and tokens[end].depth >= depth:
+            if tokens[end].depth == depth and tokens[end].upper in (
+                "UNION",
+                "INTERSECT",
+            ):
+                break
+            if tokens[end].depth == depth and _is_set_except(tokens, end):
+                break
+            end += 1
+        scopes.append((index, end, _from_items(tokens, index, end, cte_names)))
+    return scopes
+
+
+def _cte_names(tokens: list[Token]) -> set[str]:
+    names = set()
+    for index in range(len(tokens) - 2):
+        if tokens[index + 1].upper == "AS" and tokens[index + 2].text == "(":
+            prev = tokens[index - 1] if index else None
+            if prev is not None and (
+                prev.upper in ("WITH", "RECURSIVE") or prev.text == ","
+            ):
+                names.add(tokens[index].name)
+    return names
+
+
+def _is_set_except(tokens: list[Token], index: int) -> bool:
+    """EXCEPT DISTINCT is a set operator; `* EXCEPT (col)` is a column modifier."""
+    return (
+        tokens[index].upper == "EXCEPT"
+        and index + 1 < len(tokens)
+        and tokens[index + 1].upper in ("DISTINCT", "ALL")
+    )
+
+
+def _from_items(
+    tokens: list[Token], start: int, end: int, cte_names: set[str]
+) -> list[FromItem]:
+    depth = tokens[start].depth
+    from_index = next(
+        (
+            i
+            for i in range(start, end)
+            if tokens[i].depth == depth and tokens[i].upper == "FROM"
+        ),
+        None,
+    )
+    if from_index is None:
+        return []
+
+    items: list[FromItem] = []
+    aliases: set[str] = set()
+    join = "from"
+    i = from_index + 1
+    while i < end:
+        token = tokens[i]
+        if token.depth != depth:
+            i += 1
+            continue
+        if token.upper in _CLAUSE_KEYWORDS or _is_set_except(tokens, i):
+            break
+        if token.text == ",":
+            join = "comma"
+            i += 1
+            continue
+        if token.upper in _JOIN_KEYWORDS:
+            if token.upper == "CROSS":
+                join = "cross"
+            elif token.upper == "JOIN" and join not in ("cross",):
+                join = "join"
+            i += 1
+            continue
+        if token.upper in ("ON", "USING"):
+            i = _skip_condition(tokens, i + 1, end, depth)
+            continue
+        if join is None:
+            i += 1
+            continue
+
+        if token.text == "(":
+            kind, table = "subquery", ""
+            i = _skip_parens(tokens, i)
+        elif token.upper == "UNNEST":
+            kind, table = "unnest", ""
+            i = _skip_parens(tokens, i + 1)
+        else:
+            table, i = _read_path(tokens, i)
+            first = table.replace("`", "").split(".")[0].upper()
+            if table.replace("`", "").upper() in cte_names:
+                kind = "cte"
+            elif first in aliases:
+                kind = "unnest"  # correlated array path, e.g. `t.items`
+            else:
+                kind = "table"
+            if i < end and tokens[i].upper == "FOR":
+                i = _skip_condition(tokens, i, end, depth)
+
+        alias = ""
+        if i < end and tokens[i].upper == "AS":
+            i += 1
+        if (
+            i < end
+            and tokens[i].depth == depth
+            and tokens[i].kind in ("word", "quoted")
+            and tokens[i].upper not in _NOT_ALIAS
+        ):
+            alias = tokens[i].name
+            i += 1
+        if not alias and kind == "table":
+            alias = table.replace("`", "").split(".")[-1].upper()
+        aliases.add(alias.upper())
+        items.append(FromItem(kind, table, alias, join, tokens[i - 1].end))
+        join = None
+    return items
+
+
+def _read_path(tokens: list[Token], index: int) -> tuple[str, int]:
+    """Read an adjacent run of identifier tokens such as my-proj.ds.`tbl`."""
+    parts = [tokens[index].text]
+    index += 1
+    while (
+        index < len(tokens)
+        and tokens[index].start == tokens[index - 1].end
+        and (
+            tokens[index].text in (".", "-")
+            or tokens[index].kind in ("word", "quoted", "number")
+        )
+    ):
+        parts.append(tokens[index].text)
+        index += 1
+    return "".join(parts), index
+
+
+def _skip_parens(tokens: list[Token], index: int) -> int:
+    """Given the index of "(", return the index just past its matching ")"."""
+    if index >= len(tokens) or tokens[index].text != "(":
+        return index
+    depth = tokens[index].depth
+    index += 1
+    while index < len(tokens) and not (
+        tokens[index].text == ")" and tokens[index].depth == depth
+    ):
+        index += 1
+    return index + 1
+
+
+def _skip_condition(tokens: list[Token], index: int, end: int, depth: int) -> int:
+    """Skip a join condition up to the next join, comma, or clause keyword."""
+    while index < end:
+        token = tokens[index]
+        if token.depth == depth and (
+            token.text == ","
+            or token.upper in _JOIN_KEYWORDS
+            or token.upper in _CLAUSE_KEYWORDS
+        ):
+            break
+        index += 1
+    return index
+
+
+def _star_qualifiers(tokens: list[Token], start: int, end: int) -> list[str]:
+    """Return qualifiers of bare stars in a select list ("" for an unqualified *)."""
+    depth = tokens[start].depth
+    qualifiers = []
+    for i in range(start + 1, end):
+        token = tokens[i]
+        if token.depth != depth:
+            continue
+        if token.upper == "FROM":
+            break
+        if token.text != "*":
+            continue
+        nxt = tokens[i + 1].upper if i + 1 < len(tokens) else ""
+        if nxt in ("EXCEPT", "REPLACE"):
+            continue
+        prev = tokens[i - 1]
+        if prev.upper in ("SELECT", "DISTINCT", "ALL", "STRUCT") or prev.text == ",":
+            qualifiers.append("")
+        elif prev.text == "." and i >= 2:
+            qualifiers.append(tokens[i - 2].name)
+    return qualifiers
+
+
+def _filtered_columns(
+    tokens: list[Token], start: int, end: int
+) -> set[tuple[str, str]]:
+    """(qualifier, column) pairs in the WHERE, QUALIFY, and ON clauses of one SELECT.
+
+    Clauses of nested subqueries are left to their own SELECT, and a column
+    tested only with IS [NOT] NULL prunes no partitions, so neither counts.
+    The qualifier is the alias or table name before the column ("" if none),
+    e.g. ("A", "DT") for a.dt.
+    """
+    depth = tokens[start].depth
+    columns: set[tuple[str, str]] = set()
+    for i in range(start, end):
+        token = tokens[i]
+        if token.depth != depth or token.upper not in ("WHERE", "QUALIFY", "ON"):
+            continue
+        j = i + 1
+        while j < end and tokens[j].depth >= depth:
+            tok = tokens[j]
+            if tok.depth == depth and (
+                tok.upper in _CLAUSE_KEYWORDS or tok.upper in _JOIN_KEYWORDS
+            ):
+                break
+            if (
+                tok.text == "("
+                and j + 1 < end
+                and tokens[j + 1].upper in ("SELECT", "WITH")
+            ):
+                j = _skip_parens(tokens, j)
+                continue
+            if tok.kind in ("word", "quoted"):
+                parts = tok.name.split(".")
+                # a.dt is three tokens: a, ".", dt.
+                while (
+                    j + 2 < len(tokens)
+                    and tokens[j + 1].text == "."
+                    and tokens[j + 2].kind in ("word", "quoted")
+                ):
+                    j += 2
+                    parts.extend(tokens[j].name.split("."))
+                if not _is_null_test(tokens, j + 1):
+                    columns.add((parts[-2] if len(parts) > 1 else "", parts[-1]))
+            j += 1
+    return columns
+
+
+def _is_null_test(tokens: list[Token], index: int) -> bool:
+    """Whether tokens[index:] reads IS NULL or IS NOT NULL."""
+    words = [t.upper for t in tokens[index : index + 3]]
+    return words[:2] == ["IS", "NULL"] or words == ["IS", "NOT", "NULL"]
+
+
+def _partition_finding(
+    table: str, meta: dict[str, Any] | None, filtered_columns: set[str]
+) -> dict[str, str] | None:
+    if not meta or not meta.get("partition_type"):
+        return None
+    field = meta.get("partition_field")
+    candidates = {field.upper()} if field else {"_PARTITIONTIME", "_PARTITIONDATE"}
+    if candidates & filtered_columns:
+        return None
+    column = field or "_PARTITIONTIME"
+    required = meta.get("require_partition_filter")
+    return {
+        "rule": "missing_partition_filter",
+        "table": table,
+        "message": (
+            f"{table} is partitioned on {column} but the query does not filter on it"
+            + (
+                " (the table requires a partition filter; the query will fail)."
+                if required
+                else "; every partition will be scanned."
+            )
+        ),
+        "hint": f"Add a WHERE predicate on {column}, e.g. a date range, to prune partitions.",
+    }
+
+
+def _select_star_finding(table: str, meta: dict[str, Any]) -> dict[str, str]:
+    columns = list(meta.get("columns", {}))
+    size = _format_bytes(meta.get("num_bytes", 0))
+    return {
+        "rule": "select_star",
+        "table": table,
+        "message": (
+            f"SELECT * reads all {len(columns)} columns of {table}"
+            + (f" (~{size})." if size else ".")
+        ),
+        "hint": (
+            "List only the columns you need — BigQuery bills per column read. "
+            f"Available columns include: {', '.join(columns[:10])}"
+            + (", ..." if len(columns) > 10 else "")
+        ),
+    }
+
+
+def _order_by_finding(tokens: list[Token]) -> dict[str, str] | None:
+    if not tokens or tokens[0].upper not in ("SELECT", "WITH", "("):
+        return None
+    top = [t for t in tokens if t.depth == 0]
+    order_at = None
+    for i in range(len(top) - 1):
+        if top[i].upper == "ORDER" and top[i + 1].upper == "BY":
+            order_at = i
+    if order_at is None:
+        return None
+    if any(t.upper == "LIMIT" for t in top[order_at:]):
+        return None
+    return {
+        "rule": "order_by_without_limit",
+        "table": "",
+        "message": "The final ORDER BY has no LIMIT, so BigQuery sorts the full result.",
+        "hint": "Add LIMIT n (only the first rows are returned to the agent anyway).",
+    }
+
+
+def _format_bytes(num_bytes: int) -> str:
+    if not num_bytes:
+        return ""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if num_bytes < 1024 or unit == "TB":
+            return f"{num_bytes:.1f} {unit}" if unit != "B" else f"{num_bytes} B"
+        num_bytes /= 1024
+    return ""
+
+
+def _dedupe(findings: list[dict[str, str]]) -> list[dict[str, str]]:
+    seen = set()
+    unique = []
+    for finding in findings:
+        key = (finding["rule"], finding["table"])
+        if key not in seen:
+            seen.add(key)
+            unique.append(finding)
+    return unique
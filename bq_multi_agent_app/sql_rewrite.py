@@ -0,0 +1,362 @@
+"""
+Cost-reducing rewrites for exploratory BigQuery queries.
+
+Agents often preview a table with `SELECT * FROM t` only to show a handful of
+rows. On BigQuery's columnar storage that query is billed for every column of
+every row, and a LIMIT does not reduce bytes scanned. rewrite_exploratory_query
+turns such previews into:
+1. An explicit column list — columns the query references, then the table's
+   leading scalar columns, capped at _PREVIEW_COLUMNS
+2. A LIMIT matching the number of rows execute_sql returns anyway
+3. TABLESAMPLE SYSTEM on large tables when the query has no filter or ordering
+   (a pure preview), so only a few storage blocks are read
+
+Bytes saved are estimated from the cached get_table_info metadata (sizes by
+column type), so no dry run is needed.
+
+approximate_query is the DS agent's opt-in approximate mode for aggregate
+queries: exact COUNT(DISTINCT) becomes APPROX_COUNT_DISTINCT, and large tables
+are read through TABLESAMPLE SYSTEM with COUNT/SUM scaled up by the inverse
+sample fraction and a per-row count of sampled rows for error bounds.
+"""
+
+from typing import Any
+
+from .sql_lint import (
+    Token,
+    lookup_schema,
+    normalize_table_path,
+    select_scopes,
+    split_statements,
+)
+
+# Maximum number of columns kept when pruning SELECT *.
+_PREVIEW_COLUMNS = 12
+
+# Rows injected as LIMIT — matches BigQueryToolConfig.max_query_result_rows default.
+_PREVIEW_ROWS = 50
+
+# Only sample tables at least this large, and aim to read about this many bytes.
+_SAMPLE_MIN_BYTES = 1024**3
+_SAMPLE_TARGET_BYTES = 100 * 1024**2
+
+# Approximate stored bytes per value by BigQuery type, used only to apportion
+# the table size between kept and dropped columns.
+_TYPE_BYTES = {
+    "BOOL": 1,
+    "BOOLEAN": 1,
+    "INT64": 8,
+    "INTEGER": 8,
+    "FLOAT64": 8,
+    "FLOAT": 8,
+    "DATE": 8,
+    "DATETIME": 8,
+    "TIME": 8,
+    "TIMESTAMP": 8,
+    "NUMERIC": 16,
+    "BIGNUMERIC": 32,
+    "INTERVAL": 16,
+}
+_VARIABLE_TYPE_BYTES = 32
+
+# Columns of these types are expensive to read and rarely useful in a preview.
+_HEAVY_TYPES = {"BYTES", "JSON", "GEOGRAPHY", "RECORD", "STRUCT", "RANGE"}
+
+# Approximate mode: aim to read about this many bytes from a sampled table.
+_APPROX_TARGET_BYTES = 1024**3
+
+# Aggregates whose value over a uniform sample estimates the full-table value
+# (COUNT / COUNTIF / SUM after scaling by the inverse sample fraction).
+_SCALED_AGGREGATES = {"COUNT", "COUNTIF", "SUM"}
+_SAMPLE_SAFE_AGGREGATES = _SCALED_AGGREGATES | {
+    "AVG",
+    "STDDEV",
+    "STDDEV_SAMP",
+    "STDDEV_POP",
+    "VARIANCE",
+    "VAR_SAMP",
+    "VAR_POP",
+    "CORR",
+    "COVAR_SAMP",
+    "COVAR_POP",
+    "APPROX_QUANTILES",
+}
+# Aggregates that cannot be estimated from a sample (extremes, distinct counts,
+# top-k counts, collected values).
+_AGGREGATES = _SAMPLE_SAFE_AGGREGATES | {
+    "MIN",
+    "MAX",
+    "MIN_BY",
+    "MAX_BY",
+    "ANY_VALUE",
+    "APPROX_COUNT_DISTINCT",
+    "APPROX_TOP_COUNT",
+    "APPROX_TOP_SUM",
+    "ARRAY_AGG",
+    "STRING_AGG",
+    "LOGICAL_AND",
+    "LOGICAL_OR",
+    "HLL_COUNT",
+}
+
+# Column added to sampled queries; report_approximation turns it into an error bound.
+SAMPLED_ROWS_COLUMN = "_sampled_rows"
+
+
+def rewrite_exploratory_query(
+    sql: str,
+    schemas: dict[str, dict[str, Any]],
+    default_project: str | None = None,
+    max_rows: int = _PREVIEW_ROWS,
+) -> dict[str, Any] | None:
+    """Rewrite a `SELECT * FROM table` preview into a cheaper equivalent.
+
+    Args:
+        sql: The query passed to execute_sql.
+        schemas: Cached table metadata keyed by `project.dataset.table`.
+        default_project: Project used to resolve dataset.table references.
+        max_rows: LIMIT to inject when the query has none.
+
+    Returns:
+        None when the query is not a single-table SELECT * preview over a table
+        with cached metadata, or nothing would change. Otherwise a report dict
+        with the rewritten query, the changes made, and estimated bytes before
+        and after.
+    """
+    statements = split_statements(sql)
+    if len(statements) != 1:
+        return None
+    tokens = statements[0]
+    if tokens[0].upper != "SELECT" or sum(t.upper == "SELECT" for t in tokens) != 1:
+        return None
+    if len(tokens) < 3 or tokens[1].text != "*" or tokens[2].upper != "FROM":
+        return None
+    scopes = select_scopes(tokens)
+    items = scopes[0][2] if scopes else []
+    if len(items) != 1 or items[0].kind != "table":
+        return None
+
+    table = normalize_table_path(items[0].table, default_project)
+    meta = lookup_schema(table, schemas)
+    if not meta or not meta.get("columns"):
+        return None
+
+    top_level = {t.upper for t in tokens if t.depth == 0}
+    columns = meta["columns"]
+    kept = _preview_columns(
+        columns, {t.name for t in tokens if t.kind in ("word", "quoted")}
+    )
+    sample_percent = None
+    if (
+        not top_level & {"WHERE", "ORDER", "QUALIFY", "TABLESAMPLE", "FOR"}
+        and meta.get("table_type", "TABLE") == "TABLE"
+        and meta.get("num_bytes", 0) >= _SAMPLE_MIN_BYTES
+    ):
+        sample_percent = max(
+            round(100 * _SAMPLE_TARGET_BYTES / meta["num_bytes"], 3), 0.001
+        )
+    add_limit = "LIMIT" not in top_level
+
+    if len(kept) == len(columns) and not sample_percent and not add_limit:
+        return None
+
+    # Splice edits from the end of the text backwards so offsets stay valid.
+    rewritten = sql
+    if add_limit:
+        last = tokens[-1].end
+        rewritten = f"{rewritten[:last]}\nLIMIT {max_rows}{rewritten[last:]}"
+    if sample_percent:
+        end = items[0].end
+        rewritten = (
+            f"{rewritten[:end]} TABLESAMPLE SYSTEM ({sample_percent} PERCENT)"
+            f"{rewritten[end:]}"
+        )
+    if len(kept) < len(columns):
+        star = tokens[1]
+        column_list = ", ".join(f"`{c}`" for c in kept)
+        rewritten = f"{rewritten[: star.start]}{column_list}{rewritten[star.end :]}"
+
+    bytes_before = meta.get("num_bytes", 0)
+    bytes_after = int(
+        bytes_before * _column_fraction(columns, kept) * ((sample_percent or 100) / 100)
+    )
+    return {
+        "query": rewritten,
+        "original_query": sql,
+        "table": table,
+        "columns_kept": kept,
+        "columns_omitted": [c for c in columns if c not in kept],
+        "limit_injected": max_rows if add_limit else None,
+        "sample_percent": sample_percent,
+        "estimated_bytes_before": bytes_before,
+        "estimated_bytes_after": bytes_after,
+        "estimated_bytes_saved": bytes_before - bytes_after,
+    }
+
+
+def approximate_query(
+    sql: str,
+    schemas: dict[str, dict[str, Any]],
+    default_project: str | None = None,
+    sample_percent: float | None = None,
+) -> dict[str, Any] | None:
+    """Rewrite a single-table aggregate query to use approximate aggregation.
+
+    Args:
+        sql: The query passed to execute_sql.
+        schemas: Cached table metadata keyed by `project.dataset.table`.
+        default_project: Project used to resolve dataset.table references.
+        sample_percent: Sample rate for tables over 1 GB; by default sized to
+            read about 1 GB.
+
+    Returns:
+        None when the query is not a single-table aggregate SELECT or nothing
+        would change. Otherwise a report dict with the rewritten query, the
+        approximations made, the sample percent and scale factor (if sampled),
+        and how to read the error bounds.
+    """
+    statements = split_statements(sql)
+    if len(statements) != 1:
+        return None
+    tokens = statements[0]
+    if tokens[0].upper != "SELECT" or sum(t.upper == "SELECT" for t in tokens) != 1:
+        return None
+    if any(t.upper == "OVER" for t in tokens):
+        return None
+    scopes = select_scopes(tokens)
+    items = scopes[0][2] if scopes else []
+    if len(items) != 1 or items[0].kind != "table":
+        return None
+
+    calls = [
+        (index, token.upper, _closing_paren(tokens, index + 1))
+        for index, token in enumerate(tokens[:-1])
+        if token.kind == "word"
+        and token.upper in _AGGREGATES
+        and tokens[index + 1].text == "("
+    ]
+    if not calls:
+        return None
+
+    # (start, end, replacement) source edits, applied from the end backwards.
+    edits: list[tuple[int, int, str]] = []
+    approximations = []
+    distinct_counts = False
+    for index, name, close in calls:
+        if name == "APPROX_COUNT_DISTINCT":
+            distinct_counts = True
+        if name != "COUNT" or tokens[index + 2].upper != "DISTINCT":
+            continue
+        distinct_counts = True
+        depth = tokens[index + 1].depth + 1
+        if any(t.text == "," and t.depth == depth for t in tokens[index + 3 : close]):
+            continue  # COUNT(DISTINCT a, b) has no approximate form
+        edits.append(
+            (tokens[index].start, tokens[index + 3].start, "APPROX_COUNT_DISTINCT(")
+        )
+        approximations.append("COUNT(DISTINCT) -> APPROX_COUNT_DISTINCT")
+
+    table = normalize_table_path(items[0].table, default_project)
+    meta = lookup_schema(table, schemas) or {}
+    top_level = {t.upper for t in tokens if t.depth == 0}
+    num_bytes = meta.get("num_bytes", 0)
+    if sample_percent is None and num_bytes:
+        sample_percent = round(100 * _APPROX_TARGET_BYTES / num_bytes, 3)
+    sampled = (
+        num_bytes >= _SAMPLE_MIN_BYTES
+        and 0 < (sample_percent or 0) < 100
+        and meta.get("table_type", "TABLE") == "TABLE"
+        and "TABLESAMPLE" not in top_level
+        and not distinct_counts
+        and all(name in _SAMPLE_SAFE_AGGREGATES for _, name, _ in calls)
+    )
+    if sampled:
+        scale = round(100 / sample_percent, 6)
+        for index, name, close in calls:
+            if name not in _SCALED_AGGREGATES:
+                continue
+            wrap = "ROUND(" if name != "SUM" else "("
+            edits.append((tokens[index].start, tokens[index].start, wrap))
+            end = tokens[close].end
+            edits.append((end, end, f" * {scale:g})"))
+        end = items[0].end
+        edits.append((end, end, f" TABLESAMPLE SYSTEM ({sample_percent:g} PERCENT)"))
+        from_index = next(
+            i for i, t in enumerate(tokens) if t.upper == "FROM" and t.depth == 0
+        )
+        end = tokens[from_index - 1].end
+        edits.append((end, end, f", COUNT(*) AS {SAMPLED_ROWS_COLUMN}"))
+        approximations.append(f"TABLESAMPLE SYSTEM ({sample_percent:g} PERCENT)")
+
+    if not edits:
+        return None
+    # Splice from the end backwards; at equal offsets, later edits go in first so
+    # earlier ones end up in front of them.
+    rewritten = sql
+    for _, (start, end, text) in sorted(
+        enumerate(edits), key=lambda e: (e[1][0], e[1][1], e[0]), reverse=True
+    ):
+        rewritten = f"{rewritten[:start]}{text}{rewritten[end:]}"
+
+    error_notes = []
+    if any(a.startswith("COUNT(DISTINCT)") for a in approximations):
+        error_notes.append(
+            "APPROX_COUNT_DISTINCT is a HyperLogLog++ estimate: relative "
+            "standard error about 0.5%, exact for small counts."
+        )
+    if sampled:
+        error_notes.append(
+            f"COUNT and SUM are scaled by {scale:g} from a {sample_percent:g}% "
+            "block sample. Each row's _relative_error_95 is the 95% bound for its "
+            "counts (1.96 / sqrt(sampled rows)); SUM and AVG can vary more, and "
+            "block sampling adds error when rows are clustered."
+        )
+    return {
+        "query": rewritten,
+        "original_query": sql,
+        "table": table,
+        "approximations": approximations,
+        "sample_percent": sample_percent if sampled else None,
+        "scale_factor": scale if sampled else None,
+        "estimated_bytes_read": int(num_bytes * sample_percent / 100)
+        if sampled
+        else None,
+        "error_notes": error_notes,
+    }
+
+
+def _closing_paren(tokens: list[Token], index: int) -> int:
+    """Index of the ")" matching the "(" at index."""
+    depth = tokens[index].depth
+    for close in range(index + 1, len(tokens)):
+        if tokens[close].text == ")" and tokens[close].depth == depth:
+            return close
+    return len(tokens) - 1
+
+
+def _preview_columns(columns: dict[str, str], referenced: set[str]) -> list[str]:
+    """Pick preview columns: referenced ones first, then leading light columns."""
+    if len(columns) <= _PREVIEW_COLUMNS and not any(
+        t.upper() in _HEAVY_TYPES for t in columns.values()
+    ):
+        return list(columns)
+    kept = [c for c in columns if c.upper() in referenced]
+    for name, col_type in columns.items():
+        if len(kept) >= _PREVIEW_COLUMNS:
+            break
+        if name not in kept and col_type.upper() not in _HEAVY_TYPES:
+            kept.append(name)
+    # Preserve the table's column order in the result.
+    return [c for c in columns if c in kept]
+
+
+def _column_fraction(columns: dict[str, str], kept: list[str]) -> float:
+    """Estimate the share of table bytes stored in the kept columns."""
+
+    def weight(col_type: str) -> int:
+        return _TYPE_BYTES.get(col_type.upper(), _VARIABLE_TYPE_BYTES)
+
+    total = sum(weight(t) for t in columns.values())
+    if not total:
+        return 1.0
+    return sum(weight(columns[c]) for c in kept) / total
@@ -1,5 +1,13 @@
 from .bqml_agents.agent import bqml_agent
+from .compound_agents import compound_agent, plan_compound_request
 from .ds_agents.agent import ds_agent
-from .research_agents.agent import research_aida_agent
+from .research_agents.agent import research_aida_agent, research_compare_agent
 
-__all__ = ["bqml_agent", "ds_agent", "research_aida_agent"]
+__all__ = [
+    "bqml_agent",
+    "compound_agent",
+    "ds_agent",
+    "plan_compound_request",
+    "research_aida_agent",
+    "research_compare_agent",
+]
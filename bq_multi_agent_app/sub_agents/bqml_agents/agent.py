@@ -3,15 +3,32 @@ BQML Agent for BigQuery ML operations.
 
 This agent specializes in BigQuery ML tasks including model creation, training,
 and inspection. It uses RAG for BQML documentation and integrates with BigQuery
-through the bqml_toolset. Existing models are discovered via INFORMATION_SCHEMA
-queries through bqml_toolset, ensuring per-user OAuth is enforced consistently.
+through the bqml_toolset. Existing models are listed across datasets by
+list_bqml_models (inventory.py) with the caller's OAuth token, so per-user
+access is enforced consistently.
+Training runs as a background job (jobs.py) so it does not block the turn.
 """
 
 from google.adk.agents import Agent
 
+from .evaluation import compare_bqml_models
+from .inventory import invalidate_model_inventory, list_bqml_models
+from .jobs import get_bqml_job_status, refresh_bqml_jobs, submit_bqml_job
+from .prediction import predict_to_table
 from .prompts import return_instructions_bqml
+from .scripts import run_bqml_script
 from .tools import bqml_toolset, rag_response
+from ...callbacks import (
+    abandon_query_flight,
+    cache_table_schema,
+    lint_execute_sql,
+    report_query_rewrite,
+    rewrite_exploratory_query,
+    serve_cached_result,
+    store_query_result,
+)
 from ...constants import MODEL_NAME
+from ...tool_outputs import offload_large_output, read_tool_output
 
 bqml_agent = Agent(
     model=MODEL_NAME,
@@ -25,5 +42,28 @@ bqml_agent = Agent(
     tools=[
         bqml_toolset,  # BigQueryToolset for SQL/BQML execution with per-user OAuth
         rag_response,  # Query BQML documentation from RAG corpus
+        submit_bqml_job,  # Start CREATE MODEL without waiting for training
+        get_bqml_job_status,  # Poll a submitted training job
+        list_bqml_models,  # Cached cross-dataset model inventory
+        compare_bqml_models,  # Evaluate many models in one job
+        predict_to_table,  # Batch ML.PREDICT into a destination table
+        run_bqml_script,  # Multi-statement BQML workflow as one job
+        read_tool_output,  # Slices of results too large for the conversation
+    ],
+    before_agent_callback=refresh_bqml_jobs,
+    # Order matters: rewrite SELECT * previews first, then lint the final query;
+    # the result cache runs last so it keys on the query that would execute.
+    before_tool_callback=[
+        rewrite_exploratory_query,
+        lint_execute_sql,
+        serve_cached_result,
+    ],
+    after_tool_callback=[
+        cache_table_schema,
+        report_query_rewrite,
+        store_query_result,
+        invalidate_model_inventory,
+        offload_large_output,  # Last: replaces oversized results with a handle
     ],
+    on_tool_error_callback=abandon_query_flight,
 )
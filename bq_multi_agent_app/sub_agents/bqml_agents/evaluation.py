@@ -0,0 +1,192 @@
+"""
+Batched BQML model comparison for the BQML agent.
+
+Comparing candidates one ML.EVALUATE at a time costs a job (and an LLM turn)
+per model. compare_bqml_models builds one query that UNION ALLs ML.EVALUATE —
+and optionally ML.CONFUSION_MATRIX and ML.FEATURE_IMPORTANCE — across all
+models, runs it as a single job, and folds the rows into a compact comparison
+table. Output schemas differ by model type, so each row is carried as
+TO_JSON_STRING and parsed here.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+
+from google.adk.tools.tool_context import ToolContext
+
+from ...bq_clients import client_for
+from ...sql_lint import qualified_path
+
+_MAX_MODELS = 20
+
+# Features per model kept from ML.FEATURE_IMPORTANCE.
+_TOP_FEATURES = 5
+
+# ML.EVALUATE rows per model kept (ARIMA_PLUS returns one per time series).
+_MAX_EVAL_ROWS = 5
+
+# Direction of common ML.EVALUATE metrics, for best_by.
+_HIGHER_IS_BETTER = {
+    "precision",
+    "recall",
+    "accuracy",
+    "f1_score",
+    "roc_auc",
+    "r2_score",
+    "explained_variance",
+}
+_LOWER_IS_BETTER = {
+    "log_loss",
+    "mean_absolute_error",
+    "mean_squared_error",
+    "mean_squared_log_error",
+    "median_absolute_error",
+    "davies_bouldin_index",
+    "mean_squared_distance",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def build_comparison_sql(
+    models: list[str],
+    eval_table: str | None,
+    confusion_matrix: bool,
+    feature_importance: bool,
+) -> str:
+    """Build one UNION ALL query evaluating every model.
+
+    Args:
+        models: Fully-qualified model paths.
+        eval_table: Fully-qualified evaluation table, or None to use each
+            model's own evaluation split.
+        confusion_matrix: Include ML.CONFUSION_MATRIX (classifiers only).
+        feature_importance: Include ML.FEATURE_IMPORTANCE (tree models only).
+
+    Returns:
+        SQL returning (model, kind, row_json) rows.
+    """
+    table = f", TABLE `{eval_table}`" if eval_table else ""
+    parts = []
+    for model in models:
+        functions = [("evaluate", f"ML.EVALUATE(MODEL `{model}`{table})")]
+        if confusion_matrix:
+            functions.append(
+                ("confusion_matrix", f"ML.CONFUSION_MATRIX(MODEL `{model}`{table})")
+            )
+        if feature_importance:
+            functions.append(
+                ("feature_importance", f"ML.FEATURE_IMPORTANCE(MODEL `{model}`)")
+            )
+        parts.extend(
+            f"SELECT '{model}' AS model, '{kind}' AS kind, TO_JSON_STRING(t) AS row_json "
+            f"FROM {function} AS t"
+            for kind, function in functions
+        )
+    return "\nUNION ALL\n".join(parts)
+
+
+def summarize_comparison(rows: list[dict], models: list[str]) -> dict:
+    """Fold (model, kind, row_json) rows into a per-model comparison table."""
+    evaluations: dict[str, list[dict]] = {m: [] for m in models}
+    matrices: dict[str, list[dict]] = {}
+    importances: dict[str, list[dict]] = {}
+    for row in rows:
+        model, kind, values = row["model"], row["kind"], json.loads(row["row_json"])
+        if kind == "evaluate":
+            evaluations[model].append(values)
+        elif kind == "confusion_matrix":
+            matrices.setdefault(model, []).append(values)
+        else:
+            importances.setdefault(model, []).append(values)
+
+    comparison = []
+    for model in models:
+        evaluated = evaluations[model][:_MAX_EVAL_ROWS]
+        entry: dict[str, Any] = {"model": model}
+        if len(evaluated) == 1:
+            entry.update(evaluated[0])
+        else:
+            entry["evaluation_rows"] = evaluated
+        comparison.append(entry)
+
+    best_by = {}
+    for metric in _HIGHER_IS_BETTER | _LOWER_IS_BETTER:
+        scored = [
+            (e[metric], e["model"])
+            for e in comparison
+            if isinstance(e.get(metric), int | float)
+        ]
+        if len(scored) > 1:
+            pick = max if metric in _HIGHER_IS_BETTER else min
+            best_by[metric] = pick(scored)[1]
+
+    result: dict[str, Any] = {"comparison": comparison, "best_by": best_by}
+    if matrices:
+        result["confusion_matrices"] = matrices
+    if importances:
+        result["top_features"] = {
+            model: sorted(
+                values,
+                key=lambda v: -(v.get("importance_gain") or 0),
+            )[:_TOP_FEATURES]
+            for model, values in importances.items()
+        }
+    return result
+
+
+async def compare_bqml_models(
+    project_id: str,
+    models: list[str],
+    tool_context: ToolContext,
+    eval_table: str = "",
+    confusion_matrix: bool = False,
+    feature_importance: bool = False,
+) -> dict:
+    """Evaluates several BQML models in one BigQuery job and compares them.
+
+    Use this instead of one ML.EVALUATE per model, e.g. after a hyperparameter
+    sweep. Read-only; no approval needed.
+
+    Args:
+        project_id: The GCP project to run the job in.
+        models: Model paths (dataset.model or project.dataset.model).
+        tool_context: Provided by ADK.
+        eval_table: Optional evaluation table; empty uses each model's own
+            evaluation data.
+        confusion_matrix: Also return ML.CONFUSION_MATRIX. Classification
+            models only.
+        feature_importance: Also return the top features from
+            ML.FEATURE_IMPORTANCE. Boosted tree and random forest models only.
+
+    Returns:
+        dict: comparison (one row of metrics per model), best_by (best model
+        per metric), and optionally confusion_matrices and top_features.
+    """
+    try:
+        if not models or len(models) > _MAX_MODELS:
+            raise ValueError(f"Pass between 1 and {_MAX_MODELS} models.")
+        paths = list(dict.fromkeys(qualified_path(m, project_id) for m in models))
+        table = qualified_path(eval_table, project_id) if eval_table else None
+    except ValueError as e:
+        return {"status": "ERROR", "error_details": str(e)}
+    sql = build_comparison_sql(paths, table, confusion_matrix, feature_importance)
+
+    def run():
+        client = client_for(tool_context, project_id, user_agent="compare_bqml_models")
+        return [dict(row) for row in client.query_and_wait(sql, project=project_id)]
+
+    started = time.perf_counter()
+    try:
+        rows = await asyncio.to_thread(run)
+    except Exception as e:
+        logger.exception("compare_bqml_models: comparison job failed")
+        return {"status": "ERROR", "error_details": str(e), "sql": sql}
+    return {
+        "status": "SUCCESS",
+        **summarize_comparison(rows, paths),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000),
+    }
@@ -0,0 +1,247 @@
+"""
+Cross-dataset BQML model inventory for the BQML agent.
+
+Listing models dataset by dataset (list_dataset_ids, then one
+INFORMATION_SCHEMA.MODELS query per dataset) costs a round trip per dataset.
+list_bqml_models instead:
+1. Runs one region-qualified `region-xx`.INFORMATION_SCHEMA.MODELS query that
+   covers every dataset in the project
+2. Adds training status and the last training run's evaluation metrics from
+   models.get (metadata calls, run in parallel) for the newest models
+3. Caches the inventory per user (user: state) for _INVENTORY_TTL_SECONDS
+
+The cache is treated as stale once a tracked BQML job (jobs.py) was submitted
+or finished after it was built, and is cleared by invalidate_model_inventory
+when execute_sql runs CREATE / ALTER / DROP MODEL.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from typing import Any
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from ...bq_clients import client_for
+from ...sql_lint import split_statements
+from .jobs import BQML_JOBS_KEY
+
+# User-scoped so the inventory survives new sessions: {"project|region": {...}}.
+MODEL_INVENTORY_KEY = "user:bqml_model_inventory"
+
+_INVENTORY_TTL_SECONDS = 15 * 60
+
+# Models (newest first) enriched with training runs and evaluation metrics.
+_MAX_DETAILED_MODELS = 25
+
+# Models returned to the model per call; narrow with dataset_id beyond this.
+_MAX_RETURNED_MODELS = 100
+
+_MODEL_DDL = {"CREATE", "ALTER", "DROP"}
+
+# Tools whose SQL argument can change models, and the argument's name.
+_SQL_TOOLS = {"execute_sql": "query", "run_bqml_script": "script"}
+
+logger = logging.getLogger(__name__)
+
+
+def _column(row: dict, *names: str) -> Any:
+    """Read the first present column, case-insensitively."""
+    lowered = {k.lower(): v for k, v in row.items()}
+    return next((lowered[n] for n in names if n in lowered), None)
+
+
+def _jsonable(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _scalar_metrics(metrics: dict) -> dict[str, float]:
+    """Flatten a training run's evaluationMetrics to its scalar values.
+
+    evaluationMetrics holds one family per model type (regressionMetrics,
+    binaryClassificationMetrics, clusteringMetrics, ...); nested aggregate
+    blocks are flattened and per-threshold / per-cluster lists are dropped.
+    """
+    flat: dict[str, float] = {}
+    for family in metrics.values():
+        if not isinstance(family, dict):
+            continue
+        for key, value in family.items():
+            if isinstance(value, dict):
+                flat.update(
+                    (k, v) for k, v in value.items() if isinstance(v, int | float)
+                )
+            elif isinstance(value, int | float):
+                flat[key] = value
+    return flat
+
+
+def _training_details(model: Any) -> dict:
+    """Last training run start time and evaluation metrics from a models.get result."""
+    runs = model.to_api_repr().get("trainingRuns") or []
+    if not runs:
+        return {"training_runs": 0}
+    last = runs[-1]
+    return {
+        "training_runs": len(runs),
+        "last_trained": last.get("startTime"),
+        "metrics": _scalar_metrics(last.get("evaluationMetrics") or {}),
+    }
+
+
+def _fetch_inventory(client: Any, project_id: str, region: str) -> list[dict]:
+    rows = client.query_and_wait(
+        f"SELECT * FROM `{project_id}`.`region-{region}`.INFORMATION_SCHEMA.MODELS",
+        project=project_id,
+    )
+    models = []
+    for row in rows:
+        row = dict(row)
+        models.append(
+            {
+                "dataset": _column(row, "model_schema", "schema_name", "dataset_id"),
+                "model": _column(row, "model_name", "model_id"),
+                "model_type": _column(row, "model_type"),
+                "created": _jsonable(_column(row, "creation_time")),
+            }
+        )
+    models.sort(key=lambda m: m["created"] or "", reverse=True)
+
+    def details(model):
+        try:
+            ref = f"{project_id}.{model['dataset']}.{model['model']}"
+            return _training_details(client.get_model(ref))
+        except Exception as e:  # noqa: BLE001 — inventory still useful without metrics
+            logger.debug("list_bqml_models: no details for %s: %s", model, e)
+            return {}
+
+    detailed = models[:_MAX_DETAILED_MODELS]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for model, extra in zip(detailed, pool.map(details, detailed), strict=True):
+            model.update(extra)
+    return models
+
+
+def _is_stale(entry: dict, jobs: dict[str, dict]) -> bool:
+    fetched_at = entry["fetched_at"]
+    if time.time() - fetched_at > _INVENTORY_TTL_SECONDS:
+        return True
+    return any(
+        job["submitted_at"] > fetched_at or (job.get("finished_at") or 0) > fetched_at
+        for job in jobs.values()
+    )
+
+
+async def list_bqml_models(
+    project_id: str,
+    tool_context: ToolContext,
+    region: str = "US",
+    dataset_id: str = "",
+    refresh: bool = False,
+) -> dict:
+    """Lists BigQuery ML models across all datasets in a project region.
+
+    Uses one region-level INFORMATION_SCHEMA.MODELS query instead of one query
+    per dataset. Results are cached for 15 minutes and refreshed automatically
+    after a CREATE MODEL.
+
+    Args:
+        project_id: The GCP project that owns the models.
+        tool_context: Provided by ADK.
+        region: BigQuery location of the datasets, e.g. "US", "EU",
+            "us-central1" (get_dataset_info shows a dataset's location).
+        dataset_id: Optional dataset to filter the inventory to.
+        refresh: Bypass the cache.
+
+    Returns:
+        dict: models (dataset, model, model_type, created, training_status,
+        last_trained, metrics), model_count, and whether the result was cached.
+    """
+    region = re.sub(r"^region-", "", region.strip(), flags=re.IGNORECASE).lower()
+    if not re.fullmatch(r"[a-z0-9-]+", region):
+        return {"status": "ERROR", "error_details": f"Invalid region: {region!r}"}
+
+    jobs = tool_context.state.get(BQML_JOBS_KEY) or {}
+    inventory = dict(tool_context.state.get(MODEL_INVENTORY_KEY) or {})
+    cache_key = f"{project_id}|{region}"
+    entry = inventory.get(cache_key)
+    cached = bool(entry) and not refresh and not _is_stale(entry, jobs)
+
+    if not cached:
+
+        def fetch():
+            client = client_for(tool_context, project_id, user_agent="list_bqml_models")
+            return _fetch_inventory(client, project_id, region)
+
+        try:
+            models = await asyncio.to_thread(fetch)
+        except Exception as e:
+            logger.exception("list_bqml_models: inventory query failed")
+            return {"status": "ERROR", "error_details": str(e)}
+        entry = {"fetched_at": int(time.time()), "models": models}
+        inventory[cache_key] = entry
+        tool_context.state[MODEL_INVENTORY_KEY] = inventory
+
+    training = {
+        job["model"] for job in jobs.values() if job["state"] != "DONE" and job["model"]
+    }
+    models = [
+        {
+            **m,
+            "training_status": "TRAINING"
+            if f"{project_id}.{m['dataset']}.{m['model']}" in training
+            else ("TRAINED" if m.get("training_runs") else "UNKNOWN"),
+        }
+        for m in entry["models"]
+        if not dataset_id or m["dataset"] == dataset_id
+    ]
+    # New models do not exist (and are not listed) until training finishes.
+    listed = {f"{project_id}.{m['dataset']}.{m['model']}" for m in models}
+    for path in sorted(training - listed):
+        project, dataset, model = path.split(".")
+        if project == project_id and (not dataset_id or dataset == dataset_id):
+            models.insert(
+                0, {"dataset": dataset, "model": model, "training_status": "TRAINING"}
+            )
+    return {
+        "status": "SUCCESS",
+        "region": region,
+        "model_count": len(models),
+        "models": models[:_MAX_RETURNED_MODELS],
+        "truncated": len(models) > _MAX_RETURNED_MODELS,
+        "cached": cached,
+        "fetched_at": datetime.fromtimestamp(entry["fetched_at"], UTC).isoformat(),
+    }
+
+
+def _changes_models(sql: str) -> bool:
+    """True if any statement is CREATE / ALTER / DROP [OR REPLACE] MODEL."""
+    for statement in split_statements(sql):
+        words = [t.upper for t in statement[:4]]
+        if words[0] in _MODEL_DDL and "MODEL" in words:
+            return True
+    return False
+
+
+def invalidate_model_inventory(
+    tool: BaseTool,
+    args: dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any,
+) -> dict | None:
+    """after_tool_callback: drop the cached inventory after model DDL via SQL tools.
+
+    Failed scripts are included: statements before the failure have run.
+    """
+    if tool.name not in _SQL_TOOLS or not isinstance(tool_response, dict):
+        return None
+    if tool.name == "execute_sql" and tool_response.get("status") == "ERROR":
+        return None
+    sql = args.get(_SQL_TOOLS[tool.name]) or ""
+    if _changes_models(sql) and tool_context.state.get(MODEL_INVENTORY_KEY):
+        tool_context.state[MODEL_INVENTORY_KEY] = {}
+    return None
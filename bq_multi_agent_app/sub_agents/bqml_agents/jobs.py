@@ -0,0 +1,261 @@
+"""
+Asynchronous BQML training jobs for the BQML agent.
+
+Running CREATE MODEL through execute_sql blocks the tool call, and with it the
+user's turn, until training finishes — minutes to hours, well past request
+timeouts. Instead:
+1. submit_bqml_job inserts the query job and returns its handle immediately
+2. get_bqml_job_status reports the job state, per-iteration loss from the job
+   statistics while training runs, and ML.TRAINING_INFO once it is done
+3. refresh_bqml_jobs (before-agent callback) checks pending jobs at the start
+   of each turn; jobs that finished since the last turn are listed under
+   BQML_JOB_UPDATES_KEY, which the root global instruction surfaces
+
+Submitted jobs are tracked in session state under BQML_JOBS_KEY, keyed by
+job ID. refresh_bqml_jobs and checks on running jobs are jobs.get metadata
+calls; get_bqml_job_status runs one ML.TRAINING_INFO query job, only once
+training has succeeded.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools.tool_context import ToolContext
+
+from ...bq_clients import client_for
+from ...sql_lint import created_models, split_statements
+
+# Session state key: {job_id: {project, location, model, state, ...}}.
+BQML_JOBS_KEY = "bqml_jobs"
+
+# Jobs that finished since the previous turn (invocation-scoped).
+BQML_JOB_UPDATES_KEY = "temp:bqml_job_updates"
+
+# Finished jobs beyond this count are dropped from session state, oldest first.
+_MAX_TRACKED_JOBS = 20
+
+# ML.TRAINING_INFO iterations returned by get_bqml_job_status.
+_TRAINING_INFO_ROWS = 5
+
+logger = logging.getLogger(__name__)
+
+
+def _ml_progress(job: Any) -> dict | None:
+    """Iteration progress from the job's mlStatistics, available while training."""
+    stats = job.to_api_repr().get("statistics", {}).get("query", {})
+    ml = stats.get("mlStatistics")
+    if not ml:
+        return None
+    iterations = ml.get("iterationResults") or []
+    progress: dict[str, Any] = {
+        "iterations_completed": len(iterations),
+        "max_iterations": int(ml["maxIterations"]) if "maxIterations" in ml else None,
+    }
+    if iterations:
+        last = iterations[-1]
+        progress["last_training_loss"] = last.get("trainingLoss")
+        progress["last_eval_loss"] = last.get("evalLoss")
+    return progress
+
+
+def _job_record(job: Any, record: dict) -> dict:
+    """Update a tracked-job record from a fetched QueryJob."""
+    record = dict(record, state=job.state)
+    if job.state == "DONE":
+        record["error"] = (job.error_result or {}).get("message")
+        record["finished_at"] = int(job.ended.timestamp()) if job.ended else None
+        if job.started and job.ended:
+            record["duration_seconds"] = round(
+                (job.ended - job.started).total_seconds()
+            )
+    return record
+
+
+def _prune(jobs: dict[str, dict]) -> dict[str, dict]:
+    """Keep every pending job and the most recent finished ones."""
+    finished = [job_id for job_id, r in jobs.items() if r["state"] == "DONE"]
+    excess = len(jobs) - _MAX_TRACKED_JOBS
+    drop = set(finished[: max(excess, 0)])
+    return {job_id: r for job_id, r in jobs.items() if job_id not in drop}
+
+
+def track_bqml_job(
+    tool_context: ToolContext, job: Any, project_id: str, model: str | None
+) -> None:
+    """Start tracking a submitted job in BQML_JOBS_KEY.
+
+    model is the model the job creates, or None for a script that creates none.
+    """
+    jobs = dict(tool_context.state.get(BQML_JOBS_KEY) or {})
+    jobs[job.job_id] = {
+        "project": project_id,
+        "location": job.location,
+        "model": model,
+        "state": job.state or "PENDING",
+        "submitted_at": int(time.time()),
+    }
+    tool_context.state[BQML_JOBS_KEY] = _prune(jobs)
+
+
+async def submit_bqml_job(
+    project_id: str,
+    statement: str,
+    tool_context: ToolContext,
+    location: str = "",
+) -> dict:
+    """Submits a CREATE MODEL statement as a background BigQuery job.
+
+    Returns as soon as the job is accepted — training continues in BigQuery.
+    Use get_bqml_job_status with the returned job_id to check progress.
+
+    Args:
+        project_id: The GCP project to run the job in.
+        statement: A single CREATE [OR REPLACE] MODEL statement.
+        tool_context: Provided by ADK.
+        location: Dataset location (e.g. "US"). Optional; BigQuery infers it
+            from the model's dataset when empty.
+
+    Returns:
+        dict: status, job_id, model, and location of the submitted job.
+    """
+    models = created_models(statement, project_id)
+    if len(split_statements(statement)) != 1 or len(models) != 1:
+        return {
+            "status": "ERROR",
+            "error_details": "submit_bqml_job accepts a single CREATE MODEL "
+            "statement. Use execute_sql for other statements.",
+        }
+
+    def submit():
+        client = client_for(
+            tool_context, project_id, location or None, user_agent="submit_bqml_job"
+        )
+        return client.query(
+            statement,
+            project=project_id,
+            location=location or None,
+            job_id_prefix="bqml_",
+        )
+
+    try:
+        job = await asyncio.to_thread(submit)
+    except Exception as e:
+        logger.exception("submit_bqml_job: job insert failed")
+        return {"status": "ERROR", "error_details": str(e)}
+
+    track_bqml_job(tool_context, job, project_id, models[0])
+    return {
+        "status": "SUCCESS",
+        "job_id": job.job_id,
+        "model": models[0],
+        "location": job.location,
+        "job_state": job.state or "PENDING",
+    }
+
+
+async def get_bqml_job_status(job_id: str, tool_context: ToolContext) -> dict:
+    """Checks the progress of a job started with submit_bqml_job or run_bqml_script.
+
+    Args:
+        job_id: The job_id returned by submit_bqml_job or run_bqml_script.
+        tool_context: Provided by ADK.
+
+    Returns:
+        dict: job_state (PENDING, RUNNING, DONE), error if the job failed,
+        training progress while running, and the last ML.TRAINING_INFO
+        iterations once training succeeded.
+    """
+    jobs = tool_context.state.get(BQML_JOBS_KEY) or {}
+    record = jobs.get(job_id)
+    if record is None:
+        return {
+            "status": "ERROR",
+            "error_details": f"Unknown job {job_id}. Tracked jobs: "
+            f"{', '.join(jobs) or 'none'}.",
+        }
+
+    def fetch():
+        client = client_for(
+            tool_context,
+            record["project"],
+            record["location"],
+            user_agent="get_bqml_job_status",
+        )
+        job = client.get_job(
+            job_id, project=record["project"], location=record["location"]
+        )
+        training_info = None
+        if job.state == "DONE" and not job.error_result and record["model"]:
+            rows = client.query_and_wait(
+                f"SELECT * FROM ML.TRAINING_INFO(MODEL `{record['model']}`) "
+                f"ORDER BY iteration DESC LIMIT {_TRAINING_INFO_ROWS}",
+                project=record["project"],
+                location=record["location"],
+            )
+            training_info = [dict(row) for row in rows]
+        return job, training_info
+
+    try:
+        job, training_info = await asyncio.to_thread(fetch)
+    except Exception as e:
+        logger.exception("get_bqml_job_status: status check for %s failed", job_id)
+        return {"status": "ERROR", "error_details": str(e)}
+
+    record = _job_record(job, record)
+    tool_context.state[BQML_JOBS_KEY] = {**jobs, job_id: record}
+    result = {
+        "status": "SUCCESS",
+        "job_id": job_id,
+        "model": record["model"],
+        "job_state": job.state,
+        "error": record.get("error"),
+        "elapsed_seconds": int(time.time()) - record["submitted_at"],
+        "slot_ms": job.slot_millis,
+    }
+    if job.state != "DONE":
+        result["training_progress"] = _ml_progress(job)
+    if training_info is not None:
+        result["training_info"] = training_info
+    return result
+
+
+async def refresh_bqml_jobs(callback_context: CallbackContext) -> None:
+    """Before-agent callback: check pending BQML jobs and note newly finished ones.
+
+    Makes no calls when no job is pending. Finished jobs are listed under
+    BQML_JOB_UPDATES_KEY for this invocation only.
+    """
+    jobs = callback_context.state.get(BQML_JOBS_KEY) or {}
+    pending = {job_id: r for job_id, r in jobs.items() if r["state"] != "DONE"}
+    if not pending:
+        return
+
+    def fetch(job_id, record):
+        client = client_for(
+            callback_context,
+            record["project"],
+            record["location"],
+            user_agent="refresh_bqml_jobs",
+        )
+        return client.get_job(
+            job_id, project=record["project"], location=record["location"]
+        )
+
+    updated = dict(jobs)
+    finished = []
+    for job_id, record in pending.items():
+        try:
+            job = await asyncio.to_thread(fetch, job_id, record)
+        except Exception as e:  # noqa: BLE001 — retried next turn
+            logger.warning("refresh_bqml_jobs: could not check %s: %s", job_id, e)
+            continue
+        updated[job_id] = _job_record(job, record)
+        if job.state == "DONE":
+            finished.append({"job_id": job_id, **updated[job_id]})
+
+    callback_context.state[BQML_JOBS_KEY] = updated
+    if finished:
+        callback_context.state[BQML_JOB_UPDATES_KEY] = finished
@@ -0,0 +1,258 @@
+"""
+Batch ML.PREDICT into a destination table for the BQML agent.
+
+ML.PREDICT through execute_sql returns predictions inline, so scoring a large
+table is either truncated or floods the context. predict_to_table instead:
+1. Runs CREATE OR REPLACE TABLE ... [PARTITION BY] [CLUSTER BY] AS
+   SELECT * FROM ML.PREDICT(...) as one job
+2. Reads the row count from table metadata and summary statistics of the
+   predicted_* columns with one aggregate query
+3. Returns a few sample rows (tabledata.list, not billed) and the job's
+   performance stats, which are also kept in session state under
+   PREDICTION_RUNS_KEY
+4. Hands the job over to background tracking (jobs.py) if it is still
+   running after _MAX_WAIT_SECONDS
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import re
+import time
+from decimal import Decimal
+from typing import Any
+
+from google.adk.tools.tool_context import ToolContext
+
+from ...bq_clients import client_for
+from ...sql_lint import as_subquery, qualified_path, split_statements
+from .jobs import track_bqml_job
+
+# Session state key: recent prediction runs with job statistics (newest last).
+PREDICTION_RUNS_KEY = "bqml_prediction_runs"
+
+_MAX_RECORDED_RUNS = 20
+
+_MAX_SAMPLE_ROWS = 20
+
+# Longer prediction jobs continue as tracked jobs.
+_MAX_WAIT_SECONDS = 600
+
+# Categorical predictions: most frequent labels reported.
+_TOP_LABELS = 10
+
+_NUMERIC_TYPES = {"INTEGER", "INT64", "FLOAT", "FLOAT64", "NUMERIC", "BIGNUMERIC"}
+
+_COLUMN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# column, DATE(column), or {DATE,DATETIME,TIMESTAMP}_TRUNC(column, unit).
+_PARTITION_RE = re.compile(
+    r"[A-Za-z_]\w*"
+    r"|DATE\(\s*[A-Za-z_]\w*\s*\)"
+    r"|(?:DATE|DATETIME|TIMESTAMP)_TRUNC\(\s*[A-Za-z_]\w*\s*,\s*"
+    r"(?:HOUR|DAY|MONTH|YEAR)\s*\)",
+    re.IGNORECASE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def build_predict_sql(
+    model: str,
+    destination: str,
+    source: str,
+    partition_by: str = "",
+    cluster_by: list[str] | None = None,
+) -> str:
+    """Build the CREATE TABLE AS ML.PREDICT statement.
+
+    Args:
+        model: Fully-qualified model path.
+        destination: Fully-qualified destination table path.
+        source: "TABLE `p.d.t`" or a parenthesised SELECT.
+        partition_by: Validated partitioning expression, or "".
+        cluster_by: Validated clustering columns (at most 4).
+
+    Returns:
+        One BigQuery DDL statement.
+    """
+    lines = [f"CREATE OR REPLACE TABLE `{destination}`"]
+    if partition_by:
+        lines.append(f"PARTITION BY {partition_by}")
+    if cluster_by:
+        lines.append(f"CLUSTER BY {', '.join(cluster_by)}")
+    lines.append(f"AS SELECT * FROM ML.PREDICT(MODEL `{model}`, {source})")
+    return "\n".join(lines)
+
+
+def build_summary_sql(destination: str, schema: list[Any]) -> str | None:
+    """Aggregate query over the scalar predicted_* columns of the output table."""
+    selects = []
+    for field in schema:
+        if not field.name.startswith("predicted_") or field.mode == "REPEATED":
+            continue
+        name = field.name
+        if field.field_type in _NUMERIC_TYPES:
+            selects.append(
+                f"STRUCT(MIN({name}) AS min, MAX({name}) AS max, "
+                f"AVG({name}) AS avg, STDDEV({name}) AS stddev) AS {name}"
+            )
+        elif field.field_type in ("STRING", "BOOLEAN", "BOOL"):
+            selects.append(f"APPROX_TOP_COUNT({name}, {_TOP_LABELS}) AS {name}")
+    if not selects:
+        return None
+    return f"SELECT {', '.join(selects)} FROM `{destination}`"
+
+
+def _job_stats(job: Any) -> dict:
+    return {
+        "job_id": job.job_id,
+        "elapsed_seconds": round((job.ended - job.started).total_seconds(), 1)
+        if job.started and job.ended
+        else None,
+        "bytes_processed": job.total_bytes_processed,
+        "bytes_billed": job.total_bytes_billed,
+        "slot_ms": job.slot_millis,
+    }
+
+
+async def predict_to_table(
+    project_id: str,
+    model: str,
+    destination_table: str,
+    tool_context: ToolContext,
+    input_table: str = "",
+    input_query: str = "",
+    partition_by: str = "",
+    cluster_by: list[str] | None = None,
+    sample_rows: int = 5,
+) -> dict:
+    """Scores a table with ML.PREDICT and writes the predictions to a table.
+
+    Use this instead of ML.PREDICT through execute_sql when scoring more than a
+    few hundred rows. Writes a table, so get user approval first.
+
+    Args:
+        project_id: The GCP project to run the job in.
+        model: Model path (dataset.model or project.dataset.model).
+        destination_table: Output table path; replaced if it exists.
+        tool_context: Provided by ADK.
+        input_table: Table to score. Pass this or input_query.
+        input_query: A SELECT producing the rows to score.
+        partition_by: Optional partitioning of the output: a DATE/TIMESTAMP
+            column, DATE(col), or TIMESTAMP_TRUNC(col, DAY|HOUR|MONTH|YEAR).
+        cluster_by: Optional clustering columns (up to 4).
+        sample_rows: Sample prediction rows to return (at most 20).
+
+    Returns:
+        dict: destination table, row_count, summary statistics of each
+        predicted_* column, sample rows, and job statistics.
+    """
+    try:
+        model_path = qualified_path(model, project_id)
+        destination = qualified_path(destination_table, project_id)
+        if bool(input_table) == bool(input_query):
+            raise ValueError("Pass exactly one of input_table or input_query.")
+        if input_table:
+            source = f"TABLE `{qualified_path(input_table, project_id)}`"
+        else:
+            statements = split_statements(input_query)
+            if len(statements) != 1 or statements[0][0].upper not in ("SELECT", "WITH"):
+                raise ValueError("input_query must be a single SELECT statement.")
+            source = as_subquery(input_query, statements[0])
+        if partition_by and not _PARTITION_RE.fullmatch(partition_by.strip()):
+            raise ValueError(f"Unsupported partition_by: {partition_by!r}")
+        cluster_by = [c.strip() for c in cluster_by or [] if c.strip()]
+        if len(cluster_by) > 4 or not all(_COLUMN_RE.fullmatch(c) for c in cluster_by):
+            raise ValueError("cluster_by takes up to 4 column names.")
+    except ValueError as e:
+        return {"status": "ERROR", "error_details": str(e)}
+
+    sql = build_predict_sql(
+        model_path, destination, source, partition_by.strip(), cluster_by
+    )
+    sample_rows = max(0, min(sample_rows, _MAX_SAMPLE_ROWS))
+
+    def run():
+        client = client_for(tool_context, project_id, user_agent="predict_to_table")
+        job = client.query(sql, project=project_id)
+        try:
+            job.result(timeout=_MAX_WAIT_SECONDS)
+        except concurrent.futures.TimeoutError:
+            return job, None, None, None
+        table = client.get_table(destination)
+        summary = None
+        summary_sql = build_summary_sql(destination, table.schema)
+        if summary_sql:
+            rows = list(client.query_and_wait(summary_sql, project=project_id))
+            summary = dict(rows[0]) if rows else None
+        sample = (
+            [
+                _jsonable(dict(row.items()))
+                for row in client.list_rows(table, max_results=sample_rows)
+            ]
+            if sample_rows
+            else []
+        )
+        return job, table, summary, sample
+
+    try:
+        job, table, summary, sample = await asyncio.to_thread(run)
+    except Exception as e:
+        logger.exception("predict_to_table: prediction job failed")
+        return {"status": "ERROR", "error_details": str(e), "sql": sql}
+
+    if table is None:
+        track_bqml_job(tool_context, job, project_id, None)
+        return {
+            "status": "SUCCESS",
+            "job_id": job.job_id,
+            "job_state": "RUNNING",
+            "destination_table": destination,
+            "next_step": f"The prediction job is still running after "
+            f"{_MAX_WAIT_SECONDS}s and continues in the background. Check it "
+            "with get_bqml_job_status.",
+        }
+
+    stats = _job_stats(job)
+    runs = list(tool_context.state.get(PREDICTION_RUNS_KEY) or [])
+    runs.append(
+        {
+            "model": model_path,
+            "destination": destination,
+            "row_count": table.num_rows,
+            "recorded_at": int(time.time()),
+            **stats,
+        }
+    )
+    tool_context.state[PREDICTION_RUNS_KEY] = runs[-_MAX_RECORDED_RUNS:]
+    logger.info(
+        "predict_to_table: %s rows into %s in %ss (%s bytes billed)",
+        table.num_rows,
+        destination,
+        stats["elapsed_seconds"],
+        stats["bytes_billed"],
+    )
+    return {
+        "status": "SUCCESS",
+        "destination_table": destination,
+        "row_count": table.num_rows,
+        "summary": _jsonable(summary or {}),
+        "sample_rows": sample,
+        "job_stats": stats,
+    }
@@ -0,0 +1,371 @@
+"""
+Post-processing of BQML RAG corpus retrievals for rag_response.
+
+rag_response used to return str() of the retrieval response — the proto repr
+with its metadata — so every lookup put noise into the BQML agent's context.
+condense_contexts turns the retrieved contexts into a short, structured list:
+1. duplicate chunks (same text after whitespace normalization, contained in
+   a chunk already kept, or mostly the same passage of the same source) are
+   dropped
+2. candidates are re-ranked (RAG_RERANKER):
+   - lexical (default): BM25 over the candidate set, with BQML identifiers
+     such as ML.GENERATE_EMBEDDING or AUTO_ARIMA_MAX_ORDER kept whole, so an
+     exact function or option name outranks a merely similar chunk
+   - vertex: the Vertex AI ranking service (a hosted cross-encoder) reorders
+     candidates at retrieval time; no local re-ranking
+   - none: vector distance order
+3. the top RAG_TOP_K chunks are kept, trimmed to RAG_MAX_TOKENS in total
+
+Each chunk keeps its source URI and vector distance so the agent can cite it.
+
+Hybrid retrieval: vector search with a distance threshold often misses chunks
+that name an exact identifier. setup/rag_corpus/create_bqml_corpus.py also
+builds a local BM25 inverted index (LexicalIndex) over the same documents,
+chunked the same way, and saves it to RAG_LEXICAL_INDEX. When that file
+exists, rag_response fuses the vector results with the index's top hits by
+reciprocal rank fusion and skips the lexical re-ranking. The corpus chunks by
+tokens and the index by words, so chunk boundaries differ: fusion matches
+chunks of the same source by shared word shingles, not identical text. Set
+RAG_HYBRID=false to use vector results only.
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Chunks returned to the agent per lookup.
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "3"))
+
+# Candidates retrieved for re-ranking; RAG_TOP_K of them are kept.
+RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", "10"))
+
+# "lexical" (default), "vertex", or "none".
+RAG_RERANKER = os.getenv("RAG_RERANKER", "lexical").lower()
+
+# Vertex AI ranking model used when RAG_RERANKER=vertex.
+RAG_RANKER_MODEL = os.getenv("RAG_RANKER_MODEL", "semantic-ranker-default@latest")
+
+# Approximate token budget for all returned chunk texts.
+RAG_MAX_TOKENS = int(os.getenv("RAG_MAX_TOKENS", "1500"))
+
+# Fuse vector results with the local BM25 index when the index file exists.
+RAG_HYBRID = os.getenv("RAG_HYBRID", "true").lower() == "true"
+
+# Where create_bqml_corpus.py writes the index; deployed with the agent.
+RAG_LEXICAL_INDEX = os.getenv("RAG_LEXICAL_INDEX") or str(
+    Path(__file__).parent / "bqml_lexical_index.json"
+)
+
+# Chunking shared by the corpus import and the lexical index; tune with
+# benchmarks/bench_retrieval_chunking.py, then re-run create_bqml_corpus.py.
+CHUNK_SIZE = int(os.getenv("RAG_CHUNK_SIZE", "512"))
+CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", "100"))
+
+# Reciprocal rank fusion constant: score = sum of 1 / (k + rank).
+_RRF_K = 60
+
+# Two chunks of one source are the same passage when this share of the
+# smaller chunk's word shingles (runs of _SHINGLE_WORDS words) is in both.
+_SHINGLE_WORDS = 3
+_SAME_PASSAGE_OVERLAP = 0.5
+
+# Rough chars-per-token ratio for English documentation text.
+_CHARS_PER_TOKEN = 4
+
+# A trimmed chunk shorter than this (tokens) is dropped instead.
+_MIN_CHUNK_TOKENS = 60
+
+# Identifiers such as ML.GENERATE_EMBEDDING, ARIMA_PLUS_XREG, or plain words.
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+(?:[._][A-Za-z0-9]+)*")
+
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased terms; dotted or underscored identifiers also yield their parts.
+
+    "ML.GENERATE_EMBEDDING" -> ["ml.generate_embedding", "ml", "generate",
+    "embedding"], so an exact identifier match scores higher than its words.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        terms.append(token)
+        parts = re.split(r"[._]", token)
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+class LexicalIndex:
+    """BM25 inverted index over documentation chunks.
+
+    Each chunk is a dict with at least text and source_uri. Postings map each
+    term to (chunk number, term frequency) pairs.
+    """
+
+    def __init__(self, chunks: list[dict[str, Any]]):
+        self.chunks = chunks
+        self.lengths: list[int] = []
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+        for number, chunk in enumerate(chunks):
+            terms = Counter(tokenize(chunk["text"]))
+            self.lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self.postings.setdefault(term, []).append((number, frequency))
+
+    def scores(self, query: str) -> dict[int, float]:
+        """BM25 score of every chunk that contains a query term, by chunk number."""
+        average = sum(self.lengths) / len(self.lengths) if self.lengths else 1.0
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term, [])
+            if not postings:
+                continue
+            idf = math.log(
+                1 + (len(self.chunks) - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for number, frequency in postings:
+                length = self.lengths[number] / (average or 1.0)
+                scores[number] = scores.get(number, 0.0) + idf * (
+                    frequency
+                    * (_BM25_K1 + 1)
+                    / (frequency + _BM25_K1 * (1 - _BM25_B + _BM25_B * length))
+                )
+        return scores
+
+    def search(self, query: str, k: int) -> list[dict[str, Any]]:
+        """The k best chunks for the query, best first."""
+        scores = self.scores(query)
+        best = heapq.nlargest(k, scores, key=lambda number: scores[number])
+        return [self.chunks[number] for number in best]
+
+    def save(self, path: str | Path) -> None:
+        Path(path).write_text(
+            json.dumps(
+                {
+                    "chunk_size": CHUNK_SIZE,
+                    "chunk_overlap": CHUNK_OVERLAP,
+                    "chunks": self.chunks,
+                    "lengths": self.lengths,
+                    "postings": self.postings,
+                },
+                separators=(",", ":"),
+            )
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LexicalIndex":
+        data = json.loads(Path(path).read_text())
+        index = cls.__new__(cls)
+        index.chunks = data["chunks"]
+        index.lengths = data["lengths"]
+        index.postings = {
+            term: [tuple(posting) for posting in postings]
+            for term, postings in data["postings"].items()
+        }
+        return index
+
+
+def lexical_scores(query: str, texts: list[str]) -> list[float]:
+    """BM25 score of each text for the query, with statistics from the texts."""
+    scores = LexicalIndex([{"text": text} for text in texts]).scores(query)
+    return [scores.get(number, 0.0) for number in range(len(texts))]
+
+
+def chunk_text(
+    text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP
+) -> list[str]:
+    """Split text into overlapping chunks of chunk_size words.
+
+    Approximates the corpus import's token-based chunking with whitespace
+    words, so lexical and vector chunks cover similar spans.
+    """
+    words = text.split()
+    if not words:
+        return []
+    step = max(chunk_size - chunk_overlap, 1)
+    return [
+        " ".join(words[start : start + chunk_size])
+        for start in range(0, max(len(words) - chunk_overlap, 1), step)
+    ]
+
+
+_index: LexicalIndex | None = None
+_index_loaded = False
+
+
+def lexical_index() -> LexicalIndex | None:
+    """The corpus BM25 index, loaded on first use; None if disabled or missing."""
+    global _index, _index_loaded
+    if not _index_loaded:
+        _index_loaded = True
+        if RAG_HYBRID and Path(RAG_LEXICAL_INDEX).exists():
+            try:
+                _index = LexicalIndex.load(RAG_LEXICAL_INDEX)
+                logger.info(
+                    "lexical_index: %d chunks loaded from %s",
+                    len(_index.chunks),
+                    RAG_LEXICAL_INDEX,
+                )
+            except (OSError, ValueError, KeyError):
+                logger.exception(
+                    "lexical_index: unreadable index %s", RAG_LEXICAL_INDEX
+                )
+    return _index
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[dict[str, Any]]], k: int = _RRF_K
+) -> list[dict[str, Any]]:
+    """Merge ranked chunk lists; chunks covering the same passage are combined.
+
+    Each passage scores sum(1 / (k + rank)) over the lists it appears in, so a
+    passage ranked well by both vector and lexical search comes first. The
+    first list's copy of a passage is kept (with its distance); later copies
+    only add to its score.
+    """
+    fused: list[dict[str, Any]] = []
+    shingles: list[set[tuple[str, ...]]] = []
+    scores: list[float] = []
+    for ranking in rankings:
+        matched: set[int] = set()
+        for rank, chunk in enumerate(ranking, start=1):
+            words = _shingles(chunk.get("text") or "")
+            if not words:
+                continue
+            match = _same_passage(chunk, words, fused, shingles)
+            if match is None:
+                match = len(fused)
+                fused.append(dict(chunk))
+                shingles.append(words)
+                scores.append(0.0)
+            elif match in matched:
+                continue  # a list's near-duplicates of one passage count once
+            else:
+                fused[match] = {**chunk, **fused[match]}
+            matched.add(match)
+            scores[match] += 1 / (k + rank)
+    order = sorted(range(len(fused)), key=lambda i: -scores[i])
+    return [fused[i] for i in order]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def _shingles(text: str) -> set[tuple[str, ...]]:
+    """Runs of _SHINGLE_WORDS words, ignoring case and punctuation."""
+    words = _TOKEN_RE.findall(text.lower())
+    if len(words) <= _SHINGLE_WORDS:
+        return {tuple(words)} if words else set()
+    return {
+        tuple(words[i : i + _SHINGLE_WORDS])
+        for i in range(len(words) - _SHINGLE_WORDS + 1)
+    }
+
+
+def _same_passage(
+    chunk: dict[str, Any],
+    words: set[tuple[str, ...]],
+    others: list[dict[str, Any]],
+    other_shingles: list[set[tuple[str, ...]]],
+) -> int | None:
+    """Index of the first of others from the same source overlapping chunk."""
+    for i, other in enumerate(others):
+        if other.get("source_uri") != chunk.get("source_uri"):
+            continue
+        smaller = min(len(words), len(other_shingles[i]))
+        if (
+            smaller
+            and len(words & other_shingles[i]) >= _SAME_PASSAGE_OVERLAP * smaller
+        ):
+            return i
+    return None
+
+
+def dedupe_contexts(contexts: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Drop empty chunks and chunks whose text repeats or is inside a kept chunk.
+
+    Chunks of a kept chunk's source that mostly overlap it (the same passage
+    with different chunk boundaries) are dropped too. Contexts are processed
+    in order, so the first (closest) copy is kept.
+    """
+    kept: list[dict[str, Any]] = []
+    seen: list[str] = []
+    kept_shingles: list[set[tuple[str, ...]]] = []
+    for context in contexts:
+        text = _normalize(context.get("text") or "")
+        if not text or any(text in other for other in seen):
+            continue
+        # A longer chunk replaces kept ones it contains.
+        contained = [i for i, other in enumerate(seen) if other in text]
+        for i in reversed(contained):
+            del kept[i], seen[i], kept_shingles[i]
+        words = _shingles(text)
+        if _same_passage(context, words, kept, kept_shingles) is not None:
+            continue
+        kept.append(context)
+        seen.append(text)
+        kept_shingles.append(words)
+    return kept
+
+
+def _trim(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[: cut if cut > 0 else max_chars].rstrip() + " …"
+
+
+def condense_contexts(
+    query: str,
+    contexts: list[dict[str, Any]],
+    top_k: int = RAG_TOP_K,
+    max_tokens: int = RAG_MAX_TOKENS,
+    rerank: bool = True,
+) -> dict[str, Any]:
+    """Deduplicate, re-rank, and trim retrieved contexts for the agent.
+
+    Args:
+        query: The retrieval query.
+        contexts: Retrieved chunks in retrieval order, each a dict with text,
+            source_uri, and distance.
+        top_k: Maximum chunks to return.
+        max_tokens: Approximate token budget for all returned texts.
+        rerank: Re-rank by lexical score before taking top_k.
+
+    Returns:
+        dict: status, query, and chunks (text, source_uri, distance), plus
+        omitted_chunks when candidates were dropped by top_k or the budget.
+    """
+    candidates = dedupe_contexts(contexts)
+    if rerank and len(candidates) > 1:
+        scores = lexical_scores(query, [c["text"] for c in candidates])
+        order = sorted(range(len(candidates)), key=lambda i: -scores[i])
+        candidates = [candidates[i] for i in order]
+
+    chunks = []
+    budget = max_tokens * _CHARS_PER_TOKEN
+    for context in candidates[:top_k]:
+        if budget < _MIN_CHUNK_TOKENS * _CHARS_PER_TOKEN:
+            break
+        text = _trim(" ".join(context["text"].split()), budget)
+        budget -= len(text)
+        chunk = {"text": text, "source_uri": context.get("source_uri") or ""}
+        if context.get("distance") is not None:
+            chunk["distance"] = round(context["distance"], 4)
+        chunks.append(chunk)
+
+    result: dict[str, Any] = {"status": "SUCCESS", "query": query, "chunks": chunks}
+    if len(contexts) > len(chunks):
+        result["omitted_chunks"] = len(contexts) - len(chunks)
+    return result
@@ -0,0 +1,159 @@
+"""
+Multi-statement BQML scripts for the BQML agent.
+
+A typical workflow — create a training view, CREATE MODEL, ML.EVALUATE,
+ML.PREDICT — otherwise takes one execute_sql call (and one LLM turn plus job
+start-up) per statement. run_bqml_script instead:
+1. Runs the whole approved script as one BigQuery script job
+2. Lists the script's child jobs (one per statement) for per-statement type,
+   timing, bytes billed, affected rows, and the first rows of each SELECT
+3. Hands the job over to background tracking (jobs.py) if it is still
+   running after wait_seconds, e.g. because CREATE MODEL is training
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import time
+from typing import Any
+
+from google.adk.tools.tool_context import ToolContext
+
+from ...bq_clients import client_for
+from ...sql_lint import created_models, split_statements
+from .jobs import track_bqml_job
+
+_MAX_STATEMENTS = 20
+
+# Rows returned per SELECT statement (ML.EVALUATE, ML.PREDICT previews, ...).
+_MAX_RESULT_ROWS = 10
+
+# Upper bound on wait_seconds; longer scripts continue as tracked jobs.
+_MAX_WAIT_SECONDS = 600
+
+# Characters of each statement's text echoed back.
+_STATEMENT_PREVIEW_CHARS = 120
+
+logger = logging.getLogger(__name__)
+
+
+def _statement_result(client: Any, child: Any) -> dict:
+    """Summarize one child job of a script."""
+    text = " ".join((child.query or "").split())
+    result: dict[str, Any] = {
+        "statement": text[:_STATEMENT_PREVIEW_CHARS],
+        "statement_type": child.statement_type,
+        "elapsed_seconds": round((child.ended - child.started).total_seconds(), 1)
+        if child.started and child.ended
+        else None,
+        "bytes_billed": child.total_bytes_billed,
+    }
+    if child.error_result:
+        result["error"] = child.error_result.get("message")
+        return result
+    if child.num_dml_affected_rows is not None:
+        result["affected_rows"] = child.num_dml_affected_rows
+    if child.ddl_target_table is not None:
+        ref = child.ddl_target_table
+        result["target"] = f"{ref.project}.{ref.dataset_id}.{ref.table_id}"
+    if child.statement_type == "SELECT" and child.destination is not None:
+        rows = client.list_rows(child.destination, max_results=_MAX_RESULT_ROWS)
+        result["rows"] = [
+            json.loads(json.dumps(dict(row.items()), default=str)) for row in rows
+        ]
+        result["total_rows"] = rows.total_rows
+    return result
+
+
+async def run_bqml_script(
+    project_id: str,
+    script: str,
+    tool_context: ToolContext,
+    location: str = "",
+    wait_seconds: int = 300,
+) -> dict:
+    """Runs an approved multi-statement BigQuery script as one job.
+
+    Use this for a multi-step BQML workflow (e.g. CREATE VIEW, CREATE MODEL,
+    ML.EVALUATE, ML.PREDICT) after the user approved the whole script once,
+    instead of one execute_sql call per statement.
+
+    Args:
+        project_id: The GCP project to run the script in.
+        script: Two or more semicolon-separated BigQuery statements.
+        tool_context: Provided by ADK.
+        location: Dataset location (e.g. "US"). Optional.
+        wait_seconds: How long to wait for the script (at most 600). If it is
+            still running then, it continues in the background and can be
+            checked with get_bqml_job_status.
+
+    Returns:
+        dict: job_state, total elapsed seconds, and one entry per executed
+        statement with its type, timing, bytes billed, and SELECT rows.
+    """
+    statements = split_statements(script)
+    if not 2 <= len(statements) <= _MAX_STATEMENTS:
+        return {
+            "status": "ERROR",
+            "error_details": f"run_bqml_script takes 2 to {_MAX_STATEMENTS} "
+            "statements. Use execute_sql or submit_bqml_job for a single statement.",
+        }
+    models = created_models(script, project_id)
+    wait_seconds = max(1, min(wait_seconds, _MAX_WAIT_SECONDS))
+
+    def run():
+        client = client_for(
+            tool_context, project_id, location or None, user_agent="run_bqml_script"
+        )
+        job = client.query(
+            script,
+            project=project_id,
+            location=location or None,
+            job_id_prefix="bqml_script_",
+        )
+        try:
+            job.result(timeout=wait_seconds)
+        except concurrent.futures.TimeoutError:
+            return job, None
+        except Exception as e:  # noqa: BLE001 — reported per statement below
+            logger.info("run_bqml_script: %s failed: %s", job.job_id, e)
+        children = sorted(
+            client.list_jobs(project=project_id, parent_job=job.job_id),
+            key=lambda child: child.created,
+        )
+        return job, [_statement_result(client, child) for child in children]
+
+    started = time.perf_counter()
+    try:
+        job, results = await asyncio.to_thread(run)
+    except Exception as e:
+        logger.exception("run_bqml_script: script job failed")
+        return {"status": "ERROR", "error_details": str(e)}
+
+    if results is None:
+        track_bqml_job(tool_context, job, project_id, models[-1] if models else None)
+        return {
+            "status": "SUCCESS",
+            "job_id": job.job_id,
+            "job_state": "RUNNING",
+            "next_step": f"The script is still running after {wait_seconds}s and "
+            "continues in the background. Check it with get_bqml_job_status.",
+        }
+
+    error = (job.error_result or {}).get("message")
+    logger.info(
+        "run_bqml_script: %d statement(s) in %s (%s)",
+        len(results),
+        job.job_id,
+        "failed" if error else "succeeded",
+    )
+    return {
+        "status": "ERROR" if error else "SUCCESS",
+        "job_id": job.job_id,
+        "job_state": "DONE",
+        "error_details": error,
+        "elapsed_seconds": round(time.perf_counter() - started, 1),
+        "bytes_billed": job.total_bytes_billed,
+        "statements": results,
+    }
@@ -2,11 +2,17 @@
 Tools for BQML Agent
 
 This module provides BQML-specific tools including:
-1. rag_response: Query BQML documentation from RAG corpus
+1. rag_response: Query BQML documentation from RAG corpus, fused with the
+   local BM25 index when present, returning deduplicated, re-ranked chunks
+   with source URIs (retrieval.py)
 2. bqml_toolset: ADK built-in BigQueryToolset for executing SQL/BQML statements
 
-Note: Listing BigQuery ML models is handled via the bqml_toolset using
-INFORMATION_SCHEMA.MODELS, which ensures per-user OAuth is enforced consistently.
+rag_response and bqml_toolset results over TOOL_OUTPUT_MAX_CHARS are stored as
+artifacts by offload_large_output (tool_outputs.py), registered on bqml_agent.
+
+Note: Listing BigQuery ML models is handled by list_bqml_models (inventory.py)
+using a region-level INFORMATION_SCHEMA.MODELS query with the caller's OAuth
+token, which ensures per-user OAuth is enforced consistently.
 """
 
 import logging
@@ -16,20 +22,37 @@ from google.adk.tools.bigquery import BigQueryCredentialsConfig, BigQueryToolset
 from google.adk.tools.bigquery.config import BigQueryToolConfig, WriteMode
 from vertexai import rag
 
+from ...bq_clients import install_client_pool
+from .retrieval import (
+    RAG_CANDIDATES,
+    RAG_RANKER_MODEL,
+    RAG_RERANKER,
+    RAG_TOP_K,
+    condense_contexts,
+    lexical_index,
+    reciprocal_rank_fusion,
+)
+
 # Session state key where Gemini Enterprise deposits the user's OAuth access token.
 _AUTH_ID = os.getenv("AUTH_ID", "bq-oauth")
 
 logger = logging.getLogger(__name__)
 
 
-def rag_response(query: str) -> str:
+def rag_response(query: str) -> dict | str:
     """Retrieves contextually relevant information from a RAG corpus.
 
+    Vector results are fused with the local BM25 index when it exists, then
+    deduplicated, re-ranked, and trimmed to a token budget (retrieval.py)
+    instead of returning the raw retrieval response.
+
     Args:
         query: The query string to search within the corpus.
 
     Returns:
-        str: The response containing retrieved information from the corpus.
+        dict: status, query, and chunks — each with text, source_uri, and
+        distance (lower is closer). A string describing the problem if the
+        corpus is not configured or the query failed.
     """
     corpus_name = os.getenv("BQML_RAG_CORPUS_NAME")
 
@@ -37,9 +60,17 @@ def rag_response(query: str) -> str:
         return "BQML RAG corpus not configured. Please set BQML_RAG_CORPUS_NAME environment variable."
 
     try:
+        # Over-fetch so deduplication and re-ranking can choose the top chunks.
+        top_k = RAG_TOP_K if RAG_RERANKER == "none" else max(RAG_CANDIDATES, RAG_TOP_K)
+        ranking = None
+        if RAG_RERANKER == "vertex":
+            ranking = rag.Ranking(
+                rank_service=rag.RankService(model_name=RAG_RANKER_MODEL)
+            )
         rag_retrieval_config = rag.RagRetrievalConfig(
-            top_k=3,  # Optional
+            top_k=top_k,
             filter=rag.Filter(vector_distance_threshold=0.5),  # Optional
+            ranking=ranking,
         )
         response = rag.retrieval_query(
             rag_resources=[
@@ -50,7 +81,21 @@ def rag_response(query: str) -> str:
             text=query,
             rag_retrieval_config=rag_retrieval_config,
         )
-        return str(response)
+        contexts = [
+            {
+                "text": context.text,
+                "source_uri": context.source_uri or context.source_display_name,
+                "distance": context.distance,
+            }
+            for context in response.contexts.contexts
+        ]
+        index = lexical_index()
+        if index is not None:
+            # Exact identifiers the vector search missed come from the BM25 index.
+            contexts = reciprocal_rank_fusion([contexts, index.search(query, top_k)])
+        return condense_contexts(
+            query, contexts, rerank=RAG_RERANKER == "lexical" and index is None
+        )
     except Exception as e:
         logger.exception("rag_response: error querying corpus '%s'", corpus_name)
         return f"Error querying RAG corpus: {str(e)}"
@@ -62,6 +107,8 @@ def rag_response(query: str) -> str:
 # Write mode is ALLOWED for CREATE MODEL, INSERT, and other DDL/DML statements.
 # Uses external_access_token_key so the token is read fresh from session state
 # on every call — no refresh attempt (Gemini Enterprise issues access tokens only).
+# Clients built from that token come from the shared pool in bq_clients.py.
+install_client_pool()
 bqml_toolset = BigQueryToolset(
     credentials_config=BigQueryCredentialsConfig(
         external_access_token_key=_AUTH_ID,
@@ -0,0 +1,4 @@
+from .agent import compound_agent
+from .plan import plan_compound_request
+
+__all__ = ["compound_agent", "plan_compound_request"]
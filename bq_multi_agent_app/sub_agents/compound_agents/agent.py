@@ -0,0 +1,111 @@
+"""
+Compound-request workflow: independent parts answered in parallel.
+
+The root agent picks one path per turn, so "how does our churn trend compare
+to industry best practice, and chart it" used to take several sequential
+delegations. For such requests the root agent calls plan_compound_request
+(plan.py) with one question per branch and transfers to compound_agent:
+
+    compound_agent (SequentialAgent)
+    ├── compound_branches (ParallelAgent)
+    │   ├── compound_data_branch      ask_data_insights (CA API)
+    │   ├── compound_analysis_branch  clone of ds_agent
+    │   └── compound_research_branch  clone of research_aida_agent
+    └── compound_merge                one answer from all branch results
+
+Branches without a planned part return immediately. Branches are clones
+because an ADK agent instance can only have one parent; they keep the
+original agents' tools and callbacks, except the research answer cache, which
+keys on the whole user message rather than the branch's planned question.
+Wall-clock time approaches the slowest branch rather than the sum of all
+branches.
+"""
+
+from google.adk.agents import Agent, ParallelAgent, SequentialAgent
+
+from ...callbacks import (
+    abandon_query_flight,
+    cache_table_schema,
+    serve_cached_result,
+    store_query_result,
+)
+from ...constants import MODEL_NAME
+from ...tool_outputs import offload_large_output, read_tool_output
+from ...tools import ca_toolset
+from ..ds_agents.agent import ds_agent
+from ..ds_agents.prompts import return_instructions_ds
+from ..research_agents.agent import research_aida_agent
+from ..research_agents.prompts import return_instructions_research
+from .plan import (
+    RESULT_PREFIX,
+    branch_instruction,
+    finish_branch,
+    merge_instruction,
+    start_branch,
+)
+from .prompts import return_instructions_compound_merge, return_instructions_data_branch
+
+
+def _branch_settings(branch: str, base_instruction: str) -> dict:
+    return {
+        "name": f"compound_{branch}_branch",
+        "instruction": branch_instruction(branch, base_instruction),
+        "output_key": RESULT_PREFIX + branch,
+        "before_agent_callback": start_branch,
+        "after_agent_callback": finish_branch,
+        # Branch results go to the merge step, not to another agent.
+        "disallow_transfer_to_parent": True,
+        "disallow_transfer_to_peers": True,
+    }
+
+
+compound_data_branch = Agent(
+    model=MODEL_NAME,
+    description="Answers the quick-metrics part of a compound request.",
+    tools=[ca_toolset, read_tool_output],
+    before_tool_callback=serve_cached_result,
+    after_tool_callback=[cache_table_schema, store_query_result, offload_large_output],
+    on_tool_error_callback=abandon_query_flight,
+    **_branch_settings("data", return_instructions_data_branch()),
+)
+
+compound_analysis_branch = ds_agent.clone(
+    update=_branch_settings("analysis", return_instructions_ds())
+)
+
+compound_research_branch = research_aida_agent.clone(
+    update={
+        **_branch_settings("research", return_instructions_research()),
+        # The cache would store the research part's answer under the compound
+        # message and could serve an answer to another message's research part.
+        "before_model_callback": None,
+        "after_model_callback": None,
+    }
+)
+
+compound_agent = SequentialAgent(
+    name="compound_agent",
+    description=(
+        "Answers compound requests planned with plan_compound_request: runs the "
+        "data, analysis, and research parts in parallel, then merges them into "
+        "one answer with per-branch timing."
+    ),
+    sub_agents=[
+        ParallelAgent(
+            name="compound_branches",
+            sub_agents=[
+                compound_data_branch,
+                compound_analysis_branch,
+                compound_research_branch,
+            ],
+        ),
+        Agent(
+            model=MODEL_NAME,
+            name="compound_merge",
+            description="Merges the branch results of a compound request.",
+            instruction=merge_instruction(return_instructions_compound_merge()),
+            disallow_transfer_to_parent=True,
+            disallow_transfer_to_peers=True,
+        ),
+    ],
+)
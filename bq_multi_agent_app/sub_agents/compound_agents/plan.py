@@ -0,0 +1,159 @@
+"""
+Planning, branch instructions, and timing for compound requests.
+
+plan_compound_request (a root agent tool) splits a compound question into
+independent parts, one per branch, and stores the plan in session state.
+The compound workflow (agent.py) then runs the planned branches concurrently;
+each branch reads its part from the plan, stores its answer under
+RESULT_PREFIX + branch (output_key), and records its duration under
+TIMING_PREFIX + branch. Branches write separate keys, so concurrent updates
+never overwrite each other.
+"""
+
+import time
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+# Branch name → what it answers. Order is the order results are merged in.
+BRANCHES = {
+    "data": "quick metrics from the user's tables via ask_data_insights",
+    "analysis": "statistics, forecasting, Python, and charts via ds_agent",
+    "research": "BigQuery features, best practices, and industry context via search",
+}
+
+# Session state keys.
+PLAN_KEY = "compound_plan"
+STARTED_AT_KEY = "compound_started_at"
+RESULT_PREFIX = "compound_result_"
+TIMING_PREFIX = "compound_seconds_"
+
+_BRANCH_STARTED_PREFIX = "temp:compound_branch_started:"
+
+
+def plan_compound_request(
+    tool_context: ToolContext,
+    data_question: str = "",
+    analysis_question: str = "",
+    research_question: str = "",
+) -> dict:
+    """Plans a compound request whose independent parts can run in parallel.
+
+    Pass a self-contained question for at least two branches, then transfer
+    to compound_agent. Only split parts that do not need each other's result.
+
+    Args:
+        tool_context: Provided by ADK.
+        data_question: Counts, aggregations, or trends from the user's tables
+            (include fully-qualified table names).
+        analysis_question: Statistical analysis, forecasting, or a chart
+            (include fully-qualified table names and relevant columns).
+        research_question: BigQuery features, best practices, or industry
+            context from the web.
+
+    Returns:
+        dict: status and the planned branches.
+    """
+    parts = {
+        "data": data_question.strip(),
+        "analysis": analysis_question.strip(),
+        "research": research_question.strip(),
+    }
+    planned = [branch for branch, question in parts.items() if question]
+    if len(planned) < 2:
+        return {
+            "status": "ERROR",
+            "error_details": "A compound request needs questions for at least two "
+            "branches; route a single-part request to its usual path.",
+        }
+    tool_context.state[PLAN_KEY] = parts
+    tool_context.state[STARTED_AT_KEY] = time.time()
+    for branch in BRANCHES:
+        tool_context.state[RESULT_PREFIX + branch] = None
+        tool_context.state[TIMING_PREFIX + branch] = None
+    return {
+        "status": "SUCCESS",
+        "branches": planned,
+        "next_step": "Transfer to compound_agent.",
+    }
+
+
+def branch_instruction(branch: str, base_instruction: str):
+    """Returns an instruction provider: the agent's usual instruction plus its part."""
+
+    def provider(ctx: ReadonlyContext) -> str:
+        question = (ctx.state.get(PLAN_KEY) or {}).get(branch, "")
+        return f"""{base_instruction}
+
+    ---
+
+    ## Compound request: your part
+
+    You are the {branch} branch of a compound request; other branches answer the
+    other parts in parallel. Answer ONLY this part, completely, without asking the
+    user follow-up questions, and end with a concise summary of your findings:
+
+    {question}
+    """
+
+    return provider
+
+
+def start_branch(callback_context: CallbackContext) -> types.Content | None:
+    """before_agent_callback: start the branch timer, or skip an unplanned branch."""
+    branch = _branch(callback_context)
+    if not (callback_context.state.get(PLAN_KEY) or {}).get(branch):
+        return types.Content(
+            role="model", parts=[types.Part(text=f"No {branch} part planned.")]
+        )
+    callback_context.state[_BRANCH_STARTED_PREFIX + branch] = time.time()
+    return None
+
+
+def finish_branch(callback_context: CallbackContext) -> types.Content | None:
+    """after_agent_callback: record how long the branch took."""
+    branch = _branch(callback_context)
+    started = callback_context.state.get(_BRANCH_STARTED_PREFIX + branch)
+    if started is not None:
+        callback_context.state[TIMING_PREFIX + branch] = round(time.time() - started, 1)
+    return None
+
+
+def merge_instruction(base_instruction: str):
+    """Returns the merge agent's instruction provider with every branch result."""
+
+    def provider(ctx: ReadonlyContext) -> str:
+        plan = ctx.state.get(PLAN_KEY) or {}
+        started_at = ctx.state.get(STARTED_AT_KEY)
+        sections, timings = [], []
+        for branch in BRANCHES:
+            if not plan.get(branch):
+                continue
+            seconds = ctx.state.get(TIMING_PREFIX + branch)
+            result = ctx.state.get(RESULT_PREFIX + branch) or "(no result)"
+            sections.append(
+                f"### {branch} branch\nQuestion: {plan[branch]}\nResult:\n{result}"
+            )
+            timings.append(
+                f"{branch} {seconds}s" if seconds is not None else f"{branch} n/a"
+            )
+        wall = round(time.time() - started_at, 1) if started_at else None
+        return f"""{base_instruction}
+
+    ## Branch results
+
+    {chr(10).join(sections)}
+
+    ## Timing
+
+    Branch durations: {", ".join(timings)}. Wall-clock so far: {wall}s.
+    """
+
+    return provider
+
+
+def _branch(callback_context: CallbackContext) -> str:
+    # Branch agents are named compound_<branch>_branch.
+    return callback_context.agent_name.removeprefix("compound_").removesuffix("_branch")
@@ -14,8 +14,31 @@ from google.adk.code_executors.vertex_ai_code_executor import VertexAiCodeExecut
 from google.adk.tools import load_artifacts
 
 from .prompts import return_instructions_ds
+from ...callbacks import (
+    abandon_query_flight,
+    approximate_exploratory_query,
+    cache_table_schema,
+    lint_execute_sql,
+    report_approximation,
+    report_query_rewrite,
+    rewrite_exploratory_query,
+    serve_cached_result,
+    store_query_result,
+)
+from ...batch_forecast import forecast_series
 from ...constants import MODEL_NAME
+from ...exact_refinement import get_exact_refinement, start_exact_refinement
+from ...incremental_anomalies import detect_new_anomalies
+from ...large_results import fetch_large_result
+from ...prefetch import serve_prefetched_metadata
+from ...tool_outputs import offload_large_output, read_tool_output
+from ...local_results import (
+    cache_query_result,
+    query_cached_result,
+    store_local_result,
+)
 from ...tools import ds_toolset
+from ...warehouse_stats import run_statistical_test
 
 ds_agent = Agent(
     model=MODEL_NAME,
@@ -30,6 +53,15 @@ ds_agent = Agent(
     tools=[
         ds_toolset,  # Advanced BQ tools: execute_sql, forecast, analyze_contribution, etc.
         load_artifacts,  # Load local files for analysis
+        cache_query_result,  # Fetch a full result once for local drill-downs
+        query_cached_result,  # Answer follow-up filters/aggregations in DuckDB
+        fetch_large_result,  # Stream big results to Code Interpreter as a file
+        run_statistical_test,  # t-test / chi-square / correlation in BigQuery
+        start_exact_refinement,  # Exact re-run of an approximate answer
+        get_exact_refinement,
+        detect_new_anomalies,  # Recurring anomaly checks on new rows only
+        forecast_series,  # All series (e.g. per store) in one AI.FORECAST job
+        read_tool_output,  # Slices of results too large for the conversation
     ],
     code_executor=VertexAiCodeExecutor(
         optimize_data_file=False,
@@ -39,4 +71,23 @@ ds_agent = Agent(
         # See setup/vertex_extensions/ for provisioning instructions.
         resource_name=os.getenv("CODE_INTERPRETER_EXTENSION_NAME"),
     ),
+    # Order matters: rewrite SELECT * previews first, then lint the final query;
+    # the result cache runs last so it keys on the query that would execute.
+    # Metadata prefetched by the root agent this turn is served first.
+    before_tool_callback=[
+        serve_prefetched_metadata,
+        rewrite_exploratory_query,
+        approximate_exploratory_query,
+        lint_execute_sql,
+        serve_cached_result,
+    ],
+    after_tool_callback=[
+        cache_table_schema,
+        report_query_rewrite,
+        report_approximation,
+        store_query_result,
+        store_local_result,
+        offload_large_output,  # Last: replaces oversized results with a handle
+    ],
+    on_tool_error_callback=abandon_query_flight,
 )
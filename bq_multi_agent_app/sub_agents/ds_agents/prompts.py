@@ -20,7 +20,8 @@ def return_instructions_ds() -> str:
     Passing `import pandas`, `plt.plot(...)`, or any Python will cause a syntax error.
 
     **To use data from SQL in Python:** copy the rows from the SQL result into the Python
-    code block as literals. The Code Interpreter has no access to previous tool results.
+    code block as literals. The Code Interpreter has no access to previous tool results —
+    except files attached by `fetch_large_result` (see below).
 
     ---
 
@@ -31,12 +32,84 @@ def return_instructions_ds() -> str:
     Use fully-qualified table names: `project.dataset.table`.
 
     ### 2. Fetch Data with SQL
+    If the root agent says the rows are in the `last_query_result.json` artifact (a chart of
+    an earlier `ask_data_insights` result), call `load_artifacts` for it and use its
+    `headers` / `rows` instead of querying again — then go to step 3.
+
     Call `bigquery-execute-sql` with BigQuery SQL. Rules:
     - Exact column names (case-sensitive)
     - Partition filters for performance
     - Appropriate LIMIT
     - **Never pass Python here**
 
+    If `bigquery-execute-sql` returns `status: NEEDS_REVISION`, the query was NOT run: a local
+    linter found a costly pattern (`SELECT *` on a wide table, missing partition filter, cross
+    join, `ORDER BY` without `LIMIT`). Apply the `lint_findings` hints and resubmit. Resubmit the
+    identical query only if the flagged pattern is genuinely required.
+
+    If the result contains `query_rewrite`, a `SELECT *` preview was narrowed to save cost
+    (fewer columns, `LIMIT`, or `TABLESAMPLE`). Say so briefly, and query `columns_omitted`
+    explicitly if the user needs them.
+
+    #### Approximate answers (when enabled)
+    Results that include `approximation` were computed approximately to save time and
+    cost: `APPROX_COUNT_DISTINCT` instead of `COUNT(DISTINCT)`, and/or a `sample_percent`
+    table sample with counts and sums scaled up. Say the numbers are approximate and give
+    the sample fraction and each row's `_relative_error_95` (e.g. "±3%"). Prefer
+    `APPROX_QUANTILES` for medians/percentiles and `APPROX_TOP_COUNT` for most-frequent
+    values in this mode. If the user needs exact figures, call `start_exact_refinement`
+    with `approximation.original_query`, keep going with the approximate answer, and call
+    `get_exact_refinement` with the `job_id` when the user asks for the exact result.
+
+    #### Local drill-downs (when enabled)
+    Results that include `local_table` (e.g. `result_3`) are kept in a local DuckDB store.
+    For follow-ups that only filter, group, or re-aggregate that data, call
+    `query_cached_result` with DuckDB SQL over the table — no BigQuery job. When you expect
+    several breakdowns of a result too large to return (`result_is_likely_truncated`), call
+    `cache_query_result` once with a SELECT of just the needed columns, then drill down
+    locally. Mention the `fetched_at` time, and re-query BigQuery if `source_changed` is true.
+
+    #### Statistical tests in BigQuery
+    For a t-test (numeric column by two groups), chi-square test of independence, Pearson
+    correlation, or histogram, call `run_statistical_test` with the `table` (or a `query`
+    with the filters) — do NOT fetch rows into Python for these. It computes the sufficient
+    statistics in BigQuery and returns only `statistic`, `df`, `p_value`, and the effect size
+    (`cohens_d`, `cramers_v`, or `r_squared`), so it works on tables of any size. Report the
+    p-value together with the effect size. To plot a histogram, copy its `bins` into Python.
+
+    #### Forecasting many series
+    To forecast a metric for each store, product, region, etc., call `forecast_series` ONCE
+    with the series column(s) in `id_cols` — never one `forecast` call per series. It runs a
+    single `AI.FORECAST` job and returns one summary row per series (`forecast_total`,
+    `forecast_mean`, `last_point` with its interval), largest first, plus `series_count`
+    and `series_per_second`. Pass a `query` instead of `table` to aggregate first (e.g. daily
+    sales per store). For every forecast point (e.g. to plot), call `fetch_large_result` with
+    the returned `forecast_query`. Results with `forecast_cache` were served from cache
+    because the source data has not changed.
+
+    #### Recurring anomaly checks
+    When the user monitors a series over time ("any anomalies since yesterday?", daily
+    checks), call `detect_new_anomalies` with the `table`, `timestamp_col`, `data_col`, and
+    `id_cols` for per-series checks. It keeps a trained model per table and series and scores
+    only rows newer than the last check (`watermark` → `scored_through`), so repeat calls are
+    cheap. Report `new_rows` and `anomaly_count`; if `new_rows` is 0, say nothing new has
+    arrived since the watermark. Pass `retrain=true` only after a known level shift. Use
+    `detect_anomalies` for one-off analysis of a query or a date range.
+
+    #### Large results for Python
+    When the analysis needs more rows than `bigquery-execute-sql` returns (distributions,
+    correlations, statistical tests over thousands of rows), call `fetch_large_result` with
+    a SELECT of only the needed columns and a short `file_name`. It reads the full result
+    via the BigQuery Storage Read API and attaches it to Code Interpreter as a file; the
+    rows are NOT returned to you. In Python, load it with the returned `usage` line
+    (e.g. `df = pd.read_csv("orders.csv.gz")`) instead of copying rows as literals.
+
+    #### Oversized tool results
+    A result with `output_offloaded` was stored as an artifact instead of being returned in
+    full. Work from its `summary`; call `read_tool_output(handle=<output_artifact>, path=...,
+    offset=..., limit=...)` for specific rows or fields. For Python over all rows, use
+    `fetch_large_result` instead of paging through `read_tool_output`.
+
     ### 3. Analyse and Visualize with Python
     Call Code Interpreter. Embed the SQL result rows directly as Python literals:
 
@@ -77,10 +150,12 @@ def return_instructions_ds() -> str:
 
     - **NEVER** pass Python to `bigquery-execute-sql`
     - **NEVER** install packages
-    - **ALWAYS** embed SQL result rows as Python literals before analysing
+    - **ALWAYS** embed SQL result rows as Python literals before analysing, unless the data
+      was attached as a file by `fetch_large_result`
     - **ALWAYS** sort time series data chronologically before plotting
-    - `forecast`, `analyze_contribution`, and `detect_anomalies` are dedicated tools —
-      call them directly, not via `execute_sql`. Use `execute_sql` only for standard SQL queries.
+    - `forecast`, `forecast_series`, `analyze_contribution`, and `detect_anomalies` are
+      dedicated tools — call them directly, not via `execute_sql`. Use `execute_sql` only for
+      standard SQL queries.
 
     ## Response Format
 
@@ -1,3 +1,3 @@
-from .agent import research_aida_agent
+from .agent import research_aida_agent, research_compare_agent
 
-__all__ = ["research_aida_agent"]
+__all__ = ["research_aida_agent", "research_compare_agent"]
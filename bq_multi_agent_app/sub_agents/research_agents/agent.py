@@ -1,8 +1,16 @@
-"""Research AIDA sub-agent for BigQuery, data analytics, and AI topics.
+"""Research sub-agents for BigQuery, data analytics, and AI topics.
 
 Uses Google Search grounding to provide current, authoritative answers
 about data platforms, features, comparisons, and best practices.
 
+research_aida_agent answers general research questions. Repeated questions
+are answered from a shared, TTL-bounded answer cache
+(cache.py) without a model or search round trip.
+
+research_compare_agent handles comparisons of several platforms: its
+research_platforms tool (parallel.py) researches each platform in a
+concurrent grounded call, and the agent merges the findings.
+
 Note: google_search is an ADK built-in tool that must be used alone within
 an agent — it cannot be combined with other tools in the same agent instance.
 """
@@ -12,7 +20,12 @@ from google.adk.tools import google_search
 
 from ...constants import MODEL_NAME
 
-from .prompts import return_instructions_research
+from .cache import serve_cached_answer, store_grounded_answer
+from .parallel import research_platforms
+from .prompts import (
+    return_instructions_research,
+    return_instructions_research_compare,
+)
 
 research_aida_agent = Agent(
     model=MODEL_NAME,
@@ -25,4 +38,18 @@ research_aida_agent = Agent(
     ),
     instruction=return_instructions_research(),
     tools=[google_search],
+    before_model_callback=serve_cached_answer,
+    after_model_callback=store_grounded_answer,
+)
+
+research_compare_agent = Agent(
+    model=MODEL_NAME,
+    name="research_compare_agent",
+    description=(
+        "Compares two or more data platforms (BigQuery, Snowflake, Databricks, "
+        "Redshift, Azure Synapse) by researching each platform in parallel with "
+        "Google Search and merging the findings into one cited comparison."
+    ),
+    instruction=return_instructions_research_compare(),
+    tools=[research_platforms],
 )
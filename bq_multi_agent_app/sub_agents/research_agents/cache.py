@@ -0,0 +1,257 @@
+"""
+Shared answer cache for the Research AIDA sub-agent.
+
+Users ask the same research questions many times a day ("Snowflake vs
+BigQuery pricing", "BigQuery editions"), and every one is a full model call
+with Google Search grounding. ResearchAnswerCache keeps recent grounded
+answers, with their citations, in process memory:
+1. Questions are compared as normalised term sets (case, punctuation,
+   stop words, and simple plurals removed) by cosine similarity, so
+   rephrasings and reordered comparisons match above RESEARCH_CACHE_SIMILARITY
+2. Entries expire after RESEARCH_CACHE_TTL_SECONDS; questions asking for
+   recent information ("latest", "announced", "this week", ...) expire after
+   an hour instead
+3. Only grounded answers (with at least one cited web source) are stored
+
+Answers are public web research, not user data, so the cache is shared
+across users. Hit rate is logged on every lookup and available from stats().
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# 0 disables the cache.
+_TTL_SECONDS = int(os.getenv("RESEARCH_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+
+_FRESH_TTL_SECONDS = 60 * 60
+
+_SIMILARITY = float(os.getenv("RESEARCH_CACHE_SIMILARITY", "0.85"))
+
+_MAX_ENTRIES = 256
+
+# Shorter questions are usually follow-ups ("and Databricks?") whose answer
+# depends on the conversation, not the question alone.
+_MIN_TERMS = 3
+
+_STOPWORDS = frozenset(
+    """
+    a about an and are as at be between can compare compared comparison
+    could difference differences do does for from give how i in is it me
+    of on or please should tell than that the their there these this to us
+    versus vs we what when where which who why with would you your
+    """.split()  # noqa: SIM905 — word list
+)
+
+_FRESHNESS_TERMS = frozenset(
+    """
+    announced announcement current currently latest new newest now recent
+    recently release released roadmap today upcoming week yesterday
+    """.split()  # noqa: SIM905 — word list
+)
+
+_TERM_RE = re.compile(r"[a-z0-9]+(?:[.+#][a-z0-9]+)*")
+
+# Invocation-scoped: the question of a cache miss, stored with the answer.
+_PENDING_QUESTION_KEY = "temp:research_cache_question"
+
+logger = logging.getLogger(__name__)
+
+
+def question_terms(question: str) -> frozenset[str]:
+    """Normalise a question to its set of content terms."""
+    terms = set()
+    for term in _TERM_RE.findall(question.lower()):
+        if term in _STOPWORDS:
+            continue
+        if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+            term = term[:-1]
+        terms.add(term)
+    return frozenset(terms)
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """Cosine similarity of two term sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / math.sqrt(len(a) * len(b))
+
+
+class ResearchAnswerCache:
+    """TTL-bounded LRU of grounded answers, looked up by question similarity."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = _TTL_SECONDS,
+        fresh_ttl_seconds: float = _FRESH_TTL_SECONDS,
+        threshold: float = _SIMILARITY,
+        max_entries: int = _MAX_ENTRIES,
+    ):
+        self._ttl_seconds = ttl_seconds
+        self._fresh_ttl_seconds = min(fresh_ttl_seconds, ttl_seconds)
+        self._threshold = threshold
+        self._max_entries = max_entries
+        self._entries: OrderedDict[frozenset[str], dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    def lookup(self, question: str) -> tuple[dict[str, Any], float] | None:
+        """Return the most similar live entry and its similarity, or None."""
+        terms = question_terms(question)
+        if self._ttl_seconds <= 0 or len(terms) < _MIN_TERMS:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e["expires_at"] <= now]:
+                del self._entries[key]
+            best, best_score = None, 0.0
+            for key in self._entries:
+                score = similarity(terms, key)
+                if score > best_score:
+                    best, best_score = key, score
+            if best is None or best_score < self._threshold:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best)
+            self._stats["hits"] += 1
+            return dict(self._entries[best]), best_score
+
+    def store(
+        self,
+        question: str,
+        answer: str,
+        citations: list[dict[str, str]],
+        grounding_metadata: dict | None = None,
+    ) -> bool:
+        """Store a grounded answer. Returns False if it is not cacheable."""
+        terms = question_terms(question)
+        if self._ttl_seconds <= 0 or len(terms) < _MIN_TERMS or not citations:
+            return False
+        ttl = self._fresh_ttl_seconds if terms & _FRESHNESS_TERMS else self._ttl_seconds
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(terms, None)
+            self._entries[terms] = {
+                "question": question,
+                "answer": answer,
+                "citations": citations,
+                "grounding_metadata": grounding_metadata,
+                "stored_at": now,
+                "expires_at": now + ttl,
+            }
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            self._stats["stores"] += 1
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+research_cache = ResearchAnswerCache()
+
+
+def _question(callback_context: CallbackContext) -> str:
+    content = callback_context.user_content
+    if not content or not content.parts:
+        return ""
+    return " ".join(p.text for p in content.parts if p.text).strip()
+
+
+def web_citations(grounding_metadata) -> list[dict[str, str]]:
+    """Return the cited web sources of a grounded response."""
+    chunks = getattr(grounding_metadata, "grounding_chunks", None) or []
+    return [
+        {"title": chunk.web.title or "", "uri": chunk.web.uri}
+        for chunk in chunks
+        if chunk.web and chunk.web.uri
+    ]
+
+
+def serve_cached_answer(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> LlmResponse | None:
+    """before_model_callback: answer a repeated research question from the cache.
+
+    A hit skips the model and search round trip and returns the stored answer
+    with its grounding metadata. On a miss the question is kept for
+    store_grounded_answer.
+    """
+    question = _question(callback_context)
+    if not question:
+        return None
+    hit = research_cache.lookup(question)
+    stats = research_cache.stats()
+    if hit is None:
+        callback_context.state[_PENDING_QUESTION_KEY] = question
+        logger.info("research cache miss (hit rate %.0f%%)", stats["hit_rate"] * 100)
+        return None
+
+    entry, score = hit
+    age_minutes = round((time.monotonic() - entry["stored_at"]) / 60)
+    logger.info(
+        "research cache hit: similarity %.2f, %d min old (hit rate %.0f%%)",
+        score,
+        age_minutes,
+        stats["hit_rate"] * 100,
+    )
+    return LlmResponse(
+        content=types.Content(
+            role="model",
+            parts=[
+                types.Part(
+                    text=f"{entry['answer']}\n\n_Cached research answer from "
+                    f"{age_minutes} min ago._"
+                )
+            ],
+        ),
+        grounding_metadata=(
+            types.GroundingMetadata.model_validate(entry["grounding_metadata"])
+            if entry["grounding_metadata"]
+            else None
+        ),
+    )
+
+
+def store_grounded_answer(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> LlmResponse | None:
+    """after_model_callback: cache the final grounded answer to a missed question."""
+    question = callback_context.state.get(_PENDING_QUESTION_KEY)
+    if not question or llm_response.partial or llm_response.error_code:
+        return None
+    content = llm_response.content
+    if not content or not content.parts or any(p.function_call for p in content.parts):
+        return None
+    answer = "".join(p.text for p in content.parts if p.text and not p.thought)
+    citations = web_citations(llm_response.grounding_metadata)
+    if answer and research_cache.store(
+        question,
+        answer,
+        citations,
+        llm_response.grounding_metadata.model_dump(mode="json", exclude_none=True)
+        if citations
+        else None,
+    ):
+        callback_context.state[_PENDING_QUESTION_KEY] = None
+    return None
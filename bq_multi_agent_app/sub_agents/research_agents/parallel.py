@@ -0,0 +1,144 @@
+"""
+Parallel per-platform research for multi-platform comparisons.
+
+google_search must be the only tool of research_aida_agent, so a comparison
+of four platforms is researched one search after another inside a single
+model turn. research_platforms instead fans the question out as one grounded
+Gemini call per platform, runs them concurrently (at most
+RESEARCH_MAX_CONCURRENCY at a time), and returns each platform's findings
+with citations for research_compare_agent to merge into one answer.
+
+Each result reports per-branch timings, the wall-clock time, and the time
+the same branches would take one after another.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from google import genai
+from google.genai import types
+
+from ...constants import MODEL_NAME
+from .cache import web_citations
+
+_MAX_PLATFORMS = 6
+
+_MAX_CONCURRENCY = int(os.getenv("RESEARCH_MAX_CONCURRENCY", "4"))
+
+# Model for the per-platform calls; a Flash model trades depth for latency.
+_BRANCH_MODEL = os.getenv("RESEARCH_BRANCH_MODEL", MODEL_NAME)
+
+_BRANCH_TIMEOUT_SECONDS = 120
+
+_BRANCH_PROMPT = """
+Research {platform} for the comparison question below using Google Search.
+
+Question: {question}
+
+Report only facts about {platform} that answer the question: concise bullet
+points with concrete numbers, limits, prices, and feature names where relevant,
+current as of today. Prefer official {platform} documentation and pricing
+pages. Do not describe other platforms.
+""".strip()
+
+_client: genai.Client | None = None
+
+logger = logging.getLogger(__name__)
+
+
+def _genai_client() -> genai.Client:
+    # Created on first use, after constants.py has pinned GOOGLE_CLOUD_LOCATION.
+    global _client
+    if _client is None:
+        _client = genai.Client()
+    return _client
+
+
+async def _research_platform(
+    platform: str, question: str, semaphore: asyncio.Semaphore
+) -> dict:
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                _genai_client().aio.models.generate_content(
+                    model=_BRANCH_MODEL,
+                    contents=_BRANCH_PROMPT.format(
+                        platform=platform, question=question
+                    ),
+                    config=types.GenerateContentConfig(
+                        tools=[types.Tool(google_search=types.GoogleSearch())]
+                    ),
+                ),
+                _BRANCH_TIMEOUT_SECONDS,
+            )
+        except Exception as e:  # noqa: BLE001 — reported as a failed branch
+            logger.warning("research_platforms: %s branch failed: %s", platform, e)
+            return {
+                "platform": platform,
+                "status": "ERROR",
+                "error_details": str(e) or type(e).__name__,
+                "seconds": round(time.perf_counter() - started, 2),
+            }
+        candidate = response.candidates[0] if response.candidates else None
+        return {
+            "platform": platform,
+            "status": "SUCCESS",
+            "findings": response.text or "",
+            "citations": web_citations(candidate and candidate.grounding_metadata),
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+
+
+async def research_platforms(question: str, platforms: list[str]) -> dict:
+    """Researches each platform of a comparison concurrently with Google Search.
+
+    Call once with all platforms named in the question, then merge the
+    per-platform findings into one answer that cites their sources.
+
+    Args:
+        question: The user's comparison question, e.g. "storage and compute
+            pricing for analytics workloads".
+        platforms: The platforms to compare, e.g. ["BigQuery", "Snowflake",
+            "Databricks"] (2 to 6).
+
+    Returns:
+        dict: results (platform, findings, citations, seconds per platform)
+        and timing: wall_seconds, sequential_seconds (sum of branches), and
+        speedup.
+    """
+    platforms = list(dict.fromkeys(p.strip() for p in platforms if p.strip()))
+    if not 2 <= len(platforms) <= _MAX_PLATFORMS:
+        return {
+            "status": "ERROR",
+            "error_details": f"Pass 2 to {_MAX_PLATFORMS} distinct platforms; "
+            "use research_aida_agent for a single platform.",
+        }
+
+    semaphore = asyncio.Semaphore(max(1, _MAX_CONCURRENCY))
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(_research_platform(p, question, semaphore) for p in platforms)
+    )
+    wall = time.perf_counter() - started
+    sequential = sum(r["seconds"] for r in results)
+    logger.info(
+        "research_platforms: %d branches in %.1fs (%.1fs sequential)",
+        len(results),
+        wall,
+        sequential,
+    )
+    return {
+        "status": "SUCCESS"
+        if any(r["status"] == "SUCCESS" for r in results)
+        else "ERROR",
+        "results": results,
+        "timing": {
+            "wall_seconds": round(wall, 2),
+            "sequential_seconds": round(sequential, 2),
+            "speedup": round(sequential / wall, 1) if wall else None,
+            "max_concurrency": _MAX_CONCURRENCY,
+        },
+    }
@@ -0,0 +1,226 @@
+"""
+Output-size guard for tool results: oversized payloads become artifacts.
+
+One execute_sql over wide rows, get_table_info on a wide table, or a
+rag_response retrieval dump can add tens of thousands of tokens to the
+context, and every later turn of the session pays for them again.
+offload_large_output (after_tool_callback, registered last on every agent
+that uses ca_toolset, ds_toolset, bqml_toolset, data_agent_toolset, or
+rag_response) checks the serialized size of each result:
+1. results up to TOOL_OUTPUT_MAX_CHARS pass through unchanged
+2. larger results are saved as a session artifact and replaced with a compact
+   summary (row counts, column names, a few preview rows, table columns)
+   plus output_artifact, the handle
+3. read_tool_output(handle, path, offset, limit) returns slices on demand
+
+Without an artifact service the summary is still returned, with a note that
+the full output was not kept.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Any
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from .callbacks import compact_table_info
+
+logger = logging.getLogger(__name__)
+
+# Serialized results longer than this (about 5k tokens) are offloaded.
+_MAX_CHARS = int(os.getenv("TOOL_OUTPUT_MAX_CHARS", "20000"))
+
+# Upper bound on one read_tool_output slice.
+_MAX_SLICE_CHARS = _MAX_CHARS // 2
+
+_PREVIEW_ITEMS = 5
+_PREVIEW_CHARS = 1000
+
+# read_tool_output is bounded by itself; never offload its slices.
+_EXEMPT_TOOLS = {"read_tool_output"}
+
+
+def _preview(value: Any) -> Any:
+    """A short stand-in for one value of an offloaded result."""
+    if isinstance(value, str):
+        if len(value) <= _PREVIEW_CHARS:
+            return value
+        return {"text_preview": value[:_PREVIEW_CHARS], "total_chars": len(value)}
+    if isinstance(value, list):
+        if len(json.dumps(value, default=str)) <= _PREVIEW_CHARS:
+            return value
+        summary: dict[str, Any] = {"total_items": len(value)}
+        if value and isinstance(value[0], dict):
+            summary["columns"] = list(value[0])
+        summary["preview"] = [
+            item if len(json.dumps(item, default=str)) <= _PREVIEW_CHARS else "…"
+            for item in value[:_PREVIEW_ITEMS]
+        ]
+        return summary
+    if isinstance(value, dict):
+        if len(json.dumps(value, default=str)) <= _PREVIEW_CHARS:
+            return value
+        return {"keys": list(value)[:50], "total_keys": len(value)}
+    return value
+
+
+def summarize_output(response: Any) -> Any:
+    """Compact summary of a tool result, shaped like the result itself.
+
+    get_table_info resources become compact_table_info (columns -> types);
+    long lists keep their length, column names, and first rows; long strings
+    keep a prefix and their length.
+    """
+    if isinstance(response, dict) and "tableReference" in response:
+        ref = response["tableReference"]
+        return {
+            "table": ".".join(
+                (
+                    ref.get("projectId", ""),
+                    ref.get("datasetId", ""),
+                    ref.get("tableId", ""),
+                )
+            ),
+            **compact_table_info(response),
+        }
+    if isinstance(response, dict):
+        return {key: _preview(value) for key, value in response.items()}
+    return _preview(response)
+
+
+def _handle(tool_name: str, function_call_id: str | None) -> str:
+    suffix = re.sub(r"[^A-Za-z0-9]", "", function_call_id or "")[-12:] or "last"
+    return f"tool_output_{tool_name}_{suffix}.json"
+
+
+async def offload_large_output(
+    tool: BaseTool,
+    args: dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any,
+) -> dict | None:
+    """after_tool_callback: replace an oversized result with a summary and a handle.
+
+    Register last: ADK stops at the first after callback that returns a value,
+    and the other callbacks need the full result.
+    """
+    if tool.name in _EXEMPT_TOOLS:
+        return None
+    payload = json.dumps(tool_response, default=str)
+    if len(payload) <= _MAX_CHARS:
+        return None
+
+    handle = _handle(tool.name, tool_context.function_call_id)
+    summary = summarize_output(tool_response)
+    if len(json.dumps(summary, default=str)) > _MAX_SLICE_CHARS:
+        summary = _preview(tool_response)
+    status = (
+        tool_response.get("status", "SUCCESS")
+        if isinstance(tool_response, dict)
+        else "SUCCESS"
+    )
+    offloaded: dict[str, Any] = {
+        "status": status,
+        "output_offloaded": {"total_chars": len(payload)},
+        "summary": summary,
+    }
+    part = types.Part.from_bytes(data=payload.encode(), mime_type="application/json")
+    try:
+        await tool_context.save_artifact(handle, part)
+    except ValueError:
+        # No artifact service configured (e.g. bare `adk run`).
+        logger.warning("offload_large_output: artifact service unavailable")
+        offloaded["output_offloaded"]["note"] = (
+            "Output too large for the conversation and could not be stored; "
+            "narrow the request (fewer columns or rows) if the summary is not enough."
+        )
+        return offloaded
+
+    offloaded["output_artifact"] = handle
+    offloaded["next_step"] = (
+        "Answer from the summary when it is enough; otherwise call "
+        f"read_tool_output(handle='{handle}', path=..., offset=..., limit=...)."
+    )
+    logger.info(
+        "offload_large_output: %s result (%d chars) stored as %s",
+        tool.name,
+        len(payload),
+        handle,
+    )
+    return offloaded
+
+
+def _navigate(data: Any, path: str) -> Any:
+    for key in filter(None, path.split(".")):
+        if isinstance(data, list):
+            data = data[int(key)]
+        elif isinstance(data, dict):
+            data = data[key]
+        else:
+            raise KeyError(key)
+    return data
+
+
+async def read_tool_output(
+    handle: str,
+    tool_context: ToolContext,
+    path: str = "",
+    offset: int = 0,
+    limit: int = 50,
+) -> dict:
+    """Reads part of a tool result that was stored as an artifact.
+
+    Use the output_artifact handle from a result that reports
+    output_offloaded. Lists are returned as items, text as characters.
+
+    Args:
+        handle: The output_artifact value, e.g. "tool_output_execute_sql_ab12.json".
+        tool_context: Provided by ADK.
+        path: Dotted path into the result, e.g. "rows", "schema.fields", or
+            "rows.10". Empty for the top level.
+        offset: First list item (or character, for text) to return.
+        limit: Maximum list items to return.
+
+    Returns:
+        dict: status and the requested slice, with total_items / total_chars
+        and next_offset when more remains.
+    """
+    try:
+        part = await tool_context.load_artifact(handle)
+    except ValueError:
+        part = None
+    if part is None or part.inline_data is None:
+        return {
+            "status": "ERROR",
+            "error_details": f"No stored tool output named {handle!r}.",
+        }
+    try:
+        data = _navigate(json.loads(part.inline_data.data), path)
+    except (KeyError, IndexError, ValueError):
+        return {
+            "status": "ERROR",
+            "error_details": f"Path {path!r} not found in {handle}.",
+        }
+
+    result: dict[str, Any] = {"status": "SUCCESS", "handle": handle, "path": path}
+    if isinstance(data, list):
+        items = data[offset : offset + max(limit, 1)]
+        while len(items) > 1 and len(json.dumps(items, default=str)) > _MAX_SLICE_CHARS:
+            items = items[: len(items) // 2]
+        end = offset + len(items)
+        result.update(total_items=len(data), offset=offset, items=items)
+        if end < len(data):
+            result["next_offset"] = end
+    elif len(json.dumps(data, default=str)) <= _MAX_SLICE_CHARS:
+        result["value"] = data
+    else:
+        text = data if isinstance(data, str) else json.dumps(data, default=str)
+        end = offset + _MAX_SLICE_CHARS
+        result.update(total_chars=len(text), offset=offset, text=text[offset:end])
+        if end < len(text):
+            result["next_offset"] = end
+    return result
@@ -5,6 +5,10 @@ This module provides:
 1. ca_toolset      — CA API + discovery tools for the root agent (read-only, per-user OAuth)
 2. ds_toolset      — Advanced analysis tools for the DS sub-agent (read-only, per-user OAuth)
 3. data_agent_toolset — Pre-configured BQ Data Agents via Conversational Analytics API
+
+All toolsets share the per-user client and HTTP session pools in bq_clients.py.
+Every agent using them registers offload_large_output (tool_outputs.py), which
+stores results over TOOL_OUTPUT_MAX_CHARS as artifacts and returns a summary.
 """
 
 import os
@@ -15,6 +19,8 @@ from google.adk.tools.data_agent.config import DataAgentToolConfig
 from google.adk.tools.data_agent.credentials import DataAgentCredentialsConfig
 from google.adk.tools.data_agent.data_agent_toolset import DataAgentToolset
 
+from .bq_clients import install_client_pool
+
 # Session state key where Gemini Enterprise deposits the user's OAuth access token.
 # All toolsets read from this key on every tool call — no caching, no refresh attempt.
 # This bypasses the broken refresh flow (Gemini Enterprise issues access tokens only,
@@ -29,6 +35,10 @@ _bq_credentials = BigQueryCredentialsConfig(
     external_access_token_key=_AUTH_ID,
 )
 
+# The token is still read on every call, but the bigquery.Client built from it
+# (and its keep-alive HTTPS connections) is reused until the token changes.
+install_client_pool()
+
 # Root agent: CA API + discovery tools (read-only).
 # ask_data_insights is the Conversational Analytics API — it translates natural
 # language questions into SQL and returns results with Vega-Lite chart specs.
@@ -0,0 +1,437 @@
+"""
+In-warehouse statistical tests for the DS agent.
+
+Running a t-test or chi-square test in Code Interpreter means shipping every
+row out of BigQuery first — slow for millions of rows, impossible for billions.
+run_statistical_test instead:
+1. Computes the test's sufficient statistics with one aggregate query
+   (per-group COUNT / AVG / VAR_SAMP, contingency counts, CORR, bucket counts)
+2. Finishes the test here from those few numbers: test statistic, degrees of
+   freedom, p-value, and effect size
+
+p-values use the regularized incomplete beta and gamma functions below, so no
+scipy is needed at serving time. reference_test computes the same tests from
+raw rows with textbook formulas; the tests compare both paths.
+"""
+
+import asyncio
+import logging
+import math
+import re
+import time
+from typing import Any
+
+from google.adk.tools.tool_context import ToolContext
+from google.cloud import bigquery
+
+from .bq_clients import client_for
+from .sql_lint import as_subquery, qualified_path, split_statements
+
+_TESTS = ("t_test", "chi_square", "correlation", "histogram")
+
+# Distinct categories per column for chi_square (and groups for t_test).
+_MAX_LEVELS = 50
+
+_MAX_BINS = 100
+
+_COLUMN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# Continued-fraction settings for the incomplete beta / gamma functions.
+_MAX_ITERATIONS = 300
+_EPSILON = 3e-16
+_TINY = 1e-300
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Distribution functions
+# ---------------------------------------------------------------------------
+
+
+def _beta_continued_fraction(a: float, b: float, x: float) -> float:
+    """Continued fraction for the incomplete beta function (modified Lentz)."""
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > _TINY else _TINY)
+    result = d
+    for m in range(1, _MAX_ITERATIONS + 1):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > _TINY else _TINY)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > _TINY else _TINY
+            result *= d * c
+        if abs(d * c - 1.0) < _EPSILON:
+            break
+    return result
+
+
+def regularized_beta(a: float, b: float, x: float) -> float:
+    """I_x(a, b), the regularized incomplete beta function."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_front = (
+        math.lgamma(a + b)
+        - math.lgamma(a)
+        - math.lgamma(b)
+        + a * math.log(x)
+        + b * math.log1p(-x)
+    )
+    if x < (a + 1.0) / (a + b + 2.0):
+        return math.exp(log_front) * _beta_continued_fraction(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _beta_continued_fraction(b, a, 1.0 - x) / b
+
+
+def regularized_gamma_upper(a: float, x: float) -> float:
+    """Q(a, x), the upper regularized incomplete gamma function."""
+    if x <= 0.0:
+        return 1.0
+    log_front = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1.0:
+        # Series for P(a, x).
+        term = total = 1.0 / a
+        for n in range(1, _MAX_ITERATIONS + 1):
+            term *= x / (a + n)
+            total += term
+            if abs(term) < abs(total) * _EPSILON:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_front))
+    # Continued fraction for Q(a, x) (modified Lentz).
+    b = x + 1.0 - a
+    c, d = 1.0 / _TINY, 1.0 / b
+    result = d
+    for n in range(1, _MAX_ITERATIONS + 1):
+        numerator = -n * (n - a)
+        b += 2.0
+        d = numerator * d + b
+        d = 1.0 / (d if abs(d) > _TINY else _TINY)
+        c = b + numerator / c
+        c = c if abs(c) > _TINY else _TINY
+        result *= d * c
+        if abs(d * c - 1.0) < _EPSILON:
+            break
+    return math.exp(log_front) * result
+
+
+def t_two_sided_p(t: float, df: float) -> float:
+    """Two-sided p-value of Student's t with df degrees of freedom."""
+    if math.isinf(t):
+        return 0.0
+    return regularized_beta(df / 2.0, 0.5, df / (df + t * t))
+
+
+def chi_square_p(statistic: float, dof: int) -> float:
+    """Upper-tail p-value of the chi-square distribution."""
+    return regularized_gamma_upper(dof / 2.0, statistic / 2.0)
+
+
+# ---------------------------------------------------------------------------
+# Tests from sufficient statistics
+# ---------------------------------------------------------------------------
+
+
+def welch_t_test(a: dict, b: dict) -> dict:
+    """Welch's two-sample t-test from per-group {n, mean, var}."""
+    if a["n"] < 2 or b["n"] < 2:
+        raise ValueError("Each group needs at least 2 values.")
+    se_a, se_b = a["var"] / a["n"], b["var"] / b["n"]
+    if se_a + se_b == 0:
+        raise ValueError("Both groups have zero variance.")
+    difference = a["mean"] - b["mean"]
+    t = difference / math.sqrt(se_a + se_b)
+    df = (se_a + se_b) ** 2 / (se_a**2 / (a["n"] - 1) + se_b**2 / (b["n"] - 1))
+    pooled_var = ((a["n"] - 1) * a["var"] + (b["n"] - 1) * b["var"]) / (
+        a["n"] + b["n"] - 2
+    )
+    return {
+        "statistic": t,
+        "df": df,
+        "p_value": t_two_sided_p(t, df),
+        "mean_difference": difference,
+        "cohens_d": difference / math.sqrt(pooled_var) if pooled_var else None,
+    }
+
+
+def chi_square_independence(counts: dict[tuple[str, str], int]) -> dict:
+    """Pearson's chi-square test of independence from contingency counts."""
+    rows: dict[str, int] = {}
+    columns: dict[str, int] = {}
+    for (row, column), count in counts.items():
+        rows[row] = rows.get(row, 0) + count
+        columns[column] = columns.get(column, 0) + count
+    if len(rows) < 2 or len(columns) < 2:
+        raise ValueError("Both columns need at least 2 distinct values.")
+    n = sum(rows.values())
+    statistic = 0.0
+    for row, row_total in rows.items():
+        for column, column_total in columns.items():
+            expected = row_total * column_total / n
+            statistic += (counts.get((row, column), 0) - expected) ** 2 / expected
+    dof = (len(rows) - 1) * (len(columns) - 1)
+    return {
+        "statistic": statistic,
+        "df": dof,
+        "p_value": chi_square_p(statistic, dof),
+        "n": n,
+        "cramers_v": math.sqrt(statistic / (n * (min(len(rows), len(columns)) - 1))),
+    }
+
+
+def pearson_correlation(n: int, r: float | None) -> dict:
+    """Significance of a Pearson correlation coefficient r over n pairs."""
+    if n < 3 or r is None:
+        raise ValueError("Correlation needs at least 3 pairs with non-zero variance.")
+    df = n - 2
+    t = math.inf if abs(r) >= 1 else r * math.sqrt(df / (1 - r * r))
+    return {
+        "statistic": t if math.isfinite(t) else None,
+        "df": df,
+        "p_value": t_two_sided_p(t, df),
+        "n": n,
+        "r": r,
+        "r_squared": r * r,
+    }
+
+
+def reference_test(test: str, pairs: list[tuple[Any, Any]]) -> dict:
+    """Pure-Python reference: compute a test from raw (value, other) rows.
+
+    Uses two-pass textbook formulas on every row, independent of the
+    aggregate path, to validate run_statistical_test's numerical accuracy.
+    For t_test, `other` is the group (exactly two groups); for chi_square the
+    two categories; for correlation the two values.
+    """
+    if test == "t_test":
+        groups: dict[Any, list[float]] = {}
+        for value, group in pairs:
+            groups.setdefault(group, []).append(value)
+        stats = []
+        for group in sorted(groups, key=str):
+            values = groups[group]
+            mean = sum(values) / len(values)
+            var = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+            stats.append({"n": len(values), "mean": mean, "var": var})
+        return welch_t_test(*stats)
+    if test == "chi_square":
+        counts: dict[tuple[str, str], int] = {}
+        for a, b in pairs:
+            counts[(str(a), str(b))] = counts.get((str(a), str(b)), 0) + 1
+        return chi_square_independence(counts)
+    if test == "correlation":
+        n = len(pairs)
+        mean_x = sum(x for x, _ in pairs) / n
+        mean_y = sum(y for _, y in pairs) / n
+        sxy = sum((x - mean_x) * (y - mean_y) for x, y in pairs)
+        sxx = sum((x - mean_x) ** 2 for x, _ in pairs)
+        syy = sum((y - mean_y) ** 2 for _, y in pairs)
+        return pearson_correlation(n, sxy / math.sqrt(sxx * syy))
+    raise ValueError(f"No reference implementation for {test!r}.")
+
+
+# ---------------------------------------------------------------------------
+# SQL
+# ---------------------------------------------------------------------------
+
+
+def build_test_sql(
+    test: str,
+    source: str,
+    column: str,
+    other_column: str = "",
+    bins: int = 20,
+    filter_groups: bool = False,
+) -> str:
+    """Aggregate query returning the sufficient statistics for a test.
+
+    Args:
+        test: One of t_test, chi_square, correlation, histogram.
+        source: "`p.d.t`" or a parenthesised SELECT.
+        column: Validated value column (category column for chi_square).
+        other_column: Group column (t_test) or second column.
+        bins: Histogram bucket count.
+        filter_groups: For t_test, keep only the groups in the @groups
+            query parameter.
+
+    Returns:
+        One BigQuery SELECT.
+    """
+    x, y = f"`{column}`", f"`{other_column}`"
+    if test == "t_test":
+        group_filter = (
+            f"AND CAST({y} AS STRING) IN UNNEST(@groups) " if filter_groups else ""
+        )
+        return (
+            f"SELECT CAST({y} AS STRING) AS level, COUNT({x}) AS n, AVG({x}) AS mean, "
+            f"VAR_SAMP({x}) AS var FROM {source} "
+            f"WHERE {x} IS NOT NULL AND {y} IS NOT NULL {group_filter}"
+            f"GROUP BY level ORDER BY level LIMIT {_MAX_LEVELS + 1}"
+        )
+    if test == "chi_square":
+        return (
+            f"SELECT CAST({x} AS STRING) AS row_level, CAST({y} AS STRING) AS "
+            f"column_level, COUNT(*) AS n FROM {source} "
+            f"WHERE {x} IS NOT NULL AND {y} IS NOT NULL "
+            f"GROUP BY row_level, column_level LIMIT {_MAX_LEVELS**2 + 1}"
+        )
+    if test == "correlation":
+        return (
+            f"SELECT COUNT(*) AS n, CORR({x}, {y}) AS r, AVG({x}) AS mean_x, "
+            f"AVG({y}) AS mean_y FROM {source} "
+            f"WHERE {x} IS NOT NULL AND {y} IS NOT NULL"
+        )
+    return (
+        f"WITH v AS (SELECT {x} AS v FROM {source} WHERE {x} IS NOT NULL), "
+        "bounds AS (SELECT MIN(v) AS lo, MAX(v) AS hi, COUNT(*) AS total, "
+        "AVG(v) AS mean, STDDEV_SAMP(v) AS stddev, "
+        "APPROX_QUANTILES(v, 4) AS quartiles FROM v), "
+        "buckets AS (SELECT IFNULL(LEAST(CAST(FLOOR(SAFE_DIVIDE(v - lo, hi - lo) "
+        f"* {bins}) AS INT64), {bins - 1}), 0) AS bucket, COUNT(*) AS n "
+        "FROM v, bounds GROUP BY bucket) "
+        "SELECT * FROM buckets, bounds ORDER BY bucket"
+    )
+
+
+def _histogram(rows: list[dict], bins: int) -> dict:
+    if not rows:
+        raise ValueError("The column has no non-NULL values.")
+    first = rows[0]
+    lo, hi = float(first["lo"]), float(first["hi"])
+    width = (hi - lo) / bins if hi > lo else 0.0
+    counts = {row["bucket"]: row["n"] for row in rows}
+    return {
+        "n": first["total"],
+        "mean": first["mean"],
+        "stddev": first["stddev"],
+        "min": lo,
+        "max": hi,
+        "quartiles": list(first["quartiles"]),
+        "bins": [
+            {"start": lo + i * width, "end": lo + (i + 1) * width, "count": counts[i]}
+            for i in sorted(counts)
+        ],
+    }
+
+
+def _finish(test: str, rows: list[dict], bins: int) -> dict:
+    """Turn the aggregate rows of build_test_sql into the test result."""
+    if test == "t_test":
+        if len(rows) != 2:
+            levels = [row["level"] for row in rows[:_MAX_LEVELS]]
+            raise ValueError(
+                f"t_test needs exactly 2 groups, found {len(rows)}: {levels}. "
+                "Pass the two to compare in groups."
+            )
+        a, b = (
+            {"n": row["n"], "mean": float(row["mean"]), "var": float(row["var"] or 0)}
+            for row in rows
+        )
+        result = welch_t_test(a, b)
+        result["groups"] = {
+            row["level"]: {"n": row["n"], "mean": row["mean"]} for row in rows
+        }
+        return result
+    if test == "chi_square":
+        if len(rows) > _MAX_LEVELS**2:
+            raise ValueError(f"Too many category combinations (>{_MAX_LEVELS**2}).")
+        return chi_square_independence(
+            {(row["row_level"], row["column_level"]): row["n"] for row in rows}
+        )
+    if test == "correlation":
+        row = rows[0]
+        r = float(row["r"]) if row["r"] is not None else None
+        return pearson_correlation(row["n"], r)
+    return _histogram(rows, bins)
+
+
+async def run_statistical_test(
+    project_id: str,
+    test: str,
+    column: str,
+    tool_context: ToolContext,
+    table: str = "",
+    query: str = "",
+    other_column: str = "",
+    groups: list[str] | None = None,
+    bins: int = 20,
+) -> dict:
+    """Runs a statistical test inside BigQuery and returns only the result.
+
+    Use this instead of fetching rows into Python for t-tests, chi-square
+    tests, correlations, and histograms: only aggregates leave BigQuery, so
+    it works on tables of any size.
+
+    Args:
+        project_id: The GCP project to run the query in.
+        test: "t_test" (Welch, column by two groups of other_column),
+            "chi_square" (independence of column and other_column),
+            "correlation" (Pearson, column vs other_column), or "histogram"
+            (distribution of column).
+        column: The numeric column (a categorical column for chi_square).
+        tool_context: Provided by ADK.
+        table: Table to test (dataset.table or project.dataset.table). Pass
+            this or query.
+        query: A SELECT producing the rows to test, e.g. with a WHERE filter.
+        other_column: The group column (t_test) or second column.
+        groups: For t_test, the two group values to compare when
+            other_column has more than two.
+        bins: Histogram bucket count (at most 100).
+
+    Returns:
+        dict: statistic, df, p_value, and effect size (cohens_d, cramers_v,
+        or r_squared), or the histogram bins and summary statistics.
+    """
+    try:
+        if test not in _TESTS:
+            raise ValueError(f"test must be one of {', '.join(_TESTS)}.")
+        if bool(table) == bool(query):
+            raise ValueError("Pass exactly one of table or query.")
+        if table:
+            source = f"`{qualified_path(table, project_id)}`"
+        else:
+            statements = split_statements(query)
+            if len(statements) != 1 or statements[0][0].upper not in ("SELECT", "WITH"):
+                raise ValueError("query must be a single SELECT statement.")
+            source = as_subquery(query, statements[0])
+        needed = [column] if test == "histogram" else [column, other_column]
+        if not all(_COLUMN_RE.fullmatch(c or "") for c in needed):
+            raise ValueError(f"{test} needs valid column names: {needed}.")
+        if groups is not None and len(groups) != 2:
+            raise ValueError("groups takes exactly two values.")
+        bins = max(1, min(bins, _MAX_BINS))
+    except ValueError as e:
+        return {"status": "ERROR", "error_details": str(e)}
+
+    filter_groups = test == "t_test" and bool(groups)
+    sql = build_test_sql(test, source, column, other_column, bins, filter_groups)
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ArrayQueryParameter("groups", "STRING", groups)]
+        if filter_groups
+        else []
+    )
+
+    def run():
+        client = client_for(tool_context, project_id, user_agent="run_statistical_test")
+        rows = client.query_and_wait(sql, project=project_id, job_config=job_config)
+        return [dict(row) for row in rows]
+
+    started = time.perf_counter()
+    try:
+        rows = await asyncio.to_thread(run)
+    except Exception as e:
+        logger.exception("run_statistical_test: aggregate query failed")
+        return {"status": "ERROR", "error_details": str(e), "sql": sql}
+    try:
+        result = _finish(test, rows, bins)
+    except ValueError as e:
+        return {"status": "ERROR", "error_details": str(e)}
+    return {
+        "status": "SUCCESS",
+        "test": test,
+        **result,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000),
+    }
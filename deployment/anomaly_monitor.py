@@ -0,0 +1,124 @@
+"""
+Scheduled runner for incremental anomaly checks.
+
+Runs detect_new_anomalies' scoring (score_new_data) for every monitor in a
+JSON config, outside the agent, so daily checks score only the rows added
+since the last run. Models and watermarks are shared with the DS agent's
+detect_new_anomalies tool through ANOMALY_MODEL_DATASET.
+
+Config file — a list of monitors:
+
+    [
+      {"table": "my-project.sales.daily_revenue", "timestamp_col": "day",
+       "data_col": "revenue", "id_cols": ["store_id"], "threshold": 0.99}
+    ]
+
+Usage (Application Default Credentials):
+
+    # Once, e.g. from cron: 0 6 * * * cd /path/to/repo && uv run python ...
+    uv run python deployment/anomaly_monitor.py --config monitors.json
+
+    # Or keep running and check every 24 hours
+    uv run python deployment/anomaly_monitor.py --config monitors.json --every-hours 24
+
+Required environment variables (.env or shell):
+    GOOGLE_CLOUD_PROJECT    - GCP project that runs (and is billed for) the jobs
+    ANOMALY_MODEL_DATASET   - Dataset for the persisted anomaly models
+
+Exits with status 1 when a run found anomalies or a monitor failed, so cron
+or a CI scheduler can alert on it.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from types import ModuleType
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env", override=True)
+# App modules are imported without running the package __init__ files, which
+# build the whole agent tree (Code Interpreter, toolsets) and need the app's
+# full configuration.
+_APP = Path(__file__).parent.parent / "bq_multi_agent_app"
+for _init in _APP.rglob("__init__.py"):
+    _name = ".".join(_init.parent.relative_to(_APP.parent).parts)
+    sys.modules[_name] = ModuleType(_name)
+    sys.modules[_name].__path__ = [str(_init.parent)]
+
+import google.auth
+from google.cloud import bigquery
+
+from bq_multi_agent_app.incremental_anomalies import (
+    anomaly_model_dataset,
+    score_new_data,
+)
+from bq_multi_agent_app.sql_lint import qualified_path
+
+
+def _run_once(client: bigquery.Client, monitors: list[dict], dataset: str) -> bool:
+    """Runs every monitor once and prints one JSON line each. Returns True if
+    anything needs attention."""
+    alert = False
+    for monitor in monitors:
+        table = qualified_path(monitor["table"], client.project)
+        try:
+            result = score_new_data(
+                client,
+                table,
+                monitor["timestamp_col"],
+                monitor["data_col"],
+                monitor.get("id_cols"),
+                dataset,
+                monitor.get("threshold", 0.95),
+            )
+            status = "ANOMALIES" if result["anomaly_count"] else "OK"
+        except Exception as e:  # noqa: BLE001 — reported, other monitors still run
+            result, status = {"error_details": str(e)}, "ERROR"
+        alert = alert or status != "OK"
+        print(
+            json.dumps(
+                {
+                    "checked_at": datetime.now(UTC).isoformat(),
+                    "table": table,
+                    "status": status,
+                    **result,
+                },
+                default=str,
+            ),
+            flush=True,
+        )
+    return alert
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", required=True, type=Path)
+    parser.add_argument(
+        "--every-hours",
+        type=float,
+        help="Keep running and repeat the checks at this interval.",
+    )
+    args = parser.parse_args()
+
+    credentials, default_project = google.auth.default()
+    project_id = os.getenv("GOOGLE_CLOUD_PROJECT", default_project)
+    dataset = anomaly_model_dataset(project_id)
+    if not dataset:
+        sys.exit("ANOMALY_MODEL_DATASET is not set.")
+    monitors = json.loads(args.config.read_text())
+    client = bigquery.Client(project=project_id, credentials=credentials)
+
+    if args.every_hours is None:
+        sys.exit(1 if _run_once(client, monitors, dataset) else 0)
+    while True:
+        _run_once(client, monitors, dataset)
+        time.sleep(args.every_hours * 3600)
+
+
+if __name__ == "__main__":
+    main()
@@ -81,6 +81,7 @@ main() {
         --otel_to_cloud \
         --env_file="${ENV_FILE}" \
         --agent_engine_config_file="${AGENT_DIR}/.agent_engine_config.json" \
+        --adk_app_object=app \
         "${passthrough_args[@]}" \
         "${AGENT_DIR}" 2>&1)
 
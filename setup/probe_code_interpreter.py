@@ -31,6 +31,7 @@ candidates = {
     "sklearn": "sklearn",
     "statsmodels": "statsmodels",
     "PIL": "PIL",
+    "pyarrow": "pyarrow",
     "xgboost": "xgboost",
     "lightgbm": "lightgbm",
     "plotly": "plotly",
@@ -11,6 +11,13 @@ On first run, creates the corpus and writes BQML_RAG_CORPUS_NAME to .env.
 On subsequent runs, skips creation and only re-imports files into the
 existing corpus.
 
+After the import, the same documents are chunked locally the same way and a
+BM25 inverted index is written to RAG_LEXICAL_INDEX (default
+bq_multi_agent_app/sub_agents/bqml_agents/bqml_lexical_index.json).
+rag_response fuses it with vector results, so exact BQML identifiers such as
+ML.GENERATE_EMBEDDING are found even when vector search misses them. The
+file is deployed with the agent.
+
 Note: Vertex AI RAG defaults to us-west4 when GOOGLE_CLOUD_LOCATION is
 not set. This is intentional -- us-west4 has higher RAG quota than
 us-central1. The rest of the infrastructure runs in us-central1.
@@ -18,19 +25,41 @@ If you need the corpus in the same region, set GOOGLE_CLOUD_LOCATION
 to a region that supports both Vertex AI RAG and Agent Engine.
 """
 
+import importlib.util
 import os
+import re
 from pathlib import Path
 
 from dotenv import load_dotenv
 from dotenv import set_key
+from google.cloud import storage
 import vertexai
 from vertexai import rag
 
 # Path to repo root .env file.
 _ENV_FILE = Path(__file__).parent.parent.parent / ".env"
 
+# override=True ensures .env values take precedence over shell env vars
+# (e.g. GOOGLE_CLOUD_LOCATION=global set in the shell session). Loaded before
+# retrieval.py, which reads the chunking settings at import time.
+load_dotenv(dotenv_path=_ENV_FILE, override=True)
+
+# retrieval.py is loaded on its own: importing the bq_multi_agent_app package
+# builds the whole agent tree, which needs the app's full configuration.
+_spec = importlib.util.spec_from_file_location(
+    "bqml_retrieval",
+    _ENV_FILE.parent / "bq_multi_agent_app/sub_agents/bqml_agents/retrieval.py",
+)
+retrieval = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(retrieval)
+
 # Public GCS bucket with BQML documentation files.
-_BQML_DOCS_PATH = "gs://cloud-samples-data/adk-samples/data-science/bqml"
+_BQML_DOCS_BUCKET = "cloud-samples-data"
+_BQML_DOCS_PREFIX = "adk-samples/data-science/bqml"
+_BQML_DOCS_PATH = f"gs://{_BQML_DOCS_BUCKET}/{_BQML_DOCS_PREFIX}"
+
+# Documents indexed lexically; other formats are only in the vector corpus.
+_TEXT_SUFFIXES = (".md", ".txt", ".html", ".htm")
 
 
 def create_rag_corpus(
@@ -73,8 +102,8 @@ def ingest_files(corpus_name: str) -> None:
     """
     transformation_config = rag.TransformationConfig(
         chunking_config=rag.ChunkingConfig(
-            chunk_size=512,
-            chunk_overlap=100,
+            chunk_size=retrieval.CHUNK_SIZE,
+            chunk_overlap=retrieval.CHUNK_OVERLAP,
         ),
     )
 
@@ -88,6 +117,44 @@ def ingest_files(corpus_name: str) -> None:
     rag.list_files(corpus_name)
 
 
+def build_lexical_index(output_path: str = retrieval.RAG_LEXICAL_INDEX) -> int:
+    """Build the local BM25 index over the corpus documents.
+
+    Chunks each text document with the corpus chunking settings and saves a
+    LexicalIndex (chunks, lengths, postings) as JSON.
+
+    Args:
+        output_path: Where to write the index.
+
+    Returns:
+        The number of indexed chunks.
+    """
+    chunks = []
+    skipped = 0
+    for blob in storage.Client().list_blobs(
+        _BQML_DOCS_BUCKET, prefix=f"{_BQML_DOCS_PREFIX}/"
+    ):
+        if blob.name.endswith("/"):  # folder placeholder
+            continue
+        if not blob.name.lower().endswith(_TEXT_SUFFIXES):
+            skipped += 1
+            continue
+        text = blob.download_as_bytes().decode("utf-8", errors="replace")
+        if blob.name.lower().endswith((".html", ".htm")):
+            text = re.sub(r"<[^>]+>", " ", text)
+        source_uri = f"gs://{_BQML_DOCS_BUCKET}/{blob.name}"
+        chunks.extend(
+            {"text": chunk, "source_uri": source_uri}
+            for chunk in retrieval.chunk_text(text)
+        )
+
+    retrieval.LexicalIndex(chunks).save(output_path)
+    print(f"Lexical index: {len(chunks)} chunks written to {output_path}")
+    if skipped:
+        print(f"Lexical index: {skipped} non-text files left to vector search only")
+    return len(chunks)
+
+
 def _write_corpus_name_to_env(corpus_name: str) -> None:
     """Write the corpus resource name to the .env file.
 
@@ -100,10 +167,6 @@ def _write_corpus_name_to_env(corpus_name: str) -> None:
 
 
 if __name__ == "__main__":
-    # override=True ensures .env values take precedence over shell env vars
-    # (e.g. GOOGLE_CLOUD_LOCATION=global set in the shell session).
-    load_dotenv(dotenv_path=_ENV_FILE, override=True)
-
     project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
     if not project_id:
         raise RuntimeError("GOOGLE_CLOUD_PROJECT must be set in .env or environment.")
@@ -128,3 +191,6 @@ if __name__ == "__main__":
     print(f"Importing files to corpus: {corpus_name}")
     ingest_files(corpus_name)
     print(f"Files imported to corpus: {corpus_name}")
+
+    print("Building lexical index...")
+    build_lexical_index()
@@ -53,8 +53,53 @@ def test_root_agent_has_research_sub_agent(root_agent):
     assert "research_aida_agent" in sub_agent_names
 
 
-def test_root_agent_has_exactly_three_sub_agents(root_agent):
-    assert len(root_agent.sub_agents) == 3
+def test_root_agent_has_research_compare_sub_agent(root_agent):
+    sub_agent_names = [a.name for a in root_agent.sub_agents]
+    assert "research_compare_agent" in sub_agent_names
+
+
+def test_root_agent_has_compound_sub_agent(root_agent):
+    sub_agent_names = [a.name for a in root_agent.sub_agents]
+    assert "compound_agent" in sub_agent_names
+    assert "plan_compound_request" in _tool_names(root_agent)
+
+
+def test_root_agent_has_exactly_five_sub_agents(root_agent):
+    assert len(root_agent.sub_agents) == 5
+
+
+def test_compound_agent_runs_branches_in_parallel_then_merges():
+    from google.adk.agents import ParallelAgent
+
+    from bq_multi_agent_app.sub_agents.compound_agents.agent import compound_agent
+
+    branches, merge = compound_agent.sub_agents
+    assert isinstance(branches, ParallelAgent)
+    assert [a.name for a in branches.sub_agents] == [
+        "compound_data_branch",
+        "compound_analysis_branch",
+        "compound_research_branch",
+    ]
+    assert merge.name == "compound_merge"
+
+
+def test_compound_branches_keep_original_tools():
+    from bq_multi_agent_app.sub_agents.compound_agents.agent import (
+        compound_analysis_branch,
+    )
+
+    names = _tool_names(compound_analysis_branch)
+    assert "run_statistical_test" in names
+    assert compound_analysis_branch.output_key == "compound_result_analysis"
+
+
+def test_compound_research_branch_skips_research_cache():
+    from bq_multi_agent_app.sub_agents.compound_agents.agent import (
+        compound_research_branch,
+    )
+
+    assert compound_research_branch.before_model_callback is None
+    assert compound_research_branch.after_model_callback is None
 
 
 def test_root_agent_has_ca_toolset(root_agent):
@@ -86,6 +131,59 @@ def test_root_agent_does_not_have_load_artifacts_directly(root_agent):
     assert not any("load_artifacts" in n for n in tool_names)
 
 
+def test_root_agent_can_chart_saved_results(root_agent):
+    from bq_multi_agent_app.charts import persist_data_result
+
+    assert "render_chart" in _tool_names(root_agent)
+    assert persist_data_result in root_agent.after_tool_callback
+
+
+def test_root_agent_caches_table_schema(root_agent):
+    from bq_multi_agent_app.callbacks import cache_table_schema
+
+    assert cache_table_schema in root_agent.after_tool_callback
+
+
+def test_root_agent_caches_query_results(root_agent):
+    from bq_multi_agent_app.callbacks import serve_cached_result, store_query_result
+
+    assert root_agent.before_tool_callback[-1] is serve_cached_result
+    assert store_query_result in root_agent.after_tool_callback
+
+
+def test_root_agent_prefetches_metadata_and_memory(root_agent):
+    from bq_multi_agent_app.prefetch import (
+        SpeculativePreloadMemoryTool,
+        finish_speculative_prefetch,
+        serve_prefetched_metadata,
+        start_speculative_prefetch,
+    )
+
+    assert root_agent.before_agent_callback[0] is start_speculative_prefetch
+    assert finish_speculative_prefetch in root_agent.after_agent_callback
+    assert root_agent.before_tool_callback[0] is serve_prefetched_metadata
+    assert any(isinstance(t, SpeculativePreloadMemoryTool) for t in root_agent.tools)
+
+
+def test_agents_offload_oversized_tool_outputs(root_agent):
+    from bq_multi_agent_app.sub_agents import bqml_agent, ds_agent
+    from bq_multi_agent_app.tool_outputs import offload_large_output
+
+    for agent in (root_agent, ds_agent, bqml_agent):
+        assert agent.after_tool_callback[-1] is offload_large_output
+        assert "read_tool_output" in _tool_names(agent)
+
+
+def test_app_compacts_long_sessions(root_agent):
+    from bq_multi_agent_app.agent import app
+    from bq_multi_agent_app.compaction import AnalystEventsSummarizer
+
+    assert app.root_agent is root_agent
+    config = app.events_compaction_config
+    assert config.token_threshold > 0
+    assert isinstance(config.summarizer, AnalystEventsSummarizer)
+
+
 def test_root_agent_has_global_instruction(root_agent):
     gi = root_agent.global_instruction
     assert gi
@@ -95,6 +193,17 @@ def test_root_agent_has_global_instruction(root_agent):
     assert "Data Science" in text
 
 
+def test_root_agent_announces_finished_bqml_jobs(root_agent):
+    from types import SimpleNamespace
+
+    from bq_multi_agent_app.sub_agents.bqml_agents.jobs import BQML_JOB_UPDATES_KEY
+
+    update = {"job_id": "bqml_1", "model": "p.ml.churn", "error": None}
+    ctx = SimpleNamespace(state={BQML_JOB_UPDATES_KEY: [update]})
+    assert "p.ml.churn" in root_agent.global_instruction(ctx)
+    assert "p.ml.churn" not in root_agent.global_instruction(None)
+
+
 def test_root_agent_has_instruction(root_agent):
     assert root_agent.instruction
     assert len(root_agent.instruction) > 0
@@ -146,6 +255,42 @@ def test_bqml_agent_does_not_have_check_bq_models(bqml_agent):
     assert not any("check_bq_models" in n for n in tool_names)
 
 
+def test_bqml_agent_lints_sql_before_execution(bqml_agent):
+    from bq_multi_agent_app.callbacks import lint_execute_sql
+
+    assert lint_execute_sql in bqml_agent.before_tool_callback
+
+
+def test_bqml_agent_submits_training_in_background(bqml_agent):
+    from bq_multi_agent_app.sub_agents.bqml_agents.jobs import refresh_bqml_jobs
+
+    tool_names = _tool_names(bqml_agent)
+    assert "submit_bqml_job" in tool_names
+    assert "get_bqml_job_status" in tool_names
+    assert bqml_agent.before_agent_callback is refresh_bqml_jobs
+
+
+def test_bqml_agent_lists_models_from_cached_inventory(bqml_agent):
+    from bq_multi_agent_app.sub_agents.bqml_agents.inventory import (
+        invalidate_model_inventory,
+    )
+
+    assert "list_bqml_models" in _tool_names(bqml_agent)
+    assert invalidate_model_inventory in bqml_agent.after_tool_callback
+
+
+def test_bqml_agent_compares_models_in_one_job(bqml_agent):
+    assert "compare_bqml_models" in _tool_names(bqml_agent)
+
+
+def test_bqml_agent_can_predict_into_a_table(bqml_agent):
+    assert "predict_to_table" in _tool_names(bqml_agent)
+
+
+def test_bqml_agent_can_run_multi_statement_scripts(bqml_agent):
+    assert "run_bqml_script" in _tool_names(bqml_agent)
+
+
 def test_bqml_agent_has_instruction(bqml_agent):
     assert bqml_agent.instruction
     assert len(bqml_agent.instruction) > 0
@@ -201,6 +346,46 @@ def test_ds_agent_has_load_artifacts(ds_agent):
     assert any("load_artifacts" in n for n in tool_names)
 
 
+def test_ds_agent_lints_sql_before_execution(ds_agent):
+    from bq_multi_agent_app.callbacks import lint_execute_sql
+
+    assert lint_execute_sql in ds_agent.before_tool_callback
+
+
+def test_ds_agent_has_local_drill_down_tools(ds_agent):
+    tool_names = _tool_names(ds_agent)
+    assert "cache_query_result" in tool_names
+    assert "query_cached_result" in tool_names
+
+
+def test_ds_agent_can_fetch_large_results(ds_agent):
+    assert "fetch_large_result" in _tool_names(ds_agent)
+
+
+def test_ds_agent_runs_statistical_tests_in_bigquery(ds_agent):
+    assert "run_statistical_test" in _tool_names(ds_agent)
+
+
+def test_ds_agent_can_refine_approximate_answers(ds_agent):
+    names = _tool_names(ds_agent)
+    assert "start_exact_refinement" in names
+    assert "get_exact_refinement" in names
+
+
+def test_ds_agent_has_incremental_anomaly_checks(ds_agent):
+    assert "detect_new_anomalies" in _tool_names(ds_agent)
+
+
+def test_ds_agent_forecasts_many_series_in_one_call(ds_agent):
+    assert "forecast_series" in _tool_names(ds_agent)
+
+
+def test_ds_agent_checks_result_cache_after_lint(ds_agent):
+    from bq_multi_agent_app.callbacks import serve_cached_result
+
+    assert ds_agent.before_tool_callback[-1] is serve_cached_result
+
+
 def test_ds_agent_has_instruction(ds_agent):
     assert ds_agent.instruction
     assert len(ds_agent.instruction) > 0
@@ -241,6 +426,26 @@ def test_research_aida_agent_has_no_sub_agents(research_aida_agent):
     assert len(research_aida_agent.sub_agents) == 0
 
 
+def test_research_compare_agent_fans_out_per_platform():
+    from bq_multi_agent_app.sub_agents.research_agents.agent import (
+        research_compare_agent,
+    )
+
+    assert len(research_compare_agent.tools) == 1
+    assert "research_platforms" in _tool_names(research_compare_agent)
+    assert len(research_compare_agent.sub_agents) == 0
+
+
+def test_research_aida_agent_caches_answers(research_aida_agent):
+    from bq_multi_agent_app.sub_agents.research_agents.cache import (
+        serve_cached_answer,
+        store_grounded_answer,
+    )
+
+    assert research_aida_agent.before_model_callback is serve_cached_answer
+    assert research_aida_agent.after_model_callback is store_grounded_answer
+
+
 def test_research_aida_agent_has_google_search_tool(research_aida_agent):
     tool_names = _tool_names(research_aida_agent)
     assert any("google_search" in n or "search" in n.lower() for n in tool_names)
@@ -0,0 +1,144 @@
+"""
+Tests for batched multi-series forecasting in batch_forecast.py.
+
+A fake BigQuery client stands in for the pooled per-user client, so no
+external API calls are made.
+"""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app import batch_forecast
+from bq_multi_agent_app.batch_forecast import forecast_series
+
+_T0 = datetime(2026, 1, 1, 10, 0, tzinfo=UTC)
+
+
+class _Row(dict):
+    pass
+
+
+class _FakeJob:
+    total_bytes_billed = 104_857_600
+    started = _T0
+    ended = _T0 + timedelta(seconds=4)
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def result(self):
+        return self.rows
+
+
+class _FakeClient:
+    def __init__(self, series=300, modified=_T0):
+        self.series = series
+        self.modified = modified
+        self.queries = []
+
+    def get_table(self, table_id):
+        return SimpleNamespace(
+            table_type="TABLE", streaming_buffer=None, modified=self.modified
+        )
+
+    def query(self, sql, **kwargs):
+        self.queries.append(sql)
+        return _FakeJob(
+            [
+                _Row(store_id=f"s{i}", points=30, forecast_total=1000.0 - i)
+                for i in range(self.series)
+            ]
+        )
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    client = _FakeClient()
+    monkeypatch.setattr(batch_forecast, "client_for", lambda *a, **k: client)
+    monkeypatch.setattr(
+        batch_forecast, "forecast_cache", batch_forecast.QueryResultCache()
+    )
+    return client
+
+
+def _forecast(**kwargs):
+    args = {
+        "project_id": "p",
+        "timestamp_col": "day",
+        "data_col": "sales",
+        "id_cols": ["store_id"],
+        "tool_context": SimpleNamespace(state={}, user_id="u1"),
+        "table": "retail.daily_sales",
+        **kwargs,
+    }
+    return asyncio.run(forecast_series(**args))
+
+
+def test_all_series_are_forecast_in_one_job(fake):
+    result = _forecast(horizon=14)
+
+    assert len(fake.queries) == 1
+    sql = fake.queries[0]
+    assert "AI.FORECAST(\n  TABLE `p.retail.daily_sales`" in sql
+    assert "id_cols => ['store_id']" in sql
+    assert "horizon => 14" in sql
+    assert "GROUP BY store_id" in sql
+    assert result["series_count"] == 300
+    assert len(result["series"]) == 100
+    assert result["series_per_second"] == 75.0
+    assert "GROUP BY" not in result["forecast_query"]
+
+
+def test_query_with_trailing_comment_keeps_its_closing_paren(fake):
+    _forecast(
+        table="",
+        query="SELECT day, sales, store_id FROM retail.daily_sales; -- all stores",
+    )
+
+    sql = fake.queries[0]
+    assert "(SELECT day, sales, store_id FROM retail.daily_sales)," in sql
+    assert "--" not in sql
+
+
+def test_repeat_forecast_is_served_from_cache(fake):
+    _forecast()
+    result = _forecast()
+
+    assert len(fake.queries) == 1
+    assert result["forecast_cache"]["status"] == "HIT"
+    assert result["series_count"] == 300
+
+
+def test_cache_misses_after_table_changes(fake):
+    _forecast()
+    fake.modified = _T0 + timedelta(hours=1)
+    result = _forecast()
+
+    assert len(fake.queries) == 2
+    assert "forecast_cache" not in result
+
+
+def test_cache_is_keyed_on_horizon_and_user(fake):
+    _forecast()
+    _forecast(horizon=60)
+    _forecast(tool_context=SimpleNamespace(state={}, user_id="u2"))
+    assert len(fake.queries) == 3
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"id_cols": []},
+        {"id_cols": ["store_id; DROP TABLE x"]},
+        {"horizon": 0},
+        {"query": "SELECT 1"},
+        {"table": "", "query": "DELETE FROM retail.daily_sales WHERE TRUE"},
+    ],
+)
+def test_invalid_arguments_run_no_query(fake, kwargs):
+    result = _forecast(**kwargs)
+    assert result["status"] == "ERROR"
+    assert fake.queries == []
@@ -0,0 +1,123 @@
+"""
+Tests for the per-user BigQuery client pool in bq_clients.py.
+
+A counting factory stands in for ADK's get_bigquery_client so no clients are
+built and no external API calls are made.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app import bq_clients
+from bq_multi_agent_app.bq_clients import BigQueryClientPool, token_digest
+
+
+class _CountingFactory:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, *, project, credentials, location=None, user_agent=None):
+        self.calls += 1
+        return object()
+
+
+@pytest.fixture()
+def factory():
+    return _CountingFactory()
+
+
+def _creds(token):
+    return SimpleNamespace(token=token)
+
+
+# ---------------------------------------------------------------------------
+# BigQueryClientPool
+# ---------------------------------------------------------------------------
+
+
+def test_same_token_reuses_client(factory):
+    pool = BigQueryClientPool(factory=factory)
+    first = pool.get(project="p", credentials=_creds("tok-a"), user_agent="q")
+    second = pool.get(project="p", credentials=_creds("tok-a"), user_agent="q")
+
+    assert first is second
+    assert factory.calls == 1
+    assert pool.stats()["tls_handshakes_avoided"] == 1
+
+
+def test_different_token_project_or_location_builds_new_client(factory):
+    pool = BigQueryClientPool(factory=factory)
+    pool.get(project="p", credentials=_creds("tok-a"))
+    pool.get(project="p", credentials=_creds("tok-b"))
+    pool.get(project="other", credentials=_creds("tok-a"))
+    pool.get(project="p", credentials=_creds("tok-a"), location="EU")
+    assert factory.calls == 4
+
+
+def test_expired_clients_are_rebuilt(factory):
+    pool = BigQueryClientPool(ttl_seconds=0, factory=factory)
+    pool.get(project="p", credentials=_creds("tok-a"))
+    pool.get(project="p", credentials=_creds("tok-a"))
+
+    assert factory.calls == 2
+    assert pool.stats()["evicted_expired"] == 1
+
+
+def test_pool_is_bounded_lru(factory):
+    pool = BigQueryClientPool(max_size=2, factory=factory)
+    pool.get(project="p", credentials=_creds("tok-a"))
+    pool.get(project="p", credentials=_creds("tok-b"))
+    pool.get(project="p", credentials=_creds("tok-a"))  # refresh tok-a
+    pool.get(project="p", credentials=_creds("tok-c"))  # evicts tok-b
+
+    stats = pool.stats()
+    assert stats["pooled_clients"] == 2
+    assert stats["evicted_capacity"] == 1
+    pool.get(project="p", credentials=_creds("tok-a"))
+    assert factory.calls == 3
+
+
+def test_token_change_evicts_users_previous_clients(factory):
+    pool = BigQueryClientPool(factory=factory)
+    pool.observe_token("alice", "tok-a")
+    pool.get(project="p", credentials=_creds("tok-a"))
+    pool.observe_token("alice", "tok-a2")
+
+    stats = pool.stats()
+    assert stats["evicted_token_change"] == 1
+    assert stats["pooled_clients"] == 0
+
+
+def test_credentials_without_token_are_not_pooled(factory):
+    pool = BigQueryClientPool(factory=factory)
+    pool.get(project="p", credentials=_creds(None))
+    pool.get(project="p", credentials=_creds(None))
+    assert factory.calls == 2
+    assert pool.stats()["pooled_clients"] == 0
+
+
+def test_token_digest_does_not_contain_token():
+    digest = token_digest("ya29.secret-token")
+    assert "secret" not in digest
+    assert len(digest) == 16
+
+
+# ---------------------------------------------------------------------------
+# client_for
+# ---------------------------------------------------------------------------
+
+
+def test_client_for_requires_token_in_state():
+    ctx = SimpleNamespace(state={}, user_id="alice")
+    with pytest.raises(ValueError, match="No access token"):
+        bq_clients.client_for(ctx, project="p")
+
+
+def test_client_for_reuses_pooled_client(factory, monkeypatch):
+    monkeypatch.setattr(bq_clients, "client_pool", BigQueryClientPool(factory=factory))
+    ctx = SimpleNamespace(state={bq_clients._AUTH_ID: "tok-a"}, user_id="alice")
+
+    first = bq_clients.client_for(ctx, project="p")
+    assert bq_clients.client_for(ctx, project="p") is first
+    assert factory.calls == 1
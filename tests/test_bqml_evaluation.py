@@ -0,0 +1,88 @@
+"""
+Tests for batched BQML model comparison in bqml_agents/evaluation.py.
+
+A fake BigQuery client stands in for the pooled per-user client, so no
+external API calls are made.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app.sub_agents.bqml_agents import evaluation
+from bq_multi_agent_app.sub_agents.bqml_agents.evaluation import (
+    build_comparison_sql,
+    compare_bqml_models,
+)
+
+
+def _row(model, kind, **values):
+    return {"model": model, "kind": kind, "row_json": json.dumps(values)}
+
+
+_ROWS = [
+    _row("p.ml.churn_a", "evaluate", roc_auc=0.81, log_loss=0.42),
+    _row("p.ml.churn_b", "evaluate", roc_auc=0.86, log_loss=0.45),
+    _row("p.ml.churn_b", "feature_importance", feature="age", importance_gain=2.0),
+    _row("p.ml.churn_b", "feature_importance", feature="tenure", importance_gain=9.0),
+]
+
+
+class _FakeClient:
+    def __init__(self):
+        self.queries = []
+
+    def query_and_wait(self, query, **kwargs):
+        self.queries.append(query)
+        return _ROWS
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    fake = _FakeClient()
+    monkeypatch.setattr(evaluation, "client_for", lambda *a, **k: fake)
+    return fake
+
+
+def test_comparison_sql_unions_all_models_into_one_query():
+    sql = build_comparison_sql(
+        ["p.ml.a", "p.ml.b"],
+        "p.ml.holdout",
+        confusion_matrix=True,
+        feature_importance=False,
+    )
+    assert sql.count("UNION ALL") == 3
+    assert "ML.EVALUATE(MODEL `p.ml.b`, TABLE `p.ml.holdout`)" in sql
+    assert "ML.CONFUSION_MATRIX(MODEL `p.ml.a`, TABLE `p.ml.holdout`)" in sql
+    assert "FEATURE_IMPORTANCE" not in sql
+
+
+def test_models_are_compared_in_one_job(client):
+    result = asyncio.run(
+        compare_bqml_models(
+            "p",
+            ["ml.churn_a", "`p.ml.churn_b`"],
+            tool_context=SimpleNamespace(state={}),
+            feature_importance=True,
+        )
+    )
+
+    assert len(client.queries) == 1
+    assert [e["model"] for e in result["comparison"]] == [
+        "p.ml.churn_a",
+        "p.ml.churn_b",
+    ]
+    assert result["best_by"]["roc_auc"] == "p.ml.churn_b"
+    assert result["best_by"]["log_loss"] == "p.ml.churn_a"
+    assert result["top_features"]["p.ml.churn_b"][0]["feature"] == "tenure"
+
+
+@pytest.mark.parametrize("models", [[], ["ml.a; DROP TABLE x"]])
+def test_invalid_model_lists_are_rejected(client, models):
+    result = asyncio.run(
+        compare_bqml_models("p", models, tool_context=SimpleNamespace(state={}))
+    )
+    assert result["status"] == "ERROR"
+    assert client.queries == []
@@ -0,0 +1,133 @@
+"""
+Tests for the cross-dataset BQML model inventory in bqml_agents/inventory.py.
+
+A fake BigQuery client stands in for the pooled per-user client, so no
+external API calls are made.
+"""
+
+import asyncio
+import time
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app.sub_agents.bqml_agents import inventory
+from bq_multi_agent_app.sub_agents.bqml_agents.inventory import (
+    MODEL_INVENTORY_KEY,
+    invalidate_model_inventory,
+    list_bqml_models,
+)
+from bq_multi_agent_app.sub_agents.bqml_agents.jobs import BQML_JOBS_KEY
+
+_ROWS = [
+    {
+        "model_schema": "ml",
+        "model_name": "churn",
+        "model_type": "LOGISTIC_REGRESSION",
+        "creation_time": datetime(2026, 3, 1, tzinfo=UTC),
+    },
+    {
+        "model_schema": "forecasting",
+        "model_name": "orders_arima",
+        "model_type": "ARIMA_PLUS",
+        "creation_time": datetime(2026, 1, 1, tzinfo=UTC),
+    },
+]
+
+_CHURN = {
+    "trainingRuns": [
+        {
+            "startTime": "2026-03-01T10:00:00Z",
+            "evaluationMetrics": {
+                "binaryClassificationMetrics": {
+                    "aggregateClassificationMetrics": {"precision": 0.8, "rocAuc": 0.9},
+                    "binaryConfusionMatrixList": [{"positiveClassThreshold": 0.5}],
+                }
+            },
+        }
+    ]
+}
+
+
+class _FakeClient:
+    def __init__(self):
+        self.queries = []
+
+    def query_and_wait(self, query, **kwargs):
+        self.queries.append(query)
+        return _ROWS
+
+    def get_model(self, ref):
+        properties = _CHURN if ref.endswith(".churn") else {}
+        return SimpleNamespace(to_api_repr=lambda: properties)
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    fake = _FakeClient()
+    monkeypatch.setattr(inventory, "client_for", lambda *a, **k: fake)
+    return fake
+
+
+def _list(ctx, **kwargs):
+    return asyncio.run(list_bqml_models("p", tool_context=ctx, **kwargs))
+
+
+def test_one_region_query_lists_models_across_datasets(client):
+    result = _list(SimpleNamespace(state={}), region="region-EU")
+
+    assert client.queries == ["SELECT * FROM `p`.`region-eu`.INFORMATION_SCHEMA.MODELS"]
+    assert [m["model"] for m in result["models"]] == ["churn", "orders_arima"]
+    churn = result["models"][0]
+    assert churn["training_status"] == "TRAINED"
+    assert churn["metrics"] == {"precision": 0.8, "rocAuc": 0.9}
+    assert churn["created"].startswith("2026-03-01")
+
+
+def test_inventory_is_cached_per_user_and_filtered_by_dataset(client):
+    ctx = SimpleNamespace(state={})
+    _list(ctx)
+    result = _list(ctx, dataset_id="forecasting")
+
+    assert result["cached"] is True
+    assert len(client.queries) == 1
+    assert [m["model"] for m in result["models"]] == ["orders_arima"]
+
+
+def test_submitted_job_makes_cache_stale_and_shows_training(client):
+    ctx = SimpleNamespace(state={})
+    _list(ctx)
+    ctx.state[BQML_JOBS_KEY] = {
+        "bqml_1": {
+            "model": "p.ml.ltv",
+            "state": "RUNNING",
+            "submitted_at": int(time.time()) + 1,
+        }
+    }
+
+    result = _list(ctx)
+    assert result["cached"] is False
+    assert result["models"][0] == {
+        "dataset": "ml",
+        "model": "ltv",
+        "training_status": "TRAINING",
+    }
+
+
+def test_model_ddl_through_execute_sql_clears_cache(client):
+    ctx = SimpleNamespace(state={})
+    _list(ctx)
+    invalidate_model_inventory(
+        SimpleNamespace(name="execute_sql"),
+        {"query": "DROP MODEL p.ml.churn"},
+        ctx,
+        {"status": "SUCCESS"},
+    )
+    assert ctx.state[MODEL_INVENTORY_KEY] == {}
+
+
+def test_invalid_region_is_rejected(client):
+    result = _list(SimpleNamespace(state={}), region="us`; DROP")
+    assert result["status"] == "ERROR"
+    assert client.queries == []
@@ -0,0 +1,161 @@
+"""
+Tests for background BQML job tracking in bqml_agents/jobs.py.
+
+A fake BigQuery client stands in for the pooled per-user client, so no
+external API calls are made.
+"""
+
+import asyncio
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app.sub_agents.bqml_agents import jobs
+from bq_multi_agent_app.sub_agents.bqml_agents.jobs import (
+    BQML_JOB_UPDATES_KEY,
+    BQML_JOBS_KEY,
+    get_bqml_job_status,
+    refresh_bqml_jobs,
+    submit_bqml_job,
+)
+
+_CREATE_MODEL = (
+    "CREATE OR REPLACE MODEL `p.ml.churn` OPTIONS (model_type = 'logistic_reg') "
+    "AS SELECT * FROM p.sales.customers"
+)
+
+
+class _FakeJob:
+    def __init__(self, state, error=None, ml_statistics=None):
+        self.job_id = "bqml_1"
+        self.location = "US"
+        self.state = state
+        self.error_result = {"message": error} if error else None
+        self.started = datetime(2026, 1, 1, 10, 0, tzinfo=UTC)
+        self.ended = datetime(2026, 1, 1, 10, 30, tzinfo=UTC)
+        self.slot_millis = 1200
+        self._ml = ml_statistics
+
+    def to_api_repr(self):
+        query = {"mlStatistics": self._ml} if self._ml else {}
+        return {"statistics": {"query": query}}
+
+
+class _FakeClient:
+    def __init__(self, job):
+        self.job = job
+        self.queries = []
+
+    def query(self, query, **kwargs):
+        self.queries.append(query)
+        return _FakeJob("PENDING")
+
+    def get_job(self, job_id, project=None, location=None):
+        return self.job
+
+    def query_and_wait(self, query, **kwargs):
+        self.queries.append(query)
+        return [{"iteration": 3, "loss": 0.21}]
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    fake = _FakeClient(_FakeJob("RUNNING"))
+    monkeypatch.setattr(jobs, "client_for", lambda *a, **k: fake)
+    return fake
+
+
+def _submitted(client):
+    ctx = SimpleNamespace(state={})
+    asyncio.run(submit_bqml_job("p", _CREATE_MODEL, tool_context=ctx))
+    return ctx
+
+
+# ---------------------------------------------------------------------------
+# submit_bqml_job
+# ---------------------------------------------------------------------------
+
+
+def test_submit_returns_handle_and_tracks_job(client):
+    ctx = SimpleNamespace(state={})
+    result = asyncio.run(submit_bqml_job("p", _CREATE_MODEL, tool_context=ctx))
+
+    assert result["status"] == "SUCCESS"
+    assert result["job_id"] == "bqml_1"
+    assert result["model"] == "p.ml.churn"
+    assert ctx.state[BQML_JOBS_KEY]["bqml_1"]["state"] == "PENDING"
+
+
+@pytest.mark.parametrize(
+    "statement",
+    ["SELECT * FROM ML.EVALUATE(MODEL `p.ml.churn`)", f"{_CREATE_MODEL}; SELECT 1"],
+)
+def test_submit_rejects_anything_but_one_create_model(client, statement):
+    ctx = SimpleNamespace(state={})
+    result = asyncio.run(submit_bqml_job("p", statement, tool_context=ctx))
+    assert result["status"] == "ERROR"
+    assert client.queries == []
+
+
+# ---------------------------------------------------------------------------
+# get_bqml_job_status
+# ---------------------------------------------------------------------------
+
+
+def test_status_reports_iteration_progress_while_running(client):
+    client.job = _FakeJob(
+        "RUNNING",
+        ml_statistics={
+            "maxIterations": "20",
+            "iterationResults": [{"index": 0, "trainingLoss": 0.5}],
+        },
+    )
+    ctx = _submitted(client)
+
+    status = asyncio.run(get_bqml_job_status("bqml_1", tool_context=ctx))
+    assert status["job_state"] == "RUNNING"
+    assert status["training_progress"] == {
+        "iterations_completed": 1,
+        "max_iterations": 20,
+        "last_training_loss": 0.5,
+        "last_eval_loss": None,
+    }
+
+
+def test_status_reads_training_info_once_done(client):
+    ctx = _submitted(client)
+    client.job = _FakeJob("DONE")
+
+    status = asyncio.run(get_bqml_job_status("bqml_1", tool_context=ctx))
+    assert status["training_info"] == [{"iteration": 3, "loss": 0.21}]
+    assert "ML.TRAINING_INFO(MODEL `p.ml.churn`)" in client.queries[-1]
+    assert ctx.state[BQML_JOBS_KEY]["bqml_1"]["duration_seconds"] == 1800
+
+
+def test_status_of_unknown_job_is_an_error(client):
+    status = asyncio.run(
+        get_bqml_job_status("nope", tool_context=SimpleNamespace(state={}))
+    )
+    assert status["status"] == "ERROR"
+
+
+# ---------------------------------------------------------------------------
+# refresh_bqml_jobs
+# ---------------------------------------------------------------------------
+
+
+def test_refresh_announces_newly_finished_jobs(client):
+    ctx = _submitted(client)
+    client.job = _FakeJob("DONE", error="Training data is empty")
+
+    asyncio.run(refresh_bqml_jobs(ctx))
+    (update,) = ctx.state[BQML_JOB_UPDATES_KEY]
+    assert update["model"] == "p.ml.churn"
+    assert update["error"] == "Training data is empty"
+
+    # Already finished: no further checks or announcements.
+    del ctx.state[BQML_JOB_UPDATES_KEY]
+    client.job = None
+    asyncio.run(refresh_bqml_jobs(ctx))
+    assert BQML_JOB_UPDATES_KEY not in ctx.state
@@ -0,0 +1,173 @@
+"""
+Tests for batch ML.PREDICT into a destination table in bqml_agents/prediction.py.
+
+A fake BigQuery client stands in for the pooled per-user client, so no
+external API calls are made.
+"""
+
+import asyncio
+import concurrent.futures
+from datetime import UTC, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app.sub_agents.bqml_agents import prediction
+from bq_multi_agent_app.sub_agents.bqml_agents.jobs import BQML_JOBS_KEY
+from bq_multi_agent_app.sub_agents.bqml_agents.prediction import (
+    PREDICTION_RUNS_KEY,
+    build_predict_sql,
+    build_summary_sql,
+    predict_to_table,
+)
+
+_SCHEMA = [
+    SimpleNamespace(name="order_id", field_type="INTEGER", mode="NULLABLE"),
+    SimpleNamespace(name="predicted_returned", field_type="STRING", mode="NULLABLE"),
+    SimpleNamespace(
+        name="predicted_returned_probs", field_type="RECORD", mode="REPEATED"
+    ),
+    SimpleNamespace(name="predicted_spend", field_type="FLOAT", mode="NULLABLE"),
+]
+
+
+class _FakeClient:
+    def __init__(self):
+        self.queries = []
+        self.finishes = True
+
+    def _result(self, timeout=None):
+        if not self.finishes:
+            raise concurrent.futures.TimeoutError()
+
+    def query(self, query, **kwargs):
+        self.queries.append(query)
+        return SimpleNamespace(
+            job_id="job_1",
+            location="US",
+            state="RUNNING",
+            result=self._result,
+            started=datetime(2026, 1, 1, 10, 0, tzinfo=UTC),
+            ended=datetime(2026, 1, 1, 10, 2, tzinfo=UTC),
+            total_bytes_processed=10**9,
+            total_bytes_billed=10**9,
+            slot_millis=90_000,
+        )
+
+    def get_table(self, table):
+        return SimpleNamespace(num_rows=25_000_000, schema=_SCHEMA)
+
+    def query_and_wait(self, query, **kwargs):
+        self.queries.append(query)
+        return [{"predicted_spend": {"min": 0.0, "avg": Decimal("12.5")}}]
+
+    def list_rows(self, table, max_results=None):
+        return [{"order_id": 1, "predicted_spend": 11.0}][:max_results]
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    fake = _FakeClient()
+    monkeypatch.setattr(prediction, "client_for", lambda *a, **k: fake)
+    return fake
+
+
+def test_predict_sql_partitions_and_clusters_the_output():
+    sql = build_predict_sql(
+        "p.ml.churn",
+        "p.out.scores",
+        "TABLE `p.sales.orders`",
+        "DATE(created_at)",
+        ["user_id"],
+    )
+    assert sql.splitlines() == [
+        "CREATE OR REPLACE TABLE `p.out.scores`",
+        "PARTITION BY DATE(created_at)",
+        "CLUSTER BY user_id",
+        "AS SELECT * FROM ML.PREDICT(MODEL `p.ml.churn`, TABLE `p.sales.orders`)",
+    ]
+
+
+def test_summary_covers_scalar_predicted_columns_only():
+    sql = build_summary_sql("p.out.scores", _SCHEMA)
+    assert "APPROX_TOP_COUNT(predicted_returned, 10)" in sql
+    assert "AVG(predicted_spend)" in sql
+    assert "predicted_returned_probs" not in sql
+    assert "order_id" not in sql
+
+
+def test_predictions_are_written_and_summarized(client):
+    ctx = SimpleNamespace(state={})
+    result = asyncio.run(
+        predict_to_table(
+            "p",
+            "ml.churn",
+            "out.scores",
+            tool_context=ctx,
+            input_query="SELECT * FROM p.sales.orders WHERE year = 2026",
+            sample_rows=1,
+        )
+    )
+
+    assert result["status"] == "SUCCESS"
+    assert result["row_count"] == 25_000_000
+    assert result["summary"] == {"predicted_spend": {"min": 0.0, "avg": 12.5}}
+    assert result["sample_rows"] == [{"order_id": 1, "predicted_spend": 11.0}]
+    assert result["job_stats"]["elapsed_seconds"] == 120.0
+    assert "(SELECT * FROM p.sales.orders WHERE year = 2026)" in client.queries[0]
+    (run,) = ctx.state[PREDICTION_RUNS_KEY]
+    assert run["destination"] == "p.out.scores"
+
+
+def test_input_query_with_trailing_comment_keeps_its_closing_paren(client):
+    asyncio.run(
+        predict_to_table(
+            "p",
+            "ml.churn",
+            "out.scores",
+            tool_context=SimpleNamespace(state={}),
+            input_query="SELECT * FROM p.sales.orders;  -- 2026 only",
+        )
+    )
+
+    assert client.queries[0].endswith("(SELECT * FROM p.sales.orders))")
+
+
+def test_long_running_job_is_handed_to_job_tracking(client):
+    client.finishes = False
+    ctx = SimpleNamespace(state={})
+    result = asyncio.run(
+        predict_to_table(
+            "p", "ml.churn", "out.scores", tool_context=ctx, input_table="d.t"
+        )
+    )
+
+    assert result["job_state"] == "RUNNING"
+    assert "get_bqml_job_status" in result["next_step"]
+    assert ctx.state[BQML_JOBS_KEY]["job_1"]["model"] is None
+    assert PREDICTION_RUNS_KEY not in ctx.state
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"input_table": "d.t", "input_query": "SELECT 1"},
+        {"input_query": "DELETE FROM d.t WHERE TRUE"},
+        {"input_table": "d.t", "partition_by": "x; DROP TABLE y"},
+        {"input_table": "d.t", "cluster_by": ["a", "b", "c", "d", "e"]},
+    ],
+)
+def test_invalid_arguments_run_no_job(client, kwargs):
+    result = asyncio.run(
+        predict_to_table(
+            "p",
+            "ml.churn",
+            "out.scores",
+            tool_context=SimpleNamespace(state={}),
+            **kwargs,
+        )
+    )
+    assert result["status"] == "ERROR"
+    assert client.queries == []
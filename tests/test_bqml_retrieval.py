@@ -0,0 +1,188 @@
+"""
+Tests for rag_response post-processing in bqml_agents/retrieval.py.
+
+Contexts are plain dicts shaped like the ones rag_response builds from the
+retrieval response, and lexical indexes are built from a few chunks in a temp
+directory, so no RAG corpus is queried.
+"""
+
+from bq_multi_agent_app.sub_agents.bqml_agents import retrieval
+from bq_multi_agent_app.sub_agents.bqml_agents.retrieval import (
+    LexicalIndex,
+    chunk_text,
+    condense_contexts,
+    dedupe_contexts,
+    lexical_index,
+    lexical_scores,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+
+def _context(text, uri="gs://docs/bqml.md", distance=0.3):
+    return {"text": text, "source_uri": uri, "distance": distance}
+
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    assert tokenize("Use ML.GENERATE_EMBEDDING now") == [
+        "use",
+        "ml.generate_embedding",
+        "ml",
+        "generate",
+        "embedding",
+        "now",
+    ]
+
+
+def test_exact_identifier_outranks_similar_words():
+    texts = [
+        "Generate text embeddings with a remote model over an embedding endpoint.",
+        "ML.GENERATE_EMBEDDING returns an ml_generate_embedding_result column.",
+    ]
+    scores = lexical_scores("syntax of ML.GENERATE_EMBEDDING", texts)
+    assert scores[1] > scores[0]
+
+
+def test_duplicates_and_contained_chunks_are_dropped():
+    contexts = [
+        _context("CREATE MODEL  options (model_type='ARIMA_PLUS')"),
+        _context("create model options (model_type='arima_plus')", distance=0.4),
+        _context("", distance=0.1),
+        _context("Intro. CREATE MODEL options (model_type='ARIMA_PLUS') and more."),
+        _context("AUTO_ARIMA_MAX_ORDER sets the maximum order."),
+    ]
+    kept = dedupe_contexts(contexts)
+    assert [c["text"] for c in kept] == [
+        "Intro. CREATE MODEL options (model_type='ARIMA_PLUS') and more.",
+        "AUTO_ARIMA_MAX_ORDER sets the maximum order.",
+    ]
+
+
+def test_condense_reranks_keeps_top_k_and_sources():
+    contexts = [
+        _context("Time series models overview.", uri="gs://docs/a.md", distance=0.2),
+        _context("Boosted tree options.", uri="gs://docs/b.md", distance=0.25),
+        _context(
+            "AUTO_ARIMA_MAX_ORDER: the maximum value of p and q.",
+            uri="gs://docs/c.md",
+            distance=0.31234567,
+        ),
+    ]
+    result = condense_contexts("what is AUTO_ARIMA_MAX_ORDER", contexts, top_k=2)
+
+    assert result["status"] == "SUCCESS"
+    assert result["chunks"][0] == {
+        "text": "AUTO_ARIMA_MAX_ORDER: the maximum value of p and q.",
+        "source_uri": "gs://docs/c.md",
+        "distance": 0.3123,
+    }
+    assert len(result["chunks"]) == 2
+    assert result["omitted_chunks"] == 1
+
+
+def test_without_rerank_retrieval_order_is_kept():
+    contexts = [_context("first chunk"), _context("second AUTO_ARIMA chunk")]
+    result = condense_contexts("AUTO_ARIMA", contexts, rerank=False)
+    assert [c["text"] for c in result["chunks"]] == [
+        "first chunk",
+        "second AUTO_ARIMA chunk",
+    ]
+    assert "omitted_chunks" not in result
+
+
+def test_chunks_are_trimmed_to_the_token_budget():
+    long_text = "word " * 2000
+    contexts = [_context(long_text), _context("other " * 2000)]
+    result = condense_contexts("word", contexts, max_tokens=300)
+
+    total = sum(len(c["text"]) for c in result["chunks"])
+    assert total <= 300 * 4 + 2
+    assert result["chunks"][0]["text"].endswith(" …")
+    # Too little budget is left for a useful second chunk.
+    assert len(result["chunks"]) == 1
+
+
+def test_chunk_text_overlaps_and_covers_all_words():
+    words = [f"w{i}" for i in range(25)]
+    chunks = chunk_text(" ".join(words), chunk_size=10, chunk_overlap=3)
+    assert [c.split()[0] for c in chunks] == ["w0", "w7", "w14", "w21"]
+    assert chunks[-1].split()[-1] == "w24"
+    assert chunk_text("   ") == []
+
+
+def test_lexical_index_search_and_round_trip(tmp_path):
+    index = LexicalIndex(
+        [
+            _context("Forecasting with ARIMA_PLUS and holidays.", uri="gs://d/a"),
+            _context("ARIMA_PLUS_XREG adds external regressors.", uri="gs://d/b"),
+            _context("K-means clustering with NUM_CLUSTERS.", uri="gs://d/c"),
+        ]
+    )
+    path = tmp_path / "index.json"
+    index.save(path)
+    loaded = LexicalIndex.load(path)
+
+    hits = loaded.search("time series with ARIMA_PLUS_XREG", k=2)
+    assert hits[0]["source_uri"] == "gs://d/b"
+    assert loaded.scores("clustering") == index.scores("clustering")
+    assert loaded.search("unrelated words", k=3) == []
+
+
+def test_rrf_promotes_chunks_found_by_both_searches():
+    vector = [_context("a"), _context("b"), _context("c")]
+    lexical = [
+        {"text": "c", "source_uri": "gs://docs/bqml.md"},
+        {"text": "d", "source_uri": "gs://docs/bqml.md"},
+    ]
+    fused = reciprocal_rank_fusion([vector, lexical])
+    assert [chunk["text"] for chunk in fused] == ["c", "a", "b", "d"]
+    # The vector copy keeps its distance.
+    assert fused[0]["distance"] == 0.3
+
+
+def test_rrf_merges_same_passage_with_different_chunk_boundaries():
+    words = [f"w{i}" for i in range(40)]
+    vector = [
+        _context("unrelated vector hit about clustering models", uri="gs://d/b"),
+        _context(" ".join(words[:30]) + " AUTO_ARIMA_MAX_ORDER", uri="gs://d/a"),
+    ]
+    lexical = [
+        # Same passage, shifted boundaries (word vs token chunking).
+        {"text": " ".join(words[8:40]), "source_uri": "gs://d/a"},
+        # Same words, other document: a different passage.
+        {"text": " ".join(words[:30]), "source_uri": "gs://d/c"},
+    ]
+    fused = reciprocal_rank_fusion([vector, lexical])
+    assert [c["source_uri"] for c in fused] == ["gs://d/a", "gs://d/b", "gs://d/c"]
+    assert fused[0]["text"].endswith("AUTO_ARIMA_MAX_ORDER")
+
+
+def test_overlapping_chunks_of_one_source_are_deduplicated():
+    words = [f"w{i}" for i in range(40)]
+    contexts = [
+        _context(" ".join(words[:30]), distance=0.2),
+        _context(" ".join(words[10:40]), distance=0.3),
+        _context(" ".join(words[10:40]), uri="gs://docs/other.md"),
+    ]
+    kept = dedupe_contexts(contexts)
+    assert [(c["source_uri"], c["distance"]) for c in kept] == [
+        ("gs://docs/bqml.md", 0.2),
+        ("gs://docs/other.md", 0.3),
+    ]
+
+
+def test_lexical_index_loads_once_and_honours_hybrid_flag(tmp_path, monkeypatch):
+    path = tmp_path / "index.json"
+    LexicalIndex([_context("ML.FORECAST returns forecasts.")]).save(path)
+    monkeypatch.setattr(retrieval, "RAG_LEXICAL_INDEX", str(path))
+    monkeypatch.setattr(retrieval, "_index", None)
+    monkeypatch.setattr(retrieval, "_index_loaded", False)
+
+    index = lexical_index()
+    assert index is not None and len(index.chunks) == 1
+    assert lexical_index() is index
+
+    monkeypatch.setattr(retrieval, "_index_loaded", False)
+    monkeypatch.setattr(retrieval, "_index", None)
+    monkeypatch.setattr(retrieval, "RAG_HYBRID", False)
+    assert lexical_index() is None
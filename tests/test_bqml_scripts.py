@@ -0,0 +1,163 @@
+"""
+Tests for multi-statement BQML scripts in bqml_agents/scripts.py.
+
+A fake BigQuery client stands in for the pooled per-user client, so no
+external API calls are made.
+"""
+
+import asyncio
+import concurrent.futures
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+from bq_multi_agent_app.sub_agents.bqml_agents import scripts
+from bq_multi_agent_app.sub_agents.bqml_agents.inventory import (
+    MODEL_INVENTORY_KEY,
+    invalidate_model_inventory,
+)
+from bq_multi_agent_app.sub_agents.bqml_agents.jobs import BQML_JOBS_KEY
+from bq_multi_agent_app.sub_agents.bqml_agents.scripts import run_bqml_script
+
+_SCRIPT = """
+CREATE OR REPLACE VIEW ml.training AS SELECT * FROM sales.customers;
+CREATE OR REPLACE MODEL ml.churn OPTIONS (model_type = 'logistic_reg')
+  AS SELECT * FROM ml.training;
+SELECT * FROM ML.EVALUATE(MODEL ml.churn);
+"""
+
+_T0 = datetime(2026, 1, 1, 10, 0, tzinfo=UTC)
+
+
+def _child(offset, statement_type, query, seconds, error=None, target=None):
+    return SimpleNamespace(
+        query=query,
+        statement_type=statement_type,
+        created=_T0 + timedelta(seconds=offset),
+        started=_T0 + timedelta(seconds=offset),
+        ended=_T0 + timedelta(seconds=offset + seconds),
+        total_bytes_billed=10_485_760,
+        error_result={"message": error} if error else None,
+        num_dml_affected_rows=None,
+        ddl_target_table=target,
+        destination="p._anon.t" if statement_type == "SELECT" else None,
+    )
+
+
+class _Rows(list):
+    total_rows = 1
+
+
+class _FakeJob:
+    def __init__(self, timeout=False, error=None):
+        self.job_id = "bqml_script_1"
+        self.location = "US"
+        self.state = "RUNNING" if timeout else "DONE"
+        self.error_result = {"message": error} if error else None
+        self.total_bytes_billed = 31_457_280
+        self._timeout = timeout
+
+    def result(self, timeout=None):
+        if self._timeout:
+            raise concurrent.futures.TimeoutError()
+        if self.error_result:
+            raise RuntimeError(self.error_result["message"])
+
+
+class _FakeClient:
+    def __init__(self, job, children):
+        self.job = job
+        self.children = children
+        self.queries = []
+
+    def query(self, query, **kwargs):
+        self.queries.append(query)
+        return self.job
+
+    def list_jobs(self, project=None, parent_job=None):
+        # BigQuery lists child jobs newest first.
+        return list(reversed(self.children))
+
+    def list_rows(self, table, max_results=None):
+        return _Rows([{"roc_auc": 0.87, "log_loss": 0.41}])
+
+
+def _use(monkeypatch, job, children):
+    fake = _FakeClient(job, children)
+    monkeypatch.setattr(scripts, "client_for", lambda *a, **k: fake)
+    return fake
+
+
+def _run(ctx, script=_SCRIPT, **kwargs):
+    return asyncio.run(run_bqml_script("p", script, tool_context=ctx, **kwargs))
+
+
+def test_script_runs_as_one_job_with_per_statement_results(monkeypatch):
+    view = SimpleNamespace(project="p", dataset_id="ml", table_id="training")
+    client = _use(
+        monkeypatch,
+        _FakeJob(),
+        [
+            _child(
+                0, "CREATE_VIEW", "CREATE OR REPLACE VIEW ml.training", 1, None, view
+            ),
+            _child(1, "CREATE_MODEL", "CREATE OR REPLACE MODEL ml.churn", 95),
+            _child(96, "SELECT", "SELECT * FROM ML.EVALUATE(MODEL ml.churn)", 2),
+        ],
+    )
+    result = _run(SimpleNamespace(state={}))
+
+    assert client.queries == [_SCRIPT]
+    assert result["status"] == "SUCCESS"
+    statements = result["statements"]
+    assert [s["statement_type"] for s in statements] == [
+        "CREATE_VIEW",
+        "CREATE_MODEL",
+        "SELECT",
+    ]
+    assert statements[0]["target"] == "p.ml.training"
+    assert statements[1]["elapsed_seconds"] == 95.0
+    assert statements[2]["rows"] == [{"roc_auc": 0.87, "log_loss": 0.41}]
+
+
+def test_failed_statement_is_reported_in_place(monkeypatch):
+    _use(
+        monkeypatch,
+        _FakeJob(error="Column label not found"),
+        [
+            _child(0, "CREATE_VIEW", "CREATE OR REPLACE VIEW ml.training", 1),
+            _child(1, "CREATE_MODEL", "CREATE MODEL ml.churn", 3, "Column label"),
+        ],
+    )
+    result = _run(SimpleNamespace(state={}))
+
+    assert result["status"] == "ERROR"
+    assert result["error_details"] == "Column label not found"
+    assert result["statements"][1]["error"] == "Column label"
+
+
+def test_long_script_continues_as_tracked_job(monkeypatch):
+    _use(monkeypatch, _FakeJob(timeout=True), [])
+    ctx = SimpleNamespace(state={})
+    result = _run(ctx, wait_seconds=5)
+
+    assert result["job_state"] == "RUNNING"
+    record = ctx.state[BQML_JOBS_KEY]["bqml_script_1"]
+    assert record["model"] == "p.ml.churn"
+
+
+def test_single_statement_is_rejected(monkeypatch):
+    client = _use(monkeypatch, _FakeJob(), [])
+    result = _run(SimpleNamespace(state={}), script="SELECT 1")
+    assert result["status"] == "ERROR"
+    assert client.queries == []
+
+
+def test_script_with_model_ddl_clears_inventory_cache():
+    ctx = SimpleNamespace(state={MODEL_INVENTORY_KEY: {"p:US": {}}})
+    invalidate_model_inventory(
+        SimpleNamespace(name="run_bqml_script"),
+        {"script": _SCRIPT},
+        ctx,
+        {"status": "ERROR"},
+    )
+    assert ctx.state[MODEL_INVENTORY_KEY] == {}
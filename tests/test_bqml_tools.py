@@ -51,6 +51,61 @@ def test_rag_response_accepts_query_string(unset_rag_corpus):
     assert isinstance(result, str)
 
 
+# ---------------------------------------------------------------------------
+# rag_response – structured output and hybrid retrieval
+# ---------------------------------------------------------------------------
+
+
+def _retrieval_response(*texts):
+    from types import SimpleNamespace
+
+    return SimpleNamespace(
+        contexts=SimpleNamespace(
+            contexts=[
+                SimpleNamespace(
+                    text=text,
+                    source_uri="gs://docs/vector.md",
+                    source_display_name="vector.md",
+                    distance=0.2 + i / 10,
+                )
+                for i, text in enumerate(texts)
+            ]
+        )
+    )
+
+
+def test_rag_response_fuses_vector_and_lexical_chunks(monkeypatch):
+    from bq_multi_agent_app.sub_agents.bqml_agents import retrieval, tools
+
+    monkeypatch.setenv("BQML_RAG_CORPUS_NAME", "projects/p/locations/l/ragCorpora/1")
+    monkeypatch.setattr(
+        tools.rag,
+        "retrieval_query",
+        lambda **kwargs: _retrieval_response(
+            "Embeddings overview.", "Remote models overview."
+        ),
+    )
+    index = retrieval.LexicalIndex(
+        [
+            {
+                "text": "ML.GENERATE_EMBEDDING(MODEL m, TABLE t) returns embeddings.",
+                "source_uri": "gs://docs/lexical.md",
+            }
+        ]
+    )
+    monkeypatch.setattr(retrieval, "_index", index)
+    monkeypatch.setattr(retrieval, "_index_loaded", True)
+
+    result = tools.rag_response("ML.GENERATE_EMBEDDING syntax")
+
+    assert result["status"] == "SUCCESS"
+    assert {chunk["source_uri"] for chunk in result["chunks"]} == {
+        "gs://docs/vector.md",
+        "gs://docs/lexical.md",
+    }
+    assert "ML.GENERATE_EMBEDDING" in " ".join(c["text"] for c in result["chunks"])
+
+
 # ---------------------------------------------------------------------------
 # check_bq_models – confirm removal
 # ---------------------------------------------------------------------------
@@ -0,0 +1,281 @@
+"""
+Tests for shared tool callbacks in callbacks.py.
+
+Tools and tool contexts are replaced with lightweight stand-ins exposing only
+the attributes the callbacks read (tool.name, tool_context.state, and the
+call and user ids). No external API calls are made; table metadata lookups for
+the result cache are patched out.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app import callbacks
+from bq_multi_agent_app.callbacks import (
+    SCHEMA_CACHE_KEY,
+    approximate_exploratory_query,
+    cache_table_schema,
+    compact_table_info,
+    lint_execute_sql,
+    report_approximation,
+    report_query_rewrite,
+    rewrite_exploratory_query,
+    serve_cached_result,
+    store_query_result,
+)
+from bq_multi_agent_app.query_cache import QueryResultCache
+
+_TABLE_INFO = {
+    "tableReference": {"projectId": "proj", "datasetId": "sales", "tableId": "orders"},
+    "schema": {
+        "fields": [
+            {"name": "order_date", "type": "DATE"},
+            {"name": "amount", "type": "FLOAT"},
+        ]
+    },
+    "timePartitioning": {"type": "DAY", "field": "order_date"},
+    "numRows": "1000000",
+    "numBytes": "20000000",
+    "lastModifiedTime": "1749427268137",
+}
+
+
+@pytest.fixture()
+def tool_context():
+    return SimpleNamespace(state={}, function_call_id="call-1")
+
+
+def _tool(name):
+    return SimpleNamespace(name=name)
+
+
+# ---------------------------------------------------------------------------
+# compact_table_info / cache_table_schema
+# ---------------------------------------------------------------------------
+
+
+def test_compact_table_info_extracts_partitioning_and_sizes():
+    info = compact_table_info(_TABLE_INFO)
+    assert info["columns"] == {"order_date": "DATE", "amount": "FLOAT"}
+    assert info["partition_type"] == "DAY"
+    assert info["partition_field"] == "order_date"
+    assert info["num_rows"] == 1_000_000
+    assert info["last_modified"] == 1749427268137
+
+
+def test_cache_table_schema_stores_get_table_info_results(tool_context):
+    result = cache_table_schema(_tool("get_table_info"), {}, tool_context, _TABLE_INFO)
+    assert result is None
+    assert "proj.sales.orders" in tool_context.state[SCHEMA_CACHE_KEY]
+
+
+def test_cache_table_schema_ignores_other_tools_and_errors(tool_context):
+    cache_table_schema(_tool("list_table_ids"), {}, tool_context, _TABLE_INFO)
+    cache_table_schema(_tool("get_table_info"), {}, tool_context, {"status": "ERROR"})
+    assert SCHEMA_CACHE_KEY not in tool_context.state
+
+
+# ---------------------------------------------------------------------------
+# lint_execute_sql
+# ---------------------------------------------------------------------------
+
+
+def test_lint_execute_sql_rejects_flagged_query_once(tool_context):
+    cache_table_schema(_tool("get_table_info"), {}, tool_context, _TABLE_INFO)
+    args = {"project_id": "proj", "query": "SELECT amount FROM sales.orders"}
+
+    first = lint_execute_sql(_tool("execute_sql"), args, tool_context)
+    assert first["status"] == "NEEDS_REVISION"
+    assert first["lint_findings"][0]["rule"] == "missing_partition_filter"
+
+    # Identical resubmission means the agent accepts the cost — let it run.
+    assert lint_execute_sql(_tool("execute_sql"), args, tool_context) is None
+
+
+def test_lint_execute_sql_passes_clean_queries_and_dry_runs(tool_context):
+    clean = {"project_id": "p", "query": "SELECT 1"}
+    assert lint_execute_sql(_tool("execute_sql"), clean, tool_context) is None
+
+    dry = {
+        "project_id": "p",
+        "query": "SELECT a FROM x.y.z ORDER BY a",
+        "dry_run": True,
+    }
+    assert lint_execute_sql(_tool("execute_sql"), dry, tool_context) is None
+
+
+def test_lint_execute_sql_ignores_other_tools(tool_context):
+    args = {"query": "SELECT a FROM x.y.z ORDER BY a"}
+    assert lint_execute_sql(_tool("forecast"), args, tool_context) is None
+
+
+# ---------------------------------------------------------------------------
+# rewrite_exploratory_query / report_query_rewrite
+# ---------------------------------------------------------------------------
+
+
+def test_rewrite_is_off_by_default(tool_context, monkeypatch):
+    monkeypatch.delenv("EXPLORATORY_QUERY_REWRITE", raising=False)
+    cache_table_schema(_tool("get_table_info"), {}, tool_context, _TABLE_INFO)
+    args = {"project_id": "proj", "query": "SELECT * FROM sales.orders"}
+
+    assert rewrite_exploratory_query(_tool("execute_sql"), args, tool_context) is None
+    assert args["query"] == "SELECT * FROM sales.orders"
+
+
+def test_rewrite_mutates_args_and_reports_on_result(tool_context, monkeypatch):
+    monkeypatch.setenv("EXPLORATORY_QUERY_REWRITE", "true")
+    cache_table_schema(_tool("get_table_info"), {}, tool_context, _TABLE_INFO)
+    args = {"project_id": "proj", "query": "SELECT * FROM sales.orders"}
+
+    assert rewrite_exploratory_query(_tool("execute_sql"), args, tool_context) is None
+    assert args["query"].endswith("LIMIT 50")
+
+    response = {"status": "SUCCESS", "rows": []}
+    report_query_rewrite(_tool("execute_sql"), args, tool_context, response)
+    assert response["query_rewrite"]["original_query"] == "SELECT * FROM sales.orders"
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("", None),
+        ("2.5", 2.5),
+        ("100", 100.0),
+        ("ten", None),
+        ("0", None),
+        ("150", None),
+    ],
+)
+def test_sample_percent_setting_falls_back_when_invalid(monkeypatch, value, expected):
+    monkeypatch.setenv("APPROXIMATE_SAMPLE_PERCENT", value)
+    assert callbacks._sample_percent_setting() == expected
+
+
+def test_approximate_mode_annotates_rows_with_error_bounds(tool_context, monkeypatch):
+    monkeypatch.setenv("APPROXIMATE_EXPLORATION", "true")
+    monkeypatch.setattr(callbacks, "_APPROXIMATE_SAMPLE_PERCENT", 10.0)
+    large_table = {**_TABLE_INFO, "numBytes": str(50 * 1024**3)}
+    cache_table_schema(_tool("get_table_info"), {}, tool_context, large_table)
+    query = "SELECT order_date, COUNT(*) AS n FROM sales.orders GROUP BY order_date"
+    args = {"project_id": "proj", "query": query}
+
+    approximate_exploratory_query(_tool("execute_sql"), args, tool_context)
+    assert "TABLESAMPLE SYSTEM (10 PERCENT)" in args["query"]
+
+    response = {
+        "status": "SUCCESS",
+        "rows": [{"order_date": "2026-01-01", "n": 4000.0, "_sampled_rows": 400}],
+    }
+    report_approximation(_tool("execute_sql"), args, tool_context, response)
+    assert response["rows"][0] == {
+        "order_date": "2026-01-01",
+        "n": 4000.0,
+        "_relative_error_95": 0.098,
+    }
+    assert response["approximation"]["original_query"] == query
+    assert response["approximation"]["scale_factor"] == 10
+
+
+# ---------------------------------------------------------------------------
+# serve_cached_result / store_query_result
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def fresh_result_cache(monkeypatch):
+    cache = QueryResultCache()
+    monkeypatch.setattr(callbacks, "result_cache", cache)
+    monkeypatch.setattr(callbacks, "client_for", lambda *a, **k: object())
+    monkeypatch.setattr(
+        callbacks, "table_versions", lambda client, tables: dict.fromkeys(tables, 1)
+    )
+    return cache
+
+
+def _cache_context(call_id):
+    return SimpleNamespace(state={}, function_call_id=call_id, user_id="alice")
+
+
+def test_repeated_query_is_served_from_cache(fresh_result_cache):
+    args = {"project_id": "proj", "query": "SELECT amount FROM sales.orders"}
+    first = _cache_context("call-1")
+
+    assert asyncio.run(serve_cached_result(_tool("execute_sql"), args, first)) is None
+    store_query_result(_tool("execute_sql"), args, first, {"status": "SUCCESS"})
+
+    second = _cache_context("call-2")
+    hit = asyncio.run(serve_cached_result(_tool("execute_sql"), args, second))
+    assert hit["result_cache"]["status"] == "HIT"
+
+
+def test_concurrent_identical_queries_share_one_run(fresh_result_cache):
+    args = {"project_id": "proj", "query": "SELECT amount FROM sales.orders"}
+    runner, waiter = _cache_context("call-1"), _cache_context("call-2")
+
+    async def scenario():
+        assert await serve_cached_result(_tool("execute_sql"), args, runner) is None
+        waiting = asyncio.create_task(
+            serve_cached_result(_tool("execute_sql"), args, waiter)
+        )
+        while not fresh_result_cache.stats()["coalesced"]:
+            await asyncio.sleep(0.01)
+        store_query_result(_tool("execute_sql"), args, runner, {"status": "SUCCESS"})
+        return await waiting
+
+    shared = asyncio.run(scenario())
+    assert shared["result_cache"]["status"] == "COALESCED"
+
+
+def test_cancelled_runner_releases_its_flight(fresh_result_cache):
+    args = {"project_id": "proj", "query": "SELECT amount FROM sales.orders"}
+
+    async def call(ctx, hold):
+        result = await serve_cached_result(_tool("execute_sql"), args, ctx)
+        await hold.wait()  # the tool call, cancelled before it finishes
+        return result
+
+    async def scenario():
+        hold = asyncio.Event()
+        runner = asyncio.create_task(call(_cache_context("call-1"), hold))
+        await asyncio.sleep(0.01)
+        runner.cancel()
+        await asyncio.sleep(0.01)
+        # Not stuck behind the cancelled runner: becomes the runner itself.
+        next_ctx = _cache_context("call-2")
+        assert await serve_cached_result(_tool("execute_sql"), args, next_ctx) is None
+        return next_ctx
+
+    next_ctx = asyncio.run(scenario())
+    assert fresh_result_cache.stats()["coalesced"] == 0
+    assert next(iter(next_ctx.state.values()))
+
+
+def test_uncacheable_queries_and_other_tools_bypass_cache(fresh_result_cache):
+    ctx = _cache_context("call-1")
+    volatile = {"project_id": "p", "query": "SELECT CURRENT_DATE() FROM d.t"}
+    assert asyncio.run(serve_cached_result(_tool("execute_sql"), volatile, ctx)) is None
+    assert asyncio.run(serve_cached_result(_tool("forecast"), {}, ctx)) is None
+    assert ctx.state == {}
+
+
+def test_error_result_is_not_shared_with_waiting_calls(fresh_result_cache):
+    args = {"project_id": "proj", "query": "SELECT amount FROM sales.orders"}
+    runner, waiter = _cache_context("call-1"), _cache_context("call-2")
+
+    async def scenario():
+        assert await serve_cached_result(_tool("execute_sql"), args, runner) is None
+        waiting = asyncio.create_task(
+            serve_cached_result(_tool("execute_sql"), args, waiter)
+        )
+        while not fresh_result_cache.stats()["coalesced"]:
+            await asyncio.sleep(0.01)
+        failed = {"status": "ERROR", "error_details": "quota exceeded"}
+        store_query_result(_tool("execute_sql"), args, runner, failed)
+        return await waiting
+
+    # The waiter runs the query itself rather than receiving the error.
+    assert asyncio.run(scenario()) is None
+    assert fresh_result_cache.stats()["entries"] == 0
@@ -0,0 +1,136 @@
+"""
+Tests for follow-up charts from saved CA API results in charts.py.
+
+The tool context is a stand-in with an in-memory artifact store. PNG rendering
+is patched out so the tests do not depend on vl-convert-python. No external
+API calls are made.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app import charts
+from bq_multi_agent_app.charts import (
+    RESULT_ARTIFACT,
+    build_vega_lite_spec,
+    extract_data_result,
+    persist_data_result,
+    render_chart,
+)
+
+_CA_RESPONSE = {
+    "status": "SUCCESS",
+    "response": [
+        {"Question": "Monthly sales in 2024"},
+        {"SQL Generated": "SELECT month, sales FROM `p.d.t`"},
+        {
+            "Data Retrieved": {
+                "headers": ["month", "sales", "region"],
+                "rows": [
+                    ["2024-01-01", "302918.3", "EU"],
+                    ["2024-02-01", "290101.86", "US"],
+                ],
+                "summary": "Showing all 2 rows.",
+            }
+        },
+        {"Answer": "Sales dipped in February."},
+    ],
+}
+
+
+class _ArtifactContext:
+    def __init__(self):
+        self.artifacts = {}
+        self.state = {}
+
+    async def save_artifact(self, filename, artifact):
+        self.artifacts[filename] = artifact
+        return 0
+
+    async def load_artifact(self, filename, version=None):
+        return self.artifacts.get(filename)
+
+
+def _tool(name):
+    return SimpleNamespace(name=name)
+
+
+# ---------------------------------------------------------------------------
+# extract_data_result / build_vega_lite_spec
+# ---------------------------------------------------------------------------
+
+
+def test_extract_data_result_collects_rows_sql_and_answer():
+    result = extract_data_result(_CA_RESPONSE)
+    assert result["headers"] == ["month", "sales", "region"]
+    assert result["sql"].startswith("SELECT")
+    assert result["question"] == "Monthly sales in 2024"
+
+
+def test_extract_data_result_ignores_responses_without_data():
+    assert extract_data_result({"status": "ERROR", "error_details": "x"}) is None
+    assert extract_data_result({"response": [{"Answer": "none"}]}) is None
+
+
+def test_spec_infers_field_types_and_converts_numbers():
+    spec = build_vega_lite_spec(
+        extract_data_result(_CA_RESPONSE), "line", "month", "sales", color="region"
+    )
+    assert spec["mark"]["type"] == "line"
+    assert spec["encoding"]["x"]["type"] == "temporal"
+    assert spec["encoding"]["y"]["type"] == "quantitative"
+    assert spec["encoding"]["color"]["type"] == "nominal"
+    assert spec["data"]["values"][0]["sales"] == 302918.3
+
+
+def test_pie_chart_uses_theta_encoding():
+    spec = build_vega_lite_spec(
+        extract_data_result(_CA_RESPONSE), "pie", "region", "sales"
+    )
+    assert spec["encoding"]["theta"]["field"] == "sales"
+
+
+@pytest.mark.parametrize(
+    ("chart_type", "x"), [("radar", "month"), ("bar", "no_such_column")]
+)
+def test_spec_rejects_unknown_chart_type_or_column(chart_type, x):
+    with pytest.raises(ValueError):
+        build_vega_lite_spec(extract_data_result(_CA_RESPONSE), chart_type, x, "sales")
+
+
+# ---------------------------------------------------------------------------
+# persist_data_result / render_chart
+# ---------------------------------------------------------------------------
+
+
+def test_ca_result_is_saved_and_charted_without_requery(monkeypatch):
+    monkeypatch.setattr(charts, "_render_png", lambda spec: b"\x89PNG")
+    ctx = _ArtifactContext()
+    response = json.loads(json.dumps(_CA_RESPONSE))
+
+    asyncio.run(persist_data_result(_tool("ask_data_insights"), {}, ctx, response))
+    assert response["result_artifact"] == RESULT_ARTIFACT
+
+    chart = asyncio.run(render_chart("bar", "region", "sales", tool_context=ctx))
+    assert chart["status"] == "SUCCESS"
+    assert chart["chart_artifact"] == "chart.png"
+    assert chart["rows_plotted"] == 2
+    assert chart["source"]["sql"].startswith("SELECT")
+
+
+def test_render_chart_without_png_renderer_returns_spec_and_note(monkeypatch):
+    monkeypatch.setattr(charts, "_render_png", lambda spec: None)
+    ctx = _ArtifactContext()
+    asyncio.run(persist_data_result(_tool("ask_data_agent"), {}, ctx, _CA_RESPONSE))
+
+    chart = asyncio.run(render_chart("line", "month", "sales", tool_context=ctx))
+    assert chart["chart_artifact"] is None
+    assert "ds_agent" in chart["note"]
+
+
+def test_render_chart_without_saved_result_is_an_error():
+    chart = asyncio.run(render_chart("bar", "a", "b", tool_context=_ArtifactContext()))
+    assert chart["status"] == "ERROR"
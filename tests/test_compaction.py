@@ -0,0 +1,151 @@
+"""
+Tests for session event compaction in compaction.py.
+
+A fake LLM writes the summaries, so no model calls are made.
+"""
+
+import asyncio
+import json
+
+from google.adk.events.event import Event
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from bq_multi_agent_app import compaction
+from bq_multi_agent_app.compaction import (
+    SCHEMA_BLOCK_HEADER,
+    AnalystEventsSummarizer,
+    compaction_config,
+    render_history,
+    schema_facts,
+)
+
+_TABLE_INFO = {
+    "tableReference": {"projectId": "p", "datasetId": "sales", "tableId": "orders"},
+    "schema": {"fields": [{"name": "order_id", "type": "INTEGER"}]},
+    "numRows": "1000",
+    "timePartitioning": {"type": "DAY", "field": "order_date"},
+}
+
+
+def _event(author, *parts, timestamp=0.0):
+    return Event(
+        author=author,
+        content=types.Content(role="model", parts=list(parts)),
+        timestamp=timestamp,
+    )
+
+
+def _response(name, response):
+    return types.Part(
+        function_response=types.FunctionResponse(name=name, response=response)
+    )
+
+
+def _session_events():
+    return [
+        _event("user", types.Part(text="Describe p.sales.orders"), timestamp=1.0),
+        _event(
+            "bq_multi_agent",
+            types.Part(
+                function_call=types.FunctionCall(
+                    name="get_table_info",
+                    args={
+                        "project_id": "p",
+                        "dataset_id": "sales",
+                        "table_id": "orders",
+                    },
+                )
+            ),
+            timestamp=2.0,
+        ),
+        _event(
+            "bq_multi_agent", _response("get_table_info", _TABLE_INFO), timestamp=3.0
+        ),
+        _event(
+            "bq_multi_agent",
+            _response(
+                "ask_data_insights",
+                {"rows": ["x" * 50] * 200, "result_artifact": "last_result.json"},
+            ),
+            timestamp=4.0,
+        ),
+        _event(
+            "bq_multi_agent", types.Part(text="Revenue grew 12% in Q3."), timestamp=5.0
+        ),
+    ]
+
+
+def test_history_shortens_large_payloads_and_keeps_artifacts():
+    history = render_history(_session_events(), payload_chars=300)
+
+    assert "user: Describe p.sales.orders" in history
+    assert "bq_multi_agent called get_table_info" in history
+    assert "[schema of p.sales.orders — see known table schemas]" in history
+    assert "stored as result_artifact=last_result.json" in history
+    assert "x" * 400 not in history
+    assert "Revenue grew 12% in Q3." in history
+
+
+def test_schema_facts_merge_table_info_with_earlier_summaries():
+    earlier = {"p.hr.staff": {"columns": {"id": "INTEGER"}}}
+    seed = _event(
+        "model", types.Part(text=f"{SCHEMA_BLOCK_HEADER}\n{json.dumps(earlier)}")
+    )
+    facts = schema_facts([seed, *_session_events()])
+
+    assert facts["p.hr.staff"] == {"columns": {"id": "INTEGER"}}
+    assert facts["p.sales.orders"]["columns"] == {"order_id": "INTEGER"}
+    assert facts["p.sales.orders"]["partition_field"] == "order_date"
+
+
+class _FakeLlm:
+    model = "fake-model"
+
+    def __init__(
+        self, text="Analyst asked about orders; revenue grew 12%.", fail=False
+    ):
+        self.text = text
+        self.fail = fail
+        self.prompts = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.prompts.append(llm_request.contents[0].parts[0].text)
+        if self.fail:
+            raise RuntimeError("quota exceeded")
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=self.text)])
+        )
+
+
+def test_summary_event_covers_range_and_keeps_schema_block():
+    llm = _FakeLlm()
+    events = _session_events()
+    event = asyncio.run(
+        AnalystEventsSummarizer(llm).maybe_summarize_events(events=events)
+    )
+
+    compacted = event.actions.compaction
+    assert (compacted.start_timestamp, compacted.end_timestamp) == (1.0, 5.0)
+    summary, schema = compacted.compacted_content.parts
+    assert "revenue grew 12%" in summary.text
+    assert schema.text.startswith(SCHEMA_BLOCK_HEADER)
+    assert "p.sales.orders" in json.loads(schema.text[len(SCHEMA_BLOCK_HEADER) :])
+    assert "Revenue grew 12% in Q3." in llm.prompts[0]
+
+
+def test_failed_summary_leaves_events_uncompacted():
+    summarizer = AnalystEventsSummarizer(_FakeLlm(fail=True))
+    assert (
+        asyncio.run(summarizer.maybe_summarize_events(events=_session_events())) is None
+    )
+    assert asyncio.run(summarizer.maybe_summarize_events(events=[])) is None
+
+
+def test_compaction_is_triggered_by_token_threshold(monkeypatch):
+    config = compaction_config()
+    assert config.token_threshold == 50000
+    assert isinstance(config.summarizer, AnalystEventsSummarizer)
+
+    monkeypatch.setattr(compaction, "_TOKEN_THRESHOLD", 0)
+    assert compaction_config() is None
@@ -0,0 +1,83 @@
+"""
+Tests for compound-request planning and timing in compound_agents/plan.py.
+
+Contexts are plain namespaces holding session state, so no agents run.
+"""
+
+from types import SimpleNamespace
+
+from bq_multi_agent_app.sub_agents.compound_agents import plan
+from bq_multi_agent_app.sub_agents.compound_agents.plan import (
+    PLAN_KEY,
+    RESULT_PREFIX,
+    TIMING_PREFIX,
+    branch_instruction,
+    finish_branch,
+    merge_instruction,
+    plan_compound_request,
+    start_branch,
+)
+
+
+def _planned_state():
+    ctx = SimpleNamespace(state={RESULT_PREFIX + "data": "stale"})
+    result = plan_compound_request(
+        ctx,
+        analysis_question="Chart monthly churn rate from p.crm.customers",
+        research_question="Industry benchmarks for SaaS churn",
+    )
+    assert result["branches"] == ["analysis", "research"]
+    return ctx.state
+
+
+def test_plan_stores_parts_and_clears_previous_results():
+    state = _planned_state()
+    assert state[PLAN_KEY]["research"] == "Industry benchmarks for SaaS churn"
+    assert state[RESULT_PREFIX + "data"] is None
+
+
+def test_single_part_is_not_a_compound_request():
+    ctx = SimpleNamespace(state={})
+    result = plan_compound_request(ctx, data_question="Orders per month")
+    assert result["status"] == "ERROR"
+    assert PLAN_KEY not in ctx.state
+
+
+def test_branch_instruction_adds_its_part():
+    state = _planned_state()
+    provider = branch_instruction("analysis", "BASE PROMPT")
+    text = provider(SimpleNamespace(state=state))
+    assert text.startswith("BASE PROMPT")
+    assert "Chart monthly churn rate from p.crm.customers" in text
+    assert "Industry benchmarks" not in text
+
+
+def test_unplanned_branch_is_skipped_and_planned_branch_is_timed(monkeypatch):
+    state = _planned_state()
+    skipped = start_branch(
+        SimpleNamespace(state=state, agent_name="compound_data_branch")
+    )
+    assert skipped.parts[0].text == "No data part planned."
+
+    now = [1000.0]
+    monkeypatch.setattr(plan.time, "time", lambda: now[0])
+    ctx = SimpleNamespace(state=state, agent_name="compound_research_branch")
+    assert start_branch(ctx) is None
+    now[0] += 12.34
+    finish_branch(ctx)
+    assert state[TIMING_PREFIX + "research"] == 12.3
+
+
+def test_merge_instruction_lists_planned_results_and_timings():
+    state = _planned_state()
+    state[RESULT_PREFIX + "analysis"] = "Churn fell from 4% to 3%."
+    state[TIMING_PREFIX + "analysis"] = 41.0
+    state[TIMING_PREFIX + "research"] = 18.2
+    text = merge_instruction("MERGE")(SimpleNamespace(state=state))
+
+    assert "### analysis branch" in text
+    assert "Churn fell from 4% to 3%." in text
+    assert "### research branch" in text
+    assert "(no result)" in text
+    assert "### data branch" not in text
+    assert "analysis 41.0s, research 18.2s" in text
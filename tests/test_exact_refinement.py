@@ -0,0 +1,75 @@
+"""
+Tests for background exact refinement in exact_refinement.py.
+
+A fake BigQuery client stands in for the pooled per-user client, so no
+external API calls are made.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app import exact_refinement
+from bq_multi_agent_app.exact_refinement import (
+    EXACT_REFINEMENTS_KEY,
+    get_exact_refinement,
+    start_exact_refinement,
+)
+
+
+class _Rows(list):
+    total_rows = 2
+
+
+class _FakeClient:
+    def __init__(self):
+        self.state = "RUNNING"
+        self.queries = []
+
+    def query(self, query, **kwargs):
+        self.queries.append(query)
+        return SimpleNamespace(job_id="exact_1", location="US")
+
+    def get_job(self, job_id, project=None, location=None):
+        return SimpleNamespace(
+            state=self.state,
+            error_result=None,
+            total_bytes_billed=10**10,
+            result=lambda max_results=None: _Rows([{"n": 1}, {"n": 2}]),
+        )
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    fake = _FakeClient()
+    monkeypatch.setattr(exact_refinement, "client_for", lambda *a, **k: fake)
+    return fake
+
+
+def test_exact_query_runs_in_background_and_is_fetched_when_done(client):
+    ctx = SimpleNamespace(state={})
+    started = asyncio.run(
+        start_exact_refinement("p", "SELECT COUNT(*) AS n FROM d.t", tool_context=ctx)
+    )
+    assert started == {"status": "SUCCESS", "job_id": "exact_1"}
+    assert "exact_1" in ctx.state[EXACT_REFINEMENTS_KEY]
+
+    running = asyncio.run(get_exact_refinement("exact_1", tool_context=ctx))
+    assert running["job_state"] == "RUNNING"
+    assert "rows" not in running
+
+    client.state = "DONE"
+    done = asyncio.run(get_exact_refinement("exact_1", tool_context=ctx))
+    assert done["rows"] == [{"n": 1}, {"n": 2}]
+    assert done["total_rows"] == 2
+
+
+def test_only_single_selects_are_refined(client):
+    result = asyncio.run(
+        start_exact_refinement(
+            "p", "DELETE FROM d.t WHERE TRUE", tool_context=SimpleNamespace(state={})
+        )
+    )
+    assert result["status"] == "ERROR"
+    assert client.queries == []
@@ -0,0 +1,171 @@
+"""
+Tests for incremental anomaly detection in incremental_anomalies.py.
+
+A fake BigQuery client stands in for the pooled per-user client and keeps
+the persisted model's description, so no external API calls are made.
+"""
+
+import asyncio
+import json
+from datetime import UTC, date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from google.api_core.exceptions import NotFound
+
+from bq_multi_agent_app import incremental_anomalies
+from bq_multi_agent_app.incremental_anomalies import (
+    detect_new_anomalies,
+    model_path,
+    score_new_data,
+)
+
+_TABLE = "p.sales.daily"
+_DATASET = "p.anomaly_models"
+_MODEL = model_path(_TABLE, "day", "revenue", ["store"], _DATASET)
+
+
+class _FakeJob:
+    total_bytes_billed = 52_428_800
+
+    def result(self):
+        return None
+
+
+class _FakeClient:
+    def __init__(self, latest, new_rows, anomalies=(), model=None):
+        self.latest = latest
+        self.new_rows = new_rows
+        self.anomalies = list(anomalies)
+        self.model = model
+        self.trained = []
+        self.queries = []
+
+    def get_table(self, table):
+        return SimpleNamespace(
+            schema=[
+                SimpleNamespace(name="day", field_type="DATE"),
+                SimpleNamespace(name="revenue", field_type="FLOAT"),
+            ]
+        )
+
+    def get_model(self, model_id):
+        if self.model is None:
+            raise NotFound(model_id)
+        return self.model
+
+    def query(self, sql, **kwargs):
+        self.trained.append(sql)
+        self.model = SimpleNamespace(created=datetime.now(UTC), description=None)
+        return _FakeJob()
+
+    def query_and_wait(self, sql):
+        self.queries.append(sql)
+        if sql.startswith("SELECT MAX("):
+            return [{"latest": self.latest, "new_rows": self.new_rows}]
+        total = len(self.anomalies)
+        return [{**row, "_anomaly_count": total} for row in self.anomalies]
+
+    def update_model(self, model, fields):
+        assert fields == ["description"]
+
+
+def _existing_model(scored_through, age_days=1):
+    return SimpleNamespace(
+        created=datetime.now(UTC) - timedelta(days=age_days),
+        description=json.dumps(
+            {"scored_through": scored_through, "trained_through": "2026-01-01"}
+        ),
+    )
+
+
+def _score(client, **kwargs):
+    return score_new_data(
+        client, _TABLE, "day", "revenue", ["store"], _DATASET, **kwargs
+    )
+
+
+def test_first_run_trains_and_scores_history():
+    client = _FakeClient(
+        date(2026, 3, 1),
+        420,
+        [{"day": date(2026, 2, 3), "store": "s1", "is_anomaly": True}],
+    )
+    result = _score(client)
+
+    assert result["retrained"] is True
+    assert "time_series_id_col = ['store']" in client.trained[0]
+    assert "WHERE day <= DATE '2026-03-01'" in client.trained[0]
+    # No watermark yet: ML.DETECT_ANOMALIES scores the training data.
+    assert "SELECT day, revenue, store" not in client.queries[1]
+    assert result["anomaly_count"] == 1
+    assert result["anomalies"] == [
+        {"day": "2026-02-03", "store": "s1", "is_anomaly": True}
+    ]
+    assert json.loads(client.model.description)["scored_through"] == "2026-03-01"
+
+
+def test_later_run_scores_only_rows_after_watermark():
+    client = _FakeClient(date(2026, 3, 2), 7, model=_existing_model("2026-03-01"))
+    result = _score(client)
+
+    assert client.trained == []
+    assert "COUNTIF(day > DATE '2026-03-01')" in client.queries[0]
+    detect = client.queries[1]
+    assert f"MODEL `{_MODEL}`" in detect
+    assert "WHERE day > DATE '2026-03-01' AND day <= DATE '2026-03-02'" in detect
+    assert result["watermark"] == "2026-03-01"
+    assert result["scored_through"] == "2026-03-02"
+    assert result["anomaly_count"] == 0
+
+
+def test_no_new_rows_skips_scoring():
+    model = _existing_model("2026-03-02")
+    client = _FakeClient(date(2026, 3, 2), 0, model=model)
+    result = _score(client)
+
+    assert len(client.queries) == 1
+    assert result["new_rows"] == 0
+    assert json.loads(model.description)["scored_through"] == "2026-03-02"
+
+
+def test_stale_model_is_retrained_on_scored_rows_only():
+    client = _FakeClient(
+        date(2026, 3, 2), 7, model=_existing_model("2026-03-01", age_days=45)
+    )
+    result = _score(client)
+
+    assert result["retrained"] is True
+    assert "WHERE day <= DATE '2026-03-01'" in client.trained[0]
+    assert "WHERE day > DATE '2026-03-01'" in client.queries[1]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"data_col": "revenue; DROP TABLE x"},
+        {"timestamp_col": "revenue"},
+        {"threshold": 1.5},
+    ],
+)
+def test_invalid_arguments_run_no_query(kwargs):
+    client = _FakeClient(date(2026, 3, 2), 7)
+    args = {"timestamp_col": "day", "data_col": "revenue", **kwargs}
+    with pytest.raises(ValueError):
+        score_new_data(client, _TABLE, model_dataset=_DATASET, **args)
+    assert client.queries == []
+
+
+def test_tool_requires_model_dataset(monkeypatch):
+    monkeypatch.delenv("ANOMALY_MODEL_DATASET", raising=False)
+    client = _FakeClient(date(2026, 3, 2), 7)
+    monkeypatch.setattr(incremental_anomalies, "client_for", lambda *a, **k: client)
+    result = asyncio.run(
+        detect_new_anomalies(
+            "p", "sales.daily", "day", "revenue", SimpleNamespace(state={})
+        )
+    )
+
+    assert result["status"] == "ERROR"
+    assert "ANOMALY_MODEL_DATASET" in result["error_details"]
+    assert client.queries == []
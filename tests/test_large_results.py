@@ -0,0 +1,181 @@
+"""
+Tests for the Storage Read API fetch path in large_results.py.
+
+Fake BigQuery and Storage Read clients stand in for the real ones, so no
+external API calls are made. Requires pyarrow and google-cloud-bigquery-storage
+(both installed with google-adk).
+"""
+
+import asyncio
+import base64
+import gzip
+from types import SimpleNamespace
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pytest.importorskip("google.cloud.bigquery_storage")
+
+from bq_multi_agent_app import large_results
+from bq_multi_agent_app.large_results import (
+    attach_code_interpreter_file,
+    fetch_large_result,
+    read_table_arrow,
+)
+
+_INPUT_FILES = "_code_executor_input_files"
+
+
+class _FakeReadClient:
+    """Serves one Arrow table per stream and records the session request."""
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.request = None
+
+    def create_read_session(self, parent, read_session, max_stream_count):
+        self.request = (parent, read_session.table, max_stream_count)
+        streams = [SimpleNamespace(name=f"s{i}") for i in range(len(self.parts))]
+        schema = pa.schema([("n", pa.int64())]).serialize().to_pybytes()
+        return SimpleNamespace(
+            streams=streams,
+            arrow_schema=SimpleNamespace(serialized_schema=schema),
+        )
+
+    def read_rows(self, name):
+        part = self.parts[int(name[1:])]
+        return SimpleNamespace(to_arrow=lambda session: part)
+
+
+class _FakeQueryClient:
+    def __init__(self, total_rows):
+        self.total_rows = total_rows
+
+    def query(self, query, project=None):
+        return SimpleNamespace(
+            result=lambda max_results=None: SimpleNamespace(total_rows=self.total_rows),
+            destination=SimpleNamespace(
+                project="p", dataset_id="_anon", table_id="anon_t"
+            ),
+        )
+
+
+def _parts(*sizes):
+    start, parts = 0, []
+    for size in sizes:
+        parts.append(pa.table({"n": list(range(start, start + size))}))
+        start += size
+    return parts
+
+
+@pytest.fixture()
+def clients(monkeypatch):
+    def install(parts):
+        read_client = _FakeReadClient(parts)
+        total = sum(p.num_rows for p in parts)
+        monkeypatch.setattr(
+            large_results, "client_for", lambda *a, **k: _FakeQueryClient(total)
+        )
+        monkeypatch.setattr(
+            large_results, "read_client_for", lambda *a, **k: read_client
+        )
+        return read_client
+
+    return install
+
+
+# ---------------------------------------------------------------------------
+# read_table_arrow
+# ---------------------------------------------------------------------------
+
+
+def test_streams_are_concatenated():
+    client = _FakeReadClient(_parts(3, 2, 4))
+    table = read_table_arrow(client, "projects/p/datasets/d/tables/t", "billing")
+
+    assert table.num_rows == 9
+    assert sorted(table.column("n").to_pylist()) == list(range(9))
+    assert client.request == ("projects/billing", "projects/p/datasets/d/tables/t", 8)
+
+
+def test_empty_table_keeps_schema():
+    table = read_table_arrow(_FakeReadClient([]), "projects/p/datasets/d/tables/t", "b")
+    assert table.num_rows == 0
+    assert table.schema.names == ["n"]
+
+
+# ---------------------------------------------------------------------------
+# fetch_large_result
+# ---------------------------------------------------------------------------
+
+
+def test_result_is_attached_to_code_interpreter(clients):
+    read_client = clients(_parts(3, 2))
+    ctx = SimpleNamespace(state={})
+
+    result = asyncio.run(
+        fetch_large_result("p", "SELECT n FROM d.t", "my-rows", tool_context=ctx)
+    )
+
+    assert result["status"] == "SUCCESS"
+    assert result["file"] == "my_rows.csv.gz"
+    assert result["row_count"] == 5
+    assert "rows" not in result
+    assert read_client.request[1] == "projects/p/datasets/_anon/tables/anon_t"
+
+    (attached,) = ctx.state[_INPUT_FILES]
+    csv = gzip.decompress(base64.b64decode(attached["content"])).decode()
+    assert csv.splitlines() == ['"n"', "0", "1", "2", "3", "4"]
+
+
+def test_refetch_replaces_file_with_same_name():
+    ctx = SimpleNamespace(state={})
+    attach_code_interpreter_file(ctx, "a.csv.gz", b"old", "text/csv")
+    attach_code_interpreter_file(ctx, "b.csv.gz", b"other", "text/csv")
+    attach_code_interpreter_file(ctx, "a.csv.gz", b"new", "text/csv")
+
+    files = {f["name"]: base64.b64decode(f["content"]) for f in ctx.state[_INPUT_FILES]}
+    assert files == {"a.csv.gz": b"new", "b.csv.gz": b"other"}
+
+
+def test_oldest_files_are_evicted_past_count_and_size(monkeypatch):
+    monkeypatch.setattr(large_results, "_MAX_INPUT_FILES", 2)
+    monkeypatch.setattr(large_results, "_MAX_INPUT_FILES_BYTES", 24)
+    ctx = SimpleNamespace(state={})
+    assert attach_code_interpreter_file(ctx, "a", b"1", "text/csv") == []
+    assert attach_code_interpreter_file(ctx, "b", b"2", "text/csv") == []
+    assert attach_code_interpreter_file(ctx, "c", b"3", "text/csv") == ["a"]
+    # 18 bytes encode to 24 base64 chars, the whole budget.
+    assert attach_code_interpreter_file(ctx, "d", b"x" * 18, "text/csv") == ["b", "c"]
+    assert [f["name"] for f in ctx.state[_INPUT_FILES]] == ["d"]
+
+
+@pytest.mark.parametrize(
+    ("query", "file_format"),
+    [
+        ("DELETE FROM d.t WHERE TRUE", "csv"),
+        ("SELECT 1; SELECT 2", "csv"),
+        ("SELECT 1", "xlsx"),
+    ],
+)
+def test_non_select_and_unknown_format_are_rejected(clients, query, file_format):
+    clients(_parts(1))
+    ctx = SimpleNamespace(state={})
+    result = asyncio.run(
+        fetch_large_result("p", query, "f", tool_context=ctx, file_format=file_format)
+    )
+    assert result["status"] == "ERROR"
+    assert _INPUT_FILES not in ctx.state
+
+
+def test_oversized_result_is_not_read(clients, monkeypatch):
+    read_client = clients(_parts(5))
+    monkeypatch.setattr(large_results, "_MAX_ROWS", 4)
+
+    result = asyncio.run(
+        fetch_large_result(
+            "p", "SELECT n FROM d.t", "f", tool_context=SimpleNamespace(state={})
+        )
+    )
+    assert result["status"] == "ERROR"
+    assert read_client.request is None
@@ -0,0 +1,128 @@
+"""
+Tests for the local DuckDB drill-down cache in local_results.py.
+
+Requires the optional duckdb and pyarrow packages (skipped otherwise). Results
+are written to a pytest tmp_path; no external API calls are made.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+from bq_multi_agent_app.local_results import (
+    LOCAL_RESULTS_KEY,
+    query_cached_result,
+    store_local_result,
+)
+
+_SQL_RESULT = {
+    "status": "SUCCESS",
+    "rows": [
+        {"region": "EU", "quarter": "Q3", "sales": 10.0},
+        {"region": "EU", "quarter": "Q4", "sales": 5.0},
+        {"region": "US", "quarter": "Q3", "sales": 7.5},
+    ],
+}
+
+
+@pytest.fixture()
+def tool_context(monkeypatch, tmp_path):
+    monkeypatch.setenv("LOCAL_RESULT_CACHE", "true")
+    monkeypatch.setenv("LOCAL_RESULT_CACHE_DIR", str(tmp_path))
+    return SimpleNamespace(state={}, user_id="alice", session=SimpleNamespace(id="s1"))
+
+
+def _store(tool_context, name, args, response):
+    store_local_result(SimpleNamespace(name=name), args, tool_context, response)
+    return response.get("local_table")
+
+
+# ---------------------------------------------------------------------------
+# store_local_result
+# ---------------------------------------------------------------------------
+
+
+def test_complete_sql_result_is_stored_with_provenance(tool_context):
+    args = {"project_id": "p", "query": "SELECT * FROM sales.orders"}
+    response = dict(_SQL_RESULT)
+    assert _store(tool_context, "execute_sql", args, response) == "result_1"
+
+    meta = tool_context.state[LOCAL_RESULTS_KEY]["result_1"]
+    assert meta["source_tables"] == ["p.sales.orders"]
+    assert meta["row_count"] == 3
+
+
+def test_truncated_results_and_disabled_cache_are_not_stored(tool_context, monkeypatch):
+    truncated = {**_SQL_RESULT, "result_is_likely_truncated": True}
+    assert _store(tool_context, "execute_sql", {"query": "SELECT 1"}, truncated) is None
+
+    monkeypatch.setenv("LOCAL_RESULT_CACHE", "false")
+    assert (
+        _store(tool_context, "execute_sql", {"query": "SELECT 1"}, dict(_SQL_RESULT))
+        is None
+    )
+    assert LOCAL_RESULTS_KEY not in tool_context.state
+
+
+def test_ca_result_numeric_strings_are_stored_as_numbers(tool_context):
+    response = {
+        "status": "SUCCESS",
+        "response": [
+            {
+                "Data Retrieved": {
+                    "headers": ["region", "sales"],
+                    "rows": [["EU", "10"], ["US", "7"]],
+                    "summary": "Showing all 2 rows.",
+                }
+            }
+        ],
+    }
+    name = _store(tool_context, "ask_data_insights", {}, response)
+    result = asyncio.run(
+        query_cached_result(f"SELECT SUM(sales) AS total FROM {name}", tool_context)
+    )
+    assert result["rows"] == [{"total": 17}]
+
+
+# ---------------------------------------------------------------------------
+# query_cached_result
+# ---------------------------------------------------------------------------
+
+
+def test_drill_down_runs_locally_with_provenance(tool_context):
+    args = {"project_id": "p", "query": "SELECT * FROM sales.orders"}
+    name = _store(tool_context, "execute_sql", args, dict(_SQL_RESULT))
+
+    result = asyncio.run(
+        query_cached_result(
+            f"SELECT region, SUM(sales) AS sales FROM {name} "
+            "WHERE quarter = 'Q3' GROUP BY region ORDER BY region",
+            tool_context,
+        )
+    )
+    assert result["status"] == "SUCCESS"
+    assert result["rows"] == [
+        {"region": "EU", "sales": 10.0},
+        {"region": "US", "sales": 7.5},
+    ]
+    provenance = result["provenance"][name]
+    assert provenance["query"] == args["query"]
+    assert provenance["source_changed"] is None  # no token to check BigQuery
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "DROP TABLE result_1",
+        "SELECT * FROM result_1, read_csv('/etc/passwd')",
+        "SELECT * FROM result_9",
+    ],
+)
+def test_writes_file_access_and_unknown_tables_are_rejected(tool_context, sql):
+    _store(tool_context, "execute_sql", {"query": "SELECT 1"}, dict(_SQL_RESULT))
+    result = asyncio.run(query_cached_result(sql, tool_context))
+    assert result["status"] == "ERROR"
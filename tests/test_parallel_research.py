@@ -0,0 +1,98 @@
+"""
+Tests for parallel per-platform research in research_agents/parallel.py.
+
+A fake Gemini client stands in for google.genai, so no model or search calls
+are made.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app.sub_agents.research_agents import parallel
+from bq_multi_agent_app.sub_agents.research_agents.parallel import research_platforms
+
+
+class _FakeModels:
+    def __init__(self, delay=0.05, fail=()):
+        self.delay = delay
+        self.fail = fail
+        self.running = 0
+        self.peak = 0
+        self.prompts = []
+
+    async def generate_content(self, model, contents, config):
+        self.prompts.append(contents)
+        platform = contents.split("Research ", 1)[1].split(" for ", 1)[0]
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if platform in self.fail:
+            raise RuntimeError("quota exceeded")
+        chunk = SimpleNamespace(
+            web=SimpleNamespace(title=f"{platform} pricing", uri=f"https://{platform}")
+        )
+        return SimpleNamespace(
+            text=f"- {platform} facts",
+            candidates=[
+                SimpleNamespace(
+                    grounding_metadata=SimpleNamespace(grounding_chunks=[chunk])
+                )
+            ],
+        )
+
+
+@pytest.fixture
+def models(monkeypatch):
+    fake = _FakeModels()
+    client = SimpleNamespace(aio=SimpleNamespace(models=fake))
+    monkeypatch.setattr(parallel, "_genai_client", lambda: client)
+    return fake
+
+
+def _research(platforms, question="storage pricing"):
+    return asyncio.run(research_platforms(question, platforms))
+
+
+def test_platforms_are_researched_concurrently(models):
+    result = _research(["BigQuery", "Snowflake", "Databricks", "Redshift"])
+
+    assert models.peak == 4
+    assert [r["platform"] for r in result["results"]] == [
+        "BigQuery",
+        "Snowflake",
+        "Databricks",
+        "Redshift",
+    ]
+    assert result["results"][1]["citations"] == [
+        {"title": "Snowflake pricing", "uri": "https://Snowflake"}
+    ]
+    timing = result["timing"]
+    assert timing["wall_seconds"] < timing["sequential_seconds"]
+    assert "storage pricing" in models.prompts[0]
+
+
+def test_concurrency_is_bounded(models, monkeypatch):
+    monkeypatch.setattr(parallel, "_MAX_CONCURRENCY", 2)
+    _research(["BigQuery", "Snowflake", "Databricks", "Redshift", "Synapse"])
+    assert models.peak == 2
+
+
+def test_failed_branch_does_not_fail_the_comparison(models):
+    models.fail = ("Redshift",)
+    result = _research(["BigQuery", "Redshift"])
+
+    assert result["status"] == "SUCCESS"
+    assert result["results"][1]["status"] == "ERROR"
+    assert "quota" in result["results"][1]["error_details"]
+
+
+@pytest.mark.parametrize("platforms", [["BigQuery"], ["BigQuery", " BigQuery "]])
+def test_fewer_than_two_platforms_is_rejected(models, platforms):
+    result = _research(platforms)
+    assert result["status"] == "ERROR"
+    assert models.prompts == []
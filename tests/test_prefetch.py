@@ -0,0 +1,210 @@
+"""
+Tests for speculative schema discovery and memory preload in prefetch.py.
+
+Metadata lookups and the memory search are replaced with fakes, so no
+BigQuery or Memory Bank calls are made.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from bq_multi_agent_app import prefetch
+from bq_multi_agent_app.callbacks import SCHEMA_CACHE_KEY
+from bq_multi_agent_app.prefetch import (
+    SpeculativePreloadMemoryTool,
+    finish_speculative_prefetch,
+    prefetch_stats,
+    serve_prefetched_metadata,
+    speculative_lookups,
+    start_speculative_prefetch,
+)
+
+
+def test_lookups_from_message_references():
+    lookups = speculative_lookups(
+        "Compare `my-project.sales.orders` with my-project.sales.returns. "
+        "What else is in my-project.crm? (e.g. customers)"
+    )
+    assert lookups == [
+        ("get_table_info", "my-project", "sales", "orders"),
+        ("get_table_info", "my-project", "sales", "returns"),
+        ("list_table_ids", "my-project", "crm"),
+    ]
+
+
+def test_lookups_from_session_history_and_limit():
+    schema_cache = {
+        "p-123456.sales.orders": {},
+        "p-123456.sales.returns": {},
+        "p-123456.hr.employees": {},
+    }
+    assert speculative_lookups("orders by month", schema_cache) == [
+        ("get_table_info", "p-123456", "sales", "orders")
+    ]
+    assert len(speculative_lookups("sales trend", schema_cache)) == 2
+    assert len(speculative_lookups("sales trend", schema_cache, max_lookups=1)) == 1
+
+
+class _Lookups:
+    def __init__(self, delay=0.05, fail=()):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+
+    def __call__(self, context, lookup):
+        self.calls.append(lookup)
+        time.sleep(self.delay)
+        if lookup[-1] in self.fail:
+            raise RuntimeError("Not found: Table")
+        if lookup[0] == "list_table_ids":
+            return ["orders", "returns"]
+        return {"tableReference": {"tableId": lookup[-1]}, "schema": {"fields": []}}
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    fake = _Lookups()
+    monkeypatch.setattr(prefetch, "_lookup", fake)
+    return fake
+
+
+def _context(message, invocation_id="inv-1", state=None):
+    searches = []
+
+    async def search_memory(query):
+        searches.append(query)
+        entry = MemoryEntry(
+            author="user",
+            content=types.Content(parts=[types.Part(text=f"memory for {query}")]),
+        )
+        return SearchMemoryResponse(memories=[entry])
+
+    return SimpleNamespace(
+        user_content=types.Content(role="user", parts=[types.Part(text=message)]),
+        state=state or {},
+        invocation_id=invocation_id,
+        search_memory=search_memory,
+        searches=searches,
+    )
+
+
+def _tool(name):
+    return SimpleNamespace(name=name)
+
+
+def test_prefetched_lookup_is_served_and_unused_one_is_wasted(lookups):
+    async def turn():
+        ctx = _context(
+            "Top products in my-project.sales.orders and my-project.hr.staff"
+        )
+        await start_speculative_prefetch(ctx)
+        await asyncio.sleep(0.1)  # the routing model call
+        served = await serve_prefetched_metadata(
+            _tool("get_table_info"),
+            {"project_id": "my-project", "dataset_id": "sales", "table_id": "orders"},
+            ctx,
+        )
+        other = await serve_prefetched_metadata(
+            _tool("get_table_info"),
+            {"project_id": "my-project", "dataset_id": "sales", "table_id": "items"},
+            ctx,
+        )
+        finish_speculative_prefetch(ctx)
+        return served, other
+
+    before = prefetch_stats()
+    served, other = asyncio.run(turn())
+    after = prefetch_stats()
+
+    assert served["tableReference"]["tableId"] == "orders"
+    assert other is None
+    assert len(lookups.calls) == 2
+    assert after["lookups_used"] - before["lookups_used"] == 1
+    assert after["lookups_wasted"] - before["lookups_wasted"] == 1
+    assert after["seconds_saved"] > before["seconds_saved"]
+
+
+def test_failed_lookup_falls_through_to_the_tool(monkeypatch):
+    monkeypatch.setattr(prefetch, "_lookup", _Lookups(fail=("missing",)))
+
+    async def turn():
+        ctx = _context("Describe my-project.sales.missing", invocation_id="inv-2")
+        await start_speculative_prefetch(ctx)
+        result = await serve_prefetched_metadata(
+            _tool("get_table_info"),
+            {"project_id": "my-project", "dataset_id": "sales", "table_id": "missing"},
+            ctx,
+        )
+        finish_speculative_prefetch(ctx)
+        return result
+
+    assert asyncio.run(turn()) is None
+
+
+def test_list_table_ids_and_history_tables_are_prefetched(lookups):
+    state = {SCHEMA_CACHE_KEY: {"my-project.sales.orders": {}}}
+
+    async def turn():
+        ctx = _context("List my-project.sales", invocation_id="inv-3", state=state)
+        await start_speculative_prefetch(ctx)
+        tables = await serve_prefetched_metadata(
+            _tool("list_table_ids"),
+            {"project_id": "my-project", "dataset_id": "sales"},
+            ctx,
+        )
+        finish_speculative_prefetch(ctx)
+        return tables
+
+    assert asyncio.run(turn()) == ["orders", "returns"]
+    assert ("get_table_info", "my-project", "sales", "orders") in lookups.calls
+
+
+def test_memory_is_searched_once_per_turn(lookups):
+    async def turn():
+        ctx = _context("How did churn change?", invocation_id="inv-4")
+        await start_speculative_prefetch(ctx)
+        tool = SpeculativePreloadMemoryTool()
+        requests = [LlmRequest(), LlmRequest()]
+        for request in requests:
+            tool_ctx = _context("How did churn change?", invocation_id="inv-4")
+            await tool.process_llm_request(tool_context=tool_ctx, llm_request=request)
+            assert tool_ctx.searches == []
+        finish_speculative_prefetch(ctx)
+        return ctx, requests
+
+    ctx, requests = asyncio.run(turn())
+    assert ctx.searches == ["How did churn change?"]
+    for request in requests:
+        assert "user: memory for How did churn change?" in (
+            request.config.system_instruction
+        )
+
+
+def test_unused_lookups_are_cancelled_at_turn_end(monkeypatch):
+    monkeypatch.setattr(prefetch, "_lookup", _Lookups(delay=0.5))
+
+    async def turn():
+        ctx = _context("Describe my-project.sales.orders", invocation_id="inv-5")
+        await start_speculative_prefetch(ctx)
+        task = next(iter(prefetch._turns["inv-5"].lookups.values()))
+        finish_speculative_prefetch(ctx)
+        await asyncio.sleep(0)
+        return task
+
+    assert asyncio.run(turn()).cancelled()
+    assert "inv-5" not in prefetch._turns
+
+
+def test_disabled_prefetch_starts_nothing(lookups, monkeypatch):
+    monkeypatch.setattr(prefetch, "_ENABLED", False)
+    ctx = _context("Describe my-project.sales.orders", invocation_id="inv-6")
+    asyncio.run(start_speculative_prefetch(ctx))
+    assert lookups.calls == []
+    assert ctx.searches == []
@@ -134,6 +134,11 @@ def test_bqml_instructions_reference_rag_for_syntax(bqml_instructions):
     )
 
 
+def test_bqml_instructions_explain_rag_chunks(bqml_instructions):
+    assert "chunks" in bqml_instructions
+    assert "source_uri" in bqml_instructions
+
+
 def test_bqml_instructions_warn_about_long_run_times(bqml_instructions):
     lowered = bqml_instructions.lower()
     assert "time" in lowered and (
@@ -141,6 +146,11 @@ def test_bqml_instructions_warn_about_long_run_times(bqml_instructions):
     )
 
 
+def test_bqml_instructions_submit_training_as_background_job(bqml_instructions):
+    assert "submit_bqml_job" in bqml_instructions
+    assert "get_bqml_job_status" in bqml_instructions
+
+
 # ---------------------------------------------------------------------------
 # DS agent prompt
 # ---------------------------------------------------------------------------
@@ -203,6 +213,14 @@ def test_ds_instructions_do_not_reference_parent_agent_data(ds_instructions):
 # ---------------------------------------------------------------------------
 
 
+def test_all_data_agents_explain_offloaded_outputs(
+    root_instructions, bqml_instructions, ds_instructions
+):
+    for instructions in (root_instructions, bqml_instructions, ds_instructions):
+        assert "output_offloaded" in instructions
+        assert "read_tool_output" in instructions
+
+
 @pytest.fixture(scope="module")
 def research_instructions():
     from bq_multi_agent_app.sub_agents.research_agents.prompts import (
@@ -244,3 +262,38 @@ def test_research_instructions_contain_response_format(research_instructions):
     assert (
         "Summary" in research_instructions or "Response Format" in research_instructions
     )
+
+
+# ---------------------------------------------------------------------------
+# Research comparison agent prompt
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def research_compare_instructions():
+    from bq_multi_agent_app.sub_agents.research_agents.prompts import (
+        return_instructions_research_compare,
+    )
+
+    return return_instructions_research_compare()
+
+
+def test_research_compare_instructions_call_research_platforms_once(
+    research_compare_instructions,
+):
+    assert "`research_platforms` ONCE" in research_compare_instructions
+
+
+def test_research_compare_instructions_require_citations(research_compare_instructions):
+    assert "citations" in research_compare_instructions
+    assert "NEVER** fabricate" in research_compare_instructions
+
+
+def test_root_instructions_route_comparisons_to_compare_agent(root_instructions):
+    assert "research_compare_agent" in root_instructions
+
+
+def test_root_instructions_contain_compound_path(root_instructions):
+    assert "COMPOUND PATH" in root_instructions
+    assert "plan_compound_request" in root_instructions
+    assert "compound_agent" in root_instructions
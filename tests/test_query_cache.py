@@ -0,0 +1,207 @@
+"""
+Tests for the per-user query result cache in query_cache.py.
+
+Covers cacheability rules, SQL normalisation, LRU/size bounds, and
+single-flight hand-off. No external API calls are made.
+"""
+
+import asyncio
+
+import pytest
+
+from bq_multi_agent_app.query_cache import (
+    QueryResultCache,
+    cache_key,
+    cacheable_tables,
+    normalize_sql,
+)
+
+# ---------------------------------------------------------------------------
+# cacheable_tables / normalize_sql
+# ---------------------------------------------------------------------------
+
+
+def test_select_over_tables_is_cacheable():
+    sql = "SELECT a FROM sales.orders JOIN `p.sales.regions` USING (r)"
+    assert cacheable_tables(sql, default_project="p") == [
+        "p.sales.orders",
+        "p.sales.regions",
+    ]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT a FROM p.d.t WHERE day = CURRENT_DATE()",
+        "SELECT RAND() FROM p.d.t",
+        "INSERT INTO p.d.t SELECT * FROM p.d.s",
+        "CREATE MODEL p.d.m AS SELECT * FROM p.d.t",
+        "SELECT 1; SELECT a FROM p.d.t",
+        "SELECT 1",
+    ],
+)
+def test_nondeterministic_or_write_queries_are_not_cacheable(sql):
+    assert cacheable_tables(sql) is None
+
+
+def test_normalize_sql_ignores_whitespace_and_comments_not_literals():
+    a = normalize_sql("SELECT a  -- note\nFROM t WHERE s = 'x  y'")
+    b = normalize_sql("SELECT a FROM t\n  WHERE s = 'x  y'")
+    assert a == b
+    assert normalize_sql("SELECT 'x y'") != normalize_sql("SELECT 'x  y'")
+
+
+def test_cache_key_depends_on_table_versions():
+    assert cache_key("u", "SELECT 1", {"t": 1}) != cache_key("u", "SELECT 1", {"t": 2})
+
+
+# ---------------------------------------------------------------------------
+# QueryResultCache
+# ---------------------------------------------------------------------------
+
+
+def test_completed_result_is_served_as_copy():
+    cache = QueryResultCache()
+    flight, is_runner = cache.claim_flight("k")
+    assert is_runner
+    cache.complete("k", {"status": "SUCCESS", "rows": [1]}, flight)
+
+    result, age = cache.get("k")
+    result["rows"].append(2)
+    assert cache.get("k")[0]["rows"] == [1]
+    assert age >= 0
+
+
+def test_errors_are_not_cached_or_shared():
+    cache = QueryResultCache()
+    flight, _ = cache.claim_flight("k")
+    waiting, _ = cache.claim_flight("k")
+    cache.complete("k", {"status": "ERROR", "error_details": "boom"}, flight)
+    assert cache.get("k") is None
+    assert waiting.result(timeout=1) is None  # waiters run the call themselves
+
+
+def test_concurrent_claim_returns_runner_flight():
+    cache = QueryResultCache()
+    runner, is_runner = cache.claim_flight("k")
+    flight, waits = cache.claim_flight("k")
+    assert is_runner and not waits
+    assert flight is runner
+
+    cache.complete("k", {"status": "SUCCESS"}, runner)
+    assert flight.result(timeout=1) == {"status": "SUCCESS"}
+    assert cache.stats()["coalesced"] == 1
+
+
+def test_abandon_releases_waiters_without_result():
+    cache = QueryResultCache()
+    runner, _ = cache.claim_flight("k")
+    flight, _ = cache.claim_flight("k")
+    cache.abandon("k", runner)
+    assert flight.result(timeout=1) is None
+    assert cache.claim_flight("k")[1]  # next caller runs the tool
+
+
+def test_stale_flight_is_replaced_and_released():
+    cache = QueryResultCache(flight_seconds=0)
+    stale, is_runner = cache.claim_flight("k")
+    assert is_runner
+    assert cache.claim_flight("k")[1]  # expired: the next caller runs the tool
+    assert stale.result(timeout=0) is None
+    assert cache.stats()["stale_flights"] == 1
+
+
+def test_late_runner_does_not_release_its_replacement():
+    cache = QueryResultCache(flight_seconds=0)
+    old, _ = cache.claim_flight("k")
+    new, _ = cache.claim_flight("k")
+    cache.abandon("k", old)
+    assert not new.done()
+    cache.complete("k", {"status": "SUCCESS"}, new)
+    assert new.result(timeout=0) == {"status": "SUCCESS"}
+
+
+def test_wait_timeout_releases_the_flight():
+    cache = QueryResultCache(flight_seconds=0.01)
+    flight, _ = cache.claim_flight("k")
+    assert asyncio.run(cache.wait("k", flight)) is None
+    assert cache.claim_flight("k")[1]
+
+
+def test_run_once_shares_one_run_between_identical_calls():
+    cache = QueryResultCache()
+    runs = []
+
+    async def run():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"status": "SUCCESS", "rows": [1]}
+
+    async def scenario():
+        return await asyncio.gather(*(cache.run_once("k", run) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert [coalesced for _, coalesced in results] == [False, True, True]
+    assert all(result == {"status": "SUCCESS", "rows": [1]} for result, _ in results)
+
+
+def test_run_once_releases_the_flight_when_cancelled():
+    cache = QueryResultCache()
+
+    async def hang():
+        await asyncio.Event().wait()
+
+    async def scenario():
+        runner = asyncio.create_task(cache.run_once("k", hang))
+        await asyncio.sleep(0.01)
+        runner.cancel()
+        await asyncio.sleep(0.01)
+        return cache.claim_flight("k")[1]
+
+    assert asyncio.run(scenario())
+
+
+def test_run_once_does_not_share_errors():
+    cache = QueryResultCache()
+    runs = []
+
+    async def fail():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"status": "ERROR", "error_details": "boom"}
+
+    async def scenario():
+        return await asyncio.gather(
+            cache.run_once("k", fail), cache.run_once("k", fail)
+        )
+
+    results = asyncio.run(scenario())
+    assert len(runs) == 2
+    assert not any(coalesced for _, coalesced in results)
+    assert cache.get("k") is None
+
+
+def test_cache_evicts_least_recently_used_by_size():
+    cache = QueryResultCache(max_bytes=150)
+    for key in ("a", "b", "c"):
+        flight, _ = cache.claim_flight(key)
+        cache.complete(key, {"status": "SUCCESS", "rows": ["x" * 40]}, flight)
+        if key == "b":
+            cache.get("a")  # a is now most recently used
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_oversized_and_expired_results_are_not_served():
+    cache = QueryResultCache(max_entry_bytes=10)
+    flight, _ = cache.claim_flight("big")
+    cache.complete("big", {"status": "SUCCESS", "rows": ["x" * 40]}, flight)
+    assert cache.get("big") is None
+
+    cache = QueryResultCache(ttl_seconds=0)
+    flight, _ = cache.claim_flight("k")
+    cache.complete("k", {"status": "SUCCESS"}, flight)
+    assert cache.get("k") is None
@@ -0,0 +1,110 @@
+"""
+Tests for the Research AIDA answer cache in research_agents/cache.py.
+
+Model responses are plain namespaces shaped like ADK's LlmResponse, so no
+model or search calls are made.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app.sub_agents.research_agents import cache
+from bq_multi_agent_app.sub_agents.research_agents.cache import (
+    ResearchAnswerCache,
+    question_terms,
+    serve_cached_answer,
+    store_grounded_answer,
+)
+
+_CITATIONS = [{"title": "BigQuery pricing", "uri": "https://cloud.google.com/x"}]
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    research_cache = ResearchAnswerCache(ttl_seconds=3600, threshold=0.85)
+    monkeypatch.setattr(cache, "research_cache", research_cache)
+    return research_cache
+
+
+def _context(question):
+    return SimpleNamespace(
+        state={},
+        user_content=SimpleNamespace(parts=[SimpleNamespace(text=question)]),
+    )
+
+
+def _grounded_response(text):
+    chunk = SimpleNamespace(web=SimpleNamespace(title="Pricing", uri="https://x.y"))
+    return SimpleNamespace(
+        partial=False,
+        error_code=None,
+        content=SimpleNamespace(
+            parts=[SimpleNamespace(text=text, thought=None, function_call=None)]
+        ),
+        grounding_metadata=SimpleNamespace(
+            grounding_chunks=[chunk],
+            model_dump=lambda **kwargs: {"grounding_chunks": []},
+        ),
+    )
+
+
+def test_rephrased_comparison_hits():
+    research_cache = ResearchAnswerCache(ttl_seconds=3600, threshold=0.85)
+    research_cache.store("Snowflake vs BigQuery pricing", "answer", _CITATIONS)
+
+    hit = research_cache.lookup("How does BigQuery pricing compare with Snowflake?")
+    assert hit is not None
+    assert hit[0]["citations"] == _CITATIONS
+    assert research_cache.lookup("Redshift vs BigQuery pricing") is None
+    assert research_cache.stats()["hit_rate"] == 0.5
+
+
+def test_plurals_and_case_are_normalised():
+    assert question_terms("What are the BigQuery Editions?") == question_terms(
+        "bigquery edition"
+    )
+
+
+def test_entries_expire_and_fresh_questions_expire_sooner(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    research_cache = ResearchAnswerCache(ttl_seconds=86400, fresh_ttl_seconds=3600)
+    research_cache.store("BigQuery editions slot autoscaling", "a", _CITATIONS)
+    research_cache.store("latest BigQuery announcements this week", "b", _CITATIONS)
+
+    now[0] += 7200
+    assert research_cache.lookup("BigQuery editions slot autoscaling") is not None
+    assert research_cache.lookup("latest BigQuery announcements this week") is None
+
+    now[0] += 86400
+    assert research_cache.lookup("BigQuery editions slot autoscaling") is None
+
+
+def test_ungrounded_and_short_questions_are_not_stored():
+    research_cache = ResearchAnswerCache(ttl_seconds=3600)
+    assert not research_cache.store("Snowflake vs BigQuery pricing", "a", [])
+    assert not research_cache.store("and Databricks?", "a", _CITATIONS)
+
+
+def test_miss_then_store_then_serve(fresh_cache):
+    question = "Compare Snowflake and BigQuery storage pricing"
+    miss_context = _context(question)
+    assert serve_cached_answer(miss_context, None) is None
+
+    store_grounded_answer(miss_context, _grounded_response("**Summary**: ..."))
+    assert fresh_cache.stats()["stores"] == 1
+
+    response = serve_cached_answer(_context(question), None)
+    assert response.content.parts[0].text.startswith("**Summary**: ...")
+    assert fresh_cache.stats()["hits"] == 1
+
+
+def test_function_call_responses_are_not_stored(fresh_cache):
+    context = _context("Compare Snowflake and BigQuery storage pricing")
+    serve_cached_answer(context, None)
+    response = _grounded_response("")
+    response.content.parts[0].function_call = SimpleNamespace(name="transfer")
+
+    store_grounded_answer(context, response)
+    assert fresh_cache.stats()["stores"] == 0
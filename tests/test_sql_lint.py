@@ -0,0 +1,226 @@
+"""
+Tests for the local SQL linter in sql_lint.py.
+
+Each rule is exercised against cached table metadata in the same shape that
+callbacks.compact_table_info produces. No external API calls are made.
+"""
+
+import pytest
+
+from bq_multi_agent_app.sql_lint import (
+    created_models,
+    lint_sql,
+    qualified_path,
+    referenced_tables,
+)
+
+
+@pytest.fixture()
+def schemas():
+    return {
+        "proj.sales.wide": {
+            "columns": {f"col_{i}": "STRING" for i in range(30)},
+            "num_rows": 1_000_000,
+            "num_bytes": 5 * 1024**3,
+        },
+        "proj.sales.orders": {
+            "columns": {"order_date": "DATE", "amount": "FLOAT"},
+            "partition_type": "DAY",
+            "partition_field": "order_date",
+            "num_rows": 10_000_000,
+        },
+        "proj.sales.events": {
+            "columns": {"event": "STRING"},
+            "partition_type": "DAY",
+            "partition_field": None,
+            "require_partition_filter": True,
+            "num_rows": 10_000_000,
+        },
+        "proj.sales.regions": {"columns": {"region": "STRING"}, "num_rows": 12},
+    }
+
+
+def _rules(findings):
+    return [f["rule"] for f in findings]
+
+
+# ---------------------------------------------------------------------------
+# select_star
+# ---------------------------------------------------------------------------
+
+
+def test_select_star_on_wide_table_is_flagged(schemas):
+    findings = lint_sql("SELECT * FROM `proj.sales.wide`", schemas)
+    assert _rules(findings) == ["select_star"]
+    assert findings[0]["table"] == "proj.sales.wide"
+    assert "col_0" in findings[0]["hint"]
+
+
+def test_select_star_resolves_default_project(schemas):
+    findings = lint_sql("SELECT * FROM sales.wide", schemas, default_project="proj")
+    assert _rules(findings) == ["select_star"]
+
+
+def test_select_star_except_and_count_star_are_not_flagged(schemas):
+    assert lint_sql("SELECT * EXCEPT (col_1) FROM proj.sales.wide", schemas) == []
+    assert lint_sql("SELECT COUNT(*) FROM proj.sales.wide", schemas) == []
+
+
+def test_select_star_in_create_model_is_not_flagged(schemas):
+    sql = (
+        "CREATE MODEL sales.m OPTIONS (model_type='linear_reg') "
+        "AS SELECT * FROM proj.sales.wide"
+    )
+    assert lint_sql(sql, schemas) == []
+
+
+def test_qualified_star_only_checks_its_table(schemas):
+    sql = (
+        "SELECT r.*, w.col_1 FROM proj.sales.wide w "
+        "JOIN proj.sales.regions r ON w.col_2 = r.region"
+    )
+    assert lint_sql(sql, schemas) == []
+
+
+# ---------------------------------------------------------------------------
+# missing_partition_filter
+# ---------------------------------------------------------------------------
+
+
+def test_missing_partition_filter_is_flagged(schemas):
+    findings = lint_sql("SELECT SUM(amount) FROM proj.sales.orders", schemas)
+    assert _rules(findings) == ["missing_partition_filter"]
+
+
+def test_partition_filter_in_where_clause_passes(schemas):
+    sql = "SELECT SUM(amount) FROM proj.sales.orders WHERE order_date >= '2024-01-01'"
+    assert lint_sql(sql, schemas) == []
+
+
+def test_ingestion_time_partition_accepts_pseudo_column(schemas):
+    sql = "SELECT event FROM proj.sales.events WHERE _PARTITIONDATE = CURRENT_DATE()"
+    assert lint_sql(sql, schemas) == []
+
+
+def test_partition_filter_on_one_joined_table_does_not_cover_another(schemas):
+    schemas["proj.sales.returns"] = schemas["proj.sales.orders"]
+    sql = (
+        "SELECT a.amount FROM proj.sales.orders AS a "
+        "JOIN proj.sales.returns AS b ON a.order_id = b.order_id "
+        "WHERE a.order_date = '2024-01-01'"
+    )
+    findings = lint_sql(sql, schemas)
+    assert _rules(findings) == ["missing_partition_filter"]
+    assert findings[0]["table"] == "proj.sales.returns"
+
+    both = sql + " AND b.order_date = '2024-01-01'"
+    assert lint_sql(both, schemas) == []
+
+
+def test_partition_filter_through_cte_alias_passes(schemas):
+    sql = (
+        "WITH o AS (SELECT * FROM proj.sales.orders) "
+        "SELECT SUM(o.amount) FROM o WHERE o.order_date >= '2024-01-01'"
+    )
+    assert lint_sql(sql, schemas) == []
+
+
+def test_partition_filter_in_subquery_does_not_cover_outer_query(schemas):
+    sql = (
+        "SELECT amount FROM proj.sales.orders WHERE order_id IN "
+        "(SELECT order_id FROM proj.sales.orders WHERE order_date = '2024-01-01')"
+    )
+    findings = lint_sql(sql, schemas)
+    assert _rules(findings) == ["missing_partition_filter"]
+
+    outer = sql.replace(
+        "WHERE order_id", "WHERE order_date = '2024-01-01' AND order_id"
+    )
+    assert lint_sql(outer, schemas) == []
+
+
+def test_null_check_is_not_a_partition_filter(schemas):
+    sql = "SELECT amount FROM proj.sales.orders WHERE order_date IS NOT NULL"
+    assert _rules(lint_sql(sql, schemas)) == ["missing_partition_filter"]
+
+
+def test_required_partition_filter_warns_query_will_fail(schemas):
+    findings = lint_sql("SELECT event FROM proj.sales.events", schemas)
+    assert "will fail" in findings[0]["message"]
+
+
+# ---------------------------------------------------------------------------
+# cross_join
+# ---------------------------------------------------------------------------
+
+
+def test_cross_join_between_large_tables_is_flagged(schemas):
+    sql = "SELECT 1 FROM proj.sales.wide CROSS JOIN proj.sales.wide AS w2"
+    assert "cross_join" in _rules(lint_sql(sql, schemas))
+
+
+def test_comma_join_on_unknown_table_is_flagged(schemas):
+    assert _rules(lint_sql("SELECT 1 FROM a.b.c, a.b.d", {})) == ["cross_join"]
+
+
+def test_cross_join_with_small_table_or_unnest_passes(schemas):
+    assert lint_sql("SELECT 1 FROM a.b.c CROSS JOIN proj.sales.regions", schemas) == []
+    assert lint_sql("SELECT x FROM a.b.c t, UNNEST(t.items) AS x", schemas) == []
+    assert lint_sql("SELECT x FROM a.b.c t, t.items AS x", schemas) == []
+
+
+# ---------------------------------------------------------------------------
+# order_by_without_limit
+# ---------------------------------------------------------------------------
+
+
+def test_order_by_without_limit_is_flagged():
+    assert _rules(lint_sql("SELECT a FROM x.y.z ORDER BY a", {})) == [
+        "order_by_without_limit"
+    ]
+
+
+def test_order_by_with_limit_or_in_window_passes():
+    assert lint_sql("SELECT a FROM x.y.z ORDER BY a LIMIT 10", {}) == []
+    sql = "SELECT SUM(a) OVER (ORDER BY b) FROM x.y.z"
+    assert lint_sql(sql, {}) == []
+
+
+def test_order_by_inside_comment_or_string_is_ignored():
+    sql = "SELECT 'ORDER BY a' AS s FROM x.y.z -- ORDER BY a\n"
+    assert lint_sql(sql, {}) == []
+
+
+# ---------------------------------------------------------------------------
+# referenced_tables
+# ---------------------------------------------------------------------------
+
+
+def test_referenced_tables_excludes_ctes_and_unnest():
+    sql = (
+        "WITH recent AS (SELECT * FROM sales.orders) "
+        "SELECT * FROM recent JOIN `proj.sales.regions` r USING (region), "
+        "UNNEST(r.tags) AS tag"
+    )
+    assert referenced_tables(sql, default_project="proj") == [
+        "proj.sales.orders",
+        "proj.sales.regions",
+    ]
+
+
+def test_created_models_reads_create_model_statements():
+    sql = """
+    CREATE OR REPLACE MODEL `p.ml.churn` OPTIONS (model_type = 'logistic_reg') AS
+    SELECT * FROM p.sales.customers;
+    CREATE MODEL IF NOT EXISTS ml.ltv OPTIONS (model_type = 'linear_reg') AS SELECT 1;
+    SELECT * FROM ML.EVALUATE(MODEL `p.ml.churn`)
+    """
+    assert created_models(sql, "p") == ["p.ml.churn", "p.ml.ltv"]
+    assert created_models("SELECT * FROM p.ml.models") == []
+
+
+def test_qualified_path_adds_default_project_and_rejects_injection():
+    assert qualified_path("`ml.churn`", "p") == "p.ml.churn"
+    assert qualified_path("other.ml.churn", "p") == "other.ml.churn"
+    with pytest.raises(ValueError):
+        qualified_path("ml.churn`; DROP TABLE x", "p")
@@ -0,0 +1,126 @@
+"""
+Tests for exploratory query rewrites in sql_rewrite.py.
+
+Verifies column pruning, LIMIT injection, TABLESAMPLE on large tables, and
+the estimated bytes report, plus approximate-mode rewrites of aggregate
+queries. No external API calls are made.
+"""
+
+import pytest
+
+from bq_multi_agent_app.sql_rewrite import approximate_query, rewrite_exploratory_query
+
+
+@pytest.fixture()
+def schemas():
+    wide_columns = {f"col_{i}": "STRING" for i in range(25)}
+    wide_columns["payload"] = "JSON"
+    wide_columns["amount"] = "FLOAT64"
+    return {
+        "proj.sales.wide": {
+            "columns": wide_columns,
+            "num_bytes": 50 * 1024**3,
+            "table_type": "TABLE",
+        },
+        "proj.sales.narrow": {
+            "columns": {"id": "INT64", "name": "STRING"},
+            "num_bytes": 1_000_000,
+            "table_type": "TABLE",
+        },
+    }
+
+
+def test_wide_preview_is_pruned_limited_and_sampled(schemas):
+    report = rewrite_exploratory_query("SELECT * FROM `proj.sales.wide`", schemas)
+
+    assert report["query"].startswith("SELECT `col_0`, `col_1`")
+    assert "TABLESAMPLE SYSTEM" in report["query"]
+    assert report["query"].endswith("LIMIT 50")
+    assert len(report["columns_kept"]) == 12
+    assert "payload" in report["columns_omitted"]
+    assert report["estimated_bytes_saved"] > 0
+    assert (
+        report["estimated_bytes_before"] - report["estimated_bytes_after"]
+        == report["estimated_bytes_saved"]
+    )
+
+
+def test_referenced_columns_are_kept_and_filtered_queries_not_sampled(schemas):
+    sql = "SELECT * FROM sales.wide WHERE amount > 10 ORDER BY amount"
+    report = rewrite_exploratory_query(sql, schemas, default_project="proj")
+
+    assert "amount" in report["columns_kept"]
+    assert "TABLESAMPLE" not in report["query"]
+    assert report["sample_percent"] is None
+
+
+def test_limit_is_inserted_before_trailing_comment(schemas):
+    report = rewrite_exploratory_query(
+        "SELECT * FROM proj.sales.narrow -- preview\n", schemas
+    )
+    assert report["query"] == "SELECT * FROM proj.sales.narrow\nLIMIT 50 -- preview\n"
+    assert report["columns_omitted"] == []
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM proj.sales.narrow LIMIT 5",  # nothing to change
+        "SELECT id FROM proj.sales.narrow",  # not SELECT *
+        "SELECT * FROM proj.sales.wide w JOIN proj.sales.narrow n ON w.col_1 = n.name",
+        "SELECT * FROM (SELECT * FROM proj.sales.wide)",
+        "SELECT * FROM proj.sales.unknown",  # no cached schema
+        "SELECT 1; SELECT * FROM proj.sales.wide",
+    ],
+)
+def test_non_preview_queries_are_left_alone(schemas, sql):
+    assert rewrite_exploratory_query(sql, schemas) is None
+
+
+# ---------------------------------------------------------------------------
+# approximate_query
+# ---------------------------------------------------------------------------
+
+
+def test_large_aggregate_is_sampled_and_scaled(schemas):
+    report = approximate_query(
+        "SELECT col_1, COUNT(*) AS n, SUM(amount) AS total, AVG(amount) AS avg "
+        "FROM sales.wide GROUP BY col_1 HAVING COUNT(*) > 100",
+        schemas,
+        default_project="proj",
+    )
+
+    assert report["sample_percent"] == 2
+    assert report["scale_factor"] == 50
+    assert report["query"] == (
+        "SELECT col_1, ROUND(COUNT(*) * 50) AS n, (SUM(amount) * 50) AS total, "
+        "AVG(amount) AS avg, COUNT(*) AS _sampled_rows "
+        "FROM sales.wide TABLESAMPLE SYSTEM (2 PERCENT) "
+        "GROUP BY col_1 HAVING ROUND(COUNT(*) * 50) > 100"
+    )
+
+
+def test_distinct_counts_use_sketches_without_sampling(schemas):
+    report = approximate_query(
+        "SELECT COUNT(DISTINCT col_1) AS users FROM proj.sales.wide", schemas
+    )
+
+    assert report["query"] == (
+        "SELECT APPROX_COUNT_DISTINCT(col_1) AS users FROM proj.sales.wide"
+    )
+    assert report["sample_percent"] is None
+    assert report["error_notes"]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM proj.sales.wide",  # not an aggregate
+        "SELECT MAX(amount) FROM proj.sales.wide",  # extremes are not sampled
+        "SELECT COUNT(*) FROM proj.sales.narrow",  # small table
+        "SELECT SUM(amount) OVER () FROM proj.sales.wide",
+        "SELECT COUNT(*) FROM proj.sales.wide TABLESAMPLE SYSTEM (5 PERCENT)",
+    ],
+)
+def test_exact_or_unsuitable_queries_are_left_alone(schemas, sql):
+    assert approximate_query(sql, schemas) is None
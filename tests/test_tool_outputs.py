@@ -0,0 +1,132 @@
+"""
+Tests for the tool output-size guard in tool_outputs.py.
+
+An in-memory artifact context stands in for the ADK artifact service.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from bq_multi_agent_app.tool_outputs import (
+    offload_large_output,
+    read_tool_output,
+    summarize_output,
+)
+
+
+class _ArtifactContext:
+    def __init__(self, available=True):
+        self.artifacts = {}
+        self.available = available
+        self.function_call_id = "adk-1234-abcd"
+
+    async def save_artifact(self, filename, artifact):
+        if not self.available:
+            raise ValueError("Artifact service is not initialized.")
+        self.artifacts[filename] = artifact
+        return 0
+
+    async def load_artifact(self, filename, version=None):
+        return self.artifacts.get(filename)
+
+
+def _tool(name):
+    return SimpleNamespace(name=name)
+
+
+def _sql_result(rows=2000):
+    return {
+        "status": "SUCCESS",
+        "rows": [{"order_id": i, "region": f"region_{i % 7}"} for i in range(rows)],
+    }
+
+
+def _offload(response, ctx, tool="execute_sql"):
+    return asyncio.run(offload_large_output(_tool(tool), {}, ctx, response))
+
+
+def test_small_results_pass_through():
+    ctx = _ArtifactContext()
+    assert _offload(_sql_result(rows=10), ctx) is None
+    assert ctx.artifacts == {}
+
+
+def test_large_result_is_stored_and_summarized():
+    ctx = _ArtifactContext()
+    result = _offload(_sql_result(), ctx)
+
+    handle = result["output_artifact"]
+    assert handle == "tool_output_execute_sql_adk1234abcd.json"
+    assert json.loads(ctx.artifacts[handle].inline_data.data) == _sql_result()
+    assert result["status"] == "SUCCESS"
+    rows = result["summary"]["rows"]
+    assert rows["total_items"] == 2000
+    assert rows["columns"] == ["order_id", "region"]
+    assert len(rows["preview"]) == 5
+    assert len(json.dumps(result)) < 2000
+
+
+def test_wide_table_info_keeps_column_types():
+    table_info = {
+        "tableReference": {"projectId": "p", "datasetId": "d", "tableId": "wide"},
+        "schema": {
+            "fields": [
+                {"name": f"col_{i}", "type": "STRING", "description": "x" * 100}
+                for i in range(300)
+            ]
+        },
+    }
+    summary = summarize_output(table_info)
+    assert summary["table"] == "p.d.wide"
+    assert summary["columns"]["col_299"] == "STRING"
+
+
+def test_long_text_result_is_offloaded():
+    ctx = _ArtifactContext()
+    result = _offload(
+        "contexts { text: 'CREATE MODEL ...' }" * 2000, ctx, "rag_response"
+    )
+
+    assert result["summary"]["total_chars"] > 20000
+    assert result["output_artifact"].startswith("tool_output_rag_response_")
+
+
+def test_without_artifact_service_summary_is_still_returned():
+    ctx = _ArtifactContext(available=False)
+    result = _offload(_sql_result(), ctx)
+
+    assert "output_artifact" not in result
+    assert "could not be stored" in result["output_offloaded"]["note"]
+    assert result["summary"]["rows"]["total_items"] == 2000
+
+
+def test_read_tool_output_pages_through_rows():
+    ctx = _ArtifactContext()
+    handle = _offload(_sql_result(), ctx)["output_artifact"]
+
+    page = asyncio.run(read_tool_output(handle, ctx, path="rows", offset=100, limit=20))
+    assert page["total_items"] == 2000
+    assert page["items"][0] == {"order_id": 100, "region": "region_2"}
+    assert len(page["items"]) == 20
+    assert page["next_offset"] == 120
+
+    row = asyncio.run(read_tool_output(handle, ctx, path="rows.7.region"))
+    assert row["value"] == "region_0"
+
+
+def test_read_tool_output_bounds_slices_and_reports_errors():
+    ctx = _ArtifactContext()
+    handle = _offload(_sql_result(), ctx)["output_artifact"]
+
+    page = asyncio.run(read_tool_output(handle, ctx, path="rows", limit=5000))
+    assert len(json.dumps(page["items"])) <= 10000
+    assert page["next_offset"] == len(page["items"])
+
+    assert asyncio.run(read_tool_output("missing.json", ctx))["status"] == "ERROR"
+    assert asyncio.run(read_tool_output(handle, ctx, path="cols"))["status"] == "ERROR"
+
+
+def test_read_tool_output_results_are_never_offloaded():
+    ctx = _ArtifactContext()
+    assert _offload(_sql_result(), ctx, tool="read_tool_output") is None
@@ -111,3 +111,28 @@ def test_bqml_toolset_uses_external_access_token_key():
     assert creds.external_access_token_key, (
         "bqml_toolset must use external_access_token_key"
     )
+
+
+# ---------------------------------------------------------------------------
+# Shared client pool — installed when the toolsets are imported
+# ---------------------------------------------------------------------------
+
+
+def test_toolsets_share_pooled_bigquery_client_factory():
+    from google.adk.tools.bigquery import client as adk_bigquery_client
+
+    import bq_multi_agent_app.tools  # noqa: F401
+    from bq_multi_agent_app.bq_clients import client_pool
+
+    assert adk_bigquery_client.get_bigquery_client == client_pool.get
+
+
+def test_ca_api_tools_share_http_session():
+    from google.adk.tools.bigquery import data_insights_tool
+    from google.adk.tools.data_agent import data_agent_tool
+
+    import bq_multi_agent_app.tools  # noqa: F401
+    from bq_multi_agent_app.bq_clients import http_pool
+
+    assert data_insights_tool.requests is http_pool
+    assert data_agent_tool.requests is http_pool
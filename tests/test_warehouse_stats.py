@@ -0,0 +1,172 @@
+"""
+Tests for in-warehouse statistical tests in warehouse_stats.py.
+
+Distribution functions are checked against closed forms. The aggregate path
+is checked against reference_test on the same rows, with a fake BigQuery
+client returning the aggregates BigQuery would compute. No external API
+calls are made.
+"""
+
+import asyncio
+import math
+import random
+import statistics
+from types import SimpleNamespace
+
+import pytest
+
+from bq_multi_agent_app import warehouse_stats
+from bq_multi_agent_app.warehouse_stats import (
+    build_test_sql,
+    chi_square_p,
+    reference_test,
+    run_statistical_test,
+    t_two_sided_p,
+)
+
+_rng = random.Random(7)
+_VALUES = [(_rng.gauss(10, 2), "a") for _ in range(300)] + [
+    (_rng.gauss(10.4, 3), "b") for _ in range(200)
+]
+_PAIRS = [(x, 0.3 * x + _rng.gauss(0, 1)) for x, _ in _VALUES]
+_CATEGORIES = [(_rng.choice("xyz"), _rng.choice("pq")) for _ in range(400)]
+
+
+class _FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def query_and_wait(self, query, **kwargs):
+        self.calls.append((query, kwargs))
+        return self.rows
+
+
+def _run(monkeypatch, rows, test, **kwargs):
+    fake = _FakeClient(rows)
+    monkeypatch.setattr(warehouse_stats, "client_for", lambda *a, **k: fake)
+    result = asyncio.run(
+        run_statistical_test(
+            "p", test, tool_context=SimpleNamespace(state={}), **kwargs
+        )
+    )
+    return result, fake
+
+
+@pytest.mark.parametrize(
+    ("p_value", "expected"),
+    [
+        (t_two_sided_p(1.0, 1), 0.5),
+        (t_two_sided_p(2.0, 2), 1 - 2 / math.sqrt(6)),
+        (chi_square_p(3.841458820694124, 1), 0.05),
+        (chi_square_p(7.3, 2), math.exp(-3.65)),
+    ],
+)
+def test_p_values_match_closed_forms(p_value, expected):
+    assert p_value == pytest.approx(expected, rel=1e-12)
+
+
+def test_t_test_from_aggregates_matches_reference(monkeypatch):
+    rows = []
+    for group in ("a", "b"):
+        values = [v for v, g in _VALUES if g == group]
+        rows.append(
+            {
+                "level": group,
+                "n": len(values),
+                "mean": statistics.fmean(values),
+                "var": statistics.variance(values),
+            }
+        )
+    result, _ = _run(
+        monkeypatch, rows, "t_test", column="spend", other_column="arm", table="d.t"
+    )
+    expected = reference_test("t_test", _VALUES)
+
+    for key in ("statistic", "df", "p_value", "cohens_d"):
+        assert result[key] == pytest.approx(expected[key], rel=1e-9)
+    assert result["groups"]["b"]["n"] == 200
+
+
+def test_chi_square_from_counts_matches_reference(monkeypatch):
+    counts = {}
+    for pair in _CATEGORIES:
+        counts[pair] = counts.get(pair, 0) + 1
+    rows = [{"row_level": a, "column_level": b, "n": n} for (a, b), n in counts.items()]
+    result, _ = _run(
+        monkeypatch,
+        rows,
+        "chi_square",
+        column="country",
+        other_column="churned",
+        table="d.t",
+    )
+    expected = reference_test("chi_square", _CATEGORIES)
+
+    assert result["df"] == 2
+    for key in ("statistic", "p_value", "cramers_v"):
+        assert result[key] == pytest.approx(expected[key], rel=1e-9)
+
+
+def test_correlation_from_corr_matches_reference(monkeypatch):
+    xs, ys = zip(*_PAIRS, strict=True)
+    rows = [{"n": len(xs), "r": statistics.correlation(xs, ys)}]
+    result, _ = _run(
+        monkeypatch, rows, "correlation", column="x", other_column="y", table="d.t"
+    )
+    expected = reference_test("correlation", _PAIRS)
+
+    for key in ("r", "statistic", "p_value"):
+        assert result[key] == pytest.approx(expected[key], rel=1e-9)
+
+
+def test_t_test_groups_are_bound_as_query_parameter(monkeypatch):
+    result, fake = _run(
+        monkeypatch,
+        [{"level": "a", "n": 5, "mean": 1.0, "var": 1.0}],
+        "t_test",
+        column="spend",
+        other_column="arm",
+        query="SELECT * FROM d.t WHERE country = 'DE'",
+        groups=["a", "b'; DROP TABLE x"],
+    )
+    sql, kwargs = fake.calls[0]
+    assert "IN UNNEST(@groups)" in sql
+    assert "DROP" not in sql
+    assert kwargs["job_config"].query_parameters[0].values == ["a", "b'; DROP TABLE x"]
+    # Only one group matched, so the test cannot run.
+    assert result["status"] == "ERROR"
+
+
+def test_query_with_trailing_comment_keeps_its_closing_paren(monkeypatch):
+    _, fake = _run(
+        monkeypatch,
+        [],
+        "histogram",
+        column="price",
+        query="SELECT price FROM d.t;  -- list prices only",
+    )
+    sql, _ = fake.calls[0]
+    assert "(SELECT price FROM d.t)" in sql
+    assert "--" not in sql
+
+
+def test_histogram_sql_buckets_in_bigquery():
+    sql = build_test_sql("histogram", "`p.d.t`", "price", bins=10)
+    assert "FLOOR(SAFE_DIVIDE(v - lo, hi - lo) * 10)" in sql
+    assert "APPROX_QUANTILES(v, 4)" in sql
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"test": "anova", "column": "x", "table": "d.t"},
+        {"test": "t_test", "column": "x", "table": "d.t"},
+        {"test": "histogram", "column": "x; DROP", "table": "d.t"},
+        {"test": "histogram", "column": "x", "query": "DELETE FROM d.t WHERE TRUE"},
+    ],
+)
+def test_invalid_arguments_run_no_query(monkeypatch, kwargs):
+    result, fake = _run(monkeypatch, [], **kwargs)
+    assert result["status"] == "ERROR"
+    assert fake.calls == []